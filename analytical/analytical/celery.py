@@ -6,6 +6,7 @@ This module configures Celery for asynchronous task processing.
 
 import os
 from celery import Celery
+from celery.signals import before_task_publish, task_prerun, task_postrun
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'analytical.settings')
@@ -139,6 +140,22 @@ app.conf.beat_schedule = {
         'task': 'analytics.tasks.maintenance_tasks.monitor_system_resources',
         'schedule': 300.0,  # Run every 5 minutes
     },
+    'flush-audit-queue': {
+        'task': 'analytics.tasks.maintenance_tasks.flush_audit_queue',
+        'schedule': 30.0,  # Run every 30 seconds
+    },
+    'fold-rag-usage-counters': {
+        'task': 'analytics.tasks.maintenance_tasks.fold_rag_usage_counters',
+        'schedule': 60.0,  # Run every minute
+    },
+    'cleanup-model-artifacts': {
+        'task': 'analytics.tasks.maintenance_tasks.cleanup_model_artifacts',
+        'schedule': 86400.0,  # Run daily
+    },
+    'report-query-instrumentation': {
+        'task': 'analytics.tasks.maintenance_tasks.report_query_instrumentation',
+        'schedule': 900.0,  # Run every 15 minutes
+    },
     'health-check': {
         'task': 'analytics.tasks.maintenance_tasks.health_check',
         'schedule': 60.0,  # Run every minute
@@ -149,3 +166,54 @@ app.conf.beat_schedule = {
 def debug_task(self):
     """Debug task to test Celery configuration."""
     print(f'Request: {self.request!r}')
+
+
+# Logging context propagation: tasks log with the correlation id of the
+# request that queued them, or their own task id otherwise
+_task_logging_tokens = {}
+
+
+@before_task_publish.connect
+def add_logging_context_header(headers=None, **kwargs):
+    """Attach the current correlation id to outgoing task messages."""
+    from analytics.services.logging_service import get_logging_context
+    correlation_id = get_logging_context().get('correlation_id')
+    if headers is not None and correlation_id:
+        headers['log_correlation_id'] = correlation_id
+
+
+@task_prerun.connect
+def set_task_logging_context(task_id=None, task=None, **kwargs):
+    """Scope a logging context to the running task."""
+    from analytics.services.logging_service import set_logging_context
+    correlation_id = getattr(task.request, 'log_correlation_id', None) if task else None
+    _task_logging_tokens[task_id] = set_logging_context(correlation_id=correlation_id or task_id, request_id=task_id)
+
+
+@task_postrun.connect
+def reset_task_logging_context(task_id=None, **kwargs):
+    """Drop the task's logging context."""
+    from analytics.services.logging_service import reset_logging_context
+    token = _task_logging_tokens.pop(task_id, None)
+    if token is not None:
+        reset_logging_context(token)
+
+
+# Query instrumentation: count each task's queries and flag N+1 patterns
+_task_query_tokens = {}
+
+
+@task_prerun.connect
+def start_task_query_tracking(task_id=None, task=None, **kwargs):
+    """Start counting the task's database queries."""
+    from analytics.services.query_instrumentation import query_instrumentation
+    _task_query_tokens[task_id] = query_instrumentation.start(task.name if task else 'celery.task')
+
+
+@task_postrun.connect
+def stop_task_query_tracking(task_id=None, **kwargs):
+    """Record the task's query count, database time and duplicates."""
+    from analytics.services.query_instrumentation import query_instrumentation
+    token = _task_query_tokens.pop(task_id, None)
+    if token is not None:
+        query_instrumentation.stop(token)
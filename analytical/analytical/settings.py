@@ -69,18 +69,26 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Static file serving
     'corsheaders.middleware.CorsMiddleware',  # CORS support
-    'analytics.middleware.security_middleware.SecurityMiddleware',  # T012 - Security middleware
-    'analytics.middleware.security_middleware.AuditMiddleware',  # T012 - Audit logging
-    'analytics.middleware.security_middleware.PerformanceMiddleware',  # T012 - Performance monitoring
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Security, rate limiting, validation, timing, audit and error handling in one pass
+    'analytics.middleware.request_pipeline.RequestPipelineMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'analytics.middleware.security_middleware.ErrorHandlingMiddleware',  # T012 - Error handling
 ]
 
+# Request pipeline stages, in request order (response hooks run in reverse).
+# The defaults match the previous middleware. Opt-in stages: 'endpoint_rate_limit'
+# (RateLimitingMiddleware limits), 'validation' (InputValidationMiddleware checks)
+# and 'audit_trail' (AuditTrail rows for significant actions).
+# Note: the default 'rate_limit' stage still uses SecurityMiddleware.check_rate_limit,
+# whose read-then-increment counter can over-admit under concurrent requests. The
+# atomic per-endpoint limiter only runs when 'endpoint_rate_limit' is enabled.
+REQUEST_PIPELINE_STAGES = ['queries', 'security', 'rate_limit', 'timing', 'audit']
+SLOW_REQUEST_THRESHOLD = 1.0  # Seconds; slower requests are logged as warnings
+
 ROOT_URLCONF = 'analytical.urls'
 
 TEMPLATES = [
@@ -332,6 +340,10 @@ LOGGING = {
     },
 }
 
+# Send log records through a queue so request threads never wait on log I/O
+LOGGING_QUEUE_ENABLED = True
+LOGGING_QUEUE_MAX_SIZE = 10000  # Records beyond this are dropped rather than blocking
+
 # File Upload Settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
@@ -375,6 +387,11 @@ MAX_TOKENS_PER_USER = 10000000  # Increased to 10M tokens per user per month
 TOKEN_COST_PER_INPUT = 0.0005  # Cost per input token
 TOKEN_COST_PER_OUTPUT = 0.0015  # Cost per output token
 
+# Conversation Context Settings
+CONVERSATION_CONTEXT_TOKEN_BUDGET = 2000  # Max history tokens (summary + recent turns) per prompt
+CONVERSATION_RECENT_MESSAGES = 6  # Messages kept verbatim after the rolling summary
+CONVERSATION_SUMMARY_REFRESH_THRESHOLD = 8  # Unsummarized messages beyond the recent ones before a refresh is queued (capped at the 10-message context window)
+
 # Storage Limits
 MAX_STORAGE_PER_USER = 250 * 1024 * 1024  # 250MB per user
 STORAGE_WARNING_THRESHOLD = 200 * 1024 * 1024  # 200MB warning threshold
@@ -382,6 +399,13 @@ STORAGE_WARNING_THRESHOLD = 200 * 1024 * 1024  # 200MB warning threshold
 # Audit Trail Settings
 AUDIT_RETENTION_DAYS = 365  # Keep audit logs for 1 year
 AUDIT_MASK_SENSITIVE_DATA = True
+AUDIT_DELIVERY_MODE = 'buffered'  # 'sync', 'buffered' (in-process batches) or 'durable' (Redis-backed queue)
+AUDIT_BATCH_SIZE = 100  # Entries per bulk insert
+AUDIT_FLUSH_INTERVAL = 2.0  # Seconds between background flushes
+AUDIT_MAX_BUFFER_SIZE = 10000  # Oldest entries are dropped beyond this in buffered mode
+AUDIT_MAX_ATTEMPTS = 5  # Durable queue write attempts before an entry moves to the dead-letter list
+AUDIT_SYNC_CATEGORIES = ['security', 'authentication']  # Always written synchronously
+RAG_SEARCH_AUDIT_SAMPLE_RATE = 0.01  # Fraction of RAG searches that get a detailed audit record
 
 # Agentic AI Settings
 AGENT_MAX_STEPS = 20
@@ -393,6 +417,77 @@ AGENT_VERSION = "1.0"
 CACHE_TTL = 300  # 5 minutes default cache TTL
 ANALYSIS_CACHE_TTL = 3600  # 1 hour for analysis results
 SESSION_CACHE_TTL = 86400  # 24 hours for session data
+CACHE_TAG_TTL = 86400  # Minimum lifetime of cache tag sets (extended to the longest tagged entry)
+NEAR_CACHE_ENABLED = True  # Per-process LRU in front of the Redis caches for hot metadata
+NEAR_CACHE_MAX_ENTRIES = 1024
+NEAR_CACHE_TTL = 5  # seconds; bounds staleness if an invalidation message is missed
+CACHE_METRICS_ENABLED = True  # Per-keyspace cache counters shared across workers in Redis
+CACHE_METRICS_FLUSH_INTERVAL = 5.0  # seconds between pipelined counter flushes per process
+CACHE_METRICS_FLUSH_THRESHOLD = 1000  # buffered events that force an early flush
+CACHE_LOCK_TIMEOUT = 30  # seconds a recomputation lock is held before it expires
+CACHE_LOCK_WAIT_TIMEOUT = 10  # seconds callers wait for another worker's recomputation
+CACHE_STALE_TTL = 300  # seconds expired entries are still served while one worker revalidates
+CACHE_EARLY_REFRESH_BETA = 1.0  # >1 refreshes earlier, 0 disables probabilistic early refresh
+CACHE_REVALIDATE_IN_BACKGROUND = True
+CACHE_REVALIDATE_WORKERS = 2
+
+# Query Instrumentation Settings
+QUERY_INSTRUMENTATION_ENABLED = True  # Count queries per request and Celery task via execute wrappers
+QUERY_INSTRUMENTATION_HEADERS = DEBUG  # Add X-DB-Query-Count / X-DB-Time-Ms / X-DB-Duplicate-Queries headers
+QUERY_N_PLUS_ONE_THRESHOLD = 5  # repeats of one query fingerprint flagged as an N+1 pattern
+QUERY_COUNT_WARNING_THRESHOLD = 50  # queries per request/task that trigger a warning
+QUERY_REPORT_FLUSH_INTERVAL = 10.0  # seconds between per-process report flushes to Redis
+
+# Keyset Pagination Settings (history lists paginate on (created_at, id) cursors)
+KEYSET_PAGE_SIZE = 50  # default rows per page
+KEYSET_MAX_PAGE_SIZE = 200  # largest page a client may request
+KEYSET_EXPORT_BATCH_SIZE = 500  # rows fetched per query when streaming exports
+
+# Machine Learning Tool Settings
+ANALYSIS_ARTIFACTS_DIR = MEDIA_ROOT / 'artifacts'  # side artifacts (e.g. per-row cluster labels)
+CLUSTERING_LARGE_DATA_ROWS = 100000  # rows at which 'auto' clustering switches to mini-batch k-means
+CLUSTERING_BATCH_SIZE = 4096  # mini-batch k-means batch size
+CLUSTERING_SILHOUETTE_SAMPLE_SIZE = 10000  # points sampled for the silhouette score
+ML_SWEEP_N_JOBS = None  # hyperparameter sweep worker processes (None: CPU count)
+ML_SWEEP_MAX_CANDIDATES = 200  # largest grid a sweep may run (use n_iter for random search)
+ML_SWEEP_MIN_FOLDS = 2  # folds every configuration runs before early stopping prunes it
+FEATURE_MATRIX_CACHE_ENABLED = True  # Share prepared float32 feature matrices between ML tools
+FEATURE_MATRIX_CACHE_DIR = MEDIA_ROOT / 'feature_cache'  # memory-mapped .npy matrices
+FEATURE_MATRIX_CACHE_MAX_BYTES = 2 * 1024 ** 3  # least recently used matrices are deleted beyond this
+FEATURE_MATRIX_CACHE_MAX_OPEN = 16  # memory maps kept open per process
+MODEL_REGISTRY_DIR = MEDIA_ROOT / 'models'  # serialized trained models (estimator, scaler, encoders)
+MODEL_REGISTRY_CACHE_SIZE = 8  # loaded models kept per worker process for repeated scoring
+MODEL_ARTIFACT_ORPHAN_HOURS = 24  # unregistered model artifacts are deleted after this
+MODEL_SCORING_CHUNK_SIZE = 50000  # rows scored and written to Parquet at a time
+
+# Statistical Tool Settings
+DESCRIPTIVE_STATS_EXACT_MAX_ROWS = 2000000  # rows above which median, quartiles and mode are estimated from a sample
+DESCRIPTIVE_STATS_SAMPLE_ROWS = 200000  # uniform row sample used for those estimates
+DESCRIPTIVE_STATS_BLOCK_BYTES = 64 * 1024 ** 2  # float64 values of the columns reduced together at a time
+RESAMPLING_BLOCK_BYTES = 8 * 1024 ** 2  # memory of one block of bootstrap/permutation resamples
+RESAMPLING_N_JOBS = 1  # worker processes resample chunks are sharded across (1: in process)
+RESAMPLING_MAX_RESAMPLES = 100000  # most resamples a bootstrap or permutation tool may run
+SURVIVAL_CURVE_MAX_POINTS = 2000  # survival curves with more unique times are reported at this many evenly spaced times
+SURVIVAL_N_JOBS = 1  # worker processes for per-stratum Cox fits (1: in process)
+
+# Column Sketch Settings (per-column summaries built at ingest, see analytics/services/column_sketches.py)
+COLUMN_SKETCHES_ENABLED = True  # descriptive_statistics and histogram answer from sketches on large datasets unless exact=True
+COLUMN_SKETCH_CHUNK_ROWS = 100000  # rows fed to the sketches at a time
+COLUMN_SKETCH_EXACT_MAX_ROWS = 1000000  # larger datasets get column profiles and tool answers from the sketches
+COLUMN_SKETCH_KLL_K = 200  # quantile sketch size (~1.3% normalized rank error)
+COLUMN_SKETCH_HLL_PRECISION = 12  # 2^12 distinct-count registers (~1.6% relative error)
+COLUMN_SKETCH_TOP_K = 20  # most frequent values kept per column
+COLUMN_SKETCH_CMS_WIDTH = 2048  # count-min counters per row (overestimate <= e/width of rows)
+COLUMN_SKETCH_CMS_DEPTH = 4  # count-min rows (bound holds with probability 1 - e^-depth)
+
+# Chart Level-of-Detail Settings (larger chart payloads are reduced server-side)
+CHART_MAX_POINTS = 5000  # default points per chart before LTTB / density grid / binning applies
+CHART_MAX_POINTS_BY_TOOL = {  # per-tool thresholds, keyed by VisualizationTools method name
+    'scatter_plot': 10000,
+    'histogram': 10000,
+}
+CHART_DENSITY_GRID_SIZE = 100  # cells per axis of reduced scatter plots
+CHART_BOXPLOT_MAX_FLIERS = 200  # outliers kept per box in summarized box plots
 
 # Memory Optimization Settings
 ENABLE_MEMORY_MONITORING = True
@@ -433,6 +528,9 @@ IMAGE_THUMBNAIL_SIZES = {
 IMAGE_AUTO_OPTIMIZE_THRESHOLD_MB = 1.0  # Auto-optimize images larger than this
 IMAGE_CLEANUP_DAYS = 30  # Clean up compressed images older than this
 
+# Dashboard summary (incrementally maintained by model signals)
+DASHBOARD_SUMMARY_TTL = 7 * 24 * 3600  # Idle summaries expire and are rebuilt on next read
+
 # Background Monitoring Settings
 ENABLE_BACKGROUND_MONITORING = False
 SYSTEM_MONITORING_INTERVAL = 60  # seconds
@@ -513,3 +611,9 @@ else:
         '/health/',
         '/metrics/',
     ]
+
+# Atomic Redis sliding-window limiter (falls back to the cache-backed limiter if Redis is unavailable)
+RATE_LIMITING_ATOMIC = True
+# In-process token buckets reject clearly over-limit clients before any Redis round-trip
+RATE_LIMITING_LOCAL_PRECHECK = True
+RATE_LIMITING_LOCAL_BUCKETS = 10000  # Max tracked (client, category) buckets per process
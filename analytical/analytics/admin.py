@@ -6,7 +6,7 @@ from django import forms
 from .models import (
     User, Dataset, DatasetColumn, AnalysisTool, AnalysisSession, 
     AnalysisResult, ChatMessage, AuditTrail, AgentRun, AgentStep,
-    GeneratedImage, SandboxExecution, ReportGeneration, VectorNote
+    GeneratedImage, TrainedModel, SandboxExecution, ReportGeneration, VectorNote
 )
 
 
@@ -301,6 +301,18 @@ class GeneratedImageAdmin(admin.ModelAdmin):
         return f"{obj.file_size_bytes / 1024:.1f} KB"
 
 
+@admin.register(TrainedModel)
+class TrainedModelAdmin(admin.ModelAdmin):
+    list_display = ['id', 'name', 'user', 'task', 'model_type', 'artifact_size_kb', 'created_at']
+    list_filter = ['task', 'model_type', 'created_at', 'user']
+    search_fields = ['name', 'target_column', 'user__username']
+    readonly_fields = ['created_at', 'artifact_path', 'artifact_size_bytes', 'artifact_sha256']
+    
+    @admin.display(description='Artifact Size')
+    def artifact_size_kb(self, obj):
+        return f"{obj.artifact_size_bytes / 1024:.1f} KB"
+
+
 @admin.register(SandboxExecution)
 class SandboxExecutionAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'language', 'status', 'execution_time_ms', 'created_at']
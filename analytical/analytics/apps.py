@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class AnalyticsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'analytics'
+
+    def ready(self):
+        from analytics import signals  # noqa: F401
+        
+        # Keep log I/O off request threads
+        if getattr(settings, 'LOGGING_QUEUE_ENABLED', True):
+            from analytics.services.logging_service import install_queue_logging
+            install_queue_logging()
@@ -7,8 +7,12 @@ rate limiting using Redis for distributed systems.
 """
 
 import time
+import math
+import uuid
 import hashlib
 import logging
+import threading
+from collections import OrderedDict
 from typing import Dict, List, Optional, Tuple, Any
 from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.utils.deprecation import MiddlewareMixin
@@ -18,11 +22,128 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import datetime, timedelta
 import json
+import redis
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
 
+class LocalTokenBucket:
+    """
+    In-process token bucket used as a pre-check before the shared limiter.
+    
+    A process only sees a share of a client's traffic, so an empty local bucket
+    means the client is over its limit globally as well and can be rejected
+    without a Redis round-trip.
+    """
+    
+    __slots__ = ('capacity', 'refill_rate', 'tokens', 'updated_at')
+    
+    def __init__(self, capacity: int, window: int):
+        self.capacity = capacity
+        self.refill_rate = capacity / window  # tokens per second
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+    
+    def consume(self) -> bool:
+        """Take one token if available"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+        
+        if self.tokens < 1:
+            return False
+        
+        self.tokens -= 1
+        return True
+    
+    def retry_after(self) -> int:
+        """Seconds until the next token is available"""
+        return max(1, math.ceil((1 - self.tokens) / self.refill_rate))
+
+
+class RedisRateLimitBackend:
+    """
+    Atomic sliding-window limiter backed by one Redis sorted set per key.
+    
+    All windows that apply to a request (e.g. hourly and burst limits) are
+    checked and, only if every one of them allows the request, recorded by a
+    single Lua script call, so concurrent requests cannot leak past a limit.
+    """
+    
+    # KEYS: one sorted set per window
+    # ARGV: now_ms, member, then (window_ms, limit) per key
+    # Returns: allowed flag followed by (count, oldest_ms) per key
+    SLIDING_WINDOW_SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local member = ARGV[2]
+    local allowed = 1
+    local results = {}
+    
+    for i, key in ipairs(KEYS) do
+        local window = tonumber(ARGV[1 + i * 2])
+        local limit = tonumber(ARGV[2 + i * 2])
+        redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+        local count = redis.call('ZCARD', key)
+        local oldest = now
+        if count > 0 then
+            oldest = tonumber(redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')[2])
+        end
+        if count >= limit then
+            allowed = 0
+        end
+        results[#results + 1] = count
+        results[#results + 1] = oldest
+    end
+    
+    if allowed == 1 then
+        for i, key in ipairs(KEYS) do
+            local window = tonumber(ARGV[1 + i * 2])
+            redis.call('ZADD', key, now, member)
+            redis.call('PEXPIRE', key, window + 60000)
+            results[i * 2 - 1] = results[i * 2 - 1] + 1
+        end
+    end
+    
+    table.insert(results, 1, allowed)
+    return results
+    """
+    
+    def __init__(self, redis_client: redis.Redis):
+        self.redis_client = redis_client
+        self.script = redis_client.register_script(self.SLIDING_WINDOW_SCRIPT)
+    
+    def check_and_record(self, keys: List[str], windows: List[Tuple[int, int]]) -> Tuple[bool, List[Tuple[int, int]]]:
+        """
+        Check and record a request against several windows in one round-trip
+        
+        Args:
+            keys: Sorted set key per window
+            windows: (limit, window_seconds) per key
+            
+        Returns:
+            Tuple of (allowed, [(count, oldest_request_ms), ...])
+        """
+        now_ms = int(time.time() * 1000)
+        args = [now_ms, f"{now_ms}:{uuid.uuid4().hex[:8]}"]
+        for limit, window in windows:
+            args.extend([window * 1000, limit])
+        
+        raw = self.script(keys=keys, args=args)
+        allowed = bool(raw[0])
+        counts = [(int(raw[i]), int(raw[i + 1])) for i in range(1, len(raw), 2)]
+        return allowed, counts
+    
+    def count(self, key: str, window: int) -> int:
+        """Count requests recorded within the window"""
+        now_ms = int(time.time() * 1000)
+        return self.redis_client.zcount(key, now_ms - window * 1000, '+inf')
+    
+    def reset(self, *keys: str) -> None:
+        """Delete recorded requests"""
+        self.redis_client.delete(*keys)
+
+
 class RateLimitingMiddleware(MiddlewareMixin):
     """
     Advanced rate limiting middleware with multiple strategies
@@ -31,28 +152,28 @@ class RateLimitingMiddleware(MiddlewareMixin):
     # Default rate limits (requests per time window)
     DEFAULT_LIMITS = {
         # General API limits
-        'api_general': {'requests': 1000, 'window': 3600000},  # 1000 req/hour
-        'api_auth': {'requests': 100, 'window': 3600000},      # 100 auth req/hour
+        'api_general': {'requests': 1000, 'window': 3600},  # 1000 req/hour
+        'api_auth': {'requests': 100, 'window': 3600},      # 100 auth req/hour
         
         # File upload limits
-        'file_upload': {'requests': 50, 'window': 3600000},    # 50 uploads/hour
-        'file_large': {'requests': 10, 'window': 3600000},     # 10 large files/hour
+        'file_upload': {'requests': 50, 'window': 3600},    # 50 uploads/hour
+        'file_large': {'requests': 10, 'window': 3600},     # 10 large files/hour
         
         # Analysis limits
-        'analysis_execute': {'requests': 200, 'window': 3600000},  # 200 analysis/hour
-        'analysis_heavy': {'requests': 20, 'window': 3600000},     # 20 heavy analysis/hour
+        'analysis_execute': {'requests': 200, 'window': 3600},  # 200 analysis/hour
+        'analysis_heavy': {'requests': 20, 'window': 3600},     # 20 heavy analysis/hour
         
         # AI/LLM limits
-        'llm_chat': {'requests': 500, 'window': 3600000},      # 500 chat messages/hour
-        'llm_analysis': {'requests': 100, 'window': 3600000},  # 100 AI analysis/hour
+        'llm_chat': {'requests': 500, 'window': 3600},      # 500 chat messages/hour
+        'llm_analysis': {'requests': 100, 'window': 3600},  # 100 AI analysis/hour
         
         # Agent limits
-        'agent_run': {'requests': 50, 'window': 3600000},      # 50 agent runs/hour
-        'agent_expensive': {'requests': 10, 'window': 3600000}, # 10 expensive runs/hour
+        'agent_run': {'requests': 50, 'window': 3600},      # 50 agent runs/hour
+        'agent_expensive': {'requests': 10, 'window': 3600}, # 10 expensive runs/hour
         
         # Per-IP limits (for anonymous users)
-        'ip_general': {'requests': 500, 'window': 3600000},    # 500 req/hour per IP
-        'ip_strict': {'requests': 100, 'window': 3600000},     # 100 req/hour for sensitive endpoints
+        'ip_general': {'requests': 500, 'window': 3600},    # 500 req/hour per IP
+        'ip_strict': {'requests': 100, 'window': 3600},     # 100 req/hour for sensitive endpoints
     }
     
     # Endpoint to rate limit mapping
@@ -81,10 +202,10 @@ class RateLimitingMiddleware(MiddlewareMixin):
     
     # Burst limits (short-term limits)
     BURST_LIMITS = {
-        'api_general': {'requests': 100, 'window': 600},     # 100 req/minute
-        'file_upload': {'requests': 10, 'window': 600},     # 10 uploads/minute
-        'llm_chat': {'requests': 30, 'window': 600},        # 30 messages/minute
-        'agent_run': {'requests': 5, 'window': 600},        # 5 agent runs/minute
+        'api_general': {'requests': 100, 'window': 60},     # 100 req/minute
+        'file_upload': {'requests': 10, 'window': 60},     # 10 uploads/minute
+        'llm_chat': {'requests': 30, 'window': 60},        # 30 messages/minute
+        'agent_run': {'requests': 5, 'window': 60},        # 5 agent runs/minute
     }
     
     def __init__(self, get_response):
@@ -104,18 +225,18 @@ class RateLimitingMiddleware(MiddlewareMixin):
         # In development mode, increase limits significantly
         if self.is_development:
             self.limits = {
-                'api_general': {'requests': 10000, 'window': 3600000},  # 10K req/hour
-                'api_auth': {'requests': 1000, 'window': 3600000},     # 1K auth req/hour
-                'file_upload': {'requests': 500, 'window': 360000},  # 500 uploads/hour
-                'file_large': {'requests': 100, 'window': 360000},   # 100 large files/hour
-                'analysis_execute': {'requests': 2000, 'window': 360000},  # 2K analysis/hour
-                'analysis_heavy': {'requests': 200, 'window': 360000},     # 200 heavy analysis/hour
-                'llm_chat': {'requests': 5000, 'window': 360000},   # 5K chat messages/hour
-                'llm_analysis': {'requests': 1000, 'window': 360000},  # 1K AI analysis/hour
-                'agent_run': {'requests': 500, 'window': 360000},    # 500 agent runs/hour
-                'agent_expensive': {'requests': 100, 'window': 360000}, # 100 expensive runs/hour
-                'ip_general': {'requests': 5000, 'window': 360000},  # 5K req/hour per IP
-                'ip_strict': {'requests': 1000, 'window': 360000},   # 1K req/hour for sensitive endpoints
+                'api_general': {'requests': 10000, 'window': 3600},  # 10K req/hour
+                'api_auth': {'requests': 1000, 'window': 3600},     # 1K auth req/hour
+                'file_upload': {'requests': 500, 'window': 3600},  # 500 uploads/hour
+                'file_large': {'requests': 100, 'window': 3600},   # 100 large files/hour
+                'analysis_execute': {'requests': 2000, 'window': 3600},  # 2K analysis/hour
+                'analysis_heavy': {'requests': 200, 'window': 3600},     # 200 heavy analysis/hour
+                'llm_chat': {'requests': 5000, 'window': 3600},   # 5K chat messages/hour
+                'llm_analysis': {'requests': 1000, 'window': 3600},  # 1K AI analysis/hour
+                'agent_run': {'requests': 500, 'window': 3600},    # 500 agent runs/hour
+                'agent_expensive': {'requests': 100, 'window': 3600}, # 100 expensive runs/hour
+                'ip_general': {'requests': 5000, 'window': 3600},  # 5K req/hour per IP
+                'ip_strict': {'requests': 1000, 'window': 3600},   # 1K req/hour for sensitive endpoints
             }
         
         # Exempt paths
@@ -139,6 +260,27 @@ class RateLimitingMiddleware(MiddlewareMixin):
         else:
             self.cache = cache
             self.cache_prefix = 'ratelimit'
+        
+        # Atomic Redis limiter; the cache-backed list is only used as a fallback
+        self.backend = None
+        if self.use_redis and getattr(settings, 'RATE_LIMITING_ATOMIC', True):
+            try:
+                self.backend = RedisRateLimitBackend(self._get_redis_client())
+            except Exception as e:
+                logger.warning(f"Atomic rate limit backend unavailable, using cache fallback: {str(e)}")
+        
+        # Local token-bucket pre-check
+        self.local_precheck_enabled = getattr(settings, 'RATE_LIMITING_LOCAL_PRECHECK', True)
+        self.local_bucket_max = getattr(settings, 'RATE_LIMITING_LOCAL_BUCKETS', 10000)
+        self.local_buckets = OrderedDict()
+        self.local_buckets_lock = threading.Lock()
+    
+    def _get_redis_client(self) -> redis.Redis:
+        """Get Redis client connection for the rate limit backend"""
+        redis_url = getattr(settings, 'CACHES', {}).get('default', {}).get('LOCATION', 'redis://127.0.0.1:6379/1')
+        if redis_url.startswith('redis://'):
+            return redis.from_url(redis_url)
+        return redis.Redis(host='127.0.0.1', port=6379, db=1)
     
     def process_request(self, request: HttpRequest) -> Optional[HttpResponse]:
         """Process request for rate limiting"""
@@ -198,27 +340,128 @@ class RateLimitingMiddleware(MiddlewareMixin):
     def _check_rate_limits(self, request: HttpRequest) -> Dict[str, Any]:
         """Check all applicable rate limits"""
         # Determine rate limit categories
-        limit_categories = self._get_limit_categories(request)
+        limit_categories = [cat for cat in self._get_limit_categories(request) if cat in self.limits]
+        
+        if not limit_categories:
+            return {'allowed': True}
         
         # Get identifier (user ID or IP)
         identifier = self._get_identifier(request)
         
-        # Check each applicable limit
-        for category in limit_categories:
-            limit_result = self._check_single_limit(request, identifier, category)
-            
-            if not limit_result['allowed']:
-                return limit_result
+        # Check all windows (main and burst) together
+        results = self._check_windows(identifier, self._get_windows(limit_categories))
+        
+        for result in results:
+            if not result['allowed']:
+                return result
         
         # All limits passed
+        main_results = [r for r in results if not r.get('burst_limit')]
         return {
             'allowed': True,
-            'limit': max([self.limits[cat]['requests'] for cat in limit_categories]),
-            'remaining': min([self._get_remaining_requests(identifier, cat) for cat in limit_categories]),
-            'reset_time': max([self._get_reset_time(identifier, cat) for cat in limit_categories]),
-            'window': max([self.limits[cat]['window'] for cat in limit_categories]),
+            'limit': max(r['limit'] for r in main_results),
+            'remaining': min(r['remaining'] for r in main_results),
+            'reset_time': max(r['reset_time'] for r in main_results),
+            'window': max(r['window'] for r in main_results),
         }
     
+    def _get_windows(self, categories: List[str]) -> List[Tuple[str, int, int]]:
+        """Get (category, limit, window) for each category and its burst limit"""
+        windows = []
+        for category in categories:
+            limit_config = self.limits[category]
+            windows.append((category, limit_config['requests'], limit_config['window']))
+            
+            if category in self.BURST_LIMITS:
+                burst_config = self.BURST_LIMITS[category]
+                windows.append((f"{category}:burst", burst_config['requests'], burst_config['window']))
+        
+        return windows
+    
+    def _check_windows(self, identifier: str, windows: List[Tuple[str, int, int]]) -> List[Dict[str, Any]]:
+        """
+        Check and record a request against several sliding windows
+        
+        Clients whose local token bucket is empty are rejected in-process;
+        otherwise all windows are checked atomically in one Redis round-trip.
+        """
+        shed_result = self._local_precheck(identifier, windows)
+        if shed_result:
+            return [shed_result]
+        
+        if self.backend:
+            try:
+                keys = [f"{self.cache_prefix}:{identifier}:{category}" for category, _, _ in windows]
+                allowed, counts = self.backend.check_and_record(keys, [(limit, window) for _, limit, window in windows])
+                current_time = int(time.time())
+                
+                results = []
+                for (category, limit, window), (count, oldest_ms) in zip(windows, counts):
+                    oldest_request = oldest_ms // 1000
+                    result = {
+                        'allowed': True,
+                        'limit': limit,
+                        'remaining': max(0, limit - count),
+                        'reset_time': oldest_request + window,
+                        'window': window,
+                        'category': category
+                    }
+                    # Counts include the current request only if it was recorded
+                    if not allowed and count >= limit:
+                        result['allowed'] = False
+                        result['retry_after'] = max(0, oldest_request + window - current_time)
+                    if category.endswith(':burst'):
+                        result.update({'limit_type': 'burst', 'burst_limit': True})
+                    results.append(result)
+                return results
+            
+            except Exception as e:
+                logger.error(f"Atomic rate limit check failed, using cache fallback: {str(e)}")
+        
+        results = []
+        for category, limit, window in windows:
+            result = self._check_sliding_window_cache(identifier, category, limit, window)
+            if category.endswith(':burst') and not result['allowed']:
+                result.update({'limit_type': 'burst', 'burst_limit': True})
+            results.append(result)
+            if not result['allowed']:
+                break
+        return results
+    
+    def _local_precheck(self, identifier: str, windows: List[Tuple[str, int, int]]) -> Optional[Dict[str, Any]]:
+        """Reject the request in-process if a local token bucket is empty"""
+        if not self.local_precheck_enabled:
+            return None
+        
+        with self.local_buckets_lock:
+            for category, limit, window in windows:
+                bucket_key = (identifier, category, limit, window)
+                bucket = self.local_buckets.get(bucket_key)
+                if bucket is None:
+                    bucket = LocalTokenBucket(limit, window)
+                    self.local_buckets[bucket_key] = bucket
+                    if len(self.local_buckets) > self.local_bucket_max:
+                        self.local_buckets.popitem(last=False)
+                else:
+                    self.local_buckets.move_to_end(bucket_key)
+                
+                if not bucket.consume():
+                    retry_after = bucket.retry_after()
+                    result = {
+                        'allowed': False,
+                        'limit': limit,
+                        'remaining': 0,
+                        'reset_time': int(time.time()) + retry_after,
+                        'retry_after': retry_after,
+                        'window': window,
+                        'category': category
+                    }
+                    if category.endswith(':burst'):
+                        result.update({'limit_type': 'burst', 'burst_limit': True})
+                    return result
+        
+        return None
+    
     def _get_limit_categories(self, request: HttpRequest) -> List[str]:
         """Determine which rate limit categories apply to this request"""
         categories = []
@@ -262,6 +505,10 @@ class RateLimitingMiddleware(MiddlewareMixin):
     
     def _get_client_ip(self, request: HttpRequest) -> str:
         """Get client IP address"""
+        # Already resolved by the request pipeline
+        if hasattr(request, 'client_ip'):
+            return request.client_ip
+        
         # Check for forwarded IP
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         if x_forwarded_for:
@@ -276,36 +523,20 @@ class RateLimitingMiddleware(MiddlewareMixin):
         if category not in self.limits:
             return {'allowed': True}
         
-        limit_config = self.limits[category]
-        requests_limit = limit_config['requests']
-        window_seconds = limit_config['window']
-        
-        # Check main limit
-        main_result = self._check_sliding_window(identifier, category, requests_limit, window_seconds)
-        
-        if not main_result['allowed']:
-            return main_result
-        
-        # Check burst limit if exists
-        if category in self.BURST_LIMITS:
-            burst_config = self.BURST_LIMITS[category]
-            burst_result = self._check_sliding_window(
-                identifier, f"{category}:burst", 
-                burst_config['requests'], 
-                burst_config['window']
-            )
-            
-            if not burst_result['allowed']:
-                return {
-                    **burst_result,
-                    'limit_type': 'burst',
-                    'burst_limit': True
-                }
+        results = self._check_windows(identifier, self._get_windows([category]))
         
-        return main_result
+        for result in results:
+            if not result['allowed']:
+                return result
+        
+        return results[0]
     
     def _check_sliding_window(self, identifier: str, category: str, limit: int, window: int) -> Dict[str, Any]:
         """Implement sliding window rate limiting"""
+        return self._check_windows(identifier, [(category, limit, window)])[0]
+    
+    def _check_sliding_window_cache(self, identifier: str, category: str, limit: int, window: int) -> Dict[str, Any]:
+        """Sliding window rate limiting on the Django cache (fallback when Redis is unavailable)"""
         current_time = int(time.time())
         window_start = current_time - window
         
@@ -356,7 +587,22 @@ class RateLimitingMiddleware(MiddlewareMixin):
         except Exception as e:
             logger.error(f"Rate limit check failed: {str(e)}")
             # Fail open in case of cache errors
-            return {'allowed': True}
+            return {'allowed': True, 'limit': limit, 'remaining': limit,
+                    'reset_time': current_time + window, 'window': window, 'category': category}
+    
+    def _count_requests(self, identifier: str, category: str, window: int) -> int:
+        """Count requests recorded for a category within its window"""
+        cache_key = f"{self.cache_prefix}:{identifier}:{category}"
+        
+        if self.backend:
+            try:
+                return self.backend.count(cache_key, window)
+            except Exception as e:
+                logger.warning(f"Failed to count requests in Redis: {str(e)}")
+        
+        window_start = int(time.time()) - window
+        requests_data = self.cache.get(cache_key, [])
+        return len([req_time for req_time in requests_data if req_time > window_start])
     
     def _get_remaining_requests(self, identifier: str, category: str) -> int:
         """Get remaining requests for a category"""
@@ -364,15 +610,10 @@ class RateLimitingMiddleware(MiddlewareMixin):
             return 0
         
         limit_config = self.limits[category]
-        current_time = int(time.time())
-        window_start = current_time - limit_config['window']
-        
-        cache_key = f"{self.cache_prefix}:{identifier}:{category}"
         
         try:
-            requests_data = self.cache.get(cache_key, [])
-            current_requests = [req_time for req_time in requests_data if req_time > window_start]
-            return max(0, limit_config['requests'] - len(current_requests))
+            used = self._count_requests(identifier, category, limit_config['window'])
+            return max(0, limit_config['requests'] - used)
         except:
             return 0
     
@@ -473,17 +714,22 @@ class RateLimitManager:
         reset_count = 0
         
         try:
-            if category:
-                # Reset specific category
-                cache_key = f"{self.middleware.cache_prefix}:{identifier}:{category}"
-                self.middleware.cache.delete(cache_key)
-                reset_count = 1
-            else:
-                # Reset all categories (this is expensive, use sparingly)
-                for cat in self.middleware.limits.keys():
-                    cache_key = f"{self.middleware.cache_prefix}:{identifier}:{cat}"
-                    self.middleware.cache.delete(cache_key)
-                    reset_count += 1
+            categories = [category] if category else list(self.middleware.limits.keys())
+            cache_keys = []
+            for cat in categories:
+                cache_keys.append(f"{self.middleware.cache_prefix}:{identifier}:{cat}")
+                cache_keys.append(f"{self.middleware.cache_prefix}:{identifier}:{cat}:burst")
+            
+            if self.middleware.backend:
+                self.middleware.backend.reset(*cache_keys)
+            self.middleware.cache.delete_many(cache_keys)
+            reset_count = len(categories)
+            
+            # Drop local buckets so the reset takes effect immediately in this process
+            with self.middleware.local_buckets_lock:
+                for bucket_key in list(self.middleware.local_buckets):
+                    if bucket_key[0] == identifier and bucket_key[1].split(':')[0] in categories:
+                        del self.middleware.local_buckets[bucket_key]
             
             return {
                 'success': True,
@@ -512,22 +758,18 @@ class RateLimitManager:
         
         for category, config in self.middleware.limits.items():
             try:
-                cache_key = f"{self.middleware.cache_prefix}:{identifier}:{category}"
-                requests_data = self.middleware.cache.get(cache_key, [])
-                
-                window_start = current_time - config['window']
-                current_requests = [req_time for req_time in requests_data if req_time > window_start]
+                used = self.middleware._count_requests(identifier, category, config['window'])
                 
-                remaining = max(0, config['requests'] - len(current_requests))
+                remaining = max(0, config['requests'] - used)
                 reset_time = current_time + config['window']
                 
                 status[category] = {
                     'limit': config['requests'],
                     'window': config['window'],
-                    'used': len(current_requests),
+                    'used': used,
                     'remaining': remaining,
                     'reset_time': reset_time,
-                    'percentage_used': (len(current_requests) / config['requests']) * 100
+                    'percentage_used': (used / config['requests']) * 100
                 }
             
             except Exception as e:
@@ -0,0 +1,295 @@
+"""
+Request Pipeline Middleware
+
+This middleware replaces the separate security, audit, performance, rate
+limiting and validation middleware with one pipeline. Request metadata
+(correlation ID, client IP, start time) is computed once and shared by
+ordered stages, and each request produces a single accounting log record.
+Works with both sync (WSGI) and async (ASGI) views.
+"""
+
+import time
+import uuid
+import logging
+from typing import Callable, Optional
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.conf import settings
+
+from analytics.middleware.rate_limiting import RateLimitingMiddleware
+from analytics.middleware.validation import InputValidationMiddleware
+from analytics.middleware.audit_logging import AuditLoggingMiddleware
+from analytics.middleware.security_middleware import SecurityMiddleware, ErrorHandlingMiddleware
+from analytics.services.logging_service import (
+    get_logger, get_audit_logger, set_logging_context, reset_logging_context
+)
+from analytics.services.query_instrumentation import query_instrumentation
+
+logger = logging.getLogger(__name__)
+
+
+class RequestPipelineMiddleware:
+    """
+    Unified request pipeline with a shared per-request context
+
+    Stages run their request hooks in REQUEST_PIPELINE_STAGES order and their
+    response hooks in reverse order. A request hook may return a response to
+    short-circuit the view (e.g. rate limit exceeded).
+
+    The default stages do what the separate security, audit and performance
+    middleware did. 'endpoint_rate_limit' (RateLimitingMiddleware),
+    'validation' (InputValidationMiddleware) and 'audit_trail'
+    (AuditLoggingMiddleware) were not active before and are opt-in.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    DEFAULT_STAGES = ['queries', 'security', 'rate_limit', 'timing', 'audit']
+
+    SECURITY_HEADERS = {
+        'X-Content-Type-Options': 'nosniff',
+        'X-Frame-Options': 'DENY',
+        'X-XSS-Protection': '1; mode=block',
+        'Referrer-Policy': 'strict-origin-when-cross-origin',
+        'Permissions-Policy': 'geolocation=(), microphone=(), camera=()',
+    }
+
+    CSP_HEADER = (
+        "default-src 'self'; "
+        "script-src 'self' 'unsafe-inline' 'unsafe-eval' https://cdn.jsdelivr.net https://unpkg.com; "
+        "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; "
+        "img-src 'self' data: https:; "
+        "font-src 'self' https://cdn.jsdelivr.net; "
+        "connect-src 'self'; "
+        "frame-ancestors 'none';"
+    )
+
+    def __init__(self, get_response: Callable):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+        self.slow_request_threshold = getattr(settings, 'SLOW_REQUEST_THRESHOLD', 1.0)
+        self.query_headers = getattr(settings, 'QUERY_INSTRUMENTATION_HEADERS', settings.DEBUG)
+
+        self.logger = get_logger('request')
+        self.performance_logger = get_logger('performance')
+        self.audit_logger = get_audit_logger()
+
+        # Stage implementations are reused from the standalone middleware
+        self.security = SecurityMiddleware(lambda request: None)
+        self.rate_limiter = RateLimitingMiddleware(lambda request: None)
+        self.validator = InputValidationMiddleware(lambda request: None)
+        self.audit_trail = AuditLoggingMiddleware(lambda request: None)
+        self.error_handler = ErrorHandlingMiddleware(lambda request: None)
+
+        stages = {
+            'queries': (self._queries_request, self._queries_response),
+            'security': (self._security_request, self._security_response),
+            'rate_limit': (self._rate_limit_request, None),
+            'endpoint_rate_limit': (self._endpoint_rate_limit_request, self._endpoint_rate_limit_response),
+            'validation': (self._validation_request, None),
+            'timing': (None, self._timing_response),
+            'audit': (None, self._audit_response),
+            'audit_trail': (None, self._audit_trail_response),
+        }
+        stage_names = getattr(settings, 'REQUEST_PIPELINE_STAGES', self.DEFAULT_STAGES)
+
+        self.request_stages = [stages[name][0] for name in stage_names if stages[name][0]]
+        self.response_stages = [stages[name][1] for name in reversed(stage_names) if stages[name][1]]
+
+    def __call__(self, request: HttpRequest):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        token = self._prepare(request)
+        try:
+            response = self._run_request_stages(request)
+            if response is None:
+                response = self.get_response(request)
+            return self._run_response_stages(request, response)
+        finally:
+            reset_logging_context(token)
+
+    async def __acall__(self, request: HttpRequest):
+        token = self._prepare(request)
+        try:
+            # Stages may touch the database, cache or session; run them off the event loop
+            response = await sync_to_async(self._run_request_stages, thread_sensitive=True)(request)
+            if response is None:
+                response = await self.get_response(request)
+            return await sync_to_async(self._run_response_stages, thread_sensitive=True)(request, response)
+        finally:
+            reset_logging_context(token)
+
+    def process_exception(self, request: HttpRequest, exception: Exception) -> HttpResponse:
+        """Log view exceptions and return an error response"""
+        return self.error_handler.process_exception(request, exception)
+
+    def _prepare(self, request: HttpRequest):
+        """Compute request metadata once for all stages"""
+        request.start_time = time.time()
+        request.correlation_id = str(uuid.uuid4())
+        request.request_id = request.correlation_id
+        request.client_ip = self._get_client_ip(request)
+
+        # Attribute names used by the standalone middleware
+        request.audit_correlation_id = request.correlation_id
+        request.audit_start_time = request.start_time
+
+        return set_logging_context(
+            correlation_id=request.correlation_id,
+            request_id=request.request_id,
+            user_id=getattr(request.user, 'id', None) if hasattr(request, 'user') else None,
+            session_id=request.session.session_key if hasattr(request, 'session') else None
+        )
+
+    def _run_request_stages(self, request: HttpRequest) -> Optional[HttpResponse]:
+        for stage in self.request_stages:
+            response = stage(request)
+            if response is not None:
+                return response
+        return None
+
+    def _run_response_stages(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        request.duration = time.time() - request.start_time
+        for stage in self.response_stages:
+            try:
+                response = stage(request, response) or response
+            except Exception as e:
+                logger.error(f"Request pipeline stage failed: {str(e)}")
+        return response
+
+    # Stages
+
+    def _queries_request(self, request: HttpRequest) -> Optional[HttpResponse]:
+        """Start counting database queries for this request"""
+        request.query_tracking_token = query_instrumentation.start(f"{request.method} {request.path}")
+        return None
+
+    def _queries_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        """Analyze the request's queries and expose them in debug headers"""
+        token = getattr(request, 'query_tracking_token', None)
+        if token is None:
+            return response
+
+        # Aggregate by route rather than by concrete path
+        stats = query_instrumentation.current_stats()
+        resolver_match = getattr(request, 'resolver_match', None)
+        if stats is not None and resolver_match is not None:
+            stats.label = f"{request.method} {resolver_match.route or resolver_match.view_name}"
+
+        analysis = query_instrumentation.stop(token)
+        request.query_tracking_token = None
+
+        if self.query_headers and analysis:
+            response['X-DB-Query-Count'] = str(analysis['query_count'])
+            response['X-DB-Time-Ms'] = str(analysis['db_time_ms'])
+            response['X-DB-Duplicate-Queries'] = str(analysis['duplicate_queries'])
+            response['X-DB-N-Plus-One'] = str(len(analysis['n_plus_one']))
+        return response
+
+    def _security_request(self, request: HttpRequest) -> Optional[HttpResponse]:
+        """Record missing CSRF tokens and attach the CSP"""
+        if request.method in ['POST', 'PUT', 'PATCH', 'DELETE']:
+            csrf_token = request.META.get('HTTP_X_CSRFTOKEN') or request.POST.get('csrfmiddlewaretoken')
+            if not csrf_token:
+                self.audit_logger.log_security_event(
+                    'csrf_token_missing',
+                    {
+                        'ip_address': request.client_ip,
+                        'user_agent': request.META.get('HTTP_USER_AGENT', ''),
+                        'path': request.path,
+                        'method': request.method
+                    },
+                    'WARNING'
+                )
+
+        request.csp_header = self.CSP_HEADER
+        return None
+
+    def _security_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        for header, value in self.SECURITY_HEADERS.items():
+            response[header] = value
+        response['X-Correlation-ID'] = request.correlation_id
+        return response
+
+    def _rate_limit_request(self, request: HttpRequest) -> Optional[HttpResponse]:
+        """Per-user / per-IP request budget (as SecurityMiddleware)"""
+        if not self.security.check_rate_limit(request):
+            return JsonResponse({
+                'error': 'Rate limit exceeded',
+                'message': 'Too many requests. Please try again later.'
+            }, status=429)
+        return None
+
+    def _endpoint_rate_limit_request(self, request: HttpRequest) -> Optional[HttpResponse]:
+        return self.rate_limiter.process_request(request)
+
+    def _endpoint_rate_limit_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        return self.rate_limiter.process_response(request, response)
+
+    def _validation_request(self, request: HttpRequest) -> Optional[HttpResponse]:
+        return self.validator.process_request(request)
+
+    def _timing_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        response['X-Response-Time-Ms'] = str(round(request.duration * 1000, 2))
+
+        if request.duration > self.slow_request_threshold:
+            self.performance_logger.warning(f"Slow request: {request.path}", {
+                'duration_ms': round(request.duration * 1000, 2),
+                'method': request.method,
+                'status_code': response.status_code,
+                'path': request.path,
+                'correlation_id': request.correlation_id
+            })
+
+        return response
+
+    def _audit_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        """Write the single accounting record for this request"""
+        user = getattr(request, 'user', None)
+        user_id = user.id if user is not None and user.is_authenticated else None
+
+        details = {
+            'method': request.method,
+            'path': request.path,
+            'status_code': response.status_code,
+            'duration_ms': round(request.duration * 1000, 2),
+            'ip_address': request.client_ip,
+            'user_agent': request.META.get('HTTP_USER_AGENT', ''),
+            'referer': request.META.get('HTTP_REFERER', ''),
+            'correlation_id': request.correlation_id
+        }
+
+        if user_id:
+            self.audit_logger.log_user_action(
+                user_id=user_id,
+                action=f"HTTP_{request.method}",
+                resource=request.path,
+                details=details,
+                success=response.status_code < 400
+            )
+        else:
+            self.logger.info(f"Request: {request.method} {request.path} {response.status_code}", details)
+
+        return response
+
+    def _audit_trail_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        """Persist significant actions to the audit trail"""
+        audit_trail = self.audit_trail
+        if (audit_trail.audit_enabled and not audit_trail._is_excluded_path(request.path)
+                and (audit_trail.log_get_requests or request.method != 'GET')
+                and audit_trail._is_significant_action(request, response)):
+            audit_trail._log_to_audit_trail(request, response, request.duration)
+
+        return response
+
+    def _get_client_ip(self, request: HttpRequest) -> str:
+        """Get client IP address"""
+        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+        if x_forwarded_for:
+            return x_forwarded_for.split(',')[0].strip()
+        return request.META.get('REMOTE_ADDR', 'unknown')
@@ -17,7 +17,9 @@ from django.contrib.sessions.models import Session
 from django.core.exceptions import PermissionDenied
 from django.utils.crypto import constant_time_compare
 from django.contrib.auth import get_user
-from analytics.services.logging_service import get_logger, get_audit_logger, get_error_logger
+from analytics.services.logging_service import (
+    get_logger, get_audit_logger, get_error_logger, set_logging_context, reset_logging_context
+)
 
 class SecurityMiddleware(MiddlewareMixin):
     """Comprehensive security middleware"""
@@ -35,8 +37,8 @@ class SecurityMiddleware(MiddlewareMixin):
         request.correlation_id = str(uuid.uuid4())
         request.request_id = str(uuid.uuid4())
         
-        # Set logging context
-        self.logger.set_context(
+        # Set logging context (scoped to this request, reset in process_response)
+        request.logging_context_token = set_logging_context(
             correlation_id=request.correlation_id,
             request_id=request.request_id,
             user_id=getattr(request.user, 'id', None) if hasattr(request, 'user') else None,
@@ -101,6 +103,9 @@ class SecurityMiddleware(MiddlewareMixin):
             'correlation_id': getattr(request, 'correlation_id', None)
         })
         
+        if hasattr(request, 'logging_context_token'):
+            reset_logging_context(request.logging_context_token)
+        
         return response
     
     def check_rate_limit(self, request: HttpRequest) -> bool:
@@ -9,7 +9,10 @@ and data type validation.
 import re
 import json
 import logging
-from typing import Dict, List, Any, Optional, Union
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple, Union
 from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.utils.deprecation import MiddlewareMixin
 from django.conf import settings
@@ -20,6 +23,108 @@ import bleach
 logger = logging.getLogger(__name__)
 
 
+class ValidationEngine:
+    """
+    Compiled single-pass detector for malicious input patterns
+    
+    All patterns of the configured detectors are compiled once into a single
+    alternation, so a clean value costs one regex scan. Per-pattern matching is
+    only done for values that hit the combined pattern, which keeps the
+    violation details identical to checking every pattern separately.
+    """
+    
+    # Characters that make bleach change a value (markup, entities, control chars)
+    SANITIZE_SENSITIVE = re.compile(r'[<>&\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f\ufdd0-\ufdef\ufffe\uffff\ud800-\udfff]')
+    
+    # Standalone keywords that can match a value made only of ASCII letters/digits
+    KEYWORD_PATTERN = re.compile(r'\\b([A-Za-z]+)\\b')
+    
+    def __init__(self, detectors: Tuple[str, ...]):
+        self.detectors = detectors
+        self.patterns = {}
+        alternatives = []
+        keywords = set()
+        
+        for detector in detectors:
+            patterns, flags = InputValidationMiddleware.DETECTORS[detector]
+            self.patterns[detector] = [(pattern, re.compile(pattern, re.IGNORECASE | flags)) for pattern in patterns]
+            
+            for index, pattern in enumerate(patterns):
+                scoped = f"(?s:{pattern})" if flags & re.DOTALL else f"(?:{pattern})"
+                alternatives.append(f"(?P<{detector}_{index}>{scoped})")
+                keywords.update(word.lower() for word in self.KEYWORD_PATTERN.findall(pattern))
+        
+        self.combined = re.compile('|'.join(alternatives), re.IGNORECASE) if alternatives else None
+        self.alnum_keywords = frozenset(keywords)
+    
+    def scan(self, param_name: str, value: str, violations: List[Dict] = None) -> List[Dict]:
+        """Scan a value with all detectors of this engine"""
+        if violations is None:
+            violations = []
+        
+        if self.combined is None:
+            return violations
+        
+        # A pure ASCII alphanumeric value is a single word, so only standalone
+        # keyword patterns (e.g. \bSELECT\b) can match it
+        if value.isascii() and value.isalnum() and value.lower() not in self.alnum_keywords:
+            return violations
+        
+        match = self.combined.search(value)
+        if match is None:
+            return violations
+        
+        for detector in self.detectors:
+            self.detect(detector, param_name, value, violations)
+        
+        return violations
+    
+    def detect(self, detector: str, param_name: str, value: str, violations: List[Dict]) -> List[Dict]:
+        """Run a single detector, adding one violation per matching pattern"""
+        if detector == 'path_traversal':
+            if any(compiled.search(value) for _, compiled in self.patterns[detector]):
+                violations.append({
+                    'type': 'path_traversal',
+                    'parameter': param_name,
+                    'severity': 'critical',
+                    'message': f'Path traversal attempt detected in {param_name}',
+                    'value_snippet': value[:100]
+                })
+            return violations
+        
+        violation_type, message = InputValidationMiddleware.DETECTOR_MESSAGES[detector]
+        for pattern, compiled in self.patterns[detector]:
+            if compiled.search(value):
+                violations.append({
+                    'type': violation_type,
+                    'parameter': param_name,
+                    'severity': 'critical',
+                    'message': message.format(param_name=param_name),
+                    'pattern': pattern,
+                    'value_snippet': value[:100]
+                })
+        
+        return violations
+    
+    def sanitize(self, value: str) -> str:
+        """Sanitize input value, skipping bleach when it would not change the value"""
+        if self.SANITIZE_SENSITIVE.search(value):
+            # HTML escape and clean
+            value = bleach.clean(value, tags=[], attributes={}, strip=True)
+            
+            # Remove null bytes
+            value = value.replace('\x00', '')
+        
+        # Normalize whitespace
+        return ' '.join(value.split())
+
+
+@lru_cache(maxsize=None)
+def get_validation_engine(detectors: Tuple[str, ...]) -> ValidationEngine:
+    """Get the compiled engine for a detector set (compiled once per process)"""
+    return ValidationEngine(detectors)
+
+
 class InputValidationMiddleware(MiddlewareMixin):
     """
     Comprehensive input validation middleware
@@ -64,6 +169,26 @@ class InputValidationMiddleware(MiddlewareMixin):
         r'%2e%2e%5c',
     ]
     
+    # Detector name -> (patterns, extra regex flags)
+    DETECTORS = {
+        'sql_injection': (SQL_INJECTION_PATTERNS, 0),
+        'xss': (XSS_PATTERNS, re.DOTALL),
+        'command_injection': (COMMAND_INJECTION_PATTERNS, 0),
+        'path_traversal': (PATH_TRAVERSAL_PATTERNS, 0),
+    }
+    
+    DETECTOR_MESSAGES = {
+        'sql_injection': ('sql_injection', 'Potential SQL injection detected in {param_name}'),
+        'xss': ('xss_attempt', 'Potential XSS attempt detected in {param_name}'),
+        'command_injection': ('command_injection', 'Potential command injection detected in {param_name}'),
+    }
+    
+    # Detectors applied to each input source
+    DEFAULT_RULES = {
+        'params': ('sql_injection', 'xss', 'command_injection', 'path_traversal'),
+        'json': ('sql_injection', 'xss', 'command_injection'),
+    }
+    
     # Maximum lengths for different input types
     MAX_LENGTHS = {
         'username': 150,
@@ -94,8 +219,36 @@ class InputValidationMiddleware(MiddlewareMixin):
             '/media/',
         ])
         
+        # Per-route detector overrides, e.g. {'/api/chat/': {'json': ['sql_injection', 'xss']}}
+        self.route_rules = getattr(settings, 'INPUT_VALIDATION_ROUTE_RULES', {})
+        self._route_engines = OrderedDict()
+        self._route_engines_lock = threading.Lock()
+        self._route_cache_size = 1024
+        
         # Initialize validators
         self.url_validator = URLValidator()
+        self.engine = get_validation_engine(self.DEFAULT_RULES['params'])
+    
+    def _get_route_engines(self, path: str) -> Dict[str, ValidationEngine]:
+        """Resolve the compiled engines for a path, cached per path"""
+        engines = self._route_engines.get(path)
+        if engines is not None:
+            return engines
+        
+        rules = dict(self.DEFAULT_RULES)
+        for prefix, route_rules in self.route_rules.items():
+            if path.startswith(prefix):
+                rules.update({source: tuple(detectors) for source, detectors in route_rules.items()})
+                break
+        
+        engines = {source: get_validation_engine(detectors) for source, detectors in rules.items()}
+        
+        with self._route_engines_lock:
+            self._route_engines[path] = engines
+            if len(self._route_engines) > self._route_cache_size:
+                self._route_engines.popitem(last=False)
+        
+        return engines
     
     def process_request(self, request: HttpRequest) -> Optional[HttpResponse]:
         """Process incoming request for validation"""
@@ -139,22 +292,23 @@ class InputValidationMiddleware(MiddlewareMixin):
             'sanitized_data': {},
             'validation_level': 'basic'
         }
+        engines = self._get_route_engines(request.path)
         
         # Validate GET parameters
         if request.GET:
-            get_validation = self._validate_parameters(dict(request.GET), 'GET')
+            get_validation = self._validate_parameters(dict(request.GET), 'GET', engines['params'])
             validation_result['violations'].extend(get_validation['violations'])
             validation_result['sanitized_data']['GET'] = get_validation['sanitized']
         
         # Validate POST parameters
         if request.POST:
-            post_validation = self._validate_parameters(dict(request.POST), 'POST')
+            post_validation = self._validate_parameters(dict(request.POST), 'POST', engines['params'])
             validation_result['violations'].extend(post_validation['violations'])
             validation_result['sanitized_data']['POST'] = post_validation['sanitized']
         
         # Validate JSON body
         if request.content_type == 'application/json':
-            json_validation = self._validate_json_body(request)
+            json_validation = self._validate_json_body(request, engines['json'])
             validation_result['violations'].extend(json_validation['violations'])
             validation_result['sanitized_data']['JSON'] = json_validation['sanitized']
         
@@ -177,8 +331,10 @@ class InputValidationMiddleware(MiddlewareMixin):
         
         return validation_result
     
-    def _validate_parameters(self, params: Dict[str, Any], param_type: str) -> Dict[str, Any]:
+    def _validate_parameters(self, params: Dict[str, Any], param_type: str,
+                             engine: Optional[ValidationEngine] = None) -> Dict[str, Any]:
         """Validate GET/POST parameters"""
+        engine = engine or self.engine
         violations = []
         sanitized = {}
         
@@ -199,32 +355,20 @@ class InputValidationMiddleware(MiddlewareMixin):
                     'message': f'Parameter {key} exceeds maximum length'
                 })
             
-            # SQL injection detection
-            sql_violations = self._detect_sql_injection(key, value_str)
-            violations.extend(sql_violations)
-            
-            # XSS detection
-            xss_violations = self._detect_xss(key, value_str)
-            violations.extend(xss_violations)
-            
-            # Command injection detection
-            cmd_violations = self._detect_command_injection(key, value_str)
-            violations.extend(cmd_violations)
-            
-            # Path traversal detection
-            path_violations = self._detect_path_traversal(key, value_str)
-            violations.extend(path_violations)
+            # SQL injection, XSS, command injection and path traversal detection
+            engine.scan(key, value_str, violations)
             
             # Sanitize value
-            sanitized[key] = self._sanitize_value(value_str)
+            sanitized[key] = engine.sanitize(value_str)
         
         return {
             'violations': violations,
             'sanitized': sanitized
         }
     
-    def _validate_json_body(self, request: HttpRequest) -> Dict[str, Any]:
+    def _validate_json_body(self, request: HttpRequest, engine: Optional[ValidationEngine] = None) -> Dict[str, Any]:
         """Validate JSON request body"""
+        engine = engine or get_validation_engine(self.DEFAULT_RULES['json'])
         violations = []
         sanitized = {}
         
@@ -243,7 +387,7 @@ class InputValidationMiddleware(MiddlewareMixin):
                 json_data = json.loads(request.body.decode('utf-8'))
                 
                 # Recursively validate JSON structure
-                sanitized = self._validate_json_recursive(json_data, violations)
+                sanitized = self._validate_json_recursive(json_data, violations, engine)
         
         except json.JSONDecodeError as e:
             violations.append({
@@ -263,8 +407,12 @@ class InputValidationMiddleware(MiddlewareMixin):
             'sanitized': sanitized
         }
     
-    def _validate_json_recursive(self, data: Any, violations: List[Dict]) -> Any:
+    def _validate_json_recursive(self, data: Any, violations: List[Dict],
+                                 engine: Optional[ValidationEngine] = None) -> Any:
         """Recursively validate JSON data"""
+        if engine is None:
+            engine = get_validation_engine(self.DEFAULT_RULES['json'])
+        
         if isinstance(data, dict):
             sanitized = {}
             for key, value in data.items():
@@ -278,11 +426,11 @@ class InputValidationMiddleware(MiddlewareMixin):
                     })
                 
                 # Recursively validate value
-                sanitized[key] = self._validate_json_recursive(value, violations)
+                sanitized[key] = self._validate_json_recursive(value, violations, engine)
             return sanitized
         
         elif isinstance(data, list):
-            return [self._validate_json_recursive(item, violations) for item in data]
+            return [self._validate_json_recursive(item, violations, engine) for item in data]
         
         elif isinstance(data, str):
             # Validate string values
@@ -294,11 +442,9 @@ class InputValidationMiddleware(MiddlewareMixin):
                 })
             
             # Check for malicious patterns
-            self._detect_sql_injection('json_value', data, violations)
-            self._detect_xss('json_value', data, violations)
-            self._detect_command_injection('json_value', data, violations)
+            engine.scan('json_value', data, violations)
             
-            return self._sanitize_value(data)
+            return engine.sanitize(data)
         
         else:
             return data
@@ -369,93 +515,27 @@ class InputValidationMiddleware(MiddlewareMixin):
     
     def _detect_sql_injection(self, param_name: str, value: str, violations: List[Dict] = None) -> List[Dict]:
         """Detect SQL injection patterns"""
-        if violations is None:
-            violations = []
-        
-        for pattern in self.SQL_INJECTION_PATTERNS:
-            if re.search(pattern, value, re.IGNORECASE):
-                violations.append({
-                    'type': 'sql_injection',
-                    'parameter': param_name,
-                    'severity': 'critical',
-                    'message': f'Potential SQL injection detected in {param_name}',
-                    'pattern': pattern,
-                    'value_snippet': value[:100]
-                })
-        
-        return violations
+        return self.engine.detect('sql_injection', param_name, value, [] if violations is None else violations)
     
     def _detect_xss(self, param_name: str, value: str, violations: List[Dict] = None) -> List[Dict]:
         """Detect XSS patterns"""
-        if violations is None:
-            violations = []
-        
-        for pattern in self.XSS_PATTERNS:
-            if re.search(pattern, value, re.IGNORECASE | re.DOTALL):
-                violations.append({
-                    'type': 'xss_attempt',
-                    'parameter': param_name,
-                    'severity': 'critical',
-                    'message': f'Potential XSS attempt detected in {param_name}',
-                    'pattern': pattern,
-                    'value_snippet': value[:100]
-                })
-        
-        return violations
+        return self.engine.detect('xss', param_name, value, [] if violations is None else violations)
     
     def _detect_command_injection(self, param_name: str, value: str, violations: List[Dict] = None) -> List[Dict]:
         """Detect command injection patterns"""
-        if violations is None:
-            violations = []
-        
-        for pattern in self.COMMAND_INJECTION_PATTERNS:
-            if re.search(pattern, value, re.IGNORECASE):
-                violations.append({
-                    'type': 'command_injection',
-                    'parameter': param_name,
-                    'severity': 'critical',
-                    'message': f'Potential command injection detected in {param_name}',
-                    'pattern': pattern,
-                    'value_snippet': value[:100]
-                })
-        
-        return violations
+        return self.engine.detect('command_injection', param_name, value, [] if violations is None else violations)
     
     def _detect_path_traversal(self, param_name: str, value: str, violations: List[Dict] = None) -> List[Dict]:
         """Detect path traversal patterns"""
-        if violations is None:
-            violations = []
-        
-        if self._detect_path_traversal_in_string(value):
-            violations.append({
-                'type': 'path_traversal',
-                'parameter': param_name,
-                'severity': 'critical',
-                'message': f'Path traversal attempt detected in {param_name}',
-                'value_snippet': value[:100]
-            })
-        
-        return violations
+        return self.engine.detect('path_traversal', param_name, value, [] if violations is None else violations)
     
     def _detect_path_traversal_in_string(self, value: str) -> bool:
         """Check if string contains path traversal patterns"""
-        for pattern in self.PATH_TRAVERSAL_PATTERNS:
-            if re.search(pattern, value, re.IGNORECASE):
-                return True
-        return False
+        return any(compiled.search(value) for _, compiled in self.engine.patterns['path_traversal'])
     
     def _sanitize_value(self, value: str) -> str:
         """Sanitize input value"""
-        # HTML escape and clean
-        sanitized = bleach.clean(value, tags=[], attributes={}, strip=True)
-        
-        # Remove null bytes
-        sanitized = sanitized.replace('\x00', '')
-        
-        # Normalize whitespace
-        sanitized = ' '.join(sanitized.split())
-        
-        return sanitized
+        return self.engine.sanitize(value)
     
     def _is_valid_ip(self, ip: str) -> bool:
         """Validate IP address format"""
@@ -525,7 +605,7 @@ def validate_input_string(value: str, max_length: int = 500, allow_html: bool =
     Returns:
         Validation result dictionary
     """
-    validator = InputValidationMiddleware(lambda r: None)
+    engine = get_validation_engine(InputValidationMiddleware.DEFAULT_RULES['params'])
     violations = []
     
     # Length check
@@ -537,13 +617,10 @@ def validate_input_string(value: str, max_length: int = 500, allow_html: bool =
         })
     
     # Security checks
-    validator._detect_sql_injection('input', value, violations)
-    validator._detect_xss('input', value, violations)
-    validator._detect_command_injection('input', value, violations)
-    validator._detect_path_traversal('input', value, violations)
+    engine.scan('input', value, violations)
     
     # Sanitize
-    sanitized = validator._sanitize_value(value)
+    sanitized = engine.sanitize(value)
     if not allow_html:
         sanitized = bleach.clean(sanitized, tags=[], attributes={}, strip=True)
     
@@ -0,0 +1,129 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("analytics", "0005_alter_user_max_tokens_per_month"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TrainedModel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(help_text="Model name", max_length=255)),
+                (
+                    "task",
+                    models.CharField(
+                        choices=[
+                            ("classification", "Classification"),
+                            ("regression", "Regression"),
+                        ],
+                        help_text="Prediction task",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "model_type",
+                    models.CharField(
+                        help_text="Estimator type (e.g. random_forest)", max_length=50
+                    ),
+                ),
+                (
+                    "target_column",
+                    models.CharField(
+                        help_text="Target column the model was trained on",
+                        max_length=255,
+                    ),
+                ),
+                (
+                    "feature_columns",
+                    models.JSONField(
+                        default=list, help_text="Feature columns, in training order"
+                    ),
+                ),
+                (
+                    "target_classes",
+                    models.JSONField(
+                        blank=True,
+                        help_text="Class labels for encoded classification targets",
+                        null=True,
+                    ),
+                ),
+                (
+                    "metrics",
+                    models.JSONField(
+                        default=dict, help_text="Evaluation metrics from training"
+                    ),
+                ),
+                (
+                    "artifact_path",
+                    models.CharField(
+                        help_text="Path to the serialized estimator, scaler and encoders",
+                        max_length=500,
+                    ),
+                ),
+                (
+                    "artifact_size_bytes",
+                    models.PositiveBigIntegerField(
+                        default=0, help_text="Size of the serialized estimator in bytes"
+                    ),
+                ),
+                (
+                    "artifact_sha256",
+                    models.CharField(
+                        help_text="SHA-256 of the serialized estimator, checked before loading",
+                        max_length=64,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "analysis_result",
+                    models.ForeignKey(
+                        help_text="Analysis result that trained this model",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="trained_models",
+                        to="analytics.analysisresult",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        help_text="User who owns this model",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="trained_models",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Trained Model",
+                "verbose_name_plural": "Trained Models",
+                "db_table": "analytics_trained_model",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["user", "created_at"],
+                        name="analytics_t_user_id_3b4c08_idx",
+                    ),
+                    models.Index(
+                        fields=["analysis_result"],
+                        name="analytics_t_analysi_d82de4_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
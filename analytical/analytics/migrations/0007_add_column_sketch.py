@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("analytics", "0006_add_trained_model"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="datasetcolumn",
+            name="sketch",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Streaming quantile, distinct-count, top-k and moment sketches computed at ingest",
+            ),
+        ),
+    ]
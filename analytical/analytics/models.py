@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import F
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
@@ -690,6 +691,11 @@ class DatasetColumn(models.Model):
         default=list,
         help_text="User-defined tags for categorization"
     )
+    sketch = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Streaming quantile, distinct-count, top-k and moment sketches computed at ingest"
+    )
     
     # Relationships
     dataset = models.ForeignKey(
@@ -1091,23 +1097,29 @@ class AnalysisTool(models.Model):
         return True, "Tool can be used with this dataset"
     
     def record_usage(self, success=True, execution_time=None):
-        """Record tool usage statistics"""
-        self.usage_count += 1
+        """
+        Record tool usage statistics
+        
+        Counters are incremented in the database by a single UPDATE, so
+        concurrent executions do not overwrite each other, and no post_save
+        is sent, so usage does not invalidate cached tool lookups.
+        """
+        updates = {
+            'usage_count': F('usage_count') + 1,
+            'last_used': timezone.now()
+        }
         if success:
-            self.success_count += 1
+            updates['success_count'] = F('success_count') + 1
         else:
-            self.error_count += 1
+            updates['error_count'] = F('error_count') + 1
         
         if execution_time is not None:
-            # Update average execution time
-            total_time = self.average_execution_time * (self.usage_count - 1) + execution_time
-            self.average_execution_time = total_time / self.usage_count
+            # Update average execution time (right-hand sides read the old row)
+            updates['average_execution_time'] = (
+                (F('average_execution_time') * F('usage_count') + execution_time) / (F('usage_count') + 1)
+            )
         
-        self.last_used = timezone.now()
-        self.save(update_fields=[
-            'usage_count', 'success_count', 'error_count', 
-            'average_execution_time', 'last_used'
-        ])
+        AnalysisTool.objects.filter(pk=self.pk).update(**updates)
     
     def get_usage_summary(self):
         """Get comprehensive usage summary"""
@@ -2126,6 +2138,93 @@ class GeneratedImage(models.Model):
         return f"{self.name} ({self.image_format})"
 
 
+class TrainedModel(models.Model):
+    """
+    TrainedModel model for persisted estimators that can score new datasets
+    """
+    # Basic Information
+    name = models.CharField(
+        max_length=255,
+        help_text="Model name"
+    )
+    task = models.CharField(
+        max_length=20,
+        choices=[
+            ('classification', 'Classification'),
+            ('regression', 'Regression'),
+        ],
+        help_text="Prediction task"
+    )
+    model_type = models.CharField(
+        max_length=50,
+        help_text="Estimator type (e.g. random_forest)"
+    )
+    
+    # Feature Specification
+    target_column = models.CharField(
+        max_length=255,
+        help_text="Target column the model was trained on"
+    )
+    feature_columns = models.JSONField(
+        default=list,
+        help_text="Feature columns, in training order"
+    )
+    target_classes = models.JSONField(
+        blank=True,
+        null=True,
+        help_text="Class labels for encoded classification targets"
+    )
+    metrics = models.JSONField(
+        default=dict,
+        help_text="Evaluation metrics from training"
+    )
+    
+    # Artifact Information
+    artifact_path = models.CharField(
+        max_length=500,
+        help_text="Path to the serialized estimator, scaler and encoders"
+    )
+    artifact_size_bytes = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Size of the serialized estimator in bytes"
+    )
+    artifact_sha256 = models.CharField(
+        max_length=64,
+        help_text="SHA-256 of the serialized estimator, checked before loading"
+    )
+    
+    # Relationships
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='trained_models',
+        help_text="User who owns this model"
+    )
+    analysis_result = models.ForeignKey(
+        AnalysisResult,
+        on_delete=models.CASCADE,
+        related_name='trained_models',
+        help_text="Analysis result that trained this model"
+    )
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'analytics_trained_model'
+        verbose_name = 'Trained Model'
+        verbose_name_plural = 'Trained Models'
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['analysis_result']),
+        ]
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.name} ({self.model_type})"
+
+
 class SandboxExecution(models.Model):
     """
     SandboxExecution model for secure code execution
@@ -8,10 +8,12 @@ from .file_processing import FileProcessingService
 from .column_type_manager import ColumnTypeManager
 from .analysis_executor import AnalysisExecutor
 from .audit_trail_manager import AuditTrailManager
+from .audit_buffer import AuditTrailBuffer, audit_trail_buffer
 from .session_manager import SessionManager
 from .llm_processor import LLMProcessor
 from .agentic_ai_controller import AgenticAIController
 from .rag_service import RAGService
+from .rag_usage_aggregator import RAGUsageAggregator, rag_usage_aggregator
 from .vector_note_manager import VectorNoteManager
 from .google_ai_service import GoogleAIService
 from .logging_service import StructuredLogger
@@ -19,9 +21,17 @@ from .image_manager import ImageManager
 from .sandbox_executor import SandboxExecutor
 from .report_generator import ReportGenerator
 from .memory_optimizer import MemoryOptimizer, memory_optimizer
+from .feature_matrix_cache import FeatureMatrixCache, feature_matrix_cache, mark_dataset_frame
+from .model_registry import ModelRegistry, model_registry
+from .column_sketches import ColumnSketchService, column_sketch_service
+from .keyset_pagination import KeysetPaginator, keyset_paginator
+from .query_instrumentation import QueryInstrumentation, query_instrumentation
 from .query_optimizer import QueryOptimizer, query_optimizer
 from .image_compression import ImageCompressionService, image_compression_service
+from .cache_tags import CacheTagService, cache_tag_service
+from .cache_metrics import CacheMetricsCollector, cache_metrics
 from .caching_strategy import CachingStrategyService, caching_strategy_service
+from .dashboard_summary import DashboardSummaryService, dashboard_summary_service
 from .background_monitoring import BackgroundMonitoringService, background_monitoring_service
 
 __all__ = [
@@ -29,10 +39,14 @@ __all__ = [
     'ColumnTypeManager', 
     'AnalysisExecutor',
     'AuditTrailManager',
+    'AuditTrailBuffer',
+    'audit_trail_buffer',
     'SessionManager',
     'LLMProcessor',
     'AgenticAIController',
     'RAGService',
+    'RAGUsageAggregator',
+    'rag_usage_aggregator',
     'VectorNoteManager',
     'GoogleAIService',
     'StructuredLogger',
@@ -41,12 +55,29 @@ __all__ = [
     'ReportGenerator',
     'MemoryOptimizer',
     'memory_optimizer',
+    'FeatureMatrixCache',
+    'feature_matrix_cache',
+    'mark_dataset_frame',
+    'ModelRegistry',
+    'model_registry',
+    'ColumnSketchService',
+    'column_sketch_service',
+    'KeysetPaginator',
+    'keyset_paginator',
+    'QueryInstrumentation',
+    'query_instrumentation',
     'QueryOptimizer',
     'query_optimizer',
     'ImageCompressionService',
     'image_compression_service',
+    'CacheTagService',
+    'cache_tag_service',
+    'CacheMetricsCollector',
+    'cache_metrics',
     'CachingStrategyService',
     'caching_strategy_service',
+    'DashboardSummaryService',
+    'dashboard_summary_service',
     'BackgroundMonitoringService',
     'background_monitoring_service'
 ]
@@ -472,7 +472,7 @@ class AgenticAIController:
                 'name': dataset.name,
                 'row_count': dataset.row_count,
                 'column_count': dataset.column_count,
-                'column_types': {col.name: col.confirmed_type for col in dataset.columns.all()}
+                'column_types': {col.name: col.confirmed_type for col in dataset.columns.defer('sketch')}
             }
             
             # RAG Retrieval: Get relevant context for planning
@@ -721,7 +721,7 @@ class AgenticAIController:
             Description: {dataset.description or 'No description available'}
             Rows: {dataset.row_count}
             Columns: {dataset.column_count}
-            Column Types: {', '.join([f'{col.name}: {col.confirmed_type}' for col in dataset.columns.all()])}
+            Column Types: {', '.join([f'{col.name}: {col.confirmed_type}' for col in dataset.columns.defer('sketch')])}
             """
             context_parts.insert(0, dataset_context)
             
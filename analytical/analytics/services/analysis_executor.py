@@ -8,6 +8,7 @@ secure execution environment.
 
 import json
 import time
+import hashlib
 import logging
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
@@ -30,7 +31,11 @@ from analytics.models import (
     GeneratedImage, User, AuditTrail
 )
 from analytics.services.audit_trail_manager import AuditTrailManager
+from analytics.services.caching_strategy import caching_strategy_service
+from analytics.services.column_sketches import column_sketch_service
 from analytics.services.column_type_manager import ColumnTypeManager
+from analytics.services.feature_matrix_cache import mark_dataset_frame
+from analytics.services.model_registry import model_registry
 from analytics.services.vector_note_manager import VectorNoteManager
 
 logger = logging.getLogger(__name__)
@@ -78,7 +83,7 @@ class AnalysisExecutor:
         
         try:
             # Get analysis tool
-            tool = AnalysisTool.objects.get(name=tool_name, is_active=True)
+            tool = caching_strategy_service.get_active_tool(tool_name)
             
             # Validate parameters
             self._validate_parameters(tool, parameters)
@@ -90,53 +95,17 @@ class AnalysisExecutor:
                 logger.info(f"Using cached result for tool {tool_name}")
                 return self._load_cached_result(cached_result)
             
-            # Load dataset
-            dataset = session.primary_dataset
-            df = self._load_dataset(dataset)
-            
-            # Validate column types
-            self._validate_column_types(tool, df)
-            
-            # Execute tool
-            result_data = self._execute_tool_function(tool, parameters, df, session)
-            
-            # Create analysis result
-            with transaction.atomic():
-                analysis_result = self._create_analysis_result(
-                    tool, parameters, result_data, session, user, 
-                    time.time() - start_time, correlation_id
-                )
-                
-                # Cache the result
-                self._cache_result(cache_key, analysis_result)
+            # Identical concurrent requests run the analysis once; the others
+            # wait for it and reuse its cached result
+            with caching_strategy_service.single_flight(cache_key) as leader:
+                if not leader:
+                    cached_result = cache.get(cache_key)
+                    if cached_result:
+                        logger.info(f"Using cached result for tool {tool_name}")
+                        return self._load_cached_result(cached_result)
                 
-                # RAG Indexing: Create vector note for analysis result
-                self._index_analysis_result_for_rag(analysis_result, result_data, user, session)
-                
-                # Log audit trail
-                self.audit_manager.log_action(
-                    user_id=user.id,
-                    action_type='analysis',
-                    action_category='analysis',
-                    resource_type='analysis_result',
-                    resource_id=analysis_result.id,
-                    resource_name=f"{tool.display_name} Analysis",
-                    action_description=f"Analysis tool {tool.display_name} executed successfully",
-                    success=True,
-                    correlation_id=correlation_id,
-                    execution_time_ms=int((time.time() - start_time) * 1000)
-                )
-            
-            logger.info(f"Analysis {tool_name} executed successfully in {time.time() - start_time:.2f}s")
-            
-            return {
-                'analysis_id': analysis_result.id,
-                'tool_name': tool.display_name,
-                'result_data': result_data,
-                'execution_time': time.time() - start_time,
-                'cached': False,
-                'success': True
-            }
+                return self._run_analysis(tool, tool_name, parameters, session, user,
+                                          cache_key, start_time, correlation_id)
             
         except AnalysisTool.DoesNotExist:
             error_msg = f"Analysis tool '{tool_name}' not found or inactive"
@@ -150,6 +119,67 @@ class AnalysisExecutor:
             self._log_analysis_error(user, tool_name, error_msg, correlation_id)
             raise
     
+    def _run_analysis(self, tool: AnalysisTool, tool_name: str, parameters: Dict[str, Any],
+                      session: AnalysisSession, user: User, cache_key: str,
+                      start_time: float, correlation_id: str) -> Dict[str, Any]:
+        """Execute a tool on the session's dataset, then store, cache, index and audit the result"""
+        dataset = session.primary_dataset
+        
+        # On large datasets, tools that can answer from ingest-time column sketches skip
+        # loading the dataset (parameters may set exact=True to always run on the data)
+        result_data = column_sketch_service.answer(tool.tool_function, dataset, parameters)
+        if result_data is None:
+            # Load dataset
+            df = self._load_dataset(dataset)
+            
+            # Validate column types
+            self._validate_column_types(tool, df)
+            
+            # Execute tool
+            result_data = self._execute_tool_function(tool, parameters, df, session)
+        
+        # Create analysis result
+        with transaction.atomic():
+            analysis_result = self._create_analysis_result(
+                tool, parameters, result_data, session, user, 
+                time.time() - start_time, correlation_id
+            )
+            
+            # Register a model trained by the tool so it can score later datasets
+            trained_model = model_registry.register(analysis_result, result_data)
+            
+            # Cache the result
+            self._cache_result(cache_key, analysis_result)
+            
+            # RAG Indexing: Create vector note for analysis result
+            self._index_analysis_result_for_rag(analysis_result, result_data, user, session)
+            
+            # Log audit trail
+            self.audit_manager.log_action(
+                user_id=user.id,
+                action_type='analysis',
+                action_category='analysis',
+                resource_type='analysis_result',
+                resource_id=analysis_result.id,
+                resource_name=f"{tool.display_name} Analysis",
+                action_description=f"Analysis tool {tool.display_name} executed successfully",
+                success=True,
+                correlation_id=correlation_id,
+                execution_time_ms=int((time.time() - start_time) * 1000)
+            )
+        
+        logger.info(f"Analysis {tool_name} executed successfully in {time.time() - start_time:.2f}s")
+        
+        return {
+            'analysis_id': analysis_result.id,
+            'tool_name': tool.display_name,
+            'result_data': result_data,
+            'model_id': trained_model.id if trained_model else None,
+            'execution_time': time.time() - start_time,
+            'cached': False,
+            'success': True
+        }
+    
     def _validate_parameters(self, tool: AnalysisTool, parameters: Dict[str, Any]) -> None:
         """Validate parameters against tool schema"""
         required_params = tool.required_parameters
@@ -235,7 +265,8 @@ class AnalysisExecutor:
                 raise ValueError("Dataset does not have a Parquet file")
             
             df = pd.read_parquet(dataset.parquet_path)
-            return df
+            # Keys prepared feature matrices shared by ML tools on this dataset
+            return mark_dataset_frame(df, dataset.file_hash)
             
         except Exception as e:
             raise ValueError(f"Failed to load dataset: {str(e)}")
@@ -304,8 +335,9 @@ class AnalysisExecutor:
             'session_id': session.id
         }
         
-        key_string = json.dumps(key_data, sort_keys=True)
-        return f"analysis_{hash(key_string)}"
+        # hash() is salted per process; use a stable digest so workers share entries
+        key_string = json.dumps(key_data, sort_keys=True, default=str)
+        return f"analysis_{hashlib.md5(key_string.encode()).hexdigest()}"
     
     def _cache_result(self, cache_key: str, analysis_result: AnalysisResult) -> None:
         """Cache analysis result"""
@@ -482,7 +514,7 @@ class AnalysisExecutor:
         """Get suggested analysis tools for a dataset"""
         try:
             # Get dataset columns
-            columns = dataset.columns.all()
+            columns = dataset.columns.defer('sketch')
             
             # Get available tools
             available_tools = AnalysisTool.objects.filter(is_active=True)
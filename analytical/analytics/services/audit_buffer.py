@@ -0,0 +1,329 @@
+"""
+Audit Trail Buffer for Deferred, Batched Audit Writes
+
+This service takes audit trail entries off the request hot path. Entries are
+queued in-process (or in Redis for guaranteed delivery) and written with
+bulk_create by a background writer once a size or time threshold is reached.
+"""
+
+import os
+import json
+import atexit
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Any
+from django.conf import settings
+from django.db import transaction, close_old_connections, connection, IntegrityError
+from django.utils.dateparse import parse_datetime
+import redis
+
+from analytics.models import AuditTrail
+
+logger = logging.getLogger(__name__)
+
+
+class AuditTrailBuffer:
+    """
+    Buffered audit trail writer with size/time based flushing
+
+    Delivery modes:
+        sync: write each entry immediately (previous behaviour)
+        buffered: queue entries in process memory and bulk insert them
+        durable: queue entries in a Redis list so they survive a process crash;
+                 the list is only trimmed after the batch has been written;
+                 entries that keep failing move to a dead-letter list
+
+    Note that created_at is set when a batch is written, so buffered entries
+    may be stamped up to AUDIT_FLUSH_INTERVAL seconds after the event.
+    """
+
+    QUEUE_KEY = 'analytical:audit:queue'
+    DRAIN_LOCK_KEY = 'analytical:audit:drain_lock'
+    DEAD_LETTER_KEY = 'analytical:audit:dead_letter'
+
+    # Fields serialized for the durable queue
+    ENTRY_FIELDS = [
+        'user_id', 'session_id', 'action_type', 'action_category', 'resource_type',
+        'resource_id', 'resource_name', 'action_description', 'before_snapshot',
+        'after_snapshot', 'ip_address', 'user_agent', 'correlation_id', 'request_id',
+        'http_session_id', 'success', 'error_message', 'execution_time_ms',
+        'data_changed', 'sensitive_data_accessed', 'compliance_flags',
+        'retention_status', 'retention_expires_at', 'created_by'
+    ]
+
+    def __init__(self):
+        self.batch_size = getattr(settings, 'AUDIT_BATCH_SIZE', 100)
+        self.flush_interval = getattr(settings, 'AUDIT_FLUSH_INTERVAL', 2.0)
+        self.max_buffer_size = getattr(settings, 'AUDIT_MAX_BUFFER_SIZE', 10000)
+        self.max_attempts = getattr(settings, 'AUDIT_MAX_ATTEMPTS', 5)
+
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._writer_thread = None
+        self._writer_pid = None
+        self._redis_client = None
+
+        # Performance metrics
+        self.metrics = {
+            'enqueued': 0,
+            'written': 0,
+            'batches': 0,
+            'failed': 0,
+            'dropped': 0,
+            'dead_lettered': 0
+        }
+
+        atexit.register(self.flush)
+
+    @property
+    def delivery_mode(self) -> str:
+        """Current delivery mode (read per call so settings overrides apply)"""
+        return getattr(settings, 'AUDIT_DELIVERY_MODE', 'buffered')
+
+    def _get_redis_client(self) -> redis.Redis:
+        """Get Redis client connection for the durable queue"""
+        if self._redis_client is None:
+            redis_url = getattr(settings, 'CACHES', {}).get('default', {}).get('LOCATION', 'redis://127.0.0.1:6379/1')
+            if redis_url.startswith('redis://'):
+                self._redis_client = redis.from_url(redis_url, decode_responses=True)
+            else:
+                self._redis_client = redis.Redis(host='127.0.0.1', port=6379, db=1, decode_responses=True)
+        return self._redis_client
+
+    def enqueue(self, audit_entry: AuditTrail) -> None:
+        """
+        Queue an unsaved audit entry for a batched write
+
+        Args:
+            audit_entry: Unsaved AuditTrail instance
+        """
+        if self.delivery_mode == 'durable':
+            try:
+                self._get_redis_client().rpush(self.QUEUE_KEY, json.dumps(self._serialize(audit_entry)))
+                self.metrics['enqueued'] += 1
+                self._ensure_writer()
+                return
+            except Exception as e:
+                logger.warning(f"Durable audit queue unavailable, buffering in process: {str(e)}")
+
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer_size:
+                # Never block or grow without bound on the request path
+                self._buffer.popleft()
+                self.metrics['dropped'] += 1
+            self._buffer.append(audit_entry)
+            self.metrics['enqueued'] += 1
+            buffer_full = len(self._buffer) >= self.batch_size
+
+        self._ensure_writer()
+        if buffer_full:
+            self._flush_event.set()
+
+    def flush(self) -> int:
+        """
+        Write all queued entries now
+
+        Returns:
+            Number of entries written
+        """
+        with self._lock:
+            entries = list(self._buffer)
+            self._buffer.clear()
+
+        written = len(entries) - len(self._write_batch(entries)) if entries else 0
+
+        if self.delivery_mode == 'durable':
+            written += self.drain_durable_queue()
+
+        return written
+
+    def drain_durable_queue(self, max_batches: int = 100) -> int:
+        """
+        Write entries from the Redis queue in batches
+
+        Entries are read without removal and trimmed only after the batch has
+        been written, so a crash mid-batch results in redelivery rather than
+        loss; redelivered entries whose correlation_id is already stored are
+        skipped. While the database is unreachable the queue is left
+        untouched. Entries that fail on their own are pushed back onto the end
+        of the queue, and moved to the dead-letter list after
+        AUDIT_MAX_ATTEMPTS attempts.
+
+        Returns:
+            Number of entries written
+        """
+        written = 0
+        try:
+            client = self._get_redis_client()
+            # Only one drainer at a time, otherwise batches could be trimmed twice
+            if not client.set(self.DRAIN_LOCK_KEY, os.getpid(), nx=True, ex=60):
+                return 0
+            try:
+                for _ in range(max_batches):
+                    raw_entries = client.lrange(self.QUEUE_KEY, 0, self.batch_size - 1)
+                    if not raw_entries:
+                        break
+                    queued = [json.loads(raw) for raw in raw_entries]
+                    attempts = [data.pop('attempts', 0) for data in queued]
+                    entries = [self._deserialize(data) for data in queued]
+                    failed = self._write_batch(entries)
+                    written += len(entries) - len(failed)
+                    if len(failed) == len(entries) and not self._database_available():
+                        # Database down: keep the batch queued and retry on the next drain
+                        break
+
+                    failed_ids = {id(entry) for entry in failed}
+                    pipeline = client.pipeline()
+                    pipeline.ltrim(self.QUEUE_KEY, len(raw_entries), -1)
+                    for entry, attempt in zip(entries, attempts):
+                        if id(entry) not in failed_ids:
+                            continue
+                        data = {**self._serialize(entry), 'attempts': attempt + 1}
+                        if attempt + 1 >= self.max_attempts:
+                            pipeline.rpush(self.DEAD_LETTER_KEY, json.dumps(data))
+                            self.metrics['dead_lettered'] += 1
+                            logger.error(f"Audit entry {entry.correlation_id} moved to the dead-letter list "
+                                         f"after {attempt + 1} attempts")
+                        else:
+                            pipeline.rpush(self.QUEUE_KEY, json.dumps(data))
+                    pipeline.execute()
+                    if len(failed) == len(entries):
+                        break
+            finally:
+                client.delete(self.DRAIN_LOCK_KEY)
+        except Exception as e:
+            logger.error(f"Failed to drain durable audit queue: {str(e)}")
+        return written
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get buffer statistics"""
+        return {
+            'delivery_mode': self.delivery_mode,
+            'buffered': len(self._buffer),
+            'batch_size': self.batch_size,
+            'flush_interval': self.flush_interval,
+            **self.metrics
+        }
+
+    def _write_batch(self, entries: List[AuditTrail]) -> List[AuditTrail]:
+        """
+        Bulk insert a batch, falling back to row inserts if the batch is rejected
+
+        Entries whose correlation_id is already stored (redelivered from the
+        durable queue) are skipped and count as written. Each row insert runs
+        in its own savepoint so a failure cannot break a caller's transaction.
+
+        Returns:
+            The entries that could not be written
+        """
+        stored = self._stored_correlation_ids(entries)
+        if stored:
+            entries = [entry for entry in entries if entry.correlation_id not in stored]
+            if not entries:
+                return []
+
+        try:
+            with transaction.atomic():
+                AuditTrail.objects.bulk_create(entries)
+            self.metrics['written'] += len(entries)
+            self.metrics['batches'] += 1
+
+            # bulk_create sends no post_save signals
+            from analytics.services.dashboard_summary import dashboard_summary_service
+            dashboard_summary_service.record_audit_entries(entries)
+            return []
+        except Exception as e:
+            logger.warning(f"Audit batch insert failed, retrying row by row: {str(e)}")
+
+        failed = []
+        for entry in entries:
+            try:
+                entry.pk = None
+                with transaction.atomic():
+                    entry.save(force_insert=True)
+            except IntegrityError as e:
+                if entry.correlation_id and AuditTrail.objects.filter(correlation_id=entry.correlation_id).exists():
+                    # Already written by another drainer
+                    continue
+                self.metrics['failed'] += 1
+                failed.append(entry)
+                logger.error(f"Failed to write audit entry {entry.correlation_id}: {str(e)}")
+            except Exception as e:
+                self.metrics['failed'] += 1
+                failed.append(entry)
+                logger.error(f"Failed to write audit entry {entry.correlation_id}: {str(e)}")
+        self.metrics['written'] += len(entries) - len(failed)
+        return failed
+
+    def _stored_correlation_ids(self, entries: List[AuditTrail]) -> set:
+        """Correlation ids of entries that are already written"""
+        correlation_ids = [entry.correlation_id for entry in entries if entry.correlation_id]
+        if not correlation_ids:
+            return set()
+        try:
+            return set(AuditTrail.objects.filter(
+                correlation_id__in=correlation_ids
+            ).values_list('correlation_id', flat=True))
+        except Exception as e:
+            logger.warning(f"Failed to check for already written audit entries: {str(e)}")
+            return set()
+
+    def _database_available(self) -> bool:
+        """Whether the database accepts queries"""
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return True
+        except Exception:
+            return False
+
+    def _ensure_writer(self) -> None:
+        """Start the background writer, restarting it after a fork (e.g. Celery prefork)"""
+        if self._writer_thread and self._writer_thread.is_alive() and self._writer_pid == os.getpid():
+            return
+        with self._lock:
+            if self._writer_thread and self._writer_thread.is_alive() and self._writer_pid == os.getpid():
+                return
+            self._writer_pid = os.getpid()
+            self._writer_thread = threading.Thread(target=self._run_writer, daemon=True)
+            self._writer_thread.start()
+
+    def _run_writer(self) -> None:
+        """Background writer loop"""
+        while True:
+            self._flush_event.wait(self.flush_interval)
+            self._flush_event.clear()
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception as e:
+                logger.error(f"Audit writer flush failed: {str(e)}")
+
+    def _serialize(self, audit_entry: AuditTrail) -> Dict[str, Any]:
+        """Serialize an unsaved audit entry for the durable queue"""
+        data = {field: getattr(audit_entry, field) for field in self.ENTRY_FIELDS}
+        if data['retention_expires_at']:
+            data['retention_expires_at'] = data['retention_expires_at'].isoformat()
+        return data
+
+    def _deserialize(self, data: Dict[str, Any]) -> AuditTrail:
+        """Rebuild an unsaved audit entry from the durable queue"""
+        if data.get('retention_expires_at'):
+            data['retention_expires_at'] = parse_datetime(data['retention_expires_at'])
+        return AuditTrail(**data)
+
+
+# Global instance for easy access
+audit_trail_buffer = AuditTrailBuffer()
+
+
+def flush_audit_buffer() -> int:
+    """
+    Convenience function to write all queued audit entries
+
+    Returns:
+        Number of entries written
+    """
+    return audit_trail_buffer.flush()
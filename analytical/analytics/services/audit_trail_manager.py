@@ -11,11 +11,12 @@ import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from django.conf import settings
+from django.db.models import QuerySet
 from django.utils import timezone
-from django.db import transaction
 from django.contrib.auth import get_user_model
 
 from analytics.models import AuditTrail
+from analytics.services.audit_buffer import audit_trail_buffer
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -33,6 +34,8 @@ class AuditTrailManager:
             'password', 'token', 'key', 'secret', 'ssn', 'credit_card',
             'phone', 'email', 'address', 'ip_address'
         ]
+        # Security-critical events are always written synchronously
+        self.sync_categories = getattr(settings, 'AUDIT_SYNC_CATEGORIES', ['security', 'authentication'])
     
     def log_action(self, user_id: Optional[int], action_type: str, action_category: str,
                    resource_type: str, resource_id: Optional[int] = None,
@@ -68,7 +71,7 @@ class AuditTrailManager:
             correlation_id: Unique correlation ID for tracking related events
             
         Returns:
-            AuditTrail object
+            AuditTrail object (unsaved when the entry was queued for a batched write)
         """
         try:
             # Generate correlation ID if not provided
@@ -94,41 +97,45 @@ class AuditTrailManager:
             if after_snapshot and self.mask_sensitive_data:
                 after_snapshot = self._mask_sensitive_data(after_snapshot)
             
-            # Create audit trail entry
-            with transaction.atomic():
-                audit_entry = AuditTrail.objects.create(
-                    user_id=user_id,
-                    action_type=action_type,
-                    action_category=action_category,
-                    resource_type=resource_type,
-                    resource_id=resource_id,
-                    resource_name=resource_name,
-                    action_description=action_description or f"{action_type} action performed",
-                    before_snapshot=before_snapshot or {},
-                    after_snapshot=after_snapshot or {},
-                    ip_address=ip_address,
-                    user_agent=user_agent,
-                    correlation_id=correlation_id,
-                    request_id=request_id,
-                    http_session_id=http_session_id,
-                    success=success,
-                    error_message=error_message,
-                    execution_time_ms=execution_time_ms or 0,
-                    data_changed=data_changed,
-                    sensitive_data_accessed=sensitive_data_accessed,
-                    compliance_flags=compliance_flags or [],
-                    retention_status='active',
-                    retention_expires_at=timezone.now() + timedelta(days=self.retention_days),
-                    created_by='system' if user_id is None else str(user_id)
-                )
-                
-                # Add additional details as separate records
-                if additional_details:
-                    self._add_audit_details(audit_entry, additional_details)
-                
-                logger.info(f"Audit trail logged: {action_type} - {action_description}")
-                
-                return audit_entry
+            # Store additional details with the entry instead of a follow-up UPDATE
+            if additional_details:
+                after_snapshot = dict(after_snapshot or {})
+                after_snapshot['additional_details'] = additional_details
+            
+            audit_entry = AuditTrail(
+                user_id=user_id,
+                action_type=action_type,
+                action_category=action_category,
+                resource_type=resource_type,
+                resource_id=resource_id,
+                resource_name=resource_name,
+                action_description=action_description or f"{action_type} action performed",
+                before_snapshot=before_snapshot or {},
+                after_snapshot=after_snapshot or {},
+                ip_address=ip_address,
+                user_agent=user_agent,
+                correlation_id=correlation_id,
+                request_id=request_id,
+                http_session_id=http_session_id,
+                success=success,
+                error_message=error_message,
+                execution_time_ms=execution_time_ms or 0,
+                data_changed=data_changed,
+                sensitive_data_accessed=sensitive_data_accessed,
+                compliance_flags=compliance_flags or [],
+                retention_status='active',
+                retention_expires_at=timezone.now() + timedelta(days=self.retention_days),
+                created_by='system' if user_id is None else str(user_id)
+            )
+            
+            if audit_trail_buffer.delivery_mode == 'sync' or action_category in self.sync_categories:
+                audit_entry.save(force_insert=True)
+            else:
+                audit_trail_buffer.enqueue(audit_entry)
+            
+            logger.info(f"Audit trail logged: {action_type} - {action_description}")
+            
+            return audit_entry
                 
         except Exception as e:
             logger.error(f"Failed to log audit trail: {str(e)}", exc_info=True)
@@ -204,6 +211,16 @@ class AuditTrailManager:
                        resource_type: Optional[str] = None, start_date: Optional[datetime] = None,
                        end_date: Optional[datetime] = None, limit: int = 100) -> List[AuditTrail]:
         """Retrieve audit trail records with filtering"""
+        queryset = self.get_audit_trail_queryset(user_id, action_type, resource_type, start_date, end_date)
+        return queryset.order_by('-created_at')[:limit]
+    
+    def get_audit_trail_queryset(self, user_id: Optional[int] = None, action_type: Optional[str] = None,
+                                 resource_type: Optional[str] = None, start_date: Optional[datetime] = None,
+                                 end_date: Optional[datetime] = None) -> QuerySet:
+        """Filtered, unsliced audit trail queryset (for keyset pagination and exports)"""
+        # Make queued entries visible to the reader
+        audit_trail_buffer.flush()
+        
         queryset = AuditTrail.objects.all()
         
         if user_id is not None:
@@ -221,7 +238,7 @@ class AuditTrailManager:
         if end_date:
             queryset = queryset.filter(created_at__lte=end_date)
         
-        return queryset.order_by('-created_at')[:limit]
+        return queryset
     
     def export_audit_data(self, start_date: datetime, end_date: datetime,
                          format: str = 'json') -> str:
@@ -313,14 +330,6 @@ class AuditTrailManager:
         else:
             return data
     
-    def _add_audit_details(self, audit_entry: AuditTrail, details: Dict[str, Any]) -> None:
-        """Add additional details to the audit trail's after_snapshot field"""
-        # Store additional details in the after_snapshot field
-        current_snapshot = audit_entry.after_snapshot or {}
-        current_snapshot['additional_details'] = details
-        audit_entry.after_snapshot = current_snapshot
-        audit_entry.save(update_fields=['after_snapshot'])
-    
     def _create_minimal_audit_entry(self, user_id: Optional[int], action_type: str,
                                    action_category: str, resource_type: str,
                                    error_message: str) -> AuditTrail:
@@ -256,12 +256,11 @@ class BackgroundMonitoringService:
             
             # Cache performance
             cache_stats = caching_strategy_service.get_cache_stats()
-            cache_hit_rate = cache_stats.get('metrics', {}).get('cache_hits', 0) / max(
-                cache_stats.get('metrics', {}).get('cache_hits', 0) + 
-                cache_stats.get('metrics', {}).get('cache_misses', 1), 1
-            )
+            shared_totals = cache_stats.get('shared', {}).get('totals', {})
+            cache_hit_rate = shared_totals.get('hit_ratio', 0.0)
+            cache_lookups = shared_totals.get('hits', 0) + shared_totals.get('near_hits', 0) + shared_totals.get('misses', 0)
             
-            if cache_hit_rate < 0.7:  # Less than 70% hit rate
+            if cache_lookups and cache_hit_rate < 0.7:  # Less than 70% hit rate across all workers
                 self._trigger_alert('low_cache_hit_rate', {
                     'hit_rate': cache_hit_rate,
                     'threshold': 0.7
@@ -0,0 +1,224 @@
+"""
+Cache Metrics Service
+
+Records cache hits, misses, bytes written and latency per keyspace into
+shared Redis hash counters, so statistics are aggregated across every worker
+process instead of living in per-process dicts. Events are buffered in
+process and flushed with one pipelined HINCRBY batch every few seconds.
+"""
+
+import re
+import time
+import atexit
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, Any, Optional
+from django.conf import settings
+from django.utils import timezone
+import redis
+
+logger = logging.getLogger(__name__)
+
+
+class CacheMetricsCollector:
+    """
+    Shared per-keyspace cache counters
+
+    Counter fields per keyspace: hits, near_hits, misses, sets, deletes,
+    bytes_written, get_latency_ms/get_count and load_latency_ms/load_count.
+    """
+
+    METRICS_KEY = 'analytical:cache:metrics:{keyspace}'
+    KEYSPACES_KEY = 'analytical:cache:metrics:keyspaces'
+
+    FLOAT_FIELDS = ('get_latency_ms', 'load_latency_ms')
+
+    _KEYSPACE_PATTERN = re.compile(r'[A-Za-z_]*[A-Za-z]')
+
+    def __init__(self):
+        self.enabled = getattr(settings, 'CACHE_METRICS_ENABLED', True)
+        self.flush_interval = getattr(settings, 'CACHE_METRICS_FLUSH_INTERVAL', 5.0)
+        self.flush_threshold = getattr(settings, 'CACHE_METRICS_FLUSH_THRESHOLD', 1000)
+        self._pending = defaultdict(lambda: defaultdict(float))
+        self._pending_events = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._redis_client = None
+        atexit.register(self.flush)
+
+    def _get_redis_client(self) -> redis.Redis:
+        """Get Redis client connection"""
+        if self._redis_client is None:
+            redis_url = getattr(settings, 'CACHES', {}).get('default', {}).get('LOCATION', 'redis://127.0.0.1:6379/1')
+            if redis_url.startswith('redis://'):
+                self._redis_client = redis.from_url(redis_url, decode_responses=True)
+            else:
+                self._redis_client = redis.Redis(host='127.0.0.1', port=6379, db=1, decode_responses=True)
+        return self._redis_client
+
+    @classmethod
+    def keyspace_for(cls, cache_key: str) -> str:
+        """
+        Derive a keyspace from a cache key
+
+        'dataset:42' -> 'dataset', 'session_7' -> 'session',
+        'query_optimizer:v3:user_datasets_1' -> 'query_optimizer'
+        """
+        match = cls._KEYSPACE_PATTERN.match(cache_key.split(':', 1)[0])
+        return match.group(0) if match else 'other'
+
+    def record(self, keyspace: str, hits: int = 0, near_hits: int = 0, misses: int = 0,
+               sets: int = 0, deletes: int = 0, bytes_written: int = 0,
+               get_latency: Optional[float] = None, load_latency: Optional[float] = None) -> None:
+        """
+        Record cache events for a keyspace
+
+        Args:
+            keyspace: Keyspace name
+            hits: Shared cache hits
+            near_hits: Per-process near cache hits
+            misses: Misses in every tier
+            sets: Entries written
+            deletes: Entries deleted
+            bytes_written: Serialized size of written entries
+            get_latency: Shared cache lookup time in seconds
+            load_latency: Time to compute a missing entry in seconds
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            counters = self._pending[keyspace]
+            for field, value in (('hits', hits), ('near_hits', near_hits), ('misses', misses),
+                                 ('sets', sets), ('deletes', deletes), ('bytes_written', bytes_written)):
+                if value:
+                    counters[field] += value
+            if get_latency is not None:
+                counters['get_latency_ms'] += get_latency * 1000
+                counters['get_count'] += 1
+            if load_latency is not None:
+                counters['load_latency_ms'] += load_latency * 1000
+                counters['load_count'] += 1
+            self._pending_events += 1
+
+            due = (self._pending_events >= self.flush_threshold
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+
+        if due:
+            self.flush()
+
+    def flush(self) -> bool:
+        """
+        Push buffered counters to Redis in one pipelined batch
+
+        Returns:
+            True if the buffer was flushed (or empty)
+        """
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(lambda: defaultdict(float))
+            self._pending_events = 0
+            self._last_flush = time.monotonic()
+
+        if not pending:
+            return True
+
+        try:
+            pipe = self._get_redis_client().pipeline(transaction=False)
+            pipe.sadd(self.KEYSPACES_KEY, *pending.keys())
+            for keyspace, counters in pending.items():
+                metrics_key = self.METRICS_KEY.format(keyspace=keyspace)
+                for field, value in counters.items():
+                    if field in self.FLOAT_FIELDS:
+                        pipe.hincrbyfloat(metrics_key, field, value)
+                    else:
+                        pipe.hincrby(metrics_key, field, int(value))
+            pipe.execute()
+            return True
+        except Exception as e:
+            # Metrics are best effort; drop the batch rather than grow unbounded
+            logger.warning(f"Failed to flush cache metrics: {str(e)}")
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache metrics aggregated across all workers
+
+        Returns:
+            Dict with per-keyspace and total counters, hit ratios and average latencies
+        """
+        self.flush()
+
+        try:
+            client = self._get_redis_client()
+            keyspaces = sorted(client.smembers(self.KEYSPACES_KEY))
+            pipe = client.pipeline(transaction=False)
+            for keyspace in keyspaces:
+                pipe.hgetall(self.METRICS_KEY.format(keyspace=keyspace))
+            raw_counters = pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to read cache metrics: {str(e)}")
+            return {'error': str(e)}
+
+        totals = defaultdict(float)
+        per_keyspace = {}
+        for keyspace, counters in zip(keyspaces, raw_counters):
+            counters = {field: float(value) for field, value in counters.items()}
+            for field, value in counters.items():
+                totals[field] += value
+            per_keyspace[keyspace] = self._summarize(counters)
+
+        return {
+            'keyspaces': per_keyspace,
+            'totals': self._summarize(totals),
+            'timestamp': timezone.now().isoformat()
+        }
+
+    def reset(self) -> None:
+        """Delete all shared counters"""
+        with self._lock:
+            self._pending = defaultdict(lambda: defaultdict(float))
+            self._pending_events = 0
+        try:
+            client = self._get_redis_client()
+            keyspaces = client.smembers(self.KEYSPACES_KEY)
+            client.delete(self.KEYSPACES_KEY, *[self.METRICS_KEY.format(keyspace=keyspace) for keyspace in keyspaces])
+        except Exception as e:
+            logger.warning(f"Failed to reset cache metrics: {str(e)}")
+
+    def _summarize(self, counters: Dict[str, float]) -> Dict[str, Any]:
+        """Derive ratios and averages from raw counters"""
+        hits = int(counters.get('hits', 0))
+        near_hits = int(counters.get('near_hits', 0))
+        misses = int(counters.get('misses', 0))
+        sets = int(counters.get('sets', 0))
+        lookups = hits + near_hits + misses
+        get_count = counters.get('get_count', 0)
+        load_count = counters.get('load_count', 0)
+
+        return {
+            'hits': hits,
+            'near_hits': near_hits,
+            'misses': misses,
+            'sets': sets,
+            'deletes': int(counters.get('deletes', 0)),
+            'bytes_written': int(counters.get('bytes_written', 0)),
+            'hit_ratio': round((hits + near_hits) / lookups, 4) if lookups else 0.0,
+            'avg_get_latency_ms': round(counters.get('get_latency_ms', 0) / get_count, 3) if get_count else 0.0,
+            'avg_load_latency_ms': round(counters.get('load_latency_ms', 0) / load_count, 3) if load_count else 0.0,
+            'avg_entry_bytes': int(counters.get('bytes_written', 0) / sets) if sets else 0
+        }
+
+
+# Global instance for easy access
+cache_metrics = CacheMetricsCollector()
+
+
+def get_cache_metrics() -> Dict[str, Any]:
+    """
+    Convenience function to get cache metrics aggregated across workers
+
+    Returns:
+        Dict with per-keyspace cache metrics
+    """
+    return cache_metrics.get_stats()
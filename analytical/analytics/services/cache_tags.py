@@ -0,0 +1,212 @@
+"""
+Cache Tag Service
+
+Tag-based cache invalidation for the Django cache aliases. Every cached entry
+can be registered under one or more tags (Redis sets of cache keys), and
+invalidating a tag deletes its members in one batch. Versioned namespaces
+make invalidating a whole family of entries O(1): the namespace version is
+part of the key, so bumping it orphans every old entry until its TTL expires.
+Deleted keys are published on an invalidation channel so per-process near
+caches can evict their copies.
+"""
+
+import json
+import logging
+from typing import Dict, Iterable, List, Any, Optional, Callable
+from django.conf import settings
+from django.core.cache import caches
+import redis
+
+logger = logging.getLogger(__name__)
+
+
+class CacheTagService:
+    """
+    Tag and namespace registry for cache invalidation
+
+    Tag sets are keyed per cache alias so members can be deleted through the
+    alias that stored them (applying its KEY_PREFIX and VERSION).
+    """
+
+    TAG_KEY = 'analytical:cache:tag:{alias}:{tag}'
+    NAMESPACE_KEY = 'analytical:cache:namespace:{namespace}'
+    INVALIDATION_CHANNEL = 'analytical:cache:invalidations'
+
+    def __init__(self):
+        self.tag_ttl = getattr(settings, 'CACHE_TAG_TTL', 24 * 3600)
+        self._redis_client = None
+
+    def _get_redis_client(self) -> redis.Redis:
+        """Get Redis client connection"""
+        if self._redis_client is None:
+            redis_url = getattr(settings, 'CACHES', {}).get('default', {}).get('LOCATION', 'redis://127.0.0.1:6379/1')
+            if redis_url.startswith('redis://'):
+                self._redis_client = redis.from_url(redis_url, decode_responses=True)
+            else:
+                self._redis_client = redis.Redis(host='127.0.0.1', port=6379, db=1, decode_responses=True)
+        return self._redis_client
+
+    def set(self, key: str, value: Any, timeout: Optional[int] = None,
+            tags: Iterable[str] = (), alias: str = 'default') -> None:
+        """
+        Store a cache entry and register it under tags
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            timeout: Time to live in seconds
+            tags: Tags to register the key under
+            alias: Cache alias
+        """
+        caches[alias].set(key, value, timeout)
+        self.tag(key, tags, alias, timeout)
+
+    def tag(self, key: str, tags: Iterable[str], alias: str = 'default', timeout: Optional[int] = None) -> None:
+        """Register an existing cache key under tags"""
+        tags = list(tags)
+        if not tags:
+            return
+
+        # Tag sets must outlive the entries they reference
+        ttl = max(self.tag_ttl, timeout or 0)
+        try:
+            pipe = self._get_redis_client().pipeline(transaction=False)
+            for tag in tags:
+                tag_key = self.TAG_KEY.format(alias=alias, tag=tag)
+                pipe.sadd(tag_key, key)
+                pipe.expire(tag_key, ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to register cache key {key} under tags {tags}: {str(e)}")
+
+    def invalidate_tags(self, tags: Iterable[str], aliases: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """
+        Delete every cache entry registered under the given tags
+
+        Args:
+            tags: Tags to invalidate
+            aliases: Cache aliases to invalidate (default: all configured)
+
+        Returns:
+            Dict mapping alias to the deleted cache keys
+        """
+        tags = list(tags)
+        aliases = aliases or list(getattr(settings, 'CACHES', {}).keys())
+        if not tags:
+            return {}
+
+        tag_keys = [(alias, self.TAG_KEY.format(alias=alias, tag=tag)) for alias in aliases for tag in tags]
+
+        try:
+            # Read and drop the tag sets in one transaction so keys registered
+            # concurrently end up in a fresh set instead of being lost
+            pipe = self._get_redis_client().pipeline(transaction=True)
+            for _, tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            pipe.delete(*[tag_key for _, tag_key in tag_keys])
+            members = pipe.execute()[:-1]
+        except Exception as e:
+            logger.warning(f"Failed to read cache tags {tags}: {str(e)}")
+            return {}
+
+        keys_by_alias = {}
+        for (alias, _), keys in zip(tag_keys, members):
+            if keys:
+                keys_by_alias.setdefault(alias, set()).update(keys)
+
+        invalidated = {}
+        for alias, keys in keys_by_alias.items():
+            try:
+                caches[alias].delete_many(list(keys))
+                invalidated[alias] = sorted(keys)
+            except Exception as e:
+                logger.warning(f"Failed to delete tagged cache keys from '{alias}': {str(e)}")
+            self.publish_invalidation(alias, keys)
+
+        return invalidated
+
+    def publish_invalidation(self, alias: str, keys: Iterable[str], origin: Optional[str] = None) -> None:
+        """
+        Tell every process that cache keys of an alias were deleted or replaced
+
+        Args:
+            alias: Cache alias
+            keys: Cache keys
+            origin: Optional publisher ID passed through to subscribers
+        """
+        keys = list(keys)
+        if not keys:
+            return
+        try:
+            self._get_redis_client().publish(
+                self.INVALIDATION_CHANNEL, json.dumps({'alias': alias, 'keys': keys, 'origin': origin})
+            )
+        except Exception as e:
+            logger.warning(f"Failed to publish cache invalidation for '{alias}': {str(e)}")
+
+    def subscribe_invalidations(self, handler: Callable[[str, List[str], Optional[str]], None],
+                                exception_handler: Optional[Callable] = None):
+        """
+        Call handler(alias, keys, origin) for every published invalidation
+
+        Returns:
+            The background listener thread (stop() to unsubscribe)
+        """
+        def on_message(message):
+            try:
+                payload = json.loads(message['data'])
+                handler(payload['alias'], payload['keys'], payload.get('origin'))
+            except Exception as e:
+                logger.warning(f"Invalid cache invalidation message: {str(e)}")
+
+        pubsub = self._get_redis_client().pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self.INVALIDATION_CHANNEL: on_message})
+        return pubsub.run_in_thread(sleep_time=1.0, daemon=True, exception_handler=exception_handler)
+
+    def get_namespace_version(self, namespace: str) -> int:
+        """Get the current version of a cache namespace"""
+        try:
+            version = self._get_redis_client().get(self.NAMESPACE_KEY.format(namespace=namespace))
+            return int(version) if version else 1
+        except Exception as e:
+            logger.warning(f"Failed to read cache namespace version for '{namespace}': {str(e)}")
+            return 1
+
+    def namespaced_key(self, namespace: str, key: str) -> str:
+        """Build a cache key inside the current version of a namespace"""
+        return f"{namespace}:v{self.get_namespace_version(namespace)}:{key}"
+
+    def invalidate_namespace(self, namespace: str) -> int:
+        """
+        Invalidate every entry in a namespace by bumping its version
+
+        Returns:
+            The new namespace version (0 if the bump failed)
+        """
+        try:
+            namespace_key = self.NAMESPACE_KEY.format(namespace=namespace)
+            client = self._get_redis_client()
+            # Versions start at 1, so the first bump moves to 2
+            client.setnx(namespace_key, 1)
+            return client.incr(namespace_key)
+        except Exception as e:
+            logger.warning(f"Failed to invalidate cache namespace '{namespace}': {str(e)}")
+            return 0
+
+
+# Global instance for easy access
+cache_tag_service = CacheTagService()
+
+
+def invalidate_cache_tags(*tags: str) -> Dict[str, List[str]]:
+    """
+    Convenience function to invalidate cache tags
+
+    Args:
+        *tags: Tags to invalidate
+
+    Returns:
+        Dict mapping alias to the deleted cache keys
+    """
+    return cache_tag_service.invalidate_tags(tags)
+
@@ -6,27 +6,151 @@ including intelligent cache management, cache warming, invalidation patterns,
 and performance optimization through strategic caching.
 """
 
+import os
+import copy
 import json
+import math
 import time
+import uuid
+import random
 import logging
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import Dict, List, Any, Optional, Union, Callable
 from datetime import datetime, timedelta
 from django.conf import settings
 from django.core.cache import cache, caches
 from django.utils import timezone
-from django.db import models
+from django.db import models, connections
 from django.db.models import QuerySet
 import hashlib
 import pickle
 from functools import wraps
+import redis
 
 from analytics.models import (
     User, Dataset, DatasetColumn, AnalysisSession, AnalysisResult,
-    ChatMessage, AgentRun, GeneratedImage, AuditTrail, VectorNote
+    ChatMessage, AgentRun, GeneratedImage, AuditTrail, VectorNote, AnalysisTool
 )
+from analytics.services.cache_tags import cache_tag_service
+from analytics.services.cache_metrics import cache_metrics
 
 logger = logging.getLogger(__name__)
 
+_MISSING = object()
+
+# Envelope for entries with early refresh and stale serving: expires_at is the
+# logical expiry (the stored TTL adds a stale window) and delta is the time the
+# value took to compute
+CachedValue = namedtuple('CachedValue', ['value', 'expires_at', 'delta'])
+
+
+class NearCache:
+    """
+    Bounded per-process LRU in front of the shared Django caches
+    
+    Entries expire after a short TTL so staleness stays bounded even if an
+    invalidation message is missed. Invalidations published by the cache tag
+    service evict entries in every process. Cached values are shared between
+    callers and must be treated as read-only.
+    """
+    
+    LISTENER_RETRY_INTERVAL = 30  # seconds
+    
+    def __init__(self, max_entries: int = 1024, ttl: float = 5.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # (alias, key) -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._listener = None
+        self._listener_pid = None
+        self._listener_retry_at = 0.0
+        self._instance_id = uuid.uuid4().hex
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+    
+    def get(self, alias: str, key: str) -> Any:
+        """Return the cached value or _MISSING"""
+        self._ensure_listener()
+        with self._lock:
+            entry = self._entries.get((alias, key))
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[(alias, key)]
+                self.stats['misses'] += 1
+                return _MISSING
+            self._entries.move_to_end((alias, key))
+            self.stats['hits'] += 1
+            return entry[1]
+    
+    def set(self, alias: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entries when full"""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._entries[(alias, key)] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end((alias, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+    
+    def evict(self, alias: str, keys: List[str]) -> None:
+        """Drop keys of an alias"""
+        with self._lock:
+            for key in keys:
+                if self._entries.pop((alias, key), None) is not None:
+                    self.stats['invalidations'] += 1
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    @property
+    def origin(self) -> str:
+        """Publisher ID of this process's near cache (children inherit the instance)"""
+        return f"{self._instance_id}:{os.getpid()}"
+    
+    def _on_invalidation(self, alias: str, keys: List[str], origin: Optional[str]) -> None:
+        # Our own writes already updated the local copy
+        if origin != self.origin:
+            self.evict(alias, keys)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'size': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'hit_ratio': round(self.stats['hits'] / lookups, 4) if lookups else 0.0,
+            'listening': self._listener is not None and self._listener_pid == os.getpid()
+        }
+    
+    def _ensure_listener(self) -> None:
+        """Subscribe to invalidations once per process (threads do not survive fork)"""
+        pid = os.getpid()
+        if self._listener_pid == pid or time.monotonic() < self._listener_retry_at:
+            return
+        with self._lock:
+            if self._listener_pid == pid:
+                return
+            # Entries copied from a parent process missed its invalidations
+            self._entries.clear()
+            try:
+                self._listener = cache_tag_service.subscribe_invalidations(
+                    self._on_invalidation, exception_handler=self._on_listener_error
+                )
+                self._listener_pid = pid
+            except Exception as e:
+                self._listener_retry_at = time.monotonic() + self.LISTENER_RETRY_INTERVAL
+                logger.warning(f"Near cache invalidation listener unavailable: {str(e)}")
+    
+    def _on_listener_error(self, error: Exception, pubsub, thread) -> None:
+        """Invalidations may have been missed while disconnected"""
+        logger.warning(f"Near cache invalidation listener error: {str(error)}")
+        self.clear()
+        time.sleep(1.0)
+
 
 class CachingStrategyService:
     """
@@ -70,6 +194,7 @@ class CachingStrategyService:
             'image': 'image:{image_id}',
             'audit': 'audit:{user_id}:{limit}',
             'vector_note': 'vector_note:{note_id}',
+            'tool': 'tool:{tool_name}',
         }
         
         # Cache warming strategies
@@ -89,15 +214,51 @@ class CachingStrategyService:
             'cache_warming_operations': 0,
             'cache_invalidations': 0,
             'total_bytes_cached': 0,
-            'average_cache_size': 0
+            'average_cache_size': 0,
+            'remote_hits': 0,
+            'remote_misses': 0
         }
         
-        # Cache invalidation patterns
+        # Stampede protection: single-flight recomputation, probabilistic early
+        # refresh and serving stale entries while one worker revalidates
+        self.lock_timeout = getattr(settings, 'CACHE_LOCK_TIMEOUT', 30)
+        self.lock_wait_timeout = getattr(settings, 'CACHE_LOCK_WAIT_TIMEOUT', 10)
+        self.stale_ttl = getattr(settings, 'CACHE_STALE_TTL', 300)
+        self.early_refresh_beta = getattr(settings, 'CACHE_EARLY_REFRESH_BETA', 1.0)
+        self.revalidate_in_background = getattr(settings, 'CACHE_REVALIDATE_IN_BACKGROUND', True)
+        self._inflight = {}  # cache key -> [lock, waiters]
+        self._inflight_lock = threading.Lock()
+        self._revalidating = set()
+        self._refresh_executor = None
+        self._refresh_executor_pid = None
+        self._redis_client = None
+        
+        # Per-process near cache in front of the shared caches for hot metadata
+        self.near_cache_enabled = getattr(settings, 'NEAR_CACHE_ENABLED', True)
+        self.near_cache = NearCache(
+            max_entries=getattr(settings, 'NEAR_CACHE_MAX_ENTRIES', 1024),
+            ttl=getattr(settings, 'NEAR_CACHE_TTL', 5)
+        )
+        
+        # Cache invalidation patterns: explicit keys plus tags whose member
+        # keys are deleted (replaces wildcard patterns like 'user:{user_id}:*')
         self.invalidation_patterns = {
-            'user_update': ['user:{user_id}', 'user:{user_id}:*', 'dashboard:{user_id}'],
-            'dataset_update': ['dataset:{dataset_id}', 'dataset:{dataset_id}:*', 'user:{user_id}:datasets'],
-            'session_update': ['session:{session_id}', 'session:{session_id}:*', 'user:{user_id}:sessions'],
-            'analysis_complete': ['analysis:{result_id}', 'session:{session_id}:results']
+            'user_update': {
+                'keys': ['user:{user_id}', 'dashboard:{user_id}'],
+                'tags': ['user:{user_id}']
+            },
+            'dataset_update': {
+                'keys': ['dataset:{dataset_id}', 'user:{user_id}:datasets'],
+                'tags': ['dataset:{dataset_id}']
+            },
+            'session_update': {
+                'keys': ['session:{session_id}', 'user:{user_id}:sessions'],
+                'tags': ['session:{session_id}']
+            },
+            'analysis_complete': {
+                'keys': ['analysis:{result_id}', 'session:{session_id}:results'],
+                'tags': ['analysis:{result_id}']
+            }
         }
     
     def get_cache(self, alias: str = 'default'):
@@ -112,8 +273,291 @@ class CachingStrategyService:
             logger.error(f"Missing parameter for cache key pattern {pattern}: {e}")
             return f"{pattern}:{hash(str(kwargs))}"
     
+    def get_cached(self, cache_key: str, alias: str = 'default', keyspace: Optional[str] = None) -> Any:
+        """
+        Read an entry from the shared cache, recording the hit or miss and latency
+        
+        Returns:
+            Cached value or _MISSING (so cached None/falsy results count as hits)
+        """
+        keyspace = keyspace or cache_metrics.keyspace_for(cache_key)
+        start_time = time.perf_counter()
+        value = self.get_cache(alias).get(cache_key, _MISSING)
+        latency = time.perf_counter() - start_time
+        
+        if value is _MISSING:
+            self.metrics['cache_misses'] += 1
+            cache_metrics.record(keyspace, misses=1, get_latency=latency)
+        else:
+            self.metrics['cache_hits'] += 1
+            cache_metrics.record(keyspace, hits=1, get_latency=latency)
+        return value
+    
+    def set_cache(self, cache_key: str, value: Any, ttl: int, alias: str = 'default',
+                  tags: Optional[List[str]] = None, keyspace: Optional[str] = None,
+                  load_latency: Optional[float] = None) -> None:
+        """Store a cache entry and register it under its invalidation tags"""
+        cache_tag_service.set(cache_key, value, ttl, tags or (), self.cache_aliases.get(alias, 'default'))
+        self.metrics['cache_sets'] += 1
+        
+        try:
+            size = len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            size = 0
+        cache_metrics.record(keyspace or cache_metrics.keyspace_for(cache_key), sets=1,
+                             bytes_written=size, load_latency=load_latency)
+    
+    def _get_redis_client(self) -> redis.Redis:
+        """Get Redis client connection"""
+        if self._redis_client is None:
+            redis_url = getattr(settings, 'CACHES', {}).get('default', {}).get('LOCATION', 'redis://127.0.0.1:6379/1')
+            if redis_url.startswith('redis://'):
+                self._redis_client = redis.from_url(redis_url, decode_responses=True)
+            else:
+                self._redis_client = redis.Redis(host='127.0.0.1', port=6379, db=1, decode_responses=True)
+        return self._redis_client
+    
+    def _get_lock(self, cache_key: str):
+        """Get the cross-process recomputation lock for a cache key (None if Redis is unavailable)"""
+        try:
+            return self._get_redis_client().lock(
+                f"analytical:cache:lock:{cache_key}", timeout=self.lock_timeout, sleep=0.05
+            )
+        except Exception as e:
+            logger.warning(f"Cache lock unavailable for {cache_key}: {str(e)}")
+            return None
+    
+    @contextmanager
+    def single_flight(self, cache_key: str, timeout: Optional[float] = None):
+        """
+        Serialize recomputation of a cache entry across threads and processes
+        
+        Yields True to the caller that should compute the entry. Callers that
+        had to wait for another computation get False and should re-read the
+        cache first; if the entry is still missing they compute it while
+        holding the lock. Waiting is bounded and fails open.
+        
+        Args:
+            cache_key: Cache key being computed
+            timeout: Maximum time to wait for another computation
+        """
+        deadline = time.monotonic() + (self.lock_wait_timeout if timeout is None else timeout)
+        
+        # Threads of this process queue on a local lock first
+        with self._inflight_lock:
+            inflight = self._inflight.setdefault(cache_key, [threading.Lock(), 0])
+            inflight[1] += 1
+        local_lock = inflight[0]
+        waited = not local_lock.acquire(blocking=False)
+        local_acquired = not waited or local_lock.acquire(timeout=max(deadline - time.monotonic(), 0))
+        
+        # Other processes queue on a Redis lock
+        lock = self._get_lock(cache_key)
+        lock_acquired = False
+        if lock is not None:
+            try:
+                lock_acquired = lock.acquire(blocking=False)
+                if not lock_acquired:
+                    waited = True
+                    lock_acquired = lock.acquire(blocking_timeout=max(deadline - time.monotonic(), 0))
+            except Exception as e:
+                logger.warning(f"Failed to acquire cache lock for {cache_key}: {str(e)}")
+        
+        try:
+            yield not waited
+        finally:
+            if lock_acquired:
+                try:
+                    lock.release()
+                except Exception:
+                    # Lock expired while computing; another worker may hold it now
+                    pass
+            if local_acquired:
+                local_lock.release()
+            with self._inflight_lock:
+                inflight[1] -= 1
+                if not inflight[1]:
+                    self._inflight.pop(cache_key, None)
+    
+    def get_or_compute(self, cache_key: str, compute: Callable[[], Any], ttl: int, alias: str = 'default',
+                       tags: Optional[List[str]] = None, keyspace: Optional[str] = None,
+                       force_refresh: bool = False) -> Any:
+        """
+        Get an entry, computing it at most once per expiry across all workers
+        
+        Fresh entries are served directly, except that the probability of an
+        early refresh rises as expiry approaches (scaled by how long the value
+        took to compute). Expired entries stay readable for CACHE_STALE_TTL and
+        are served while a single worker recomputes them in the background.
+        Misses are computed by one caller while the others wait for its result.
+        
+        Args:
+            cache_key: Cache key
+            compute: Computes the value
+            ttl: Time to live in seconds
+            alias: Cache alias
+            tags: Tags to register the entry under
+            keyspace: Metrics keyspace (derived from the key by default)
+            force_refresh: Recompute even if cached
+            
+        Returns:
+            Cached or computed value
+        """
+        if not force_refresh:
+            entry = self.get_cached(cache_key, alias, keyspace)
+            if isinstance(entry, CachedValue):
+                if not self._should_refresh(entry):
+                    return entry.value
+                self._revalidate(cache_key, compute, ttl, alias, tags, keyspace)
+                return entry.value
+        
+        with self.single_flight(cache_key) as leader:
+            if not leader and not force_refresh:
+                entry = self.get_cache(alias).get(cache_key, _MISSING)
+                if isinstance(entry, CachedValue):
+                    return entry.value
+            return self._compute_and_store(cache_key, compute, ttl, alias, tags, keyspace)
+    
+    def _should_refresh(self, entry: CachedValue) -> bool:
+        """Probabilistic early expiration (XFetch); always true once expired"""
+        now = time.time()
+        if now >= entry.expires_at:
+            return True
+        if self.early_refresh_beta <= 0:
+            return False
+        return now - entry.delta * self.early_refresh_beta * math.log(1.0 - random.random()) >= entry.expires_at
+    
+    def _compute_and_store(self, cache_key: str, compute: Callable[[], Any], ttl: int, alias: str,
+                           tags: Optional[List[str]], keyspace: Optional[str]) -> Any:
+        start_time = time.perf_counter()
+        value = compute()
+        delta = time.perf_counter() - start_time
+        
+        entry = CachedValue(value, time.time() + ttl, delta)
+        self.set_cache(cache_key, entry, ttl + self.stale_ttl, alias, tags, keyspace, delta)
+        return value
+    
+    def _revalidate(self, cache_key: str, compute: Callable[[], Any], ttl: int, alias: str,
+                    tags: Optional[List[str]], keyspace: Optional[str]) -> None:
+        """Recompute an entry once across all workers without blocking the caller"""
+        with self._inflight_lock:
+            if cache_key in self._revalidating:
+                return
+            self._revalidating.add(cache_key)
+        
+        lock = self._get_lock(cache_key)
+        try:
+            if lock is not None and not lock.acquire(blocking=False):
+                # Another worker is already recomputing this entry
+                with self._inflight_lock:
+                    self._revalidating.discard(cache_key)
+                return
+        except Exception as e:
+            logger.warning(f"Failed to acquire cache lock for {cache_key}: {str(e)}")
+            lock = None
+        
+        def refresh():
+            try:
+                self._compute_and_store(cache_key, compute, ttl, alias, tags, keyspace)
+            except Exception as e:
+                logger.warning(f"Failed to revalidate cache entry {cache_key}: {str(e)}")
+            finally:
+                if lock is not None:
+                    try:
+                        lock.release()
+                    except Exception:
+                        pass
+                with self._inflight_lock:
+                    self._revalidating.discard(cache_key)
+        
+        if not self.revalidate_in_background:
+            refresh()
+            return
+        
+        def refresh_in_thread():
+            try:
+                refresh()
+            finally:
+                # Worker threads must not leak database connections
+                connections.close_all()
+        
+        try:
+            self._get_refresh_executor().submit(refresh_in_thread)
+        except Exception as e:
+            logger.warning(f"Failed to schedule cache revalidation for {cache_key}: {str(e)}")
+            refresh()
+    
+    def _get_refresh_executor(self) -> ThreadPoolExecutor:
+        """Background revalidation pool (recreated after fork)"""
+        if self._refresh_executor is None or self._refresh_executor_pid != os.getpid():
+            self._refresh_executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'CACHE_REVALIDATE_WORKERS', 2),
+                thread_name_prefix='cache-revalidate'
+            )
+            self._refresh_executor_pid = os.getpid()
+        return self._refresh_executor
+    
+    def near_get(self, cache_key: str, alias: str = 'default', loader: Optional[Callable[[], Any]] = None,
+                 ttl: int = 300, tags: Optional[List[str]] = None) -> Any:
+        """
+        Read through the near cache, then the shared cache, then the loader
+        
+        Args:
+            cache_key: Cache key
+            alias: Cache alias of the shared tier
+            loader: Called on a miss in both tiers; its result fills both
+            ttl: Shared tier TTL in seconds (the near tier uses NEAR_CACHE_TTL)
+            tags: Tags to register a loaded entry under
+            
+        Returns:
+            Cached or loaded value (None on a miss without loader)
+        """
+        alias = self.cache_aliases.get(alias, 'default')
+        keyspace = cache_metrics.keyspace_for(cache_key)
+        if self.near_cache_enabled:
+            value = self.near_cache.get(alias, cache_key)
+            if value is not _MISSING:
+                self.metrics['cache_hits'] += 1
+                cache_metrics.record(keyspace, near_hits=1)
+                return value
+        
+        value = self.get_cached(cache_key, alias, keyspace)
+        if value is not _MISSING:
+            self.metrics['remote_hits'] += 1
+        else:
+            self.metrics['remote_misses'] += 1
+            if loader is None:
+                return None
+            with self.single_flight(cache_key) as leader:
+                value = _MISSING if leader else self.get_cache(alias).get(cache_key, _MISSING)
+                if value is _MISSING:
+                    start_time = time.perf_counter()
+                    value = loader()
+                    self.set_cache(cache_key, value, ttl, alias, tags, keyspace, time.perf_counter() - start_time)
+        
+        if self.near_cache_enabled:
+            self.near_cache.set(alias, cache_key, value, ttl)
+        return value
+    
+    def near_set(self, cache_key: str, value: Any, ttl: int, alias: str = 'default',
+                 tags: Optional[List[str]] = None) -> None:
+        """Replace an entry in both tiers and evict stale copies in other processes"""
+        alias = self.cache_aliases.get(alias, 'default')
+        self.set_cache(cache_key, value, ttl, alias, tags)
+        cache_tag_service.publish_invalidation(alias, [cache_key], origin=self.near_cache.origin)
+        if self.near_cache_enabled:
+            self.near_cache.set(alias, cache_key, value, ttl)
+    
+    def near_delete(self, cache_key: str, alias: str = 'default') -> None:
+        """Delete an entry from both tiers in every process"""
+        alias = self.cache_aliases.get(alias, 'default')
+        self.get_cache(alias).delete(cache_key)
+        self.near_cache.evict(alias, [cache_key])
+        cache_tag_service.publish_invalidation(alias, [cache_key], origin=self.near_cache.origin)
+    
     def cache_function_result(self, ttl: int = 300, cache_alias: str = 'default',
-                            key_prefix: str = '', include_args: bool = True):
+                            key_prefix: str = '', include_args: bool = True,
+                            tags: Optional[List[str]] = None, namespace: Optional[str] = None):
         """
         Decorator to cache function results
         
@@ -122,6 +566,8 @@ class CachingStrategyService:
             cache_alias: Cache alias to use
             key_prefix: Prefix for cache key
             include_args: Whether to include function arguments in key
+            tags: Tags to register cached results under
+            namespace: Versioned namespace for the key (see invalidate_namespace)
         """
         def decorator(func):
             @wraps(func)
@@ -133,24 +579,14 @@ class CachingStrategyService:
                     key_data = func.__name__
                 
                 cache_key = f"{key_prefix}:{hashlib.md5(key_data.encode()).hexdigest()}"
+                if namespace:
+                    cache_key = cache_tag_service.namespaced_key(namespace, cache_key)
                 
-                # Try to get from cache
-                cache_instance = self.get_cache(cache_alias)
-                cached_result = cache_instance.get(cache_key)
-                
-                if cached_result is not None:
-                    self.metrics['cache_hits'] += 1
-                    logger.debug(f"Cache hit for {func.__name__}: {cache_key}")
-                    return cached_result
-                
-                # Execute function and cache result
-                result = func(*args, **kwargs)
-                cache_instance.set(cache_key, result, ttl)
-                self.metrics['cache_misses'] += 1
-                self.metrics['cache_sets'] += 1
-                
-                logger.debug(f"Cached result for {func.__name__}: {cache_key}")
-                return result
+                # Single-flight, early refresh and stale-while-revalidate
+                return self.get_or_compute(
+                    cache_key, lambda: func(*args, **kwargs), ttl, cache_alias,
+                    tags=tags, keyspace=key_prefix or func.__name__
+                )
             
             return wrapper
         return decorator
@@ -168,12 +604,10 @@ class CachingStrategyService:
         """
         try:
             cache_key = self.generate_cache_key(self.key_patterns['user'], user_id=user_id)
-            cache_instance = self.get_cache('default')
             
             if not force_refresh:
-                cached_data = cache_instance.get(cache_key)
-                if cached_data:
-                    self.metrics['cache_hits'] += 1
+                cached_data = self.get_cached(cache_key)
+                if cached_data is not _MISSING:
                     return cached_data
             
             # Fetch fresh data
@@ -200,9 +634,7 @@ class CachingStrategyService:
             }
             
             # Cache the data
-            cache_instance.set(cache_key, user_data, self.cache_ttls['user_data'])
-            self.metrics['cache_misses'] += 1
-            self.metrics['cache_sets'] += 1
+            self.set_cache(cache_key, user_data, self.cache_ttls['user_data'], tags=[f"user:{user_id}"])
             
             logger.info(f"Cached user data for user {user_id}")
             return user_data
@@ -226,65 +658,16 @@ class CachingStrategyService:
         """
         try:
             cache_key = self.generate_cache_key(self.key_patterns['dataset'], dataset_id=dataset_id)
-            cache_instance = self.get_cache('default')
+            tags = [f"dataset:{dataset_id}"]
             
-            if not force_refresh:
-                cached_data = cache_instance.get(cache_key)
-                if cached_data:
-                    self.metrics['cache_hits'] += 1
-                    return cached_data
-            
-            # Fetch fresh data
-            dataset = Dataset.objects.select_related('user').prefetch_related('columns').get(id=dataset_id)
-            
-            dataset_data = {
-                'id': dataset.id,
-                'name': dataset.name,
-                'description': dataset.description,
-                'original_filename': dataset.original_filename,
-                'file_size_bytes': dataset.file_size_bytes,
-                'file_size_mb': dataset.file_size_mb,
-                'original_format': dataset.original_format,
-                'row_count': dataset.row_count,
-                'column_count': dataset.column_count,
-                'data_types': dataset.data_types,
-                'processing_status': dataset.processing_status,
-                'data_quality_score': dataset.data_quality_score,
-                'completeness_score': dataset.completeness_score,
-                'consistency_score': dataset.consistency_score,
-                'security_scan_passed': dataset.security_scan_passed,
-                'sanitized': dataset.sanitized,
-                'is_public': dataset.is_public,
-                'access_level': dataset.access_level,
-                'created_at': dataset.created_at,
-                'updated_at': dataset.updated_at,
-                'last_accessed': dataset.last_accessed,
-                'user_id': dataset.user.id,
-                'user_username': dataset.user.username,
-                'columns': [
-                    {
-                        'id': col.id,
-                        'name': col.name,
-                        'display_name': col.display_name,
-                        'detected_type': col.detected_type,
-                        'confirmed_type': col.confirmed_type,
-                        'confidence_score': col.confidence_score,
-                        'null_count': col.null_count,
-                        'null_percentage': col.null_percentage,
-                        'unique_count': col.unique_count,
-                        'unique_percentage': col.unique_percentage
-                    }
-                    for col in dataset.columns.all()
-                ]
-            }
-            
-            # Cache the data
-            cache_instance.set(cache_key, dataset_data, self.cache_ttls['dataset_info'])
-            self.metrics['cache_misses'] += 1
-            self.metrics['cache_sets'] += 1
+            if force_refresh:
+                # Replace stale near cache copies in other processes
+                dataset_data = self._load_dataset_info(dataset_id)
+                self.near_set(cache_key, dataset_data, self.cache_ttls['dataset_info'], tags=tags)
+                return dataset_data
             
-            logger.info(f"Cached dataset info for dataset {dataset_id}")
-            return dataset_data
+            return self.near_get(cache_key, loader=lambda: self._load_dataset_info(dataset_id),
+                                 ttl=self.cache_ttls['dataset_info'], tags=tags)
             
         except Dataset.DoesNotExist:
             return {}
@@ -292,6 +675,74 @@ class CachingStrategyService:
             logger.error(f"Failed to cache dataset info: {str(e)}")
             return {}
     
+    def _load_dataset_info(self, dataset_id: int) -> Dict[str, Any]:
+        """Fetch dataset information with columns from the database"""
+        dataset = Dataset.objects.select_related('user').prefetch_related('columns').get(id=dataset_id)
+        
+        dataset_data = {
+            'id': dataset.id,
+            'name': dataset.name,
+            'description': dataset.description,
+            'original_filename': dataset.original_filename,
+            'file_size_bytes': dataset.file_size_bytes,
+            'file_size_mb': dataset.file_size_mb,
+            'original_format': dataset.original_format,
+            'row_count': dataset.row_count,
+            'column_count': dataset.column_count,
+            'data_types': dataset.data_types,
+            'processing_status': dataset.processing_status,
+            'data_quality_score': dataset.data_quality_score,
+            'completeness_score': dataset.completeness_score,
+            'consistency_score': dataset.consistency_score,
+            'security_scan_passed': dataset.security_scan_passed,
+            'sanitized': dataset.sanitized,
+            'is_public': dataset.is_public,
+            'access_level': dataset.access_level,
+            'created_at': dataset.created_at,
+            'updated_at': dataset.updated_at,
+            'last_accessed': dataset.last_accessed,
+            'user_id': dataset.user.id,
+            'user_username': dataset.user.username,
+            'columns': [
+                {
+                    'id': col.id,
+                    'name': col.name,
+                    'display_name': col.display_name,
+                    'detected_type': col.detected_type,
+                    'confirmed_type': col.confirmed_type,
+                    'confidence_score': col.confidence_score,
+                    'null_count': col.null_count,
+                    'null_percentage': col.null_percentage,
+                    'unique_count': col.unique_count,
+                    'unique_percentage': col.unique_percentage
+                }
+                for col in dataset.columns.defer('sketch')
+            ]
+        }
+        
+        logger.info(f"Loaded dataset info for dataset {dataset_id}")
+        return dataset_data
+    
+    def get_active_tool(self, tool_name: str) -> AnalysisTool:
+        """
+        Get an active analysis tool through the near cache
+        
+        Args:
+            tool_name: Tool name
+            
+        Returns:
+            AnalysisTool instance (a copy; the near cache entry is shared between threads)
+            
+        Raises:
+            AnalysisTool.DoesNotExist: If no active tool has this name
+        """
+        return copy.deepcopy(self.near_get(
+            self.generate_cache_key(self.key_patterns['tool'], tool_name=tool_name),
+            loader=lambda: AnalysisTool.objects.get(name=tool_name, is_active=True),
+            ttl=self.cache_ttls['static_data'],
+            tags=[f"tool:{tool_name}"]
+        ))
+    
     def cache_analysis_results(self, session_id: int, force_refresh: bool = False) -> List[Dict[str, Any]]:
         """
         Cache analysis results for a session
@@ -305,68 +756,66 @@ class CachingStrategyService:
         """
         try:
             cache_key = self.generate_cache_key(self.key_patterns['session_results'], session_id=session_id)
-            cache_instance = self.get_cache('analysis')
             
-            if not force_refresh:
-                cached_data = cache_instance.get(cache_key)
-                if cached_data:
-                    self.metrics['cache_hits'] += 1
-                    return cached_data
-            
-            # Fetch fresh data
-            results = AnalysisResult.objects.filter(session_id=session_id).select_related(
-                'session', 'session__user', 'session__dataset'
-            ).prefetch_related('generated_images')
-            
-            results_data = []
-            for result in results:
-                result_data = {
-                    'id': result.id,
-                    'tool_name': result.tool_name,
-                    'tool_category': result.tool_category,
-                    'parameters': result.parameters,
-                    'result_data': result.result_data,
-                    'result_type': result.result_type,
-                    'execution_time': result.execution_time,
-                    'status': result.status,
-                    'error_message': result.error_message,
-                    'created_at': result.created_at,
-                    'session_id': result.session.id,
-                    'session_name': result.session.name,
-                    'user_id': result.session.user.id,
-                    'user_username': result.session.user.username,
-                    'dataset_id': result.session.dataset.id,
-                    'dataset_name': result.session.dataset.name,
-                    'images': [
-                        {
-                            'id': img.id,
-                            'name': img.name,
-                            'file_path': img.file_path,
-                            'file_size_bytes': img.file_size_bytes,
-                            'image_format': img.image_format,
-                            'width': img.width,
-                            'height': img.height
-                        }
-                        for img in result.generated_images.all()
-                    ]
-                }
-                results_data.append(result_data)
-            
-            # Cache the data
-            cache_instance.set(cache_key, results_data, self.cache_ttls['analysis_results'])
-            self.metrics['cache_misses'] += 1
-            self.metrics['cache_sets'] += 1
-            
-            logger.info(f"Cached analysis results for session {session_id}")
-            return results_data
+            return self.get_or_compute(
+                cache_key, lambda: self._load_analysis_results(session_id),
+                self.cache_ttls['analysis_results'], 'analysis',
+                tags=[f"session:{session_id}"], force_refresh=force_refresh
+            )
             
         except Exception as e:
             logger.error(f"Failed to cache analysis results: {str(e)}")
             return []
     
+    def _load_analysis_results(self, session_id: int) -> List[Dict[str, Any]]:
+        """Fetch analysis results for a session from the database"""
+        results = AnalysisResult.objects.filter(session_id=session_id).select_related(
+            'session', 'session__user', 'session__dataset'
+        ).prefetch_related('generated_images')
+        
+        results_data = []
+        for result in results:
+            result_data = {
+                'id': result.id,
+                'tool_name': result.tool_name,
+                'tool_category': result.tool_category,
+                'parameters': result.parameters,
+                'result_data': result.result_data,
+                'result_type': result.result_type,
+                'execution_time': result.execution_time,
+                'status': result.status,
+                'error_message': result.error_message,
+                'created_at': result.created_at,
+                'session_id': result.session.id,
+                'session_name': result.session.name,
+                'user_id': result.session.user.id,
+                'user_username': result.session.user.username,
+                'dataset_id': result.session.dataset.id,
+                'dataset_name': result.session.dataset.name,
+                'images': [
+                    {
+                        'id': img.id,
+                        'name': img.name,
+                        'file_path': img.file_path,
+                        'file_size_bytes': img.file_size_bytes,
+                        'image_format': img.image_format,
+                        'width': img.width,
+                        'height': img.height
+                    }
+                    for img in result.generated_images.all()
+                ]
+            }
+            results_data.append(result_data)
+        
+        logger.info(f"Loaded analysis results for session {session_id}")
+        return results_data
+    
     def cache_dashboard_data(self, user_id: int, force_refresh: bool = False) -> Dict[str, Any]:
         """
-        Cache comprehensive dashboard data for a user
+        Get dashboard data for a user from the incrementally maintained summary
+        
+        The summary is kept current by model signals, so there is no TTL-driven
+        rebuild; force_refresh rebuilds it from the database.
         
         Args:
             user_id: User ID
@@ -376,91 +825,13 @@ class CachingStrategyService:
             Dict with cached dashboard data
         """
         try:
-            cache_key = self.generate_cache_key(self.key_patterns['dashboard'], user_id=user_id)
-            cache_instance = self.get_cache('default')
-            
-            if not force_refresh:
-                cached_data = cache_instance.get(cache_key)
-                if cached_data:
-                    self.metrics['cache_hits'] += 1
-                    return cached_data
-            
-            # Fetch fresh data
-            user = User.objects.select_related().prefetch_related(
-                'datasets', 'analysis_sessions', 'audit_trails'
-            ).get(id=user_id)
-            
-            # Get recent datasets
-            recent_datasets = user.datasets.order_by('-created_at')[:5]
+            from analytics.services.dashboard_summary import dashboard_summary_service
             
-            # Get recent sessions
-            recent_sessions = user.analysis_sessions.select_related('dataset').order_by('-created_at')[:10]
-            
-            # Get recent audit trails
-            recent_audits = user.audit_trails.order_by('-created_at')[:20]
-            
-            dashboard_data = {
-                'user': {
-                    'id': user.id,
-                    'username': user.username,
-                    'email': user.email,
-                    'is_premium': user.is_premium,
-                    'usage_summary': user.get_usage_summary()
-                },
-                'recent_datasets': [
-                    {
-                        'id': ds.id,
-                        'name': ds.name,
-                        'original_filename': ds.original_filename,
-                        'row_count': ds.row_count,
-                        'column_count': ds.column_count,
-                        'data_quality_score': ds.data_quality_score,
-                        'created_at': ds.created_at
-                    }
-                    for ds in recent_datasets
-                ],
-                'recent_sessions': [
-                    {
-                        'id': sess.id,
-                        'name': sess.name,
-                        'dataset_name': sess.dataset.name,
-                        'status': sess.status,
-                        'created_at': sess.created_at,
-                        'last_activity': sess.last_activity
-                    }
-                    for sess in recent_sessions
-                ],
-                'recent_audits': [
-                    {
-                        'id': audit.id,
-                        'action_type': audit.action_type,
-                        'resource_type': audit.resource_type,
-                        'resource_name': audit.resource_name,
-                        'action_description': audit.action_description,
-                        'created_at': audit.created_at
-                    }
-                    for audit in recent_audits
-                ],
-                'statistics': {
-                    'total_datasets': user.datasets.count(),
-                    'total_sessions': user.analysis_sessions.count(),
-                    'total_audits': user.audit_trails.count(),
-                    'storage_used_mb': user.storage_used_mb,
-                    'storage_max_mb': user.max_storage_mb,
-                    'token_usage_percentage': user.token_usage_percentage
-                }
-            }
-            
-            # Cache the data
-            cache_instance.set(cache_key, dashboard_data, self.cache_ttls['dashboard_data'])
-            self.metrics['cache_misses'] += 1
-            self.metrics['cache_sets'] += 1
-            
-            logger.info(f"Cached dashboard data for user {user_id}")
+            dashboard_data = dashboard_summary_service.get_summary(user_id, force_refresh=force_refresh)
+            if dashboard_data:
+                self.metrics['cache_hits'] += 1
             return dashboard_data
             
-        except User.DoesNotExist:
-            return {}
         except Exception as e:
             logger.error(f"Failed to cache dashboard data: {str(e)}")
             return {}
@@ -512,7 +883,8 @@ class CachingStrategyService:
                         'created_at': session.created_at
                     }
                     cache_key = self.generate_cache_key(self.key_patterns['session'], session_id=kwargs['session_id'])
-                    self.get_cache('sessions').set(cache_key, session_data, self.cache_ttls['session_data'])
+                    self.set_cache(cache_key, session_data, self.cache_ttls['session_data'], 'sessions',
+                                   [f"session:{session.id}", f"user:{session.user.id}"])
                     results[operation] = session_data
                 elif operation == 'analysis_results' and 'session_id' in kwargs:
                     results[operation] = self.cache_analysis_results(kwargs['session_id'])
@@ -555,7 +927,7 @@ class CachingStrategyService:
             patterns = self.invalidation_patterns[pattern]
             invalidated_keys = []
             
-            for key_pattern in patterns:
+            for key_pattern in patterns['keys']:
                 cache_key = self.generate_cache_key(key_pattern, **kwargs)
                 
                 # Try to delete from all caches
@@ -563,12 +935,17 @@ class CachingStrategyService:
                     cache_instance = self.get_cache(alias)
                     if cache_instance.delete(cache_key):
                         invalidated_keys.append(f"{alias}:{cache_key}")
-                
-                # Also try wildcard patterns (Redis-specific)
-                if '*' in key_pattern:
-                    # This would require Redis-specific implementation
-                    # For now, we'll log the pattern
-                    logger.info(f"Wildcard invalidation pattern: {key_pattern}")
+                    self.near_cache.evict(alias, [cache_key])
+                    cache_tag_service.publish_invalidation(alias, [cache_key], origin=self.near_cache.origin)
+            
+            # Delete every entry registered under the pattern's tags
+            tags = [self.generate_cache_key(tag_pattern, **kwargs) for tag_pattern in patterns['tags']]
+            tagged_keys = cache_tag_service.invalidate_tags(tags, list(set(self.cache_aliases.values())))
+            for alias, keys in tagged_keys.items():
+                invalidated_keys.extend(f"{alias}:{key}" for key in keys)
+            
+            for invalidated_key in invalidated_keys:
+                cache_metrics.record(cache_metrics.keyspace_for(invalidated_key.split(':', 1)[1]), deletes=1)
             
             self.metrics['cache_invalidations'] += len(invalidated_keys)
             
@@ -588,6 +965,28 @@ class CachingStrategyService:
                 'pattern': pattern
             }
     
+    def invalidate_namespace(self, namespace: str) -> Dict[str, Any]:
+        """
+        Invalidate every entry cached under a versioned namespace in O(1)
+        
+        Args:
+            namespace: Namespace passed to cache_function_result
+            
+        Returns:
+            Dict with invalidation results
+        """
+        version = cache_tag_service.invalidate_namespace(namespace)
+        if not version:
+            return {'success': False, 'error': f'Failed to invalidate namespace: {namespace}', 'namespace': namespace}
+        
+        self.metrics['cache_invalidations'] += 1
+        logger.info(f"Cache namespace '{namespace}' invalidated, now at version {version}")
+        return {
+            'success': True,
+            'namespace': namespace,
+            'version': version
+        }
+    
     def get_cache_stats(self) -> Dict[str, Any]:
         """
         Get comprehensive cache statistics
@@ -605,6 +1004,20 @@ class CachingStrategyService:
                 'timestamp': timezone.now().isoformat()
             }
             
+            # Counters aggregated across all worker processes
+            stats['shared'] = cache_metrics.get_stats()
+            
+            # This process's hit ratios per tier (the remote tier only sees near cache misses)
+            remote_lookups = self.metrics['remote_hits'] + self.metrics['remote_misses']
+            stats['tiers'] = {
+                'near': self.near_cache.get_stats() if self.near_cache_enabled else {'enabled': False},
+                'remote': {
+                    'hits': self.metrics['remote_hits'],
+                    'misses': self.metrics['remote_misses'],
+                    'hit_ratio': round(self.metrics['remote_hits'] / remote_lookups, 4) if remote_lookups else 0.0
+                }
+            }
+            
             # Try to get Redis-specific stats if available
             try:
                 redis_stats = {}
@@ -638,6 +1051,7 @@ class CachingStrategyService:
                 cache_instance = self.get_cache(alias)
                 cache_instance.clear()
                 cleared_caches.append(alias)
+            self.near_cache.clear()
             
             logger.info(f"Cleared all caches: {cleared_caches}")
             return {
@@ -659,7 +1073,8 @@ caching_strategy_service = CachingStrategyService()
 
 
 # Convenience functions for easy integration
-def cache_function_result(ttl: int = 300, cache_alias: str = 'default', key_prefix: str = ''):
+def cache_function_result(ttl: int = 300, cache_alias: str = 'default', key_prefix: str = '',
+                          tags: Optional[List[str]] = None, namespace: Optional[str] = None):
     """
     Convenience decorator to cache function results
     
@@ -667,11 +1082,14 @@ def cache_function_result(ttl: int = 300, cache_alias: str = 'default', key_pref
         ttl: Time to live in seconds
         cache_alias: Cache alias to use
         key_prefix: Prefix for cache key
+        tags: Tags to register cached results under
+        namespace: Versioned namespace for the key
         
     Returns:
         Decorator function
     """
-    return caching_strategy_service.cache_function_result(ttl, cache_alias, key_prefix)
+    return caching_strategy_service.cache_function_result(ttl, cache_alias, key_prefix,
+                                                          tags=tags, namespace=namespace)
 
 
 def warm_cache(strategy: str, **kwargs) -> Dict[str, Any]:
@@ -702,6 +1120,19 @@ def invalidate_cache(pattern: str, **kwargs) -> Dict[str, Any]:
     return caching_strategy_service.invalidate_cache(pattern, **kwargs)
 
 
+def invalidate_cache_namespace(namespace: str) -> Dict[str, Any]:
+    """
+    Convenience function to invalidate a versioned cache namespace
+    
+    Args:
+        namespace: Namespace name
+        
+    Returns:
+        Dict with invalidation results
+    """
+    return caching_strategy_service.invalidate_namespace(namespace)
+
+
 def cache_user_data(user_id: int, force_refresh: bool = False) -> Dict[str, Any]:
     """
     Convenience function to cache user data
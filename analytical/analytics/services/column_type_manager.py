@@ -410,6 +410,53 @@ class ColumnTypeManager:
         
         return stats
     
+    def calculate_statistics_from_sketch(self, sketch: Dict[str, Any], column_type: str) -> Optional[Dict[str, Any]]:
+        """
+        Calculate column statistics from an ingest-time column sketch
+        
+        Quantiles, outlier flags and frequent values are approximate (see
+        ColumnSketch.error_bounds); top_values and value_counts hold the
+        sketch's most frequent values only.
+        
+        Args:
+            sketch: Serialized column sketch
+            column_type: Detected column type
+            
+        Returns:
+            Dict of statistics, or None if the type needs the full data
+        """
+        from analytics.services.column_sketches import ColumnSketch
+        
+        column_sketch = ColumnSketch(sketch)
+        if column_sketch.count == 0:
+            return {}
+        
+        if column_type in ['integer', 'float', 'decimal'] and column_sketch.is_numeric:
+            q1, q2, q3 = column_sketch.quantile([0.25, 0.5, 0.75])
+            iqr = q3 - q1
+            return {
+                'min_value': float(column_sketch.minimum),
+                'max_value': float(column_sketch.maximum),
+                'mean_value': float(column_sketch.mean),
+                'median_value': float(q2),
+                'std_deviation': float(column_sketch.std()),
+                'has_outliers': bool(column_sketch.minimum < q1 - 1.5 * iqr or column_sketch.maximum > q3 + 1.5 * iqr),
+                'has_duplicates': column_sketch.distinct_count() < column_sketch.count,
+                'q1': float(q1),
+                'q2': float(q2),
+                'q3': float(q3)
+            }
+        
+        if column_type == 'category':
+            top_values = column_sketch.top_values()
+            return {
+                'top_values': dict(top_values[:10]),
+                'value_counts': dict(top_values),
+                'has_duplicates': column_sketch.distinct_count() < column_sketch.count
+            }
+        
+        return None
+    
     def _calculate_numeric_statistics(self, data: pd.Series) -> Dict[str, Any]:
         """Calculate statistics for numeric columns"""
         numeric_data = pd.to_numeric(data, errors='coerce').dropna()
@@ -0,0 +1,314 @@
+"""
+Dashboard Summary Service
+
+Maintains a per-user dashboard summary in a Redis hash that is updated
+incrementally by model signals (datasets, sessions, results, audit trails),
+so reading the dashboard is a single hash fetch plus the user row instead of
+several history queries.
+"""
+
+import json
+import logging
+from typing import Dict, List, Any, Optional
+from django.conf import settings
+import redis
+
+from analytics.models import User, Dataset, AnalysisSession, AnalysisResult, AuditTrail
+
+logger = logging.getLogger(__name__)
+
+
+class DashboardSummaryService:
+    """
+    Incrementally maintained per-user dashboard summary
+
+    The summary hash holds counters (total_datasets, ...) and one JSON field
+    per recent entry (dataset:{id}, session:{id}, audit:{id}). A sorted set per
+    entry kind orders entries by creation time so only the most recent ones
+    are kept. Updates are only applied to summaries that already exist; a
+    missing summary is rebuilt from the database on the next read.
+
+    Every update bumps a per-user version key, and a rebuild only stores its
+    result if the version is unchanged since it started reading the database,
+    so increments that land mid-rebuild are never overwritten by stale counts.
+    """
+
+    SUMMARY_KEY = 'analytical:dashboard:{user_id}'
+    RECENT_KEY = 'analytical:dashboard:{user_id}:recent:{kind}'
+    VERSION_KEY = 'analytical:dashboard:{user_id}:version'
+
+    # Number of recent entries kept per kind
+    RECENT_LIMITS = {
+        'dataset': 5,
+        'session': 10,
+        'audit': 20,
+    }
+
+    # KEYS: summary hash, recent sorted set, version
+    # ARGV: counter field, counter delta, entry field, entry JSON, score, limit, ttl
+    UPDATE_SCRIPT = """
+    redis.call('INCR', KEYS[3])
+    redis.call('EXPIRE', KEYS[3], ARGV[7])
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        return 0
+    end
+    if ARGV[1] ~= '' then
+        redis.call('HINCRBY', KEYS[1], ARGV[1], ARGV[2])
+    end
+    if ARGV[3] ~= '' then
+        redis.call('ZADD', KEYS[2], ARGV[5], ARGV[3])
+        redis.call('HSET', KEYS[1], ARGV[3], ARGV[4])
+        while redis.call('ZCARD', KEYS[2]) > tonumber(ARGV[6]) do
+            local evicted = redis.call('ZPOPMIN', KEYS[2])
+            redis.call('HDEL', KEYS[1], evicted[1])
+        end
+        redis.call('EXPIRE', KEYS[2], ARGV[7])
+    end
+    redis.call('EXPIRE', KEYS[1], ARGV[7])
+    return 1
+    """
+
+    def __init__(self):
+        self.ttl = getattr(settings, 'DASHBOARD_SUMMARY_TTL', 7 * 24 * 3600)
+        self._redis_client = None
+        self._update_script = None
+
+    def _get_redis_client(self) -> redis.Redis:
+        """Get Redis client connection"""
+        if self._redis_client is None:
+            redis_url = getattr(settings, 'CACHES', {}).get('default', {}).get('LOCATION', 'redis://127.0.0.1:6379/1')
+            if redis_url.startswith('redis://'):
+                self._redis_client = redis.from_url(redis_url, decode_responses=True)
+            else:
+                self._redis_client = redis.Redis(host='127.0.0.1', port=6379, db=1, decode_responses=True)
+            self._update_script = self._redis_client.register_script(self.UPDATE_SCRIPT)
+        return self._redis_client
+
+    def get_summary(self, user_id: int, force_refresh: bool = False) -> Dict[str, Any]:
+        """
+        Get the dashboard summary for a user
+
+        Args:
+            user_id: User ID
+            force_refresh: Rebuild the summary from the database
+
+        Returns:
+            Dict with user, recent_datasets, recent_sessions, recent_audits and statistics
+        """
+        try:
+            user = User.objects.get(id=user_id)
+        except User.DoesNotExist:
+            return {}
+
+        fields = {}
+        if not force_refresh:
+            try:
+                fields = self._get_redis_client().hgetall(self.SUMMARY_KEY.format(user_id=user_id))
+            except Exception as e:
+                logger.warning(f"Failed to read dashboard summary for user {user_id}: {str(e)}")
+
+        if not fields:
+            fields = self.rebuild(user_id)
+
+        return self._build_response(user, fields)
+
+    def rebuild(self, user_id: int) -> Dict[str, str]:
+        """
+        Rebuild a user's summary from the database
+
+        The rebuilt summary is only stored if no update was recorded while
+        the database was being read; otherwise it stays missing and the next
+        read rebuilds it again.
+
+        Returns:
+            The summary hash fields
+        """
+        version_key = self.VERSION_KEY.format(user_id=user_id)
+        try:
+            version = self._get_redis_client().get(version_key)
+        except Exception as e:
+            logger.warning(f"Failed to read dashboard summary version for user {user_id}: {str(e)}")
+            version = None
+
+        datasets = Dataset.objects.filter(user_id=user_id).order_by('-created_at')[:self.RECENT_LIMITS['dataset']]
+        sessions = AnalysisSession.objects.filter(user_id=user_id).select_related(
+            'primary_dataset'
+        ).order_by('-created_at')[:self.RECENT_LIMITS['session']]
+        audits = AuditTrail.objects.filter(user_id=user_id).order_by('-created_at')[:self.RECENT_LIMITS['audit']]
+
+        fields = {
+            'total_datasets': Dataset.objects.filter(user_id=user_id).count(),
+            'total_sessions': AnalysisSession.objects.filter(user_id=user_id).count(),
+            'total_results': AnalysisResult.objects.filter(user_id=user_id).count(),
+            'total_audits': AuditTrail.objects.filter(user_id=user_id).count(),
+        }
+        recent = {kind: {} for kind in self.RECENT_LIMITS}
+
+        for kind, instances in (('dataset', datasets), ('session', sessions), ('audit', audits)):
+            for instance in instances:
+                entry = self._serialize_entry(kind, instance)
+                field = f"{kind}:{instance.id}"
+                fields[field] = json.dumps(entry)
+                recent[kind][field] = instance.created_at.timestamp()
+
+        try:
+            with self._get_redis_client().pipeline(transaction=True) as pipe:
+                pipe.watch(version_key)
+                if pipe.get(version_key) != version:
+                    raise redis.WatchError(f"version changed from {version}")
+                pipe.multi()
+                summary_key = self.SUMMARY_KEY.format(user_id=user_id)
+                pipe.delete(summary_key, *[self.RECENT_KEY.format(user_id=user_id, kind=kind) for kind in recent])
+                pipe.hset(summary_key, mapping=fields)
+                pipe.expire(summary_key, self.ttl)
+                for kind, scores in recent.items():
+                    if scores:
+                        recent_key = self.RECENT_KEY.format(user_id=user_id, kind=kind)
+                        pipe.zadd(recent_key, scores)
+                        pipe.expire(recent_key, self.ttl)
+                pipe.execute()
+        except redis.WatchError:
+            # An update landed during the rebuild; drop the summary so it is rebuilt on the next read
+            logger.info(f"Dashboard summary for user {user_id} changed during rebuild; not storing it")
+            self.invalidate(user_id)
+        except Exception as e:
+            logger.warning(f"Failed to store dashboard summary for user {user_id}: {str(e)}")
+
+        return {key: str(value) for key, value in fields.items()}
+
+    def record(self, user_id: Optional[int], kind: str, instance: Any = None, created: bool = False) -> bool:
+        """
+        Apply a created/updated entry to the user's summary
+
+        Args:
+            user_id: Owner of the entry
+            kind: Entry kind ('dataset', 'session', 'result', 'audit')
+            instance: Model instance to store as a recent entry (not stored for 'result')
+            created: Whether the instance was just created (increments the counter)
+
+        Returns:
+            True if a summary was updated
+        """
+        if not user_id:
+            return False
+
+        counter_field = f"total_{kind}s" if created else ''
+        entry_field, entry_json, score = '', '', 0
+        if instance is not None and kind in self.RECENT_LIMITS:
+            entry_field = f"{kind}:{instance.id}"
+            entry_json = json.dumps(self._serialize_entry(kind, instance))
+            score = instance.created_at.timestamp() if instance.created_at else 0
+
+        if not counter_field and not entry_field:
+            return False
+
+        try:
+            self._get_redis_client()
+            return bool(self._update_script(
+                keys=[self.SUMMARY_KEY.format(user_id=user_id), self.RECENT_KEY.format(user_id=user_id, kind=kind),
+                      self.VERSION_KEY.format(user_id=user_id)],
+                args=[counter_field, 1, entry_field, entry_json, score, self.RECENT_LIMITS.get(kind, 0), self.ttl]
+            ))
+        except Exception as e:
+            logger.warning(f"Failed to update dashboard summary for user {user_id}: {str(e)}")
+            self.invalidate(user_id)
+            return False
+
+    def record_audit_entries(self, entries: List[AuditTrail]) -> None:
+        """Apply bulk-created audit entries (bulk_create sends no signals)"""
+        for entry in entries:
+            if entry.pk:
+                self.record(entry.user_id, 'audit', entry, created=True)
+
+    def invalidate(self, user_id: Optional[int]) -> None:
+        """Drop a user's summary so it is rebuilt on the next read"""
+        if not user_id:
+            return
+        try:
+            self._get_redis_client().delete(
+                self.SUMMARY_KEY.format(user_id=user_id),
+                *[self.RECENT_KEY.format(user_id=user_id, kind=kind) for kind in self.RECENT_LIMITS]
+            )
+        except Exception as e:
+            logger.warning(f"Failed to invalidate dashboard summary for user {user_id}: {str(e)}")
+
+    def _serialize_entry(self, kind: str, instance: Any) -> Dict[str, Any]:
+        """Serialize a recent entry"""
+        if kind == 'dataset':
+            return {
+                'id': instance.id,
+                'name': instance.name,
+                'original_filename': instance.original_filename,
+                'row_count': instance.row_count,
+                'column_count': instance.column_count,
+                'data_quality_score': instance.data_quality_score,
+                'created_at': instance.created_at.isoformat() if instance.created_at else None
+            }
+        if kind == 'session':
+            return {
+                'id': instance.id,
+                'name': instance.name,
+                'dataset_name': instance.primary_dataset.name,
+                'status': 'active' if instance.is_active else 'inactive',
+                'created_at': instance.created_at.isoformat() if instance.created_at else None,
+                'last_activity': instance.last_accessed.isoformat() if instance.last_accessed else None
+            }
+        return {
+            'id': instance.id,
+            'action_type': instance.action_type,
+            'resource_type': instance.resource_type,
+            'resource_name': instance.resource_name,
+            'action_description': instance.action_description,
+            'created_at': instance.created_at.isoformat() if instance.created_at else None
+        }
+
+    def _build_response(self, user: User, fields: Dict[str, str]) -> Dict[str, Any]:
+        """Shape summary fields into the dashboard response"""
+        recent = {kind: [] for kind in self.RECENT_LIMITS}
+        for field, value in fields.items():
+            kind, _, _ = field.partition(':')
+            if kind in recent:
+                recent[kind].append(json.loads(value))
+
+        for entries in recent.values():
+            entries.sort(key=lambda entry: entry['created_at'] or '', reverse=True)
+
+        return {
+            'user': {
+                'id': user.id,
+                'username': user.username,
+                'email': user.email,
+                'is_premium': user.is_premium,
+                'usage_summary': user.get_usage_summary()
+            },
+            'recent_datasets': recent['dataset'],
+            'recent_sessions': recent['session'],
+            'recent_audits': recent['audit'],
+            'statistics': {
+                'total_datasets': int(fields.get('total_datasets', 0)),
+                'total_sessions': int(fields.get('total_sessions', 0)),
+                'total_results': int(fields.get('total_results', 0)),
+                'total_audits': int(fields.get('total_audits', 0)),
+                'storage_used_mb': user.storage_used_mb,
+                'storage_max_mb': user.max_storage_mb,
+                'token_usage_percentage': user.token_usage_percentage
+            }
+        }
+
+
+# Global instance for easy access
+dashboard_summary_service = DashboardSummaryService()
+
+
+def get_dashboard_summary(user_id: int, force_refresh: bool = False) -> Dict[str, Any]:
+    """
+    Convenience function to get a user's dashboard summary
+
+    Args:
+        user_id: User ID
+        force_refresh: Rebuild the summary from the database
+
+    Returns:
+        Dict with dashboard summary
+    """
+    return dashboard_summary_service.get_summary(user_id, force_refresh)
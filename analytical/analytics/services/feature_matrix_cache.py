@@ -0,0 +1,303 @@
+"""
+Feature Matrix Cache Service
+
+Prepares the design matrix for ML tools once per (dataset, feature columns,
+preprocessing spec): mean imputation, label encoding of object columns and
+optional standard scaling into a compact float32 array. Prepared matrices
+are written to disk as .npy files and memory-mapped, so later tools in the
+same session - in any worker process - start from the prepared matrix
+instead of repeating the preprocessing.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+import weakref
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# matrix: float32 (n_rows, n_features), read-only when memory-mapped
+# encoders: {'categories': {col: [classes]}, 'fill_values': {col: mean}, 'scaling': {'mean': [...], 'scale': [...]}}
+PreparedFeatures = namedtuple('PreparedFeatures', ['matrix', 'feature_columns', 'encoders', 'key', 'cached'])
+
+# Frames loaded unmodified from a dataset file: token -> (weakref to frame, shape)
+_dataset_frames = {}
+
+
+def mark_dataset_frame(df: pd.DataFrame, file_hash: str) -> pd.DataFrame:
+    """
+    Tag a frame just loaded from a dataset file so its matrices are keyed by file_hash
+
+    attrs are copied to every frame derived from this one (filtered, assigned,
+    filled, copied), so the hash is only trusted while the tagged object itself
+    is used with its original shape; derived frames are fingerprinted by content.
+    """
+    token = os.urandom(8).hex()
+    _dataset_frames[token] = (weakref.ref(df, lambda _: _dataset_frames.pop(token, None)), df.shape)
+    df.attrs['file_hash'] = file_hash
+    df.attrs['file_hash_frame'] = token
+    return df
+
+
+def _dataset_file_hash(df: pd.DataFrame) -> Optional[str]:
+    """file_hash of a frame marked by mark_dataset_frame, if it is that unmodified frame"""
+    marked = _dataset_frames.get(df.attrs.get('file_hash_frame'))
+    if marked is None or marked[0]() is not df or marked[1] != df.shape:
+        return None
+    return df.attrs.get('file_hash')
+
+
+class FeatureMatrixCache:
+    """
+    Disk-backed, memory-mapped cache of prepared feature matrices
+
+    Entries are keyed by the dataset's file_hash for frames marked with
+    mark_dataset_frame when datasets are loaded for analysis, or by a content
+    fingerprint of the feature columns for any other (including derived) frame.
+    """
+
+    # Preprocessing specs
+    SCALED = {'impute': 'mean', 'encode': 'label', 'scale': 'standard'}
+    ENCODED = {'impute': 'mean', 'encode': 'label', 'scale': None}
+
+    def __init__(self):
+        self.enabled = getattr(settings, 'FEATURE_MATRIX_CACHE_ENABLED', True)
+        self.cache_dir = Path(getattr(settings, 'FEATURE_MATRIX_CACHE_DIR', Path(settings.MEDIA_ROOT) / 'feature_cache'))
+        self.max_bytes = getattr(settings, 'FEATURE_MATRIX_CACHE_MAX_BYTES', 2 * 1024 ** 3)
+        self.max_open = getattr(settings, 'FEATURE_MATRIX_CACHE_MAX_OPEN', 16)
+        self._open = OrderedDict()  # key -> PreparedFeatures (memory-mapped)
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0}
+
+    def prepare(self, df: pd.DataFrame, feature_columns: List[str],
+                spec: Optional[Dict[str, Any]] = None) -> PreparedFeatures:
+        """
+        Get the prepared feature matrix for columns of a DataFrame
+
+        Args:
+            df: Input DataFrame
+            feature_columns: Columns to include, in order
+            spec: Preprocessing spec (default SCALED)
+
+        Returns:
+            PreparedFeatures
+        """
+        spec = spec or self.SCALED
+        if not self.enabled:
+            matrix, encoders = self._build(df, feature_columns, spec)
+            return PreparedFeatures(matrix, list(feature_columns), encoders, None, False)
+
+        key = self.cache_key(df, feature_columns, spec)
+
+        with self._lock:
+            prepared = self._open.get(key)
+            if prepared is not None:
+                self._open.move_to_end(key)
+                self.stats['hits'] += 1
+                return prepared
+
+        prepared = self._load(key)
+        if prepared is not None:
+            self.stats['disk_hits'] += 1
+        else:
+            self.stats['misses'] += 1
+            matrix, encoders = self._build(df, feature_columns, spec)
+            prepared = self._store(key, matrix, list(feature_columns), encoders)
+
+        with self._lock:
+            self._open[key] = prepared
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+        return prepared
+
+    def cache_key(self, df: pd.DataFrame, feature_columns: List[str], spec: Dict[str, Any]) -> str:
+        """Key for (dataset, feature columns, preprocessing spec)"""
+        source = _dataset_file_hash(df)
+        if not source:
+            source = hashlib.sha256(
+                pd.util.hash_pandas_object(df[feature_columns], index=True).values.tobytes()
+            ).hexdigest()
+        raw = json.dumps({'source': source, 'columns': list(feature_columns), 'spec': spec}, sort_keys=True)
+        return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+    def _build(self, df: pd.DataFrame, feature_columns: List[str], spec: Dict[str, Any]):
+        """Impute, encode and scale feature columns into a float32 matrix"""
+        X = df[feature_columns]
+        matrix = np.empty((len(X), len(feature_columns)), dtype=np.float32)
+        categories, fill_values = {}, {}
+
+        for position, col in enumerate(feature_columns):
+            values = X[col]
+            if values.dtype == 'object' or isinstance(values.dtype, pd.CategoricalDtype):
+                # Missing values become their own category, as with astype(str) label encoding
+                codes, uniques = pd.factorize(values.astype(str), sort=True)
+                matrix[:, position] = codes
+                categories[col] = uniques.tolist()
+            else:
+                column = values.to_numpy(dtype=np.float32, na_value=np.nan)
+                if spec.get('impute') == 'mean':
+                    mean = float(np.nanmean(column)) if len(column) and not np.isnan(column).all() else 0.0
+                    column = np.where(np.isnan(column), np.float32(mean), column)
+                    fill_values[col] = mean
+                matrix[:, position] = column
+
+        scaling = None
+        if spec.get('scale') == 'standard':
+            mean = matrix.mean(axis=0, dtype=np.float64)
+            scale = matrix.std(axis=0, dtype=np.float64)
+            scale[scale == 0] = 1.0
+            matrix -= mean.astype(np.float32)
+            matrix /= scale.astype(np.float32)
+            scaling = {'mean': mean.tolist(), 'scale': scale.tolist()}
+
+        return matrix, {'categories': categories, 'fill_values': fill_values, 'scaling': scaling}
+
+    def transform(self, df: pd.DataFrame, feature_columns: List[str], encoders: Dict[str, Any]) -> np.ndarray:
+        """
+        Apply the encoders of a prepared matrix to new rows
+
+        Categories not seen when the encoders were built are coded -1.
+
+        Args:
+            df: Input DataFrame
+            feature_columns: Columns to include, in order
+            encoders: PreparedFeatures.encoders
+
+        Returns:
+            float32 matrix (n_rows, n_features)
+        """
+        matrix = np.empty((len(df), len(feature_columns)), dtype=np.float32)
+        categories = encoders.get('categories', {})
+        fill_values = encoders.get('fill_values', {})
+
+        for position, col in enumerate(feature_columns):
+            if col in categories:
+                matrix[:, position] = pd.Categorical(df[col].astype(str), categories=categories[col]).codes
+            else:
+                column = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float32, na_value=np.nan)
+                if col in fill_values:
+                    column = np.where(np.isnan(column), np.float32(fill_values[col]), column)
+                matrix[:, position] = column
+
+        scaling = encoders.get('scaling')
+        if scaling:
+            matrix -= np.asarray(scaling['mean'], dtype=np.float32)
+            matrix /= np.asarray(scaling['scale'], dtype=np.float32)
+        return matrix
+
+    def _paths(self, key: str):
+        return self.cache_dir / f"{key}.npy", self.cache_dir / f"{key}.json"
+
+    def _load(self, key: str) -> Optional[PreparedFeatures]:
+        matrix_path, meta_path = self._paths(key)
+        try:
+            if not meta_path.exists():
+                return None
+            meta = json.loads(meta_path.read_text())
+            matrix = np.load(matrix_path, mmap_mode='r')
+            os.utime(meta_path)  # Recency for eviction
+            return PreparedFeatures(matrix, meta['feature_columns'], meta['encoders'], key, True)
+        except Exception as e:
+            logger.warning(f"Failed to load prepared feature matrix {key}: {str(e)}")
+            return None
+
+    def _store(self, key: str, matrix: np.ndarray, feature_columns: List[str],
+               encoders: Dict[str, Any]) -> PreparedFeatures:
+        matrix_path, meta_path = self._paths(key)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Write then rename so concurrent readers never see partial files;
+            # the metadata file is written last and marks the entry complete
+            suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(f"{matrix_path}{suffix}", 'wb') as handle:
+                np.save(handle, matrix)
+            os.replace(f"{matrix_path}{suffix}", matrix_path)
+            Path(f"{meta_path}{suffix}").write_text(json.dumps({
+                'feature_columns': feature_columns,
+                'encoders': encoders,
+                'shape': list(matrix.shape),
+                'created_at': time.time()
+            }))
+            os.replace(f"{meta_path}{suffix}", meta_path)
+
+            self._evict()
+            return PreparedFeatures(np.load(matrix_path, mmap_mode='r'), feature_columns, encoders, key, False)
+        except Exception as e:
+            logger.warning(f"Failed to store prepared feature matrix {key}: {str(e)}")
+            return PreparedFeatures(matrix, feature_columns, encoders, key, False)
+
+    def _evict(self) -> None:
+        """Drop least recently used entries beyond FEATURE_MATRIX_CACHE_MAX_BYTES"""
+        entries = []
+        total = 0
+        for meta_path in self.cache_dir.glob('*.json'):
+            matrix_path = meta_path.with_suffix('.npy')
+            try:
+                size = matrix_path.stat().st_size + meta_path.stat().st_size
+                entries.append((meta_path.stat().st_mtime, meta_path, matrix_path, size))
+                total += size
+            except FileNotFoundError:
+                continue
+
+        for _, meta_path, matrix_path, size in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            meta_path.unlink(missing_ok=True)
+            matrix_path.unlink(missing_ok=True)
+            total -= size
+            with self._lock:
+                self._open.pop(meta_path.stem, None)
+
+    def clear(self) -> int:
+        """
+        Delete every prepared matrix
+
+        Returns:
+            Number of entries deleted
+        """
+        with self._lock:
+            self._open.clear()
+        deleted = 0
+        for meta_path in self.cache_dir.glob('*.json'):
+            meta_path.unlink(missing_ok=True)
+            meta_path.with_suffix('.npy').unlink(missing_ok=True)
+            deleted += 1
+        return deleted
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics for this process"""
+        lookups = sum(self.stats.values())
+        return {
+            **self.stats,
+            'open_entries': len(self._open),
+            'hit_ratio': round((self.stats['hits'] + self.stats['disk_hits']) / lookups, 4) if lookups else 0.0
+        }
+
+
+# Global instance for easy access
+feature_matrix_cache = FeatureMatrixCache()
+
+
+def prepare_features(df: pd.DataFrame, feature_columns: List[str],
+                     spec: Optional[Dict[str, Any]] = None) -> PreparedFeatures:
+    """
+    Convenience function to get a prepared feature matrix
+
+    Args:
+        df: Input DataFrame
+        feature_columns: Columns to include
+        spec: Preprocessing spec (default FeatureMatrixCache.SCALED)
+
+    Returns:
+        PreparedFeatures
+    """
+    return feature_matrix_cache.prepare(df, feature_columns, spec)
@@ -25,6 +25,7 @@ from django.contrib.auth import get_user_model
 
 from analytics.models import Dataset, DatasetColumn, AuditTrail, AnalysisSession
 from analytics.services.audit_trail_manager import AuditTrailManager
+from analytics.services.column_sketches import ColumnSketch, build_column_sketches
 from analytics.services.vector_note_manager import VectorNoteManager
 from analytics.services.session_manager import SessionManager
 
@@ -444,12 +445,26 @@ class FileProcessingService:
         
         column_manager = ColumnTypeManager()
         
+        # Sketches let tools answer from the column records; large datasets are also profiled from them
+        sketches = build_column_sketches(df)
+        profile_from_sketch = len(df) > getattr(settings, 'COLUMN_SKETCH_EXACT_MAX_ROWS', 1000000)
+        
         for column_name in df.columns:
             column_data = df[column_name]
             detected_type = column_manager.detect_column_type(column_data)
+            sketch = sketches.get(column_name, {})
             
             # Get statistics and filter to only include valid DatasetColumn fields
-            stats = column_manager.calculate_statistics(column_data, detected_type)
+            stats = None
+            if profile_from_sketch and sketch:
+                stats = column_manager.calculate_statistics_from_sketch(sketch, detected_type)
+            if stats is None:
+                stats = column_manager.calculate_statistics(column_data, detected_type)
+            
+            if profile_from_sketch and sketch:
+                unique_count = ColumnSketch(sketch).distinct_count()
+            else:
+                unique_count = column_data.nunique()
             
             # Only include fields that exist in DatasetColumn model
             valid_fields = {
@@ -471,15 +486,16 @@ class FileProcessingService:
                 confidence_score=column_manager.calculate_confidence_score(column_data, detected_type),
                 null_count=column_data.isnull().sum(),
                 null_percentage=(column_data.isnull().sum() / len(column_data)) * 100,
-                unique_count=column_data.nunique(),
-                unique_percentage=(column_data.nunique() / len(column_data)) * 100,
+                unique_count=unique_count,
+                unique_percentage=(unique_count / len(column_data)) * 100,
+                sketch=sketch,
                 dataset=dataset,
                 **filtered_stats
             )
     
     def _get_columns_info(self, dataset: Dataset) -> List[Dict[str, Any]]:
         """Get columns information for a dataset"""
-        columns = dataset.columns.all()
+        columns = dataset.columns.defer('sketch')
         return [
             {
                 'name': col.name,
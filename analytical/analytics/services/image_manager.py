@@ -148,6 +148,8 @@ class ImageManager:
             # Multiple series
             labels = chart_data.get('labels', [f'Series {i+1}' for i in range(len(y_data))])
             for i, series in enumerate(y_data):
+                # Reduced (LTTB) series mark missing points as None
+                series = [np.nan if value is None else value for value in series]
                 ax.plot(x_data, series, label=labels[i] if i < len(labels) else f'Series {i+1}')
             ax.legend()
         else:
@@ -185,6 +187,12 @@ class ImageManager:
     
     def _create_histogram_chart(self, ax, chart_data: Dict[str, Any]):
         """Create histogram chart"""
+        if 'counts' in chart_data:
+            # Pre-binned histogram of a large column
+            bin_edges = chart_data['bin_edges']
+            ax.hist(bin_edges[:-1], bins=bin_edges, weights=chart_data['counts'], alpha=0.7, edgecolor='black')
+            return
+        
         data = chart_data.get('data', [])
         bins = chart_data.get('bins', 10)
         
@@ -211,6 +219,11 @@ class ImageManager:
     
     def _create_boxplot_chart(self, ax, chart_data: Dict[str, Any]):
         """Create boxplot chart"""
+        if 'stats' in chart_data:
+            # Boxes summarized server-side for large columns
+            ax.bxp(chart_data['stats'], showmeans=False)
+            return
+        
         data = chart_data.get('data', [])
         labels = chart_data.get('labels', [])
         
@@ -0,0 +1,169 @@
+"""
+Keyset Pagination Service
+
+Cursor pagination on (created_at, id) for history lists (datasets, chat
+messages, audit trail). Each page seeks past the last row of the previous
+one through the (owner, created_at) composite indexes instead of counting
+and skipping rows, so page latency does not grow with history size. Exports
+stream JSON in keyset batches instead of serializing the whole list in
+memory.
+"""
+
+import json
+import base64
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Any, Optional, Callable, Tuple
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, QuerySet
+from django.http import StreamingHttpResponse
+
+logger = logging.getLogger(__name__)
+
+
+class KeysetPaginator:
+    """
+    Newest-first keyset pagination over created_at with id as tie-breaker
+
+    Cursors are opaque URL-safe strings encoding the (created_at, id) of the
+    last row returned.
+    """
+
+    ORDERING = ('-created_at', '-id')
+
+    def __init__(self):
+        self.default_page_size = getattr(settings, 'KEYSET_PAGE_SIZE', 50)
+        self.max_page_size = getattr(settings, 'KEYSET_MAX_PAGE_SIZE', 200)
+        self.export_batch_size = getattr(settings, 'KEYSET_EXPORT_BATCH_SIZE', 500)
+
+    def encode_cursor(self, instance: Any) -> str:
+        """Build the cursor pointing after a row"""
+        raw = f"{instance.created_at.isoformat()}|{instance.id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor: str) -> Tuple[datetime, int]:
+        """
+        Decode a cursor
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            created_at, _, row_id = base64.urlsafe_b64decode(padded.encode()).decode().partition('|')
+            return datetime.fromisoformat(created_at), int(row_id)
+        except Exception:
+            raise ValueError(f"Invalid cursor: {cursor}")
+
+    def get_page_size(self, requested: Optional[Any] = None) -> int:
+        """Clamp a requested page size to [1, KEYSET_MAX_PAGE_SIZE]"""
+        try:
+            page_size = int(requested) if requested else self.default_page_size
+        except (TypeError, ValueError):
+            page_size = self.default_page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def seek(self, queryset: QuerySet, cursor: Optional[str] = None) -> QuerySet:
+        """Order newest first and skip everything up to the cursor"""
+        queryset = queryset.order_by(*self.ORDERING)
+        if cursor:
+            created_at, row_id = self.decode_cursor(cursor)
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=row_id))
+        return queryset
+
+    def paginate(self, queryset: QuerySet, cursor: Optional[str] = None, page_size: Optional[Any] = None,
+                 fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Fetch one page
+
+        Args:
+            queryset: Filtered queryset (ordering is replaced)
+            cursor: Cursor from the previous page
+            page_size: Requested page size
+            fields: Fields to load (only() projection)
+
+        Returns:
+            Dict with items, next_cursor and has_more
+        """
+        return self._fetch(queryset, cursor, self.get_page_size(page_size), fields)
+
+    def iterate(self, queryset: QuerySet, fields: Optional[Iterable[str]] = None,
+                batch_size: Optional[int] = None) -> Iterator[Any]:
+        """Yield every row newest first, fetching keyset batches"""
+        batch_size = batch_size or self.export_batch_size
+        cursor = None
+        while True:
+            page = self._fetch(queryset, cursor, batch_size, fields)
+            yield from page['items']
+            if not page['has_more']:
+                return
+            cursor = page['next_cursor']
+
+    def _fetch(self, queryset: QuerySet, cursor: Optional[str], size: int,
+               fields: Optional[Iterable[str]]) -> Dict[str, Any]:
+        queryset = self.seek(queryset, cursor)
+        if fields:
+            queryset = queryset.only(*fields)
+
+        # One extra row tells whether another page exists without a COUNT
+        items = list(queryset[:size + 1])
+        has_more = len(items) > size
+        items = items[:size]
+
+        return {
+            'items': items,
+            'next_cursor': self.encode_cursor(items[-1]) if has_more else None,
+            'has_more': has_more
+        }
+
+    def stream_json(self, queryset: QuerySet, serialize: Callable[[Any], Dict[str, Any]], key: str,
+                    fields: Optional[Iterable[str]] = None) -> StreamingHttpResponse:
+        """
+        Stream every row as {"success": true, "<key>": [...], "count": n}
+
+        Args:
+            queryset: Filtered queryset
+            serialize: Row to dict
+            key: Name of the list in the response
+            fields: Fields to load (only() projection)
+
+        Returns:
+            StreamingHttpResponse
+        """
+        def generate():
+            count = 0
+            yield f'{{"success": true, "{key}": ['
+            try:
+                for instance in self.iterate(queryset, fields):
+                    yield (',' if count else '') + json.dumps(serialize(instance), cls=DjangoJSONEncoder)
+                    count += 1
+            except Exception as e:
+                # Headers are already sent; close the document and report the failure in it
+                logger.error(f"Streaming export of {key} failed after {count} rows: {str(e)}")
+                yield f'], "count": {count}, "error": "Export interrupted"}}'
+                return
+            yield f'], "count": {count}}}'
+
+        return StreamingHttpResponse(generate(), content_type='application/json')
+
+
+# Global instance for easy access
+keyset_paginator = KeysetPaginator()
+
+
+def paginate_keyset(queryset: QuerySet, cursor: Optional[str] = None, page_size: Optional[Any] = None,
+                    fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Convenience function to fetch one keyset page
+
+    Args:
+        queryset: Filtered queryset
+        cursor: Cursor from the previous page
+        page_size: Requested page size
+        fields: Fields to load
+
+    Returns:
+        Dict with items, next_cursor and has_more
+    """
+    return keyset_paginator.paginate(queryset, cursor, page_size, fields)
@@ -17,6 +17,7 @@ from django.core.cache import cache
 from django.contrib.auth import get_user_model
 import google.generativeai as genai
 import tiktoken
+import redis
 from io import BytesIO
 import base64
 
@@ -41,6 +42,17 @@ class LLMProcessor:
     Service for LLM operations with Google AI integration and comprehensive token tracking
     """
     
+    # Prime a context buffer only if it is still cold and no message was
+    # appended since the database read (KEYS: buffer, version; ARGV: version, ttl, entries...)
+    PRIME_CONTEXT_SCRIPT = """
+    if redis.call('EXISTS', KEYS[1]) == 1 or (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+        return 0
+    end
+    redis.call('RPUSH', KEYS[1], unpack(ARGV, 3))
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    return 1
+    """
+    
     def __init__(self):
         self.audit_manager = AuditTrailManager()
         self.rag_service = RAGService()
@@ -56,10 +68,22 @@ class LLMProcessor:
         # Context management
         self.max_context_messages = 10
         self.context_cache_timeout = 3600  # 1 hour
+        self.context_key_prefix = 'analytical:chat:context:'
+        self.redis_client = self._get_redis_client()
+        self.context_token_budget = getattr(settings, 'CONVERSATION_CONTEXT_TOKEN_BUDGET', 2000)
+        self.recent_context_messages = getattr(settings, 'CONVERSATION_RECENT_MESSAGES', 6)
+        self.summary_refresh_threshold = getattr(settings, 'CONVERSATION_SUMMARY_REFRESH_THRESHOLD', 8)
         
         # Initialize Google AI
         self._initialize_google_ai()
     
+    def _get_redis_client(self) -> redis.Redis:
+        """Get Redis client connection for the context message buffer"""
+        redis_url = getattr(settings, 'CACHES', {}).get('default', {}).get('LOCATION', 'redis://127.0.0.1:6379/1')
+        if redis_url.startswith('redis://'):
+            return redis.from_url(redis_url, decode_responses=True)
+        return redis.Redis(host='127.0.0.1', port=6379, db=1, decode_responses=True)
+    
     def _initialize_google_ai(self):
         """Initialize Google AI client"""
         try:
@@ -89,7 +113,8 @@ class LLMProcessor:
     def generate_text(self, prompt: str, user, context_messages: Optional[List[Dict]] = None,
                      analysis_result: Optional[AnalysisResult] = None, 
                      include_images: bool = False, rag_context: Optional[str] = None,
-                     session: Optional[AnalysisSession] = None) -> Dict[str, Any]:
+                     session: Optional[AnalysisSession] = None,
+                     conversation_summary: Optional[str] = None) -> Dict[str, Any]:
         """
         Generate text using Google AI with context and token tracking
         
@@ -101,6 +126,7 @@ class LLMProcessor:
             include_images: Whether to include images in the generation
             rag_context: Optional RAG context for enhanced responses
             session: Optional AnalysisSession for context
+            conversation_summary: Optional rolling summary of older conversation turns
             
         Returns:
             Dict containing generated text, token usage, and metadata
@@ -110,7 +136,9 @@ class LLMProcessor:
         
         try:
             # Prepare context with RAG integration
-            full_prompt = self._prepare_prompt_with_context(prompt, context_messages, analysis_result, rag_context)
+            full_prompt = self._prepare_prompt_with_context(
+                prompt, context_messages, analysis_result, rag_context, conversation_summary
+            )
             
             # Calculate input tokens
             input_tokens = self._count_tokens(full_prompt)
@@ -236,13 +264,17 @@ class LLMProcessor:
                 except Exception as e:
                     logger.warning(f"RAG context retrieval failed: {str(e)}")
             
+            # Rolling summary of turns older than the verbatim context window
+            conversation_summary = self.get_conversation_summary(session)
+            
             # Generate response
             result = self.generate_text(
                 prompt=message,
                 user=user,
                 context_messages=context_messages,
                 rag_context=rag_context,
-                session=session  # Pass the session to generate_text
+                session=session,  # Pass the session to generate_text
+                conversation_summary=conversation_summary
             )
             
             # Create chat message records
@@ -257,6 +289,9 @@ class LLMProcessor:
                 None, correlation_id, session
             )
             
+            if session:
+                self._schedule_summary_refresh(session, user)
+            
             return {
                 'success': True,
                 'message_id': ai_message.id if hasattr(ai_message, 'id') else 0,
@@ -461,34 +496,44 @@ class LLMProcessor:
             raise ValueError(f"Batch processing failed: {str(e)}")
     
     def get_context_messages(self, session_id: int, user, limit: int = 10):
-        """Get recent context messages for a session"""
+        """
+        Get recent context messages for a session
+        
+        Messages are served from a bounded per-session ring buffer in Redis that
+        _create_chat_message appends to, so the database is only queried when
+        the buffer is cold.
+        """
+        buffer_key = self._get_context_buffer_key(session_id, user.id)
+        
+        if limit <= self.max_context_messages:
+            try:
+                cached_messages = self.redis_client.lrange(buffer_key, 0, limit - 1)
+                if cached_messages:
+                    # Newest first in Redis; reverse to get chronological order
+                    return [json.loads(item) for item in reversed(cached_messages)]
+            except Exception as e:
+                logger.warning(f"Failed to read context buffer: {str(e)}")
+        
+        try:
+            # Appends bump the version, so a prime from a stale read is discarded
+            version = self.redis_client.get(f"{buffer_key}:version") or ''
+        except Exception as e:
+            logger.warning(f"Failed to read context buffer version: {str(e)}")
+            version = None
+        
         try:
-            # Try to get from cache first
-            cache_key = f"context_{session_id}_{user.id}"
-            cached_context = cache.get(cache_key)
-            
-            if cached_context:
-                return cached_context
-            
             # Get from database
             messages = ChatMessage.objects.filter(
                 user=user,
                 session_id=session_id
-            ).order_by('-created_at')[:limit]
-            
-            context = []
-            for message in reversed(messages):  # Reverse to get chronological order
-                context.append({
-                    'role': 'user' if message.message_type == 'user' else 'assistant',
-                    'content': message.content,
-                    'timestamp': message.created_at.isoformat(),
-                    'token_count': message.token_count
-                })
+            ).order_by('-created_at')[:max(limit, self.max_context_messages)]
             
-            # Cache context
-            cache.set(cache_key, context, self.context_cache_timeout)
+            # Newest first, matching the buffer layout
+            entries = [self._context_entry(message) for message in messages]
+            if version is not None:
+                self._prime_context_buffer(buffer_key, entries, version)
             
-            return context
+            return list(reversed(entries[:limit]))
             
         except Exception as e:
             logger.error(f"Failed to get context messages: {str(e)}")
@@ -497,23 +542,205 @@ class LLMProcessor:
     def clear_context_cache(self, session_id: int, user) -> None:
         """Clear context cache for a session"""
         try:
-            cache_key = f"context_{session_id}_{user.id}"
-            cache.delete(cache_key)
+            buffer_key = self._get_context_buffer_key(session_id, user.id)
+            pipe = self.redis_client.pipeline(transaction=True)
+            pipe.delete(buffer_key)
+            # Discard primes started from reads before the clear
+            pipe.incr(f"{buffer_key}:version")
+            pipe.expire(f"{buffer_key}:version", self.context_cache_timeout)
+            pipe.execute()
         except Exception as e:
             logger.warning(f"Failed to clear context cache: {str(e)}")
     
+    def _get_context_buffer_key(self, session_id: int, user_id: int) -> str:
+        """Get Redis key of the context message buffer for a session"""
+        return f"{self.context_key_prefix}{session_id}:{user_id}"
+    
+    def _context_entry(self, message: ChatMessage) -> Dict[str, Any]:
+        """Convert a chat message into a context entry"""
+        return {
+            'role': 'user' if message.message_type == 'user' else 'assistant',
+            'content': message.content,
+            'timestamp': message.created_at.isoformat(),
+            'token_count': message.token_count
+        }
+    
+    def _prime_context_buffer(self, buffer_key: str, entries: List[Dict[str, Any]], version: str) -> None:
+        """
+        Fill a cold context buffer from newest-first entries loaded from the database
+        
+        Nothing is written if the buffer was primed meanwhile or a message was
+        appended after `version` was read, since the entries may then be stale.
+        """
+        if not entries:
+            return
+        try:
+            self.redis_client.eval(
+                self.PRIME_CONTEXT_SCRIPT, 2, buffer_key, f"{buffer_key}:version",
+                version, self.context_cache_timeout,
+                *[json.dumps(entry) for entry in entries[:self.max_context_messages]]
+            )
+        except Exception as e:
+            logger.warning(f"Failed to prime context buffer: {str(e)}")
+    
+    def _append_context_message(self, message: ChatMessage) -> None:
+        """Append a new chat message to its session's context buffer"""
+        if not message.session_id:
+            return
+        try:
+            buffer_key = self._get_context_buffer_key(message.session_id, message.user_id)
+            pipe = self.redis_client.pipeline(transaction=True)
+            # LPUSHX only extends a primed buffer; a cold buffer is rebuilt from the database on read
+            pipe.lpushx(buffer_key, json.dumps(self._context_entry(message)))
+            pipe.ltrim(buffer_key, 0, self.max_context_messages - 1)
+            pipe.expire(buffer_key, self.context_cache_timeout)
+            pipe.incr(f"{buffer_key}:version")
+            pipe.expire(f"{buffer_key}:version", self.context_cache_timeout)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to append to context buffer: {str(e)}")
+    
+    def get_conversation_summary(self, session: Optional[AnalysisSession]) -> Optional[str]:
+        """Get the rolling conversation summary stored on a session"""
+        if not session:
+            return None
+        summary_state = (session.session_data or {}).get('conversation_summary') or {}
+        return summary_state.get('text') or None
+    
+    def generate_conversation_summary(self, session_id: str, user) -> Dict[str, Any]:
+        """
+        Fold messages that have left the verbatim context window into the
+        session's rolling summary.
+        
+        Only messages newer than the last summarized message are sent to the
+        model, together with the previous summary, so each refresh costs a
+        bounded number of tokens regardless of conversation length.
+        
+        Args:
+            session_id: AnalysisSession ID
+            user: Session owner
+            
+        Returns:
+            Dict with the current summary state
+        """
+        try:
+            session = AnalysisSession.objects.get(id=int(session_id), user=user)
+            summary_state = (session.session_data or {}).get('conversation_summary') or {}
+            last_message_id = summary_state.get('last_message_id', 0)
+            
+            pending = list(
+                ChatMessage.objects.filter(session=session, id__gt=last_message_id)
+                .order_by('created_at', 'id')
+                .values('id', 'message_type', 'content')
+            )
+            
+            # The most recent messages are sent verbatim, so they stay out of the summary
+            to_fold = pending[:-self.recent_context_messages] if self.recent_context_messages else pending
+            if not to_fold:
+                return summary_state
+            
+            transcript = "\n".join(
+                f"{'user' if msg['message_type'] == 'user' else 'assistant'}: {msg['content'][:2000]}"
+                for msg in to_fold
+            )
+            max_words = max(self.context_token_budget // 3, 50)
+            summary_prompt = (
+                "You maintain a running summary of a data analysis conversation.\n"
+                f"Update the summary below with the new messages in at most {max_words} words. "
+                "Keep datasets, columns, analyses run, key results and open questions; drop pleasantries.\n\n"
+                f"Current summary:\n{summary_state.get('text') or '(none)'}\n\n"
+                f"New messages:\n{transcript}\n\nUpdated summary:"
+            )
+            
+            input_tokens = self._count_tokens(summary_prompt)
+            response = self.model.generate_content(summary_prompt)
+            summary_text = (response.text or '').strip()
+            output_tokens = self._count_tokens(summary_text)
+            
+            total_cost = ((input_tokens / 1000) * self.input_token_cost +
+                          (output_tokens / 1000) * self.output_token_cost)
+            self._update_user_token_usage(user, input_tokens, output_tokens, total_cost)
+            
+            summary_state = {
+                'text': summary_text,
+                'last_message_id': to_fold[-1]['id'],
+                'message_count': summary_state.get('message_count', 0) + len(to_fold),
+                'token_count': output_tokens,
+                'updated_at': timezone.now().isoformat()
+            }
+            
+            # Re-read under lock so concurrent session_data updates are not lost
+            with transaction.atomic():
+                locked_session = AnalysisSession.objects.select_for_update().get(pk=session.pk)
+                session_data = locked_session.session_data or {}
+                session_data['conversation_summary'] = summary_state
+                locked_session.session_data = session_data
+                locked_session.save(update_fields=['session_data'])
+            
+            logger.info(f"Conversation summary for session {session.id} now covers "
+                        f"{summary_state['message_count']} messages ({output_tokens} tokens)")
+            
+            return summary_state
+            
+        finally:
+            cache.delete(f"conversation_summary_pending_{session_id}")
+    
+    def _schedule_summary_refresh(self, session: AnalysisSession, user) -> None:
+        """Queue a background summary refresh once enough messages have accrued"""
+        try:
+            summary_state = (session.session_data or {}).get('conversation_summary') or {}
+            unsummarized = ChatMessage.objects.filter(
+                session=session,
+                id__gt=summary_state.get('last_message_id', 0)
+            ).count()
+            
+            # Refresh no later than the verbatim window fills, so no message
+            # leaves the prompt before it has been folded into the summary
+            refresh_at = min(self.recent_context_messages + self.summary_refresh_threshold,
+                             self.max_context_messages)
+            if unsummarized < refresh_at:
+                return
+            
+            # Only one refresh in flight per session
+            if not cache.add(f"conversation_summary_pending_{session.id}", True, 300):
+                return
+            
+            from analytics.tasks.llm_tasks import generate_conversation_summary
+            generate_conversation_summary.delay(str(session.id), user.id)
+            
+        except Exception as e:
+            logger.warning(f"Failed to schedule conversation summary refresh: {str(e)}")
+    
     def _prepare_prompt_with_context(self, prompt: str, context_messages: Optional[List[Dict]], 
-                                   analysis_result: Optional[AnalysisResult], rag_context: Optional[str] = None) -> str:
+                                   analysis_result: Optional[AnalysisResult], rag_context: Optional[str] = None,
+                                   conversation_summary: Optional[str] = None) -> str:
         """Prepare prompt with context and analysis results"""
         full_prompt = prompt
         
-        # Add context messages
+        # Add conversation history: rolling summary plus the most recent turns that fit the budget
+        history_parts = []
+        remaining_tokens = self.context_token_budget
+        
+        if conversation_summary:
+            history_parts.append(f"Summary of earlier conversation:\n{conversation_summary}")
+            remaining_tokens -= self._count_tokens(conversation_summary)
+        
         if context_messages:
-            context_text = "\n".join([
-                f"{msg['role']}: {msg['content']}" 
-                for msg in context_messages[-self.max_context_messages:]
-            ])
-            full_prompt = f"Previous conversation:\n{context_text}\n\nCurrent request: {prompt}"
+            recent_lines = []
+            for msg in reversed(context_messages[-self.max_context_messages:]):
+                line = f"{msg['role']}: {msg['content']}"
+                line_tokens = self._count_tokens(line)
+                if recent_lines and line_tokens > remaining_tokens:
+                    break
+                recent_lines.append(line)
+                remaining_tokens -= line_tokens
+            
+            if recent_lines:
+                context_text = "\n".join(reversed(recent_lines))
+                history_parts.append(f"Previous conversation:\n{context_text}")
+        
+        if history_parts:
+            full_prompt = "\n\n".join(history_parts) + f"\n\nCurrent request: {prompt}"
         
         # Add analysis result context
         if analysis_result:
@@ -669,7 +896,7 @@ class LLMProcessor:
                            analysis_result: Optional[AnalysisResult],
                            correlation_id: str, session: Optional[AnalysisSession]):
         """Create chat message record"""
-        return ChatMessage.objects.create(
+        chat_message = ChatMessage.objects.create(
             content=content,
             message_type=message_type,
             llm_model=self.model_name,
@@ -684,6 +911,8 @@ class LLMProcessor:
                 'generation_time': timezone.now().isoformat()
             }
         )
+        self._append_context_message(chat_message)
+        return chat_message
     
     def get_user_token_usage(self, user) -> Dict[str, Any]:
         """Get comprehensive token usage information for a user"""
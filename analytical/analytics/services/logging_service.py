@@ -4,44 +4,140 @@ Handles comprehensive logging with correlation IDs and structured data
 """
 
 import logging
+import logging.handlers
 import uuid
 import json
 import time
+import queue
+import atexit
+import contextvars
+from contextlib import contextmanager
 from typing import Dict, Any, Optional
 from django.conf import settings
 from django.utils import timezone
-from datetime import datetime
+from datetime import datetime, timezone as dt_timezone
 import psutil
 import os
 
+# Request/task scoped logging context. Each thread and asyncio task sees its
+# own value, so concurrent requests never share correlation ids.
+_logging_context = contextvars.ContextVar('logging_context', default={})
+
+CONTEXT_FIELDS = ('correlation_id', 'request_id', 'user_id', 'session_id')
+
+# Map custom severity levels to standard Python logging levels
+LEVEL_MAPPING = {
+    'LOW': logging.INFO,
+    'MEDIUM': logging.WARNING,
+    'HIGH': logging.ERROR,
+    'CRITICAL': logging.CRITICAL,
+    'DEBUG': logging.DEBUG,
+    'INFO': logging.INFO,
+    'WARNING': logging.WARNING,
+    'ERROR': logging.ERROR
+}
+
+
+def set_logging_context(correlation_id: str = None, request_id: str = None,
+                        user_id: int = None, session_id: str = None) -> contextvars.Token:
+    """
+    Set the logging context for the current request or task
+    
+    Returns:
+        Token to pass to reset_logging_context once the request/task ends
+    """
+    return _logging_context.set({
+        'correlation_id': correlation_id or str(uuid.uuid4()),
+        'request_id': request_id or str(uuid.uuid4()),
+        'user_id': user_id,
+        'session_id': session_id
+    })
+
+
+def reset_logging_context(token: contextvars.Token) -> None:
+    """Restore the logging context that was active before set_logging_context"""
+    try:
+        _logging_context.reset(token)
+    except ValueError:
+        # Token created in a different context (e.g. another thread)
+        _logging_context.set({})
+
+
+def get_logging_context() -> Dict[str, Any]:
+    """Get the logging context of the current request or task"""
+    return _logging_context.get()
+
+
+@contextmanager
+def logging_context(**context):
+    """Context manager that scopes a logging context to a block of code"""
+    token = set_logging_context(**context)
+    try:
+        yield get_logging_context()
+    finally:
+        reset_logging_context(token)
+
+
+class StructuredLogMessage:
+    """
+    Log message that is serialized to JSON only when a handler formats it
+    
+    Disabled levels never build one, and with the queue handler the JSON
+    encoding happens on the listener thread rather than the request thread.
+    """
+    
+    __slots__ = ('data', 'created', '_serialized')
+    
+    def __init__(self, data: Dict[str, Any], created: float):
+        self.data = data
+        self.created = created
+        self._serialized = None
+    
+    def __str__(self) -> str:
+        if self._serialized is None:
+            data = {'timestamp': datetime.fromtimestamp(self.created, dt_timezone.utc).isoformat()}
+            data.update(self.data)
+            self._serialized = json.dumps(data, default=str)
+        return self._serialized
+
+
 class StructuredLogger:
     """Structured logging service with correlation IDs"""
     
     def __init__(self, name: str = 'analytics'):
         self.logger = logging.getLogger(name)
-        self.correlation_id = None
-        self.request_id = None
-        self.user_id = None
-        self.session_id = None
+    
+    @property
+    def correlation_id(self) -> Optional[str]:
+        return _logging_context.get().get('correlation_id')
+    
+    @property
+    def request_id(self) -> Optional[str]:
+        return _logging_context.get().get('request_id')
+    
+    @property
+    def user_id(self) -> Optional[int]:
+        return _logging_context.get().get('user_id')
+    
+    @property
+    def session_id(self) -> Optional[str]:
+        return _logging_context.get().get('session_id')
     
     def set_context(self, correlation_id: str = None, request_id: str = None, 
-                   user_id: int = None, session_id: str = None):
-        """Set logging context"""
-        self.correlation_id = correlation_id or str(uuid.uuid4())
-        self.request_id = request_id or str(uuid.uuid4())
-        self.user_id = user_id
-        self.session_id = session_id
+                   user_id: int = None, session_id: str = None) -> contextvars.Token:
+        """Set logging context for the current request or task"""
+        return set_logging_context(correlation_id, request_id, user_id, session_id)
     
     def _format_message(self, message: str, level: str, extra_data: Dict = None) -> Dict:
         """Format message with structured data"""
+        context = _logging_context.get()
         base_data = {
-            'timestamp': timezone.now().isoformat(),
             'level': level,
             'message': message,
-            'correlation_id': self.correlation_id,
-            'request_id': self.request_id,
-            'user_id': self.user_id,
-            'session_id': self.session_id,
+            'correlation_id': context.get('correlation_id'),
+            'request_id': context.get('request_id'),
+            'user_id': context.get('user_id'),
+            'session_id': context.get('session_id'),
             'service': 'analytics'
         }
         
@@ -52,28 +148,20 @@ class StructuredLogger:
     
     def _log_structured(self, level: str, message: str, extra_data: Dict = None):
         """Log structured message"""
-        structured_data = self._format_message(message, level, extra_data)
+        levelno = LEVEL_MAPPING.get(level.upper(), logging.INFO)
         
-        # Map custom severity levels to standard Python logging levels
-        level_mapping = {
-            'LOW': 'INFO',
-            'MEDIUM': 'WARNING', 
-            'HIGH': 'ERROR',
-            'CRITICAL': 'CRITICAL',
-            'DEBUG': 'DEBUG',
-            'INFO': 'INFO',
-            'WARNING': 'WARNING',
-            'ERROR': 'ERROR'
-        }
+        # Skip formatting entirely when the level is disabled
+        if not self.logger.isEnabledFor(levelno):
+            return
         
-        mapped_level = level_mapping.get(level.upper(), 'INFO')
+        structured_data = self._format_message(message, level, extra_data)
         
         # Log to file
-        self.logger.log(getattr(logging, mapped_level), json.dumps(structured_data))
+        self.logger.log(levelno, StructuredLogMessage(structured_data, time.time()))
         
         # Also log to console in development
         if settings.DEBUG:
-            print(f"[{level.upper()}] {message} | {self.correlation_id}")
+            print(f"[{level.upper()}] {message} | {structured_data['correlation_id']}")
     
     def info(self, message: str, extra_data: Dict = None):
         """Log info message"""
@@ -231,6 +319,91 @@ class ErrorLogger:
         
         self.logger.warning(f"Validation error: {field}", validation_data)
 
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that never blocks the calling thread
+    
+    Records are handed to a QueueListener thread without being formatted, so
+    structured messages are serialized off the request path. When the queue
+    is full the record is dropped instead of waiting.
+    """
+    
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Exception tracebacks reference live frames; render them now
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+    
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_queue_listeners = []
+
+
+def install_queue_logging(max_queue_size: int = None) -> None:
+    """
+    Move configured log handlers behind non-blocking queue handlers
+    
+    Each logger from settings.LOGGING (and the root logger) gets a queue
+    handler, and its original handlers are driven by a QueueListener thread.
+    Loggers sharing the same handlers share one queue and listener.
+    """
+    if _queue_listeners:
+        return
+    
+    max_queue_size = max_queue_size or getattr(settings, 'LOGGING_QUEUE_MAX_SIZE', 10000)
+    logger_names = [None] + list(getattr(settings, 'LOGGING', {}).get('loggers', {}).keys())
+    queue_handlers = {}
+    
+    for name in logger_names:
+        target_logger = logging.getLogger(name)
+        handlers = tuple(h for h in target_logger.handlers if not isinstance(h, logging.handlers.QueueHandler))
+        if not handlers:
+            continue
+        
+        handler_key = tuple(id(h) for h in handlers)
+        if handler_key not in queue_handlers:
+            log_queue = queue.Queue(maxsize=max_queue_size)
+            listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+            listener.start()
+            queue_handlers[handler_key] = NonBlockingQueueHandler(log_queue)
+            _queue_listeners.append((queue_handlers[handler_key], listener))
+        
+        for handler in handlers:
+            target_logger.removeHandler(handler)
+        target_logger.addHandler(queue_handlers[handler_key])
+    
+    atexit.register(_stop_queue_listeners)
+    os.register_at_fork(after_in_child=_restart_queue_listeners)
+
+
+def _stop_queue_listeners() -> None:
+    """Flush and stop queue listeners"""
+    for _, listener in _queue_listeners:
+        try:
+            listener.stop()
+        except Exception:
+            pass
+
+
+def _restart_queue_listeners() -> None:
+    """Listener threads do not survive fork (Celery prefork, gunicorn); start fresh ones"""
+    for index, (handler, listener) in enumerate(_queue_listeners):
+        handler.queue = queue.Queue(maxsize=handler.queue.maxsize)
+        new_listener = logging.handlers.QueueListener(handler.queue, *listener.handlers, respect_handler_level=True)
+        new_listener.start()
+        _queue_listeners[index] = (handler, new_listener)
+
+
 # Global logging services
 def get_logger(name: str = 'analytics') -> StructuredLogger:
     """Get structured logger instance"""
@@ -0,0 +1,232 @@
+"""
+Model Registry Service
+
+Persists estimators trained by the ML tools together with their scaler,
+feature encoders and feature specification, ties them to the AnalysisResult
+that trained them and loads them back for batch scoring. Loaded models are
+kept in a per-process LRU so repeated scoring skips deserialization.
+"""
+
+import os
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+import joblib
+from django.conf import settings
+
+from analytics.models import AnalysisResult, TrainedModel
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    Artifact store and in-process LRU for trained models
+
+    Tools serialize a bundle ({'model', 'scaler', 'encoders', 'feature_columns',
+    'target_column', 'target_classes', 'task', 'model_type'}) with
+    save_artifact() and reference it from their result as 'model_artifact';
+    the analysis executor then registers it against the stored AnalysisResult.
+    """
+
+    ARTIFACT_SUFFIX = '.joblib'
+
+    def __init__(self):
+        self.artifacts_dir = Path(getattr(settings, 'MODEL_REGISTRY_DIR', Path(settings.MEDIA_ROOT) / 'models'))
+        self.max_loaded = getattr(settings, 'MODEL_REGISTRY_CACHE_SIZE', 8)
+        self.orphan_hours = getattr(settings, 'MODEL_ARTIFACT_ORPHAN_HOURS', 24)
+        self._loaded = OrderedDict()  # model id -> bundle
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'loads': 0}
+
+    def save_artifact(self, bundle: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Serialize a trained model bundle
+
+        Args:
+            bundle: Estimator, scaler, encoders and feature specification
+
+        Returns:
+            Dict with path, size_bytes and sha256, or None if it could not be written
+        """
+        try:
+            self.artifacts_dir.mkdir(parents=True, exist_ok=True)
+            path = self.artifacts_dir / f"{uuid.uuid4().hex}{self.ARTIFACT_SUFFIX}"
+            temp_path = path.with_suffix('.tmp')
+            joblib.dump(bundle, temp_path, compress=3)
+            os.replace(temp_path, path)
+
+            return {
+                'path': str(path),
+                'size_bytes': path.stat().st_size,
+                'sha256': self._sha256(path)
+            }
+        except Exception as e:
+            logger.warning(f"Failed to save model artifact: {str(e)}")
+            return None
+
+    def register(self, analysis_result: AnalysisResult, result_data: Dict[str, Any]) -> Optional[TrainedModel]:
+        """
+        Register the model artifact referenced by a tool result
+
+        Args:
+            analysis_result: Stored result of the training run
+            result_data: Tool result (with 'model_artifact')
+
+        Returns:
+            TrainedModel, or None if the result has no model artifact
+        """
+        artifact = result_data.get('model_artifact') if isinstance(result_data, dict) else None
+        if not artifact:
+            return None
+
+        try:
+            path = Path(artifact['path']).resolve()
+            if path.parent != self.artifacts_dir.resolve():
+                raise ValueError(f"Model artifact outside {self.artifacts_dir}: {path}")
+
+            task = result_data.get('type')
+            model_type = result_data.get('model_type', '')
+            target_column = result_data.get('target_column', '')
+            return TrainedModel.objects.create(
+                name=f"{model_type.replace('_', ' ').title()} {task} of {target_column}",
+                task=task,
+                model_type=model_type,
+                target_column=target_column,
+                feature_columns=result_data.get('feature_columns', []),
+                target_classes=result_data.get('target_classes'),
+                metrics=result_data.get('metrics', {}),
+                artifact_path=str(path),
+                artifact_size_bytes=artifact.get('size_bytes', 0),
+                artifact_sha256=artifact['sha256'],
+                user=analysis_result.user,
+                analysis_result=analysis_result
+            )
+        except Exception as e:
+            logger.warning(f"Failed to register model for analysis result {analysis_result.id}: {str(e)}")
+            return None
+
+    def load(self, model_id: int, user_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Load a registered model bundle, from the process LRU when possible
+
+        Args:
+            model_id: TrainedModel id
+            user_id: Owner to enforce (None skips the check)
+
+        Returns:
+            Model bundle with 'model_id' and 'user_id' added
+
+        Raises:
+            TrainedModel.DoesNotExist: If there is no such model for the user
+            ValueError: If the artifact is missing or does not match its checksum
+        """
+        with self._lock:
+            bundle = self._loaded.get(model_id)
+            if bundle is not None:
+                if user_id is not None and bundle['user_id'] != user_id:
+                    raise TrainedModel.DoesNotExist(f"Trained model {model_id} not found")
+                self._loaded.move_to_end(model_id)
+                self.stats['hits'] += 1
+                return bundle
+
+        filters = {'id': model_id}
+        if user_id is not None:
+            filters['user_id'] = user_id
+        trained_model = TrainedModel.objects.get(**filters)
+
+        path = Path(trained_model.artifact_path)
+        if not path.exists():
+            raise ValueError(f"Model artifact missing for trained model {model_id}")
+        # Artifacts are pickles; only deserialize the file that was registered
+        if self._sha256(path) != trained_model.artifact_sha256:
+            raise ValueError(f"Model artifact checksum mismatch for trained model {model_id}")
+
+        start_time = time.perf_counter()
+        bundle = joblib.load(path)
+        bundle['model_id'] = trained_model.id
+        bundle['user_id'] = trained_model.user_id
+        logger.info(f"Loaded trained model {model_id} in {time.perf_counter() - start_time:.2f}s")
+
+        with self._lock:
+            self.stats['loads'] += 1
+            self._loaded[model_id] = bundle
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+        return bundle
+
+    def evict(self, model_id: int) -> None:
+        """Drop a model from this process's LRU"""
+        with self._lock:
+            self._loaded.pop(model_id, None)
+
+    def delete_artifact(self, artifact_path: str) -> None:
+        """Delete a model artifact file"""
+        try:
+            Path(artifact_path).unlink(missing_ok=True)
+        except Exception as e:
+            logger.warning(f"Failed to delete model artifact {artifact_path}: {str(e)}")
+
+    def cleanup_orphan_artifacts(self) -> int:
+        """
+        Delete artifacts never registered to an analysis result
+
+        Tools run outside the analysis executor still write artifacts; those
+        older than MODEL_ARTIFACT_ORPHAN_HOURS without a TrainedModel are removed.
+
+        Returns:
+            Number of artifacts deleted
+        """
+        if not self.artifacts_dir.exists():
+            return 0
+
+        registered = {Path(path).name for path in TrainedModel.objects.values_list('artifact_path', flat=True)}
+        cutoff = time.time() - self.orphan_hours * 3600
+        deleted = 0
+        for path in self.artifacts_dir.iterdir():
+            if path.name in registered or path.stat().st_mtime > cutoff:
+                continue
+            if path.suffix in (self.ARTIFACT_SUFFIX, '.tmp'):
+                path.unlink(missing_ok=True)
+                deleted += 1
+        return deleted
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get LRU statistics for this process"""
+        lookups = self.stats['hits'] + self.stats['loads']
+        return {
+            **self.stats,
+            'loaded_models': len(self._loaded),
+            'hit_ratio': round(self.stats['hits'] / lookups, 4) if lookups else 0.0
+        }
+
+    @staticmethod
+    def _sha256(path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as handle:
+            for block in iter(lambda: handle.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+
+# Global instance for easy access
+model_registry = ModelRegistry()
+
+
+def load_trained_model(model_id: int, user_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Convenience function to load a registered model bundle
+
+    Args:
+        model_id: TrainedModel id
+        user_id: Owner to enforce
+
+    Returns:
+        Model bundle
+    """
+    return model_registry.load(model_id, user_id)
@@ -0,0 +1,350 @@
+"""
+Query Instrumentation Service
+
+Counts database queries per request and per Celery task through a connection
+execute wrapper, fingerprints duplicate queries, totals database time and
+flags N+1 patterns together with the select_related/prefetch_related fix
+from the query optimizer's optimization patterns. Per-label aggregates are
+kept in a shared Redis hash for a periodic report.
+"""
+
+import re
+import time
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Any, Optional
+from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
+import redis
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Queries executed within one tracked unit of work"""
+
+    __slots__ = ('label', 'count', 'duration', 'fingerprints')
+
+    def __init__(self, label: str):
+        self.label = label
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = {}  # fingerprint -> [count, duration]
+
+    def record(self, sql: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        entry = self.fingerprints.get(sql)
+        if entry is None:
+            self.fingerprints[sql] = [1, duration]
+        else:
+            entry[0] += 1
+            entry[1] += duration
+
+    def duplicates(self) -> Dict[str, int]:
+        """Fingerprints executed more than once (parameters may differ)"""
+        duplicates = defaultdict(int)
+        for sql, (count, _) in self.fingerprints.items():
+            duplicates[QueryInstrumentation.fingerprint(sql)] += count
+        return {fingerprint: count for fingerprint, count in duplicates.items() if count > 1}
+
+
+class QueryInstrumentation:
+    """
+    Connection execute wrapper recording queries into the current QueryStats
+
+    The wrapper is installed on every connection when it is created and only
+    does work while a request or task is being tracked.
+    """
+
+    REPORT_KEY = 'analytical:queries:report'
+
+    _IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+    _NUMBER = re.compile(r'\b\d+\b')
+    _STRING = re.compile(r"'(?:[^']|'')*'")
+    _FROM_TABLE = re.compile(r'FROM "(\w+)"')
+    _WHERE_COLUMN = re.compile(r'WHERE "(\w+)"\."(\w+)" (?:= %s|IN \(%s\.\.\.\))')
+
+    def __init__(self):
+        self.enabled = getattr(settings, 'QUERY_INSTRUMENTATION_ENABLED', True)
+        self.n_plus_one_threshold = getattr(settings, 'QUERY_N_PLUS_ONE_THRESHOLD', 5)
+        self.query_count_threshold = getattr(settings, 'QUERY_COUNT_WARNING_THRESHOLD', 50)
+        self.flush_interval = getattr(settings, 'QUERY_REPORT_FLUSH_INTERVAL', 10.0)
+        self._pending = defaultdict(lambda: defaultdict(float))
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._stats = ContextVar('query_stats', default=None)
+        self._models_by_table = None
+        self._redis_client = None
+
+    def _get_redis_client(self) -> redis.Redis:
+        """Get Redis client connection"""
+        if self._redis_client is None:
+            redis_url = getattr(settings, 'CACHES', {}).get('default', {}).get('LOCATION', 'redis://127.0.0.1:6379/1')
+            if redis_url.startswith('redis://'):
+                self._redis_client = redis.from_url(redis_url, decode_responses=True)
+            else:
+                self._redis_client = redis.Redis(host='127.0.0.1', port=6379, db=1, decode_responses=True)
+        return self._redis_client
+
+    def __call__(self, execute, sql, params, many, context):
+        stats = self._stats.get()
+        if stats is None:
+            return execute(sql, params, many, context)
+
+        start_time = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            stats.record(sql, time.perf_counter() - start_time)
+
+    def install(self, connection) -> None:
+        """Install the execute wrapper on a database connection"""
+        if self.enabled and self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    def start(self, label: str):
+        """
+        Start tracking queries for a unit of work
+
+        Returns:
+            Token for stop()
+        """
+        return self._stats.set(QueryStats(label))
+
+    def stop(self, token, record: bool = True) -> Dict[str, Any]:
+        """
+        Stop tracking and analyze the queries
+
+        Args:
+            token: Token returned by start()
+            record: Add the result to the shared report and log warnings
+
+        Returns:
+            Dict with query count, database time, duplicates and N+1 patterns
+        """
+        stats = self._stats.get()
+        try:
+            self._stats.reset(token)
+        except ValueError:
+            # Started in a copied context (e.g. a sync_to_async pipeline stage)
+            self._stats.set(None if token.old_value is Token.MISSING else token.old_value)
+        if stats is None:
+            return {}
+
+        analysis = self.analyze(stats)
+        if record:
+            self._record(analysis)
+        return analysis
+
+    @contextmanager
+    def track(self, label: str, record: bool = True):
+        """Track queries in a block; yields a dict filled with the analysis on exit"""
+        analysis = {}
+        token = self.start(label)
+        try:
+            yield analysis
+        finally:
+            analysis.update(self.stop(token, record))
+
+    def current_stats(self) -> Optional[QueryStats]:
+        return self._stats.get()
+
+    @classmethod
+    def fingerprint(cls, sql: str) -> str:
+        """Normalize a query so executions differing only in parameters match"""
+        sql = cls._IN_LIST.sub('IN (%s...)', sql)
+        sql = cls._STRING.sub('?', sql)
+        return cls._NUMBER.sub('N', sql)
+
+    def analyze(self, stats: QueryStats) -> Dict[str, Any]:
+        """Summarize a unit of work's queries"""
+        duplicates = stats.duplicates()
+        n_plus_one = [
+            self._describe_n_plus_one(fingerprint, count)
+            for fingerprint, count in duplicates.items()
+            if count >= self.n_plus_one_threshold
+        ]
+
+        return {
+            'label': stats.label,
+            'query_count': stats.count,
+            'db_time_ms': round(stats.duration * 1000, 2),
+            'duplicate_queries': sum(count - 1 for count in duplicates.values()),
+            'n_plus_one': n_plus_one
+        }
+
+    def _describe_n_plus_one(self, fingerprint: str, count: int) -> Dict[str, Any]:
+        """Identify the repeated lookup and the optimization pattern that avoids it"""
+        table_match = self._FROM_TABLE.search(fingerprint)
+        column_match = self._WHERE_COLUMN.search(fingerprint)
+        table = table_match.group(1) if table_match else None
+        model = self._get_models_by_table().get(table)
+
+        description = {
+            'table': table,
+            'model': model.__name__ if model else None,
+            'count': count,
+            'query': fingerprint[:300],
+            'suggestion': None
+        }
+
+        if model is not None and column_match:
+            description['suggestion'] = self._suggest_fix(model, column_match.group(2))
+        return description
+
+    def _suggest_fix(self, model, column: str) -> Optional[str]:
+        """Map a repeated lookup onto select_related/prefetch_related from the optimization patterns"""
+        from analytics.services.query_optimizer import query_optimizer
+
+        field = next((f for f in model._meta.concrete_fields if f.column == column), None)
+        if field is None:
+            return None
+
+        if field.primary_key:
+            # Forward foreign key followed per row: select_related on the referencing model
+            for owner, patterns in query_optimizer.optimization_patterns.items():
+                for path in patterns.get('select_related', []):
+                    if self._resolve_path(owner, path) is model:
+                        return f"{owner}.objects.select_related('{path}')"
+            return f"select_related() the relation to {model.__name__}"
+
+        if field.many_to_one:
+            # Reverse relation loaded per parent row: prefetch_related on the parent
+            parent = field.related_model.__name__
+            for path in query_optimizer.optimization_patterns.get(parent, {}).get('prefetch_related', []):
+                if self._resolve_path(parent, path) is model:
+                    return f"{parent}.objects.prefetch_related('{path}')"
+            return f"prefetch_related() the {model.__name__} rows of {parent}"
+
+        return None
+
+    def _resolve_path(self, model_name: str, path: str):
+        """Follow a select_related/prefetch_related path to its target model"""
+        try:
+            model = apps.get_model('analytics', model_name)
+            for part in path.split('__'):
+                model = model._meta.get_field(part).related_model
+            return model
+        except Exception:
+            return None
+
+    def _get_models_by_table(self) -> Dict[str, Any]:
+        if self._models_by_table is None:
+            self._models_by_table = {model._meta.db_table: model for model in apps.get_models()}
+        return self._models_by_table
+
+    def _record(self, analysis: Dict[str, Any]) -> None:
+        """Log notable units of work and add them to the shared report"""
+        if analysis['n_plus_one'] or analysis['query_count'] >= self.query_count_threshold:
+            logger.warning(
+                f"{analysis['label']}: {analysis['query_count']} queries in {analysis['db_time_ms']}ms, "
+                f"{analysis['duplicate_queries']} duplicates, {len(analysis['n_plus_one'])} N+1 patterns",
+                extra={'query_analysis': analysis}
+            )
+
+        with self._lock:
+            counters = self._pending[analysis['label']]
+            counters['runs'] += 1
+            counters['queries'] += analysis['query_count']
+            counters['db_time_ms'] += analysis['db_time_ms']
+            counters['duplicates'] += analysis['duplicate_queries']
+            counters['n_plus_one'] += len(analysis['n_plus_one'])
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+
+        if due:
+            self.flush()
+
+    def flush(self) -> bool:
+        """Push buffered per-label counters to the shared report"""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(lambda: defaultdict(float))
+            self._last_flush = time.monotonic()
+
+        if not pending:
+            return True
+
+        try:
+            pipe = self._get_redis_client().pipeline(transaction=False)
+            for label, counters in pending.items():
+                for field, value in counters.items():
+                    if field == 'db_time_ms':
+                        pipe.hincrbyfloat(self.REPORT_KEY, f"{label}|{field}", value)
+                    else:
+                        pipe.hincrby(self.REPORT_KEY, f"{label}|{field}", int(value))
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to flush query report: {str(e)}")
+            return False
+
+    def get_report(self, limit: int = 20, reset: bool = False) -> Dict[str, Any]:
+        """
+        Get the views and tasks issuing the most queries
+
+        Args:
+            limit: Number of labels to return
+            reset: Clear the report after reading it
+
+        Returns:
+            Dict with labels ordered by average queries per run
+        """
+        self.flush()
+
+        try:
+            client = self._get_redis_client()
+            if reset:
+                pipe = client.pipeline(transaction=True)
+                pipe.hgetall(self.REPORT_KEY)
+                pipe.delete(self.REPORT_KEY)
+                raw = pipe.execute()[0]
+            else:
+                raw = client.hgetall(self.REPORT_KEY)
+        except Exception as e:
+            logger.warning(f"Failed to read query report: {str(e)}")
+            return {'error': str(e)}
+
+        per_label = defaultdict(dict)
+        for key, value in raw.items():
+            label, _, field = key.rpartition('|')
+            per_label[label][field] = float(value)
+
+        entries = []
+        for label, counters in per_label.items():
+            runs = counters.get('runs', 0) or 1
+            entries.append({
+                'label': label,
+                'runs': int(counters.get('runs', 0)),
+                'avg_queries': round(counters.get('queries', 0) / runs, 1),
+                'avg_db_time_ms': round(counters.get('db_time_ms', 0) / runs, 2),
+                'duplicates': int(counters.get('duplicates', 0)),
+                'n_plus_one': int(counters.get('n_plus_one', 0))
+            })
+        entries.sort(key=lambda entry: entry['avg_queries'], reverse=True)
+
+        return {
+            'labels': entries[:limit],
+            'labels_count': len(entries),
+            'timestamp': timezone.now().isoformat()
+        }
+
+
+# Global instance for easy access
+query_instrumentation = QueryInstrumentation()
+
+
+def get_query_report(limit: int = 20) -> Dict[str, Any]:
+    """
+    Convenience function to get the query instrumentation report
+
+    Args:
+        limit: Number of labels to return
+
+    Returns:
+        Dict with the views and tasks issuing the most queries
+    """
+    return query_instrumentation.get_report(limit)
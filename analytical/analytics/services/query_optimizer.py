@@ -20,6 +20,9 @@ from analytics.models import (
     User, Dataset, DatasetColumn, AnalysisSession, AnalysisResult,
     ChatMessage, AgentRun, GeneratedImage, AuditTrail, VectorNote
 )
+from analytics.services.cache_tags import cache_tag_service
+from analytics.services.cache_metrics import cache_metrics
+from analytics.services.query_instrumentation import query_instrumentation
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +32,9 @@ class QueryOptimizer:
     Comprehensive query optimization service for the analytical system
     """
     
+    # Versioned cache namespace for optimized query results
+    CACHE_NAMESPACE = 'query_optimizer'
+    
     def __init__(self):
         self.optimization_cache = {}
         self.query_stats = defaultdict(int)
@@ -199,11 +205,12 @@ class QueryOptimizer:
             User instance with datasets prefetched
         """
         try:
-            cache_key = f"user_datasets_{user_id}"
+            cache_key = cache_tag_service.namespaced_key(self.CACHE_NAMESPACE, f"user_datasets_{user_id}")
             cached_result = cache.get(cache_key)
             
             if cached_result:
                 self.performance_metrics['cache_hits'] += 1
+                cache_metrics.record(self.CACHE_NAMESPACE, hits=1)
                 return cached_result
             
             user = User.objects.select_related().prefetch_related(
@@ -212,8 +219,9 @@ class QueryOptimizer:
             ).get(id=user_id)
             
             # Cache the result
-            cache.set(cache_key, user, self.cache_timeout)
+            cache_tag_service.set(cache_key, user, self.cache_timeout, tags=[f"user:{user_id}"])
             self.performance_metrics['cache_misses'] += 1
+            cache_metrics.record(self.CACHE_NAMESPACE, misses=1, sets=1)
             
             return user
             
@@ -234,11 +242,12 @@ class QueryOptimizer:
             Dataset instance with columns prefetched
         """
         try:
-            cache_key = f"dataset_columns_{dataset_id}"
+            cache_key = cache_tag_service.namespaced_key(self.CACHE_NAMESPACE, f"dataset_columns_{dataset_id}")
             cached_result = cache.get(cache_key)
             
             if cached_result:
                 self.performance_metrics['cache_hits'] += 1
+                cache_metrics.record(self.CACHE_NAMESPACE, hits=1)
                 return cached_result
             
             dataset = Dataset.objects.select_related(
@@ -248,8 +257,10 @@ class QueryOptimizer:
             ).get(id=dataset_id)
             
             # Cache the result
-            cache.set(cache_key, dataset, self.cache_timeout)
+            cache_tag_service.set(cache_key, dataset, self.cache_timeout,
+                                  tags=[f"dataset:{dataset_id}", f"user:{dataset.user_id}"])
             self.performance_metrics['cache_misses'] += 1
+            cache_metrics.record(self.CACHE_NAMESPACE, misses=1, sets=1)
             
             return dataset
             
@@ -270,11 +281,12 @@ class QueryOptimizer:
             AnalysisSession instance with results prefetched
         """
         try:
-            cache_key = f"session_results_{session_id}"
+            cache_key = cache_tag_service.namespaced_key(self.CACHE_NAMESPACE, f"session_results_{session_id}")
             cached_result = cache.get(cache_key)
             
             if cached_result:
                 self.performance_metrics['cache_hits'] += 1
+                cache_metrics.record(self.CACHE_NAMESPACE, hits=1)
                 return cached_result
             
             session = AnalysisSession.objects.select_related(
@@ -288,8 +300,10 @@ class QueryOptimizer:
             ).get(id=session_id)
             
             # Cache the result
-            cache.set(cache_key, session, self.cache_timeout)
+            cache_tag_service.set(cache_key, session, self.cache_timeout,
+                                  tags=[f"session:{session_id}", f"user:{session.user_id}"])
             self.performance_metrics['cache_misses'] += 1
+            cache_metrics.record(self.CACHE_NAMESPACE, misses=1, sets=1)
             
             return session
             
@@ -471,29 +485,23 @@ class QueryOptimizer:
         try:
             start_time = time.time()
             
-            # Get user with all related data
-            user = self.get_user_with_datasets(user_id)
+            user = User.objects.filter(id=user_id).first()
             if not user:
                 return {}
             
-            # Get datasets with columns
-            datasets = self.get_user_datasets_optimized(user_id)
-            
-            # Get recent sessions
-            recent_sessions = AnalysisSession.objects.filter(
-                user_id=user_id
-            ).select_related('dataset').prefetch_related('results')[:10]
-            
-            # Get recent audit trails
-            recent_audits = self.get_audit_trails_optimized(user_id, 20)
+            # Recent datasets, sessions, audit trails and totals come from the
+            # incrementally maintained summary instead of history queries
+            from analytics.services.dashboard_summary import dashboard_summary_service
+            summary = dashboard_summary_service.get_summary(user_id)
             
             execution_time = time.time() - start_time
             
             return {
                 'user': user,
-                'datasets': datasets,
-                'recent_sessions': recent_sessions,
-                'recent_audits': recent_audits,
+                'datasets': summary.get('recent_datasets', []),
+                'recent_sessions': summary.get('recent_sessions', []),
+                'recent_audits': summary.get('recent_audits', []),
+                'statistics': summary.get('statistics', {}),
                 'execution_time': execution_time,
                 'optimization_applied': True
             }
@@ -507,18 +515,17 @@ class QueryOptimizer:
         Clear optimization cache
         
         Args:
-            pattern: Optional pattern to match cache keys
+            pattern: Optional cache tag to invalidate (e.g. 'dataset:42')
             
         Returns:
             True if successful
         """
         try:
             if pattern:
-                # Clear specific pattern
-                cache.delete_many([key for key in cache._cache.keys() if pattern in key])
-            else:
-                # Clear all optimization cache
-                cache.delete_many([key for key in cache._cache.keys() if 'user_' in key or 'dataset_' in key or 'session_' in key])
+                # Clear entries registered under the tag
+                cache_tag_service.invalidate_tags([pattern], aliases=['default'])
+            elif not cache_tag_service.invalidate_namespace(self.CACHE_NAMESPACE):
+                return False
             
             logger.info(f"Optimization cache cleared: {pattern or 'all'}")
             return True
@@ -534,8 +541,10 @@ class QueryOptimizer:
         Returns:
             Dict with optimization statistics
         """
+        shared_metrics = cache_metrics.get_stats()
         return {
             'performance_metrics': self.performance_metrics.copy(),
+            'shared_cache_metrics': shared_metrics.get('keyspaces', {}).get(self.CACHE_NAMESPACE, {}),
             'query_stats': dict(self.query_stats),
             'optimization_patterns': len(self.optimization_patterns),
             'cache_timeout': self.cache_timeout,
@@ -555,8 +564,9 @@ class QueryOptimizer:
         try:
             start_time = time.time()
             
-            # Execute query to get timing
-            list(queryset)
+            # Execute the query once, counting what it issues (prefetches included)
+            with query_instrumentation.track(f"analyze:{queryset.model.__name__}", record=False) as queries:
+                list(queryset)
             
             execution_time = time.time() - start_time
             
@@ -564,10 +574,17 @@ class QueryOptimizer:
             analysis = {
                 'model': queryset.model.__name__,
                 'execution_time': execution_time,
-                'query_count': len(queryset.query.get_compiler().execute_sql()),
+                'query_count': queries['query_count'],
+                'db_time_ms': queries['db_time_ms'],
+                'duplicate_queries': queries['duplicate_queries'],
+                'n_plus_one': queries['n_plus_one'],
                 'optimization_recommendations': []
             }
             
+            for pattern in queries['n_plus_one']:
+                if pattern['suggestion']:
+                    analysis['optimization_recommendations'].append(pattern['suggestion'])
+            
             # Provide recommendations
             if execution_time > 1.0:  # More than 1 second
                 analysis['optimization_recommendations'].append(
@@ -579,7 +596,7 @@ class QueryOptimizer:
                     "select_related is already applied"
                 )
             
-            if queryset.query.prefetch_related:
+            if queryset._prefetch_related_lookups:
                 analysis['optimization_recommendations'].append(
                     "prefetch_related is already applied"
                 )
@@ -654,7 +671,7 @@ def clear_optimization_cache(pattern: Optional[str] = None) -> bool:
     Convenience function to clear optimization cache
     
     Args:
-        pattern: Optional pattern to match cache keys
+        pattern: Optional cache tag to invalidate
         
     Returns:
         True if successful
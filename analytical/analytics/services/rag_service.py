@@ -21,6 +21,7 @@ from analytics.models import VectorNote, User, Dataset, AuditTrail
 from django.db import models
 from django.db.models import F
 from analytics.services.audit_trail_manager import AuditTrailManager
+from analytics.services.rag_usage_aggregator import rag_usage_aggregator
 
 logger = logging.getLogger(__name__)
 
@@ -199,10 +200,7 @@ class RAGService:
             similarities.sort(key=lambda x: x['similarity'], reverse=True)
             results = similarities[:top_k]
             
-            # Update usage counts
-            self._update_usage_counts([r['data']['id'] for r in results])
-            
-            # Log audit trail and track tokens
+            # Track usage counts, audit trail and tokens
             self._log_rag_search_operation(
                 user_id=user_id,
                 query_embedding=query_embedding,
@@ -210,7 +208,8 @@ class RAGService:
                 scope=scope,
                 dataset_id=dataset_id,
                 top_k=top_k,
-                similarity_threshold=similarity_threshold
+                similarity_threshold=similarity_threshold,
+                vector_note_ids=[r['data']['id'] for r in results]
             )
             
             logger.info(f"Found {len(results)} similar vectors for query")
@@ -677,7 +676,7 @@ class RAGService:
                 resource_name=resource_name,
                 action_description=f"RAG {operation} operation",
                 success=success,
-                metadata_json=metadata or {},
+                additional_details=metadata or {},
                 correlation_id=f"rag_{int(timezone.now().timestamp())}"
             )
         except Exception as e:
@@ -685,10 +684,15 @@ class RAGService:
     
     def _log_rag_search_operation(self, user_id: int, query_embedding: List[float],
                                 results_count: int, scope: str, dataset_id: Optional[int],
-                                top_k: int, similarity_threshold: float) -> None:
+                                top_k: int, similarity_threshold: float,
+                                vector_note_ids: Optional[List[int]] = None) -> None:
         """
         Log RAG search operation with token tracking
         
+        Counts, costs and vector note usage are accumulated in Redis and folded
+        into the database periodically; only a sample of searches
+        (RAG_SEARCH_AUDIT_SAMPLE_RATE) gets its own detailed audit record.
+        
         Args:
             user_id: User performing the search
             query_embedding: Query embedding vector
@@ -697,32 +701,46 @@ class RAGService:
             dataset_id: Dataset ID if applicable
             top_k: Number of top results requested
             similarity_threshold: Similarity threshold used
+            vector_note_ids: IDs of the returned vector notes
         """
         try:
             # Calculate token cost for search operation
             search_cost = self.search_token_cost
+            vector_note_ids = vector_note_ids or []
             
-            # Log audit trail
-            self._log_rag_operation(
+            recorded = rag_usage_aggregator.record_search(
                 user_id=user_id,
-                operation='search_vectors',
-                resource_type='rag_search',
-                resource_id=0,  # No specific resource ID for search
-                resource_name=f"RAG Search ({scope})",
-                success=True,
-                metadata={
-                    'scope': scope,
-                    'dataset_id': dataset_id,
-                    'results_count': results_count,
-                    'top_k': top_k,
-                    'similarity_threshold': similarity_threshold,
-                    'embedding_dimension': len(query_embedding),
-                    'search_cost': search_cost
-                }
+                scope=scope,
+                results_count=results_count,
+                cost=search_cost,
+                vector_note_ids=vector_note_ids
             )
             
-            # Update user token usage
-            self._update_user_token_usage(user_id, search_cost)
+            if not recorded:
+                # Redis unavailable - fall back to direct writes
+                self._update_usage_counts(vector_note_ids)
+                self._update_user_token_usage(user_id, search_cost)
+            
+            if not recorded or rag_usage_aggregator.should_sample():
+                self._log_rag_operation(
+                    user_id=user_id,
+                    operation='search_vectors',
+                    resource_type='rag_search',
+                    resource_id=0,  # No specific resource ID for search
+                    resource_name=f"RAG Search ({scope})",
+                    success=True,
+                    metadata={
+                        'scope': scope,
+                        'dataset_id': dataset_id,
+                        'results_count': results_count,
+                        'top_k': top_k,
+                        'similarity_threshold': similarity_threshold,
+                        'embedding_dimension': len(query_embedding),
+                        'search_cost': search_cost,
+                        # Already counted by the aggregated record
+                        'sampled': recorded
+                    }
+                )
             
         except Exception as e:
             logger.warning(f"Failed to log RAG search operation: {str(e)}")
@@ -773,23 +791,28 @@ class RAGService:
                 created_at__range=[start_date, end_date]
             )
             
-            # Calculate statistics
-            total_operations = rag_entries.count()
-            successful_operations = rag_entries.filter(success=True).count()
-            failed_operations = rag_entries.filter(success=False).count()
-            
-            # Count by operation type
+            # Calculate statistics in one pass; aggregated records stand for many searches
+            total_operations = 0
+            successful_operations = 0
+            failed_operations = 0
             operation_counts = {}
+            total_cost = 0.0
+            
             for entry in rag_entries:
+                details = (entry.after_snapshot or {}).get('additional_details', {})
+                if details.get('sampled'):
+                    continue
+                
+                count = details.get('search_count', 1)
+                total_operations += count
+                if entry.success:
+                    successful_operations += count
+                else:
+                    failed_operations += count
+                
                 op_type = entry.action_description.split()[1] if ' ' in entry.action_description else 'unknown'
-                operation_counts[op_type] = operation_counts.get(op_type, 0) + 1
-            
-            # Calculate total cost
-            total_cost = sum(
-                float(entry.metadata_json.get('search_cost', 0)) 
-                for entry in rag_entries 
-                if entry.metadata_json
-            )
+                operation_counts[op_type] = operation_counts.get(op_type, 0) + count
+                total_cost += float(details.get('search_cost', 0))
             
             return {
                 'user_id': user.id,
@@ -0,0 +1,209 @@
+"""
+RAG Usage Aggregator
+
+Accumulates per-search accounting (search counts, costs, vector note usage) in
+Redis hash counters and periodically folds them into AuditTrail, User and
+VectorNote in bulk, instead of issuing several writes for every vector search.
+"""
+
+import logging
+import random
+from collections import defaultdict
+from typing import Dict, List, Any, Optional
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+import redis
+
+from analytics.models import VectorNote, User
+
+logger = logging.getLogger(__name__)
+
+
+class RAGUsageAggregator:
+    """
+    Redis-backed counters for RAG search accounting
+    """
+
+    USER_COUNTERS_KEY = 'analytical:rag:usage:users'
+    NOTE_COUNTERS_KEY = 'analytical:rag:usage:notes'
+    FOLD_LOCK_KEY = 'analytical:rag:usage:fold_lock'
+
+    def __init__(self):
+        self.sample_rate = getattr(settings, 'RAG_SEARCH_AUDIT_SAMPLE_RATE', 0.01)
+        self._redis_client = None
+
+    def _get_redis_client(self) -> redis.Redis:
+        """Get Redis client connection"""
+        if self._redis_client is None:
+            redis_url = getattr(settings, 'CACHES', {}).get('default', {}).get('LOCATION', 'redis://127.0.0.1:6379/1')
+            if redis_url.startswith('redis://'):
+                self._redis_client = redis.from_url(redis_url, decode_responses=True)
+            else:
+                self._redis_client = redis.Redis(host='127.0.0.1', port=6379, db=1, decode_responses=True)
+        return self._redis_client
+
+    def should_sample(self) -> bool:
+        """Whether the current search should also get a detailed audit record"""
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def record_search(self, user_id: Optional[int], scope: str, results_count: int,
+                      cost: float, vector_note_ids: List[int]) -> bool:
+        """
+        Record one vector search in a single Redis round-trip
+
+        Args:
+            user_id: User performing the search
+            scope: Search scope
+            results_count: Number of results returned
+            cost: Token cost of the search
+            vector_note_ids: IDs of the returned vector notes
+
+        Returns:
+            bool: True if recorded, False if Redis is unavailable
+        """
+        try:
+            pipe = self._get_redis_client().pipeline(transaction=False)
+            if user_id:
+                pipe.hincrby(self.USER_COUNTERS_KEY, f"{user_id}:searches", 1)
+                pipe.hincrby(self.USER_COUNTERS_KEY, f"{user_id}:results", results_count)
+                pipe.hincrby(self.USER_COUNTERS_KEY, f"{user_id}:scope:{scope}", 1)
+                pipe.hincrbyfloat(self.USER_COUNTERS_KEY, f"{user_id}:cost", cost)
+            for note_id in vector_note_ids:
+                pipe.hincrby(self.NOTE_COUNTERS_KEY, str(note_id), 1)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to record RAG search usage: {str(e)}")
+            return False
+
+    def fold_into_database(self) -> Dict[str, Any]:
+        """
+        Fold accumulated counters into the database
+
+        Counters are snapshotted with RENAME so searches recorded while folding
+        land in fresh hashes. A snapshot left behind by a failed fold is
+        processed again on the next run.
+
+        Returns:
+            Dict with fold statistics
+        """
+        client = self._get_redis_client()
+        if not client.set(self.FOLD_LOCK_KEY, 1, nx=True, ex=300):
+            return {'skipped': True}
+
+        try:
+            notes_updated = self._fold_note_counters(client)
+            users_updated = self._fold_user_counters(client)
+
+            logger.info(f"Folded RAG usage counters: {users_updated} users, {notes_updated} vector notes")
+
+            return {
+                'users_updated': users_updated,
+                'notes_updated': notes_updated
+            }
+        finally:
+            client.delete(self.FOLD_LOCK_KEY)
+
+    def get_pending_counts(self) -> Dict[str, int]:
+        """Get the number of counters waiting to be folded"""
+        client = self._get_redis_client()
+        return {
+            'user_counters': client.hlen(self.USER_COUNTERS_KEY),
+            'note_counters': client.hlen(self.NOTE_COUNTERS_KEY)
+        }
+
+    def _snapshot(self, client: redis.Redis, key: str) -> Dict[str, str]:
+        """Atomically move a counter hash aside and return its contents"""
+        processing_key = f"{key}:processing"
+        if not client.exists(processing_key):
+            if not client.exists(key):
+                return {}
+            client.rename(key, processing_key)
+        return client.hgetall(processing_key)
+
+    def _fold_note_counters(self, client: redis.Redis) -> int:
+        """Apply usage count increments to VectorNote rows, one UPDATE per distinct increment"""
+        counters = self._snapshot(client, self.NOTE_COUNTERS_KEY)
+        if not counters:
+            return 0
+
+        ids_by_increment = defaultdict(list)
+        for note_id, count in counters.items():
+            ids_by_increment[int(count)].append(int(note_id))
+
+        now = timezone.now()
+        with transaction.atomic():
+            for increment, note_ids in ids_by_increment.items():
+                VectorNote.objects.filter(id__in=note_ids).update(
+                    usage_count=F('usage_count') + increment,
+                    last_accessed=now
+                )
+
+        client.delete(f"{self.NOTE_COUNTERS_KEY}:processing")
+        return len(counters)
+
+    def _fold_user_counters(self, client: redis.Redis) -> int:
+        """Write one aggregated audit record and one token usage update per user"""
+        counters = self._snapshot(client, self.USER_COUNTERS_KEY)
+        if not counters:
+            return 0
+
+        per_user = defaultdict(lambda: {'searches': 0, 'results': 0, 'cost': 0.0, 'carry': 0.0, 'scopes': {}})
+        for field, value in counters.items():
+            user_id, metric = field.split(':', 1)
+            if metric.startswith('scope:'):
+                per_user[user_id]['scopes'][metric[len('scope:'):]] = int(value)
+            elif metric in ('cost', 'carry'):
+                per_user[user_id][metric] = float(value)
+            else:
+                per_user[user_id][metric] = int(value)
+
+        from analytics.services.audit_trail_manager import AuditTrailManager
+        audit_manager = AuditTrailManager()
+
+        carry_over = {}
+        with transaction.atomic():
+            for user_id, usage in per_user.items():
+                # Token usage is an integer field; carry fractional cost forward
+                pending_tokens = usage['cost'] + usage['carry']
+                whole_tokens = int(pending_tokens)
+                if whole_tokens:
+                    User.objects.filter(id=int(user_id)).update(
+                        token_usage_current_month=F('token_usage_current_month') + whole_tokens
+                    )
+                if pending_tokens - whole_tokens:
+                    carry_over[f"{user_id}:carry"] = pending_tokens - whole_tokens
+
+                if not usage['searches']:
+                    continue
+
+                audit_manager.log_action(
+                    user_id=int(user_id),
+                    action_type='rag_operation',
+                    action_category='rag_system',
+                    resource_type='rag_search',
+                    resource_name='RAG Search (aggregated)',
+                    action_description='RAG search_vectors operation',
+                    success=True,
+                    additional_details={
+                        'aggregated': True,
+                        'search_count': usage['searches'],
+                        'results_count': usage['results'],
+                        'scopes': usage['scopes'],
+                        'search_cost': usage['cost']
+                    }
+                )
+
+        pipe = client.pipeline(transaction=False)
+        for field, remainder in carry_over.items():
+            pipe.hincrbyfloat(self.USER_COUNTERS_KEY, field, remainder)
+        pipe.delete(f"{self.USER_COUNTERS_KEY}:processing")
+        pipe.execute()
+
+        return len(per_user)
+
+
+# Global instance for easy access
+rag_usage_aggregator = RAGUsageAggregator()
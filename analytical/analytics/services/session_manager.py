@@ -12,7 +12,6 @@ from datetime import datetime, timedelta
 from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
-from django.core.cache import cache
 from django.contrib.auth import get_user_model
 
 from analytics.models import (
@@ -21,6 +20,8 @@ from analytics.models import (
 )
 from django.db import models
 from analytics.services.audit_trail_manager import AuditTrailManager
+from analytics.services.caching_strategy import caching_strategy_service
+from analytics.services.keyset_pagination import keyset_paginator
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -31,6 +32,12 @@ class SessionManager:
     Service for managing analysis sessions with dataset tagging and user preferences
     """
     
+    # Chat history columns (context_messages snapshots are not loaded)
+    CHAT_HISTORY_FIELDS = (
+        'id', 'content', 'message_type', 'llm_model', 'token_count', 'metadata',
+        'attachments', 'analysis_result', 'user', 'session', 'created_at'
+    )
+    
     def __init__(self):
         self.audit_manager = AuditTrailManager()
         self.session_cache_timeout = getattr(settings, 'SESSION_CACHE_TTL', 3600)  # 1 hour
@@ -330,16 +337,25 @@ class SessionManager:
             return []
     
     def get_session_chat_history(self, session_id: int, user: User, 
-                               limit: int = 100) -> List[ChatMessage]:
-        """Get chat history for a session"""
+                               limit: int = 100, cursor: Optional[str] = None) -> List[ChatMessage]:
+        """
+        Get chat history for a session, newest first
+        
+        Pass keyset_paginator.encode_cursor(messages[-1]) as cursor to get the
+        next (older) page.
+        """
         try:
             session = self.get_session(session_id, user)
             if not session:
                 return []
             
-            return ChatMessage.objects.filter(
-                session=session, user=user
-            ).order_by('-created_at')[:limit]
+            page = keyset_paginator.paginate(
+                ChatMessage.objects.filter(session=session, user=user),
+                cursor=cursor,
+                page_size=limit,
+                fields=self.CHAT_HISTORY_FIELDS
+            )
+            return page['items']
             
         except Exception as e:
             logger.error(f"Failed to get session chat history: {str(e)}")
@@ -529,7 +545,8 @@ class SessionManager:
                 'last_analysis_at': session.last_analysis_at.isoformat() if session.last_analysis_at else None
             }
             
-            cache.set(cache_key, session_data, self.session_cache_timeout)
+            caching_strategy_service.near_set(cache_key, session_data, self.session_cache_timeout,
+                                              tags=[f"session:{session.id}"])
             
         except Exception as e:
             logger.warning(f"Failed to cache session data: {str(e)}")
@@ -538,7 +555,7 @@ class SessionManager:
         """Clear cached session data"""
         try:
             cache_key = f"session_{session_id}"
-            cache.delete(cache_key)
+            caching_strategy_service.near_delete(cache_key)
         except Exception as e:
             logger.warning(f"Failed to clear session cache: {str(e)}")
     
@@ -546,7 +563,7 @@ class SessionManager:
         """Get cached session data"""
         try:
             cache_key = f"session_{session_id}"
-            return cache.get(cache_key)
+            return caching_strategy_service.near_get(cache_key)
         except Exception as e:
             logger.warning(f"Failed to get cached session data: {str(e)}")
             return None
@@ -462,7 +462,7 @@ class VectorNoteManager:
         # Add column information
         if hasattr(dataset, 'columns'):
             column_info = []
-            for col in dataset.columns.all()[:10]:  # Limit to first 10 columns
+            for col in dataset.columns.defer('sketch')[:10]:  # Limit to first 10 columns
                 column_info.append(f"{col.name} ({col.confirmed_type})")
             if column_info:
                 summary_parts.append(f"Columns: {', '.join(column_info)}")
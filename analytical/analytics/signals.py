@@ -0,0 +1,98 @@
+"""
+Model signal handlers
+
+Keeps the incrementally maintained dashboard summary in sync with writes to
+datasets, sessions, analysis results and audit trails, and invalidates the
+cache tags of changed rows. Updates are applied after the surrounding
+transaction commits so rolled back writes never reach the caches. Also
+installs the query instrumentation wrapper on new database connections and
+deletes the artifacts of deleted trained models.
+"""
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from analytics.models import Dataset, AnalysisSession, AnalysisResult, AuditTrail, AnalysisTool, TrainedModel
+from analytics.services.dashboard_summary import dashboard_summary_service
+from analytics.services.cache_tags import cache_tag_service
+from analytics.services.query_instrumentation import query_instrumentation
+from analytics.services.model_registry import model_registry
+
+SUMMARY_KINDS = {
+    Dataset: 'dataset',
+    AnalysisSession: 'session',
+    AnalysisResult: 'result',
+    AuditTrail: 'audit',
+}
+
+
+@receiver(post_save, sender=Dataset)
+@receiver(post_save, sender=AnalysisSession)
+@receiver(post_save, sender=AnalysisResult)
+@receiver(post_save, sender=AuditTrail)
+def update_dashboard_summary(sender, instance, created, raw=False, **kwargs):
+    """Apply a created or updated row to the owner's dashboard summary"""
+    if raw:
+        return
+    kind = SUMMARY_KINDS[sender]
+    transaction.on_commit(lambda: dashboard_summary_service.record(instance.user_id, kind, instance, created))
+
+
+@receiver(post_delete, sender=Dataset)
+@receiver(post_delete, sender=AnalysisSession)
+@receiver(post_delete, sender=AnalysisResult)
+@receiver(post_delete, sender=AuditTrail)
+def invalidate_dashboard_summary(sender, instance, **kwargs):
+    """Deletes can remove recent entries; rebuild the summary on the next read"""
+    transaction.on_commit(lambda: dashboard_summary_service.invalidate(instance.user_id))
+
+
+def _cache_tags(instance) -> list:
+    """Cache tags affected by a write to instance"""
+    if isinstance(instance, AnalysisResult):
+        return [f"analysis:{instance.id}", f"session:{instance.session_id}"]
+    if isinstance(instance, Dataset):
+        return [f"dataset:{instance.id}", f"user:{instance.user_id}"]
+    return [f"session:{instance.id}", f"user:{instance.user_id}"]
+
+
+@receiver(post_save, sender=Dataset)
+@receiver(post_save, sender=AnalysisSession)
+@receiver(post_save, sender=AnalysisResult)
+@receiver(post_delete, sender=Dataset)
+@receiver(post_delete, sender=AnalysisSession)
+@receiver(post_delete, sender=AnalysisResult)
+def invalidate_cache_tags(sender, instance, raw=False, **kwargs):
+    """Drop cached entries tagged with the changed row"""
+    if raw:
+        return
+    tags = _cache_tags(instance)
+    transaction.on_commit(lambda: cache_tag_service.invalidate_tags(tags))
+
+
+@receiver(post_save, sender=AnalysisTool)
+@receiver(post_delete, sender=AnalysisTool)
+def invalidate_tool_cache(sender, instance, raw=False, **kwargs):
+    """Drop cached tool lookups (including near cache copies in every process)"""
+    if raw:
+        return
+    transaction.on_commit(lambda: cache_tag_service.invalidate_tags([f"tool:{instance.name}"]))
+
+
+@receiver(post_delete, sender=TrainedModel)
+def delete_trained_model_artifact(sender, instance, **kwargs):
+    """Remove the serialized estimator once the deletion commits"""
+    model_id, artifact_path = instance.id, instance.artifact_path  # pk is cleared after deletion
+
+    def delete():
+        model_registry.evict(model_id)
+        model_registry.delete_artifact(artifact_path)
+    transaction.on_commit(delete)
+
+
+@receiver(connection_created)
+def install_query_instrumentation(sender, connection, **kwargs):
+    """Count queries on every connection (recorded only while a request or task is tracked)"""
+    query_instrumentation.install(connection)
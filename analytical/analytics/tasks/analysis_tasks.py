@@ -16,6 +16,7 @@ from pathlib import Path
 from analytics.models import Dataset, User
 from analytics.services.analysis_executor import AnalysisExecutor
 from analytics.services.audit_trail_manager import AuditTrailManager
+from analytics.services.feature_matrix_cache import mark_dataset_frame
 from analytics.services.logging_service import StructuredLogger
 from analytics.tools.tool_registry import ToolRegistry
 
@@ -54,7 +55,7 @@ def execute_analysis_task(self, dataset_id: int, tool_name: str, parameters: Dic
         if not Path(parquet_path).exists():
             raise FileNotFoundError(f"Dataset file not found: {parquet_path}")
         
-        df = pd.read_parquet(parquet_path)
+        df = mark_dataset_frame(pd.read_parquet(parquet_path), dataset.file_hash)
         
         # Get tool from registry
         tool = tool_registry.get_tool(tool_name)
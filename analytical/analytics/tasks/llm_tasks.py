@@ -358,7 +358,10 @@ def monitor_token_usage():
 @shared_task
 def generate_conversation_summary(session_id: str, user_id: int) -> Dict[str, Any]:
     """
-    Generate summary of conversation session
+    Refresh the rolling summary of a conversation session
+    
+    Folds messages that have aged out of the verbatim context window into the
+    summary stored on the session, so prompts stay within a fixed token budget.
     
     Args:
         session_id: Session ID
@@ -384,7 +387,8 @@ def generate_conversation_summary(session_id: str, user_id: int) -> Dict[str, An
         )
         
         logger.info(f"Conversation summary generated", 
-                   extra={'user_id': user_id, 'session_id': session_id})
+                   extra={'user_id': user_id, 'session_id': session_id,
+                          'summarized_messages': summary.get('message_count', 0)})
         
         return {
             'status': 'success',
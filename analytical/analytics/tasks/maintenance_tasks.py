@@ -244,6 +244,123 @@ def cleanup_audit_logs():
         }
 
 
+@shared_task
+def flush_audit_queue():
+    """
+    Write queued audit trail entries
+    
+    Safety net for the durable audit queue: drains entries left behind by
+    processes that exited before their background writer flushed.
+    """
+    try:
+        from analytics.services.audit_buffer import audit_trail_buffer
+        
+        written = audit_trail_buffer.flush()
+        
+        if written:
+            logger.info(f"Audit queue flush completed: {written} entries written")
+        
+        return {
+            'status': 'success',
+            'written': written
+        }
+        
+    except Exception as exc:
+        logger.error(f"Audit queue flush error: {str(exc)}")
+        
+        return {
+            'status': 'error',
+            'error': str(exc)
+        }
+
+
+@shared_task
+def fold_rag_usage_counters():
+    """
+    Fold accumulated RAG search counters into the database
+    """
+    try:
+        from analytics.services.rag_usage_aggregator import rag_usage_aggregator
+        
+        result = rag_usage_aggregator.fold_into_database()
+        
+        return {
+            'status': 'success',
+            **result
+        }
+        
+    except Exception as exc:
+        logger.error(f"RAG usage fold error: {str(exc)}")
+        
+        return {
+            'status': 'error',
+            'error': str(exc)
+        }
+
+
+@shared_task
+def cleanup_model_artifacts():
+    """
+    Delete model artifacts that were never registered to an analysis result
+    """
+    try:
+        from analytics.services.model_registry import model_registry
+        
+        deleted = model_registry.cleanup_orphan_artifacts()
+        logger.info(f"Model artifact cleanup completed: {deleted} artifacts removed")
+        
+        return {
+            'status': 'success',
+            'deleted_artifacts': deleted
+        }
+        
+    except Exception as exc:
+        logger.error(f"Model artifact cleanup error: {str(exc)}")
+        
+        return {
+            'status': 'error',
+            'error': str(exc)
+        }
+
+
+@shared_task
+def report_query_instrumentation():
+    """
+    Report the views and tasks issuing the most database queries
+    
+    Reads and resets the shared per-label query counters, so each report
+    covers the interval since the previous one.
+    """
+    try:
+        from analytics.services.query_instrumentation import query_instrumentation
+        
+        report = query_instrumentation.get_report(limit=20, reset=True)
+        if 'error' in report:
+            return {
+                'status': 'error',
+                'error': report['error']
+            }
+        
+        offenders = [entry for entry in report['labels'] if entry['n_plus_one']]
+        for entry in offenders:
+            logger.warning(f"N+1 queries in {entry['label']}: {entry['n_plus_one']} patterns over "
+                           f"{entry['runs']} runs, {entry['avg_queries']} queries/run")
+        
+        return {
+            'status': 'success',
+            'labels': report['labels'],
+            'n_plus_one_labels': len(offenders)
+        }
+        
+    except Exception as exc:
+        logger.error(f"Query instrumentation report error: {str(exc)}")
+        
+        return {
+            'status': 'error',
+            'error': str(exc)
+        }
+
+
 @shared_task
 def optimize_database():
     """
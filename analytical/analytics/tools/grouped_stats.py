@@ -0,0 +1,211 @@
+"""
+Grouped Statistics
+
+Per-group reductions shared by the tools that compare groups (t-test, ANOVA,
+box plots, survival analysis). The group column is factorized once and rows
+are ordered by group code once; counts and moments come from np.bincount and
+minimums, maximums, quantiles and box statistics from the sorted group
+segments, so the cost no longer grows with groups x rows as a boolean mask
+scan per group does.
+"""
+
+from functools import cached_property
+from typing import Any, Dict, List, Sequence
+import numpy as np
+import pandas as pd
+
+
+class GroupedStatistics:
+    """
+    Per-group counts, moments, quantiles and arrays of a value column
+    
+    Groups keep their order of first appearance (as Series.unique()). Rows
+    with a missing group label are excluded and missing values are dropped,
+    so a group whose values are all missing is kept with a count of 0.
+    Numeric reductions require a numeric value column; arrays() and
+    positions() work for any dtype.
+    """
+    
+    def __init__(self, values: pd.Series, groups: pd.Series):
+        codes, uniques = pd.factorize(groups, sort=False)
+        valid = (codes >= 0) & values.notna().to_numpy()
+        
+        self.labels = list(uniques)
+        self.n_groups = len(self.labels)
+        self._codes = codes[valid]
+        self._values = values.to_numpy()[valid]
+        self._positions = np.flatnonzero(valid)
+        self.counts = np.bincount(self._codes, minlength=self.n_groups)
+        self._offsets = np.concatenate(([0], np.cumsum(self.counts)))
+    
+    @cached_property
+    def _order(self) -> np.ndarray:
+        """Row order grouping rows by code, preserving row order within a group"""
+        return np.argsort(self._codes, kind='stable')
+    
+    @cached_property
+    def _float_values(self) -> np.ndarray:
+        return self._values.astype(float)
+    
+    @cached_property
+    def _sorted_values(self) -> np.ndarray:
+        """Values ordered by group, ascending within each group"""
+        return self._float_values[np.lexsort((self._float_values, self._codes))]
+    
+    def bincount(self, weights: np.ndarray) -> np.ndarray:
+        """
+        Per-group sums of an array aligned with the kept rows
+        
+        Args:
+            weights: Array aligned with the input rows (full length)
+        
+        Returns:
+            Array of per-group sums
+        """
+        weights = np.asarray(weights, dtype=float)[self._positions]
+        return np.bincount(self._codes, weights=weights, minlength=self.n_groups)
+    
+    @cached_property
+    def sums(self) -> np.ndarray:
+        return np.bincount(self._codes, weights=self._float_values, minlength=self.n_groups)
+    
+    @cached_property
+    def means(self) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.sums / self.counts
+    
+    @cached_property
+    def _squared_deviations(self) -> np.ndarray:
+        # Two-pass (centered) sum of squares: no cancellation for large means
+        centered = self._float_values - self.means[self._codes]
+        return np.bincount(self._codes, weights=centered ** 2, minlength=self.n_groups)
+    
+    def variances(self, ddof: int = 1) -> np.ndarray:
+        """Per-group variances (NaN where a group has ddof or fewer values)"""
+        denominator = self.counts - ddof
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(denominator > 0, self._squared_deviations / np.maximum(denominator, 1), np.nan)
+    
+    def stds(self, ddof: int = 1) -> np.ndarray:
+        """Per-group standard deviations (NaN where a group has ddof or fewer values)"""
+        return np.sqrt(self.variances(ddof))
+    
+    @cached_property
+    def minimums(self) -> np.ndarray:
+        return self._segment_values(self._offsets[:-1])
+    
+    @cached_property
+    def maximums(self) -> np.ndarray:
+        return self._segment_values(self._offsets[1:] - 1)
+    
+    def quantiles(self, q: Sequence[float]) -> np.ndarray:
+        """
+        Per-group quantiles with linear interpolation (as np.percentile)
+        
+        Args:
+            q: Quantiles in [0, 1]
+        
+        Returns:
+            Array of shape (n_groups, len(q)), NaN for empty groups
+        """
+        q = np.asarray(q, dtype=float)
+        counts = self.counts[:, None]
+        position = q[None, :] * np.maximum(counts - 1, 0)
+        lower = np.floor(position).astype(int)
+        upper = np.minimum(lower + 1, np.maximum(counts - 1, 0))
+        fraction = position - lower
+        
+        starts = self._offsets[:-1, None]
+        low_values = self._segment_values(starts + lower)
+        high_values = self._segment_values(starts + upper)
+        return low_values + (high_values - low_values) * fraction
+    
+    def box_stats(self, whis: float = 1.5) -> Dict[str, np.ndarray]:
+        """
+        Per-group matplotlib bxp statistics (as cbook.boxplot_stats)
+        
+        Args:
+            whis: Whisker reach as a multiple of the interquartile range
+        
+        Returns:
+            Dict of per-group arrays (mean, med, q1, q3, whislo, whishi) and
+            'fliers', a list with one array of outliers per group
+        """
+        q1, med, q3 = self.quantiles([0.25, 0.5, 0.75]).T
+        iqr = q3 - q1
+        codes = np.repeat(np.arange(self.n_groups), self.counts)
+        values = self._sorted_values
+        
+        low_limit = (q1 - whis * iqr)[codes]
+        high_limit = (q3 + whis * iqr)[codes]
+        inside = (values >= low_limit) & (values <= high_limit)
+        whislo = self._reduce(np.minimum, np.where(values >= low_limit, values, np.inf))
+        whishi = self._reduce(np.maximum, np.where(values <= high_limit, values, -np.inf))
+        # No value within reach of a quartile: the whisker collapses onto it
+        whislo = np.where(whislo > q1, q1, whislo)
+        whishi = np.where(whishi < q3, q3, whishi)
+        
+        fliers = self._split(values[~inside], np.bincount(codes[~inside], minlength=self.n_groups))
+        
+        return {
+            'mean': self.means,
+            'med': med,
+            'q1': q1,
+            'q3': q3,
+            'whislo': whislo,
+            'whishi': whishi,
+            'fliers': fliers
+        }
+    
+    def arrays(self) -> List[np.ndarray]:
+        """Per-group values, in row order"""
+        return self._split(self._values[self._order], self.counts)
+    
+    def positions(self) -> List[np.ndarray]:
+        """Per-group row positions into the input, for DataFrame.iloc"""
+        return self._split(self._positions[self._order], self.counts)
+    
+    def summary(self, ddof: int = 1) -> List[Dict[str, Any]]:
+        """
+        Per-group n, mean, std, min and max of the non-empty groups
+        
+        Returns:
+            List of dicts in group order
+        """
+        stds = self.stds(ddof)
+        return [
+            {
+                'group': self.labels[index],
+                'n': int(self.counts[index]),
+                'mean': float(self.means[index]),
+                'std': float(stds[index]),
+                'min': float(self.minimums[index]),
+                'max': float(self.maximums[index])
+            }
+            for index in np.flatnonzero(self.counts)
+        ]
+    
+    def _split(self, array: np.ndarray, counts: np.ndarray) -> List[np.ndarray]:
+        """Split a group-ordered array into per-group arrays"""
+        if self.n_groups == 0:
+            return []
+        return np.split(array, np.cumsum(counts)[:-1])
+    
+    def _segment_values(self, indices: np.ndarray) -> np.ndarray:
+        """Sorted values at the given indices, NaN for empty groups"""
+        values = self._sorted_values
+        if len(values) == 0:
+            return np.full(np.shape(indices), np.nan)
+        taken = values[np.clip(indices, 0, len(values) - 1)]
+        empty = self.counts == 0
+        if taken.ndim > 1:
+            empty = empty[:, None]
+        return np.where(empty, np.nan, taken)
+    
+    def _reduce(self, ufunc: np.ufunc, values: np.ndarray) -> np.ndarray:
+        """ufunc.reduceat over each non-empty group segment, NaN for empty groups"""
+        result = np.full(self.n_groups, np.nan)
+        non_empty = self.counts > 0
+        if non_empty.any():
+            result[non_empty] = ufunc.reduceat(values, self._offsets[:-1][non_empty])
+        return result
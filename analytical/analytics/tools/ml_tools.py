@@ -7,21 +7,36 @@ All tools are designed to work with pandas DataFrames and return standardized re
 
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
+from sklearn.model_selection import (train_test_split, cross_val_score, GridSearchCV, KFold, StratifiedKFold,
+                                     ParameterGrid, ParameterSampler)
 from sklearn.preprocessing import StandardScaler, LabelEncoder, OneHotEncoder
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
 from sklearn.linear_model import LinearRegression, LogisticRegression
 from sklearn.svm import SVC, SVR
-from sklearn.cluster import KMeans, DBSCAN
+from sklearn.cluster import KMeans, MiniBatchKMeans, DBSCAN
 from sklearn.metrics import (accuracy_score, precision_score, recall_score, f1_score,
                            mean_squared_error, mean_absolute_error, r2_score,
-                           classification_report, confusion_matrix, silhouette_score)
+                           classification_report, confusion_matrix, silhouette_score, get_scorer)
 from sklearn.decomposition import PCA
 from sklearn.feature_selection import SelectKBest, f_classif, f_regression
 from typing import Dict, List, Any, Optional, Tuple, Union
+import os
+import time
+import uuid
 import logging
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
 from datetime import datetime
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+import pyarrow as pa
+import pyarrow.parquet as pq
 import warnings
+
+from analytics.services.feature_matrix_cache import FeatureMatrixCache, feature_matrix_cache
+from analytics.services.model_registry import model_registry
 warnings.filterwarnings('ignore')
 
 logger = logging.getLogger(__name__)
@@ -36,10 +51,14 @@ class MachineLearningTools:
     def train_classifier(df: pd.DataFrame, target_column: str, 
                         feature_columns: Optional[List[str]] = None,
                         model_type: str = 'random_forest', test_size: float = 0.2,
-                        random_state: int = 42) -> Dict[str, Any]:
+                        random_state: int = 42, persist_model: bool = True) -> Dict[str, Any]:
         """
         Train a classification model
         
+        With persist_model the fitted model, scaler and feature encoders are
+        saved as an artifact (result['model_artifact']) that the analysis
+        executor registers as a TrainedModel for batch_score.
+        
         Args:
             df: Input DataFrame
             target_column: Name of target column
@@ -47,6 +66,7 @@ class MachineLearningTools:
             model_type: Type of model ('random_forest', 'logistic_regression', 'svm')
             test_size: Proportion of data for testing
             random_state: Random state for reproducibility
+            persist_model: Save the trained model for later scoring
             
         Returns:
             Dict containing model results and metrics
@@ -62,21 +82,12 @@ class MachineLearningTools:
                 if missing_cols:
                     return {"error": f"Feature columns not found: {missing_cols}"}
             
-            # Prepare data
-            X = df[feature_columns].copy()
+            # Imputed, encoded features (shared with other tools on the same dataset)
+            prepared = feature_matrix_cache.prepare(df, feature_columns, FeatureMatrixCache.ENCODED)
+            X = prepared.matrix
             y = df[target_column].copy()
-            
-            # Handle missing values
-            X = X.fillna(X.mean() if X.select_dtypes(include=[np.number]).shape[1] > 0 else X.mode().iloc[0])
             y = y.fillna(y.mode().iloc[0]) if y.dtype == 'object' else y.fillna(y.mean())
             
-            # Encode categorical variables
-            label_encoders = {}
-            for col in X.select_dtypes(include=['object']).columns:
-                le = LabelEncoder()
-                X[col] = le.fit_transform(X[col].astype(str))
-                label_encoders[col] = le
-            
             # Encode target if categorical
             if y.dtype == 'object':
                 le_target = LabelEncoder()
@@ -126,11 +137,20 @@ class MachineLearningTools:
             if hasattr(model, 'feature_importances_'):
                 feature_importance = dict(zip(feature_columns, model.feature_importances_))
             elif hasattr(model, 'coef_'):
-                feature_importance = dict(zip(feature_columns, abs(model.coef_[0])))
+                feature_importance = dict(zip(feature_columns, np.abs(model.coef_[0]).tolist()))
+            
+            model_artifact = None
+            if persist_model:
+                model_artifact = model_registry.save_artifact({
+                    'model': model, 'scaler': scaler, 'encoders': prepared.encoders,
+                    'feature_columns': list(feature_columns), 'target_column': target_column,
+                    'target_classes': target_classes, 'task': 'classification', 'model_type': model_type
+                })
             
             return {
                 'type': 'classification',
                 'model_type': model_type,
+                'target_column': target_column,
                 'metrics': {
                     'accuracy': float(accuracy),
                     'precision': float(precision),
@@ -147,6 +167,7 @@ class MachineLearningTools:
                 'feature_importance': feature_importance,
                 'target_classes': target_classes,
                 'feature_columns': feature_columns,
+                'model_artifact': model_artifact,
                 'data_info': {
                     'train_size': len(X_train),
                     'test_size': len(X_test),
@@ -163,10 +184,14 @@ class MachineLearningTools:
     def train_regressor(df: pd.DataFrame, target_column: str,
                        feature_columns: Optional[List[str]] = None,
                        model_type: str = 'random_forest', test_size: float = 0.2,
-                       random_state: int = 42) -> Dict[str, Any]:
+                       random_state: int = 42, persist_model: bool = True) -> Dict[str, Any]:
         """
         Train a regression model
         
+        With persist_model the fitted model, scaler and feature encoders are
+        saved as an artifact (result['model_artifact']) that the analysis
+        executor registers as a TrainedModel for batch_score.
+        
         Args:
             df: Input DataFrame
             target_column: Name of target column
@@ -174,6 +199,7 @@ class MachineLearningTools:
             model_type: Type of model ('random_forest', 'linear_regression', 'svr')
             test_size: Proportion of data for testing
             random_state: Random state for reproducibility
+            persist_model: Save the trained model for later scoring
             
         Returns:
             Dict containing model results and metrics
@@ -189,21 +215,12 @@ class MachineLearningTools:
                 if missing_cols:
                     return {"error": f"Feature columns not found: {missing_cols}"}
             
-            # Prepare data
-            X = df[feature_columns].copy()
+            # Imputed, encoded features (shared with other tools on the same dataset)
+            prepared = feature_matrix_cache.prepare(df, feature_columns, FeatureMatrixCache.ENCODED)
+            X = prepared.matrix
             y = df[target_column].copy()
-            
-            # Handle missing values
-            X = X.fillna(X.mean() if X.select_dtypes(include=[np.number]).shape[1] > 0 else X.mode().iloc[0])
             y = y.fillna(y.mean())
             
-            # Encode categorical variables
-            label_encoders = {}
-            for col in X.select_dtypes(include=['object']).columns:
-                le = LabelEncoder()
-                X[col] = le.fit_transform(X[col].astype(str))
-                label_encoders[col] = le
-            
             # Split data
             X_train, X_test, y_train, y_test = train_test_split(
                 X, y, test_size=test_size, random_state=random_state
@@ -243,11 +260,20 @@ class MachineLearningTools:
             if hasattr(model, 'feature_importances_'):
                 feature_importance = dict(zip(feature_columns, model.feature_importances_))
             elif hasattr(model, 'coef_'):
-                feature_importance = dict(zip(feature_columns, abs(model.coef_)))
+                feature_importance = dict(zip(feature_columns, np.abs(model.coef_).tolist()))
+            
+            model_artifact = None
+            if persist_model:
+                model_artifact = model_registry.save_artifact({
+                    'model': model, 'scaler': scaler, 'encoders': prepared.encoders,
+                    'feature_columns': list(feature_columns), 'target_column': target_column,
+                    'target_classes': None, 'task': 'regression', 'model_type': model_type
+                })
             
             return {
                 'type': 'regression',
                 'model_type': model_type,
+                'target_column': target_column,
                 'metrics': {
                     'mse': float(mse),
                     'rmse': float(rmse),
@@ -262,6 +288,7 @@ class MachineLearningTools:
                 },
                 'feature_importance': feature_importance,
                 'feature_columns': feature_columns,
+                'model_artifact': model_artifact,
                 'data_info': {
                     'train_size': len(X_train),
                     'test_size': len(X_test),
@@ -274,19 +301,169 @@ class MachineLearningTools:
             logger.error(f"Error in train_regressor: {str(e)}")
             return {"error": f"Regression training failed: {str(e)}"}
     
+    @staticmethod
+    def batch_score(df: pd.DataFrame, model_id: int, user_id: int, output_path: Optional[str] = None,
+                    chunk_size: Optional[int] = None, include_probabilities: bool = False,
+                    id_column: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Score a dataset with a registered trained model
+        
+        Rows are encoded with the model's training encoders and scored in
+        chunks of chunk_size rows; predictions are streamed to a Parquet
+        artifact referenced from the result instead of being inlined.
+        
+        Args:
+            df: Input DataFrame
+            model_id: TrainedModel id (from a train_classifier/train_regressor run)
+            user_id: Owner of the model; other users' models are not found
+            output_path: Parquet path for the predictions, relative to or inside
+                         ANALYSIS_ARTIFACTS_DIR/scoring (default: a new file there)
+            chunk_size: Rows scored at a time (default MODEL_SCORING_CHUNK_SIZE)
+            include_probabilities: Add a probability column per class (classifiers)
+            id_column: Column identifying rows in the output (default: the row index)
+            
+        Returns:
+            Dict containing the predictions artifact and a prediction summary
+        """
+        writer = None
+        try:
+            if user_id is None:
+                return {"error": "Model owner is required for batch scoring"}
+            
+            # Predictions are only written inside the scoring artifacts directory
+            output_path = MachineLearningTools._artifact_path('scoring', output_path, 'predictions')
+            if output_path is None:
+                return {"error": "Output path must be inside the scoring artifacts directory"}
+            
+            try:
+                bundle = model_registry.load(model_id, user_id)
+            except ObjectDoesNotExist:
+                return {"error": f"Trained model {model_id} not found"}
+            
+            feature_columns = bundle['feature_columns']
+            missing_cols = [col for col in feature_columns if col not in df.columns]
+            if missing_cols:
+                return {"error": f"Feature columns not found: {missing_cols}"}
+            if id_column is not None and id_column not in df.columns:
+                return {"error": f"ID column '{id_column}' not found in DataFrame"}
+            if len(df) == 0:
+                return {"error": "No rows to score"}
+            
+            chunk_size = max(1, int(chunk_size or getattr(settings, 'MODEL_SCORING_CHUNK_SIZE', 50000)))
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            model, scaler = bundle['model'], bundle['scaler']
+            is_classifier = bundle['task'] == 'classification'
+            target_classes = bundle.get('target_classes')
+            with_probabilities = include_probabilities and is_classifier and hasattr(model, 'predict_proba')
+            
+            start_time = time.perf_counter()
+            prediction_counts = {}
+            total = total_squares = 0.0
+            minimum, maximum = np.inf, -np.inf
+            chunks = 0
+            
+            for start in range(0, len(df), chunk_size):
+                chunk = df.iloc[start:start + chunk_size]
+                X = scaler.transform(feature_matrix_cache.transform(chunk, feature_columns, bundle['encoders']))
+                predictions = model.predict(X)
+                
+                columns = {'row_index': chunk[id_column].to_numpy() if id_column else chunk.index.to_numpy()}
+                if is_classifier:
+                    labels = np.asarray(target_classes, dtype=object)[predictions.astype(int)] if target_classes else predictions
+                    columns['prediction'] = labels
+                    values, counts = np.unique(labels.astype(str), return_counts=True)
+                    for value, count in zip(values.tolist(), counts.tolist()):
+                        prediction_counts[value] = prediction_counts.get(value, 0) + count
+                    if with_probabilities:
+                        probabilities = model.predict_proba(X)
+                        for position, encoded in enumerate(model.classes_):
+                            label = target_classes[int(encoded)] if target_classes else encoded
+                            columns[f"probability_{label}"] = probabilities[:, position]
+                else:
+                    columns['prediction'] = predictions
+                    total += float(predictions.sum())
+                    total_squares += float(np.square(predictions).sum())
+                    minimum = min(minimum, float(predictions.min()))
+                    maximum = max(maximum, float(predictions.max()))
+                
+                table = pa.Table.from_pandas(pd.DataFrame(columns), preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema, compression='snappy')
+                writer.write_table(table)
+                chunks += 1
+            
+            writer.close()
+            writer = None
+            
+            if is_classifier:
+                summary = {'prediction_counts': prediction_counts}
+            else:
+                mean = total / len(df)
+                summary = {
+                    'mean': mean,
+                    'std': float(np.sqrt(max(total_squares / len(df) - mean ** 2, 0.0))),
+                    'min': minimum,
+                    'max': maximum
+                }
+            
+            return {
+                'type': 'batch_scoring',
+                'model': {
+                    'model_id': bundle['model_id'],
+                    'task': bundle['task'],
+                    'model_type': bundle['model_type'],
+                    'target_column': bundle['target_column'],
+                    'feature_columns': feature_columns
+                },
+                'predictions_artifact': {
+                    'path': str(output_path),
+                    'format': 'parquet',
+                    'columns': list(columns),
+                    'rows': len(df)
+                },
+                'summary': summary,
+                'data_info': {
+                    'rows_scored': len(df),
+                    'chunks': chunks,
+                    'chunk_size': chunk_size,
+                    'scoring_time_seconds': round(time.perf_counter() - start_time, 3),
+                    'created_at': datetime.now().isoformat()
+                }
+            }
+            
+        except Exception as e:
+            logger.error(f"Error in batch_score: {str(e)}")
+            return {"error": f"Batch scoring failed: {str(e)}"}
+        finally:
+            if writer is not None:
+                writer.close()
+    
     @staticmethod
     def clustering(df: pd.DataFrame, feature_columns: Optional[List[str]] = None,
                   n_clusters: int = 3, algorithm: str = 'kmeans',
-                  random_state: int = 42) -> Dict[str, Any]:
+                  random_state: int = 42, mode: str = 'auto',
+                  silhouette_sample_size: Optional[int] = None,
+                  labels_path: Optional[str] = None) -> Dict[str, Any]:
         """
         Perform clustering analysis
         
+        Large datasets (CLUSTERING_LARGE_DATA_ROWS rows or more in 'auto' mode)
+        use mini-batch k-means, and their per-row labels are written to a
+        Parquet artifact referenced from the result instead of being inlined.
+        The silhouette score is computed on a sample of at most
+        silhouette_sample_size points.
+        
         Args:
             df: Input DataFrame
             feature_columns: List of feature columns (if None, all numeric columns)
             n_clusters: Number of clusters
             algorithm: Clustering algorithm ('kmeans', 'dbscan')
             random_state: Random state for reproducibility
+            mode: 'auto', 'full' or 'large' (mini-batch k-means, labels artifact)
+            silhouette_sample_size: Points sampled for the silhouette score
+            labels_path: Parquet path for the labels artifact, relative to or inside
+                         ANALYSIS_ARTIFACTS_DIR/clustering (default: a new file there)
             
         Returns:
             Dict containing clustering results
@@ -302,17 +479,29 @@ class MachineLearningTools:
             if len(feature_columns) < 2:
                 return {"error": "At least 2 numeric columns required for clustering"}
             
-            # Prepare data
-            X = df[feature_columns].copy()
-            X = X.fillna(X.mean())
+            if mode == 'auto':
+                large_data_rows = getattr(settings, 'CLUSTERING_LARGE_DATA_ROWS', 100000)
+                mode = 'large' if len(df) >= large_data_rows else 'full'
+            elif mode not in ('full', 'large'):
+                return {"error": f"Unknown clustering mode: {mode}"}
             
-            # Scale features
-            scaler = StandardScaler()
-            X_scaled = scaler.fit_transform(X)
+            if mode == 'large':
+                labels_path = MachineLearningTools._artifact_path('clustering', labels_path, 'labels')
+                if labels_path is None:
+                    return {"error": "Labels path must be inside the clustering artifacts directory"}
+            
+            # Imputed, scaled float32 features (shared with other tools on the same dataset)
+            X_scaled = feature_matrix_cache.prepare(df, feature_columns).matrix
             
             # Perform clustering
             if algorithm == 'kmeans':
-                model = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=10)
+                if mode == 'large':
+                    model = MiniBatchKMeans(
+                        n_clusters=n_clusters, random_state=random_state, n_init=3,
+                        batch_size=getattr(settings, 'CLUSTERING_BATCH_SIZE', 4096)
+                    )
+                else:
+                    model = KMeans(n_clusters=n_clusters, random_state=random_state, n_init=10)
                 cluster_labels = model.fit_predict(X_scaled)
                 cluster_centers = model.cluster_centers_
             elif algorithm == 'dbscan':
@@ -322,38 +511,56 @@ class MachineLearningTools:
             else:
                 return {"error": f"Unknown clustering algorithm: {algorithm}"}
             
-            # Calculate silhouette score
+            # Silhouette is O(n^2); score a sample of the points
+            sample_size = silhouette_sample_size or getattr(settings, 'CLUSTERING_SILHOUETTE_SAMPLE_SIZE', 10000)
             if len(set(cluster_labels)) > 1:
-                silhouette_avg = silhouette_score(X_scaled, cluster_labels)
+                silhouette_avg = silhouette_score(
+                    X_scaled, cluster_labels,
+                    sample_size=sample_size if len(X_scaled) > sample_size else None,
+                    random_state=random_state
+                )
             else:
                 silhouette_avg = -1
             
             # Cluster statistics
-            unique_labels = np.unique(cluster_labels)
+            unique_labels, counts = np.unique(cluster_labels, return_counts=True)
+            centroids = None
+            if cluster_centers is None:
+                X = df[feature_columns]
+                centroids = X.fillna(X.mean()).groupby(cluster_labels).mean()
             cluster_stats = []
             
-            for label in unique_labels:
+            for label, size in zip(unique_labels, counts):
                 if label == -1:  # Noise points in DBSCAN
                     continue
-                cluster_data = X[cluster_labels == label]
                 cluster_stats.append({
                     'cluster_id': int(label),
-                    'size': len(cluster_data),
-                    'percentage': len(cluster_data) / len(X) * 100,
-                    'centroid': cluster_data.mean().to_dict() if cluster_centers is None else None
+                    'size': int(size),
+                    'percentage': size / len(X_scaled) * 100,
+                    'centroid': centroids.loc[label].to_dict() if centroids is not None else None
                 })
             
+            if mode == 'large':
+                labels_artifact = MachineLearningTools._write_labels_artifact(df.index, cluster_labels, labels_path)
+                inline_labels = None
+            else:
+                labels_artifact = None
+                inline_labels = cluster_labels.tolist()
+            
             return {
                 'type': 'clustering',
                 'algorithm': algorithm,
+                'mode': mode,
                 'n_clusters': len(unique_labels),
-                'cluster_labels': cluster_labels.tolist(),
+                'cluster_labels': inline_labels,
+                'labels_artifact': labels_artifact,
                 'cluster_centers': cluster_centers.tolist() if cluster_centers is not None else None,
                 'silhouette_score': float(silhouette_avg),
+                'silhouette_sample_size': min(sample_size, len(X_scaled)),
                 'cluster_statistics': cluster_stats,
                 'feature_columns': feature_columns,
                 'data_info': {
-                    'total_points': len(X),
+                    'total_points': len(X_scaled),
                     'n_features': len(feature_columns),
                     'created_at': datetime.now().isoformat()
                 }
@@ -363,6 +570,34 @@ class MachineLearningTools:
             logger.error(f"Error in clustering: {str(e)}")
             return {"error": f"Clustering failed: {str(e)}"}
     
+    @staticmethod
+    def _artifact_path(subdir: str, path: Optional[str], prefix: str) -> Optional[Path]:
+        """
+        Resolve a caller-supplied artifact path under ANALYSIS_ARTIFACTS_DIR/subdir
+        
+        Relative paths are taken from that directory and a missing path becomes
+        a new uniquely named Parquet file there; None if the path escapes it.
+        """
+        artifacts_dir = Path(getattr(settings, 'ANALYSIS_ARTIFACTS_DIR', Path(settings.MEDIA_ROOT) / 'artifacts')) / subdir
+        resolved = (artifacts_dir / (path or f"{prefix}_{uuid.uuid4().hex}.parquet")).resolve()
+        return resolved if resolved.is_relative_to(artifacts_dir.resolve()) else None
+    
+    @staticmethod
+    def _write_labels_artifact(index: pd.Index, cluster_labels: np.ndarray, labels_path: Path) -> Dict[str, Any]:
+        """Write per-row cluster labels to Parquet and describe the artifact"""
+        labels_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        pd.DataFrame({'row_index': index, 'cluster': cluster_labels.astype(np.int32)}).to_parquet(
+            labels_path, index=False, compression='snappy'
+        )
+        
+        return {
+            'path': str(labels_path),
+            'format': 'parquet',
+            'columns': ['row_index', 'cluster'],
+            'rows': len(cluster_labels)
+        }
+    
     @staticmethod
     def feature_selection(df: pd.DataFrame, target_column: str,
                          feature_columns: Optional[List[str]] = None,
@@ -391,19 +626,11 @@ class MachineLearningTools:
                 if missing_cols:
                     return {"error": f"Feature columns not found: {missing_cols}"}
             
-            # Prepare data
-            X = df[feature_columns].copy()
+            # Imputed, encoded features (shared with other tools on the same dataset)
+            X = feature_matrix_cache.prepare(df, feature_columns, FeatureMatrixCache.ENCODED).matrix
             y = df[target_column].copy()
-            
-            # Handle missing values
-            X = X.fillna(X.mean() if X.select_dtypes(include=[np.number]).shape[1] > 0 else X.mode().iloc[0])
             y = y.fillna(y.mode().iloc[0]) if y.dtype == 'object' else y.fillna(y.mean())
             
-            # Encode categorical variables
-            for col in X.select_dtypes(include=['object']).columns:
-                le = LabelEncoder()
-                X[col] = le.fit_transform(X[col].astype(str))
-            
             # Determine if classification or regression
             is_classification = y.dtype == 'object' or len(y.unique()) < 10
             
@@ -421,7 +648,7 @@ class MachineLearningTools:
             
             # Get selected features
             selected_features = [feature_columns[i] for i in selector.get_support(indices=True)]
-            feature_scores = dict(zip(feature_columns, selector.scores_))
+            feature_scores = dict(zip(feature_columns, selector.scores_.tolist()))
             
             return {
                 'type': 'feature_selection',
@@ -467,13 +694,8 @@ class MachineLearningTools:
             if len(feature_columns) < 2:
                 return {"error": "At least 2 numeric columns required for PCA"}
             
-            # Prepare data
-            X = df[feature_columns].copy()
-            X = X.fillna(X.mean())
-            
-            # Scale features
-            scaler = StandardScaler()
-            X_scaled = scaler.fit_transform(X)
+            # Imputed, scaled float32 features (shared with other tools on the same dataset)
+            X_scaled = feature_matrix_cache.prepare(df, feature_columns).matrix
             
             # Perform PCA
             pca = PCA(n_components=min(n_components, len(feature_columns)))
@@ -490,7 +712,7 @@ class MachineLearningTools:
             components = pca.components_
             feature_loadings = {}
             for i, component in enumerate(components):
-                feature_loadings[f'PC{i+1}'] = dict(zip(feature_columns, component))
+                feature_loadings[f'PC{i+1}'] = dict(zip(feature_columns, component.tolist()))
             
             return {
                 'type': 'pca_analysis',
@@ -541,19 +763,9 @@ class MachineLearningTools:
                 if missing_cols:
                     return {"error": f"Feature columns not found: {missing_cols}"}
             
-            # Prepare data
-            X = df[feature_columns].copy()
             y = df[target_column].copy()
-            
-            # Handle missing values
-            X = X.fillna(X.mean() if X.select_dtypes(include=[np.number]).shape[1] > 0 else X.mode().iloc[0])
             y = y.fillna(y.mode().iloc[0]) if y.dtype == 'object' else y.fillna(y.mean())
             
-            # Encode categorical variables
-            for col in X.select_dtypes(include=['object']).columns:
-                le = LabelEncoder()
-                X[col] = le.fit_transform(X[col].astype(str))
-            
             # Determine if classification or regression
             is_classification = y.dtype == 'object' or len(y.unique()) < 10
             
@@ -562,9 +774,8 @@ class MachineLearningTools:
             elif model_type == 'regression' and is_classification:
                 return {"error": "Target column appears to be categorical, not continuous"}
             
-            # Scale features
-            scaler = StandardScaler()
-            X_scaled = scaler.fit_transform(X)
+            # Imputed, encoded, scaled features (shared with other tools on the same dataset)
+            X_scaled = feature_matrix_cache.prepare(df, feature_columns).matrix
             
             # Define models to evaluate
             if is_classification:
@@ -608,7 +819,7 @@ class MachineLearningTools:
                 'best_model': best_model,
                 'feature_columns': feature_columns,
                 'data_info': {
-                    'total_samples': len(X),
+                    'total_samples': len(X_scaled),
                     'n_features': len(feature_columns),
                     'created_at': datetime.now().isoformat()
                 }
@@ -617,3 +828,267 @@ class MachineLearningTools:
         except Exception as e:
             logger.error(f"Error in model_evaluation: {str(e)}")
             return {"error": f"Model evaluation failed: {str(e)}"}
+    
+    # Estimators available to hyperparameter_sweep, keyed by (task, model_type)
+    SWEEP_ESTIMATORS = {
+        ('classification', 'random_forest'): RandomForestClassifier,
+        ('classification', 'logistic_regression'): LogisticRegression,
+        ('classification', 'svm'): SVC,
+        ('regression', 'random_forest'): RandomForestRegressor,
+        ('regression', 'linear_regression'): LinearRegression,
+        ('regression', 'svr'): SVR,
+    }
+    
+    # Parameter grids used when none is given
+    DEFAULT_SWEEP_GRIDS = {
+        'random_forest': {'n_estimators': [100, 200], 'max_depth': [None, 10, 20], 'min_samples_leaf': [1, 5]},
+        'logistic_regression': {'C': [0.01, 0.1, 1.0, 10.0], 'max_iter': [1000]},
+        'svm': {'C': [0.1, 1.0, 10.0], 'kernel': ['rbf', 'linear']},
+        'linear_regression': {'fit_intercept': [True, False]},
+        'svr': {'C': [0.1, 1.0, 10.0], 'kernel': ['rbf', 'linear']},
+    }
+    
+    @staticmethod
+    def hyperparameter_sweep(df: pd.DataFrame, target_column: str,
+                             feature_columns: Optional[List[str]] = None,
+                             task: str = 'classification', model_type: str = 'random_forest',
+                             param_grid: Optional[Dict[str, List[Any]]] = None,
+                             n_iter: Optional[int] = None, cv_folds: int = 5,
+                             scoring: Optional[str] = None, n_jobs: Optional[int] = None,
+                             early_stopping: bool = True, random_state: int = 42,
+                             top_k: int = 10) -> Dict[str, Any]:
+        """
+        Cross-validated hyperparameter sweep
+        
+        The data is encoded and scaled once; every (configuration, fold) fit
+        reuses that matrix and is fanned out across a process pool. With
+        early stopping, folds run in rounds and after ML_SWEEP_MIN_FOLDS
+        folds only the better half of the surviving configurations (by mean
+        score so far) continues.
+        
+        Args:
+            df: Input DataFrame
+            target_column: Name of target column
+            feature_columns: List of feature columns (if None, all except target)
+            task: 'classification' or 'regression'
+            model_type: Estimator ('random_forest', 'logistic_regression', 'svm',
+                        'linear_regression', 'svr')
+            param_grid: Parameter grid (values are lists); defaults per model type
+            n_iter: Random search budget (sample n_iter configurations from the grid)
+            cv_folds: Number of cross-validation folds
+            scoring: sklearn scorer name (default 'accuracy' / 'r2')
+            n_jobs: Worker processes (default ML_SWEEP_N_JOBS or CPU count)
+            early_stopping: Drop poor configurations after the first folds
+            random_state: Random state for reproducibility
+            top_k: Leaderboard entries to return
+            
+        Returns:
+            Dict containing the leaderboard and best parameters
+        """
+        try:
+            estimator_class = MachineLearningTools.SWEEP_ESTIMATORS.get((task, model_type))
+            if estimator_class is None:
+                return {"error": f"Unknown model type for {task}: {model_type}"}
+            
+            prepared = MachineLearningTools._prepare_supervised_data(df, target_column, feature_columns)
+            if 'error' in prepared:
+                return prepared
+            X, y = prepared['X'], prepared['y']
+            
+            # Candidate configurations
+            param_grid = param_grid or MachineLearningTools.DEFAULT_SWEEP_GRIDS[model_type]
+            if n_iter:
+                candidates = list(ParameterSampler(param_grid, n_iter=n_iter, random_state=random_state))
+            else:
+                candidates = list(ParameterGrid(param_grid))
+            max_candidates = getattr(settings, 'ML_SWEEP_MAX_CANDIDATES', 200)
+            if len(candidates) > max_candidates:
+                return {"error": f"Sweep has {len(candidates)} configurations (limit {max_candidates}); "
+                                 f"use n_iter for random search"}
+            
+            # Folds are computed once and shared by every configuration
+            if task == 'classification':
+                splitter = StratifiedKFold(n_splits=cv_folds, shuffle=True, random_state=random_state)
+            else:
+                splitter = KFold(n_splits=cv_folds, shuffle=True, random_state=random_state)
+            folds = list(splitter.split(X, y))
+            scoring = scoring or ('accuracy' if task == 'classification' else 'r2')
+            
+            scores = {index: [] for index in range(len(candidates))}
+            fit_times = {index: [] for index in range(len(candidates))}
+            errors = {}
+            stopped = set()
+            min_folds = getattr(settings, 'ML_SWEEP_MIN_FOLDS', 2)
+            
+            n_jobs = n_jobs or getattr(settings, 'ML_SWEEP_N_JOBS', None) or os.cpu_count() or 1
+            
+            with _sweep_executor(X, y, n_jobs) as submit:
+                active = list(range(len(candidates)))
+                # Without early stopping every fold is one round
+                rounds = [[fold] for fold in range(len(folds))] if early_stopping else [list(range(len(folds)))]
+                
+                for round_folds in rounds:
+                    pending = {}
+                    for index in active:
+                        for fold in round_folds:
+                            train_idx, test_idx = folds[fold]
+                            future = submit(_fit_and_score, estimator_class, candidates[index],
+                                            train_idx, test_idx, scoring, random_state)
+                            pending[future] = index
+                    
+                    for future, index in pending.items():
+                        try:
+                            score, fit_time = future.result()
+                            scores[index].append(score)
+                            fit_times[index].append(fit_time)
+                        except Exception as e:
+                            errors[index] = str(e)
+                    
+                    active = [index for index in active if index not in errors]
+                    completed = len(scores[active[0]]) if active else 0
+                    if early_stopping and completed >= min_folds and completed < len(folds) and len(active) > 1:
+                        active.sort(key=lambda index: np.mean(scores[index]), reverse=True)
+                        keep = max(1, (len(active) + 1) // 2)
+                        stopped.update(active[keep:])
+                        active = active[:keep]
+            
+            leaderboard = []
+            for index, params in enumerate(candidates):
+                # A failed configuration's partial scores are not comparable, so it gets no mean
+                scored = bool(scores[index]) and index not in errors
+                entry = {
+                    'params': params,
+                    'mean_score': float(np.mean(scores[index])) if scored else None,
+                    'std_score': float(np.std(scores[index])) if scored else None,
+                    'fold_scores': [float(score) for score in scores[index]],
+                    'folds_completed': len(scores[index]),
+                    'mean_fit_time': float(np.mean(fit_times[index])) if fit_times[index] else None,
+                    'stopped_early': index in stopped
+                }
+                if index in errors:
+                    entry['error'] = errors[index]
+                leaderboard.append(entry)
+            
+            # Configurations that ran every fold rank ahead of early-stopped ones;
+            # failed configurations are listed last without a rank
+            leaderboard.sort(key=lambda entry: (
+                entry['mean_score'] is not None, not entry['stopped_early'], entry['mean_score'] or 0
+            ), reverse=True)
+            for rank, entry in enumerate(leaderboard, 1):
+                entry['rank'] = rank if entry['mean_score'] is not None else None
+            
+            best = leaderboard[0]
+            if best['mean_score'] is None:
+                return {"error": f"Every configuration failed: {best.get('error')}"}
+            
+            return {
+                'type': 'hyperparameter_sweep',
+                'task': task,
+                'model_type': model_type,
+                'scoring': scoring,
+                'search': 'random' if n_iter else 'grid',
+                'cv_folds': cv_folds,
+                'n_configurations': len(candidates),
+                'n_stopped_early': len(stopped),
+                'n_failed': len(errors),
+                'best_params': best['params'],
+                'best_score': best['mean_score'],
+                'leaderboard': leaderboard[:top_k],
+                'target_classes': prepared['target_classes'],
+                'feature_columns': prepared['feature_columns'],
+                'data_info': {
+                    'total_samples': len(y),
+                    'n_features': X.shape[1],
+                    'n_jobs': n_jobs,
+                    'created_at': datetime.now().isoformat()
+                }
+            }
+            
+        except Exception as e:
+            logger.error(f"Error in hyperparameter_sweep: {str(e)}")
+            return {"error": f"Hyperparameter sweep failed: {str(e)}"}
+    
+    @staticmethod
+    def _prepare_supervised_data(df: pd.DataFrame, target_column: str,
+                                 feature_columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Get the shared prepared feature matrix and encode a categorical target"""
+        if target_column not in df.columns:
+            return {"error": f"Target column '{target_column}' not found in DataFrame"}
+        
+        if feature_columns is None:
+            feature_columns = [col for col in df.columns if col != target_column]
+        else:
+            missing_cols = [col for col in feature_columns if col not in df.columns]
+            if missing_cols:
+                return {"error": f"Feature columns not found: {missing_cols}"}
+        
+        y = df[target_column].copy()
+        y = y.fillna(y.mode().iloc[0]) if y.dtype == 'object' else y.fillna(y.mean())
+        
+        target_classes = None
+        if y.dtype == 'object':
+            le_target = LabelEncoder()
+            y = le_target.fit_transform(y.astype(str))
+            target_classes = le_target.classes_.tolist()
+        
+        return {
+            'X': feature_matrix_cache.prepare(df, feature_columns).matrix,
+            'y': np.asarray(y),
+            'feature_columns': feature_columns,
+            'target_classes': target_classes
+        }
+
+
+# Feature matrix and target installed once per sweep pool worker process
+_sweep_data = {}
+
+
+def _init_sweep_worker(X: np.ndarray, y: np.ndarray) -> None:
+    _sweep_data['X'] = X
+    _sweep_data['y'] = y
+
+
+def _fit_and_score(estimator_class, params: Dict[str, Any], train_idx: np.ndarray, test_idx: np.ndarray,
+                   scoring: str, random_state: int, X: Optional[np.ndarray] = None,
+                   y: Optional[np.ndarray] = None) -> Tuple[float, float]:
+    """Fit one configuration on one fold; returns (score, fit seconds)"""
+    if X is None:
+        X, y = _sweep_data['X'], _sweep_data['y']
+    estimator = estimator_class(**params)
+    if 'random_state' in estimator.get_params() and 'random_state' not in params:
+        estimator.set_params(random_state=random_state)
+    
+    start_time = time.perf_counter()
+    estimator.fit(X[train_idx], y[train_idx])
+    fit_time = time.perf_counter() - start_time
+    
+    return float(get_scorer(scoring)(estimator, X[test_idx], y[test_idx])), fit_time
+
+
+@contextmanager
+def _sweep_executor(X: np.ndarray, y: np.ndarray, n_jobs: int):
+    """
+    Yield a submit() function backed by a process pool, or running in process
+    
+    Daemonic processes (Celery prefork workers) cannot start children, so
+    they run the sweep in process. In process X and y are passed to each call
+    rather than installed globally, so concurrent sweeps never share them.
+    """
+    if n_jobs > 1 and multiprocessing.current_process().daemon:
+        logger.warning("Hyperparameter sweep running in a daemonic process; using a single process")
+        n_jobs = 1
+    
+    if n_jobs <= 1:
+        def submit(fn, *args):
+            future = Future()
+            try:
+                future.set_result(fn(*args, X=X, y=y))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        
+        yield submit
+        return
+    
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_sweep_worker, initargs=(X, y)) as executor:
+        yield executor.submit
@@ -0,0 +1,141 @@
+"""
+Resampling Engine
+
+Vectorized bootstrap and permutation resampling shared by the statistical
+tools. Resamples are generated in blocks as index (bootstrap) or permuted
+value (permutation) matrices of shape (block, n) and reduced along rows with
+NumPy, so memory is bounded by the block size rather than by the number of
+resamples. Seeds are assigned per fixed chunk of resamples, each chunk drawing
+from its own child of one SeedSequence with a separate stream per sample, so
+results depend only on random_state and never on the block size or on how
+chunks are sharded across worker processes.
+"""
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Resamples drawn from one seed; fixed so results do not depend on RESAMPLING_BLOCK_BYTES
+RESAMPLE_CHUNK_SIZE = 1000
+
+STATISTICS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    'mean': lambda samples: samples.mean(axis=1),
+    'median': lambda samples: np.median(samples, axis=1),
+    'std': lambda samples: samples.std(axis=1, ddof=1),
+    'var': lambda samples: samples.var(axis=1, ddof=1)
+}
+
+# Samples installed once per resampling worker process
+_worker_samples = []
+
+
+def _init_resampling_worker(samples: List[np.ndarray]) -> None:
+    _worker_samples[:] = samples
+
+
+def _statistic(statistic: str, samples: List[np.ndarray]) -> np.ndarray:
+    """Statistic of each resample; the difference between the first two samples when there are two"""
+    values = [STATISTICS[statistic](sample) for sample in samples]
+    return values[0] - values[1] if len(values) == 2 else values[0]
+
+
+def _resample_chunk(samples: List[np.ndarray], kind: str, statistic: str,
+                    seed: np.random.SeedSequence, size: int, block_size: int) -> np.ndarray:
+    """Statistic replicates of one chunk of `size` resamples, drawn in blocks of at most `block_size`"""
+    # One generator per sample, so splitting the chunk into blocks does not reorder the draws
+    rngs = [np.random.default_rng(child) for child in seed.spawn(len(samples))]
+    blocks = []
+    
+    for start in range(0, size, block_size):
+        rows = min(block_size, size - start)
+        if kind == 'bootstrap':
+            resampled = [sample[rng.integers(0, len(sample), (rows, len(sample)), dtype=np.int32)]
+                         for sample, rng in zip(samples, rngs)]
+        else:
+            # Permute the pooled values of every row and split them back into the groups
+            pooled = np.concatenate(samples)
+            permuted = rngs[0].permuted(np.tile(pooled, (rows, 1)), axis=1)
+            resampled = np.split(permuted, np.cumsum([len(sample) for sample in samples])[:-1], axis=1)
+        blocks.append(_statistic(statistic, resampled))
+    
+    return np.concatenate(blocks)
+
+
+def _resample_chunk_in_worker(kind: str, statistic: str, seed: np.random.SeedSequence,
+                              size: int, block_size: int) -> np.ndarray:
+    return _resample_chunk(_worker_samples, kind, statistic, seed, size, block_size)
+
+
+class Resampler:
+    """
+    Bootstrap and permutation replicates of a statistic of one or two samples
+    
+    With one sample the replicates are of the statistic itself; with two they
+    are of the difference statistic(first) - statistic(second). Bootstrap
+    resamples each sample independently with replacement; permutation
+    reassigns the pooled values to groups of the original sizes.
+    """
+    
+    def __init__(self, samples: Sequence[np.ndarray], statistic: str = 'mean', random_state: int = 0,
+                 n_jobs: Optional[int] = None, block_bytes: Optional[int] = None):
+        if statistic not in STATISTICS:
+            raise ValueError(f"Unsupported statistic '{statistic}'. Use one of: {', '.join(STATISTICS)}")
+        if len(samples) not in (1, 2):
+            raise ValueError("Resampling supports one or two samples")
+        
+        self.samples = [np.asarray(sample, dtype=float) for sample in samples]
+        self.statistic = statistic
+        self.random_state = random_state
+        self.n_jobs = n_jobs or getattr(settings, 'RESAMPLING_N_JOBS', 1) or 1
+        self.block_bytes = block_bytes or getattr(settings, 'RESAMPLING_BLOCK_BYTES', 8 * 1024 ** 2)
+    
+    @property
+    def observed(self) -> float:
+        """Statistic of the original samples"""
+        return float(_statistic(self.statistic, [sample[None, :] for sample in self.samples])[0])
+    
+    @property
+    def block_size(self) -> int:
+        """Resamples per block, so one block of float64 values fits in block_bytes"""
+        n = sum(len(sample) for sample in self.samples)
+        return max(1, int(self.block_bytes // (8 * max(n, 1))))
+    
+    def bootstrap(self, n_resamples: int) -> np.ndarray:
+        """Bootstrap replicates of the statistic"""
+        return self._run('bootstrap', n_resamples)
+    
+    def permutation(self, n_resamples: int) -> np.ndarray:
+        """Replicates of the difference statistic under random reassignment to groups"""
+        if len(self.samples) != 2:
+            raise ValueError("Permutation resampling requires two samples")
+        return self._run('permutation', n_resamples)
+    
+    def _run(self, kind: str, n_resamples: int) -> np.ndarray:
+        block_size = min(self.block_size, RESAMPLE_CHUNK_SIZE)
+        sizes = [RESAMPLE_CHUNK_SIZE] * (n_resamples // RESAMPLE_CHUNK_SIZE)
+        if n_resamples % RESAMPLE_CHUNK_SIZE:
+            sizes.append(n_resamples % RESAMPLE_CHUNK_SIZE)
+        seeds = np.random.SeedSequence(self.random_state).spawn(len(sizes))
+        
+        n_jobs = min(self.n_jobs, len(sizes))
+        if n_jobs > 1 and multiprocessing.current_process().daemon:
+            # Daemonic processes (Celery prefork workers) cannot start children
+            logger.warning("Resampling running in a daemonic process; using a single process")
+            n_jobs = 1
+        
+        if n_jobs <= 1:
+            chunks = [_resample_chunk(self.samples, kind, self.statistic, seed, size, block_size)
+                      for seed, size in zip(seeds, sizes)]
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_resampling_worker,
+                                     initargs=(self.samples,)) as executor:
+                chunks = list(executor.map(_resample_chunk_in_worker, [kind] * len(sizes),
+                                           [self.statistic] * len(sizes), seeds, sizes,
+                                           [block_size] * len(sizes)))
+        
+        return np.concatenate(chunks) if chunks else np.empty(0)
@@ -12,6 +12,11 @@ from scipy.stats import chi2_contingency, fisher_exact
 from typing import Dict, List, Any, Optional, Tuple, Union
 import logging
 from datetime import datetime
+from django.conf import settings
+
+from analytics.services.column_sketches import ColumnSketch
+from analytics.tools.grouped_stats import GroupedStatistics
+from analytics.tools.resampling import Resampler, STATISTICS
 
 logger = logging.getLogger(__name__)
 
@@ -22,18 +27,32 @@ class StatisticalTools:
     """
     
     @staticmethod
-    def descriptive_statistics(df: pd.DataFrame, columns: Optional[List[str]] = None) -> Dict[str, Any]:
+    def descriptive_statistics(df: Optional[pd.DataFrame], columns: Optional[List[str]] = None,
+                               exact: bool = False,
+                               sketches: Optional[Dict[str, ColumnSketch]] = None) -> Dict[str, Any]:
         """
         Calculate comprehensive descriptive statistics for numeric columns
         
+        Columns are reduced in float64 blocks of about
+        DESCRIPTIVE_STATS_BLOCK_BYTES, so temporaries stay bounded however wide
+        the frame is: moments in one pass, order statistics (median, quartiles,
+        mode) from one column-wise sort per block. Above DESCRIPTIVE_STATS_EXACT_MAX_ROWS rows the order statistics
+        are estimated from a uniform sample of DESCRIPTIVE_STATS_SAMPLE_ROWS
+        rows unless exact is set; count, moments, min and max stay exact.
+        
         Args:
             df: Input DataFrame
             columns: Specific columns to analyze (if None, all numeric columns)
+            exact: Compute order statistics over all rows regardless of size
+            sketches: Ingest-time column sketches to answer from instead of df (ignored if exact)
             
         Returns:
             Dict containing descriptive statistics
         """
         try:
+            if sketches is not None and not exact:
+                return _sketch_descriptive_statistics(sketches, columns)
+            
             if columns is None:
                 numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
             else:
@@ -42,39 +61,63 @@ class StatisticalTools:
             if not numeric_cols:
                 return {"error": "No numeric columns found for analysis"}
             
-            results = {}
+            max_rows = getattr(settings, 'DESCRIPTIVE_STATS_EXACT_MAX_ROWS', 2000000)
+            sample_rows = getattr(settings, 'DESCRIPTIVE_STATS_SAMPLE_ROWS', 200000)
+            approximate = not exact and len(df) > max(max_rows, sample_rows)
+            if approximate:
+                rows = np.sort(np.random.default_rng(0).choice(len(df), sample_rows, replace=False))
+            
+            block_bytes = getattr(settings, 'DESCRIPTIVE_STATS_BLOCK_BYTES', 64 * 1024 ** 2)
+            block_width = max(1, int(block_bytes // (8 * max(len(df), 1))))
+            moment_blocks, order_blocks = [], []
+            for start in range(0, len(numeric_cols), block_width):
+                values = df[numeric_cols[start:start + block_width]].to_numpy(dtype=np.float64, na_value=np.nan)
+                moment_blocks.append(_column_moments(values))
+                order_blocks.append(_column_order_statistics(values[rows] if approximate else values))
+                del values
+            moments, order_stats = _merge_column_blocks(moment_blocks), _merge_column_blocks(order_blocks)
             
-            for col in numeric_cols:
-                series = df[col].dropna()
-                if len(series) == 0:
+            results = {}
+            for index, col in enumerate(numeric_cols):
+                count = int(moments['count'][index])
+                if count == 0:
                     continue
-                    
+                
+                missing_count = len(df) - count
                 results[col] = {
-                    'count': len(series),
-                    'mean': float(series.mean()),
-                    'median': float(series.median()),
-                    'mode': float(series.mode().iloc[0]) if not series.mode().empty else None,
-                    'std': float(series.std()),
-                    'var': float(series.var()),
-                    'min': float(series.min()),
-                    'max': float(series.max()),
-                    'range': float(series.max() - series.min()),
-                    'q1': float(series.quantile(0.25)),
-                    'q3': float(series.quantile(0.75)),
-                    'iqr': float(series.quantile(0.75) - series.quantile(0.25)),
-                    'skewness': float(series.skew()),
-                    'kurtosis': float(series.kurtosis()),
-                    'missing_count': int(df[col].isna().sum()),
-                    'missing_percentage': float(df[col].isna().sum() / len(df) * 100)
+                    'count': count,
+                    'mean': float(moments['mean'][index]),
+                    'median': float(order_stats['median'][index]),
+                    'mode': order_stats['mode'][index],
+                    'std': float(np.sqrt(moments['var'][index])),
+                    'var': float(moments['var'][index]),
+                    'min': float(moments['min'][index]),
+                    'max': float(moments['max'][index]),
+                    'range': float(moments['max'][index] - moments['min'][index]),
+                    'q1': float(order_stats['q1'][index]),
+                    'q3': float(order_stats['q3'][index]),
+                    'iqr': float(order_stats['q3'][index] - order_stats['q1'][index]),
+                    'skewness': float(moments['skewness'][index]),
+                    'kurtosis': float(moments['kurtosis'][index]),
+                    'missing_count': missing_count,
+                    'missing_percentage': float(missing_count / len(df) * 100)
+                }
+            
+            summary = {
+                'total_columns_analyzed': len(results),
+                'total_rows': len(df),
+                'analysis_timestamp': datetime.now().isoformat()
+            }
+            if approximate:
+                summary['approximate'] = {
+                    'statistics': ['median', 'mode', 'q1', 'q3', 'iqr'],
+                    'method': 'uniform_sample',
+                    'sample_rows': sample_rows
                 }
             
             return {
                 'type': 'descriptive_statistics',
-                'summary': {
-                    'total_columns_analyzed': len(results),
-                    'total_rows': len(df),
-                    'analysis_timestamp': datetime.now().isoformat()
-                },
+                'summary': summary,
                 'statistics': results
             }
             
@@ -157,24 +200,23 @@ class StatisticalTools:
                 return {"error": "Specified columns not found in DataFrame"}
             
             # Get groups
-            groups = df[group_column].unique()
-            if len(groups) != 2:
+            grouped = GroupedStatistics(df[column], df[group_column])
+            if grouped.n_groups != 2:
                 return {"error": "Group column must have exactly 2 unique values"}
             
-            group1_data = df[df[group_column] == groups[0]][column].dropna()
-            group2_data = df[df[group_column] == groups[1]][column].dropna()
-            
-            if len(group1_data) < 2 or len(group2_data) < 2:
+            n1, n2 = (int(n) for n in grouped.counts)
+            if n1 < 2 or n2 < 2:
                 return {"error": "Each group must have at least 2 observations"}
             
-            # Perform t-test
-            t_stat, p_value = stats.ttest_ind(group1_data, group2_data, alternative=alternative)
+            # Perform t-test from the group moments
+            mean1, mean2 = grouped.means
+            std1, std2 = grouped.stds()
+            t_stat, p_value = stats.ttest_ind_from_stats(mean1, std1, n1, mean2, std2, n2,
+                                                         alternative=alternative)
             
             # Calculate effect size (Cohen's d)
-            pooled_std = np.sqrt(((len(group1_data) - 1) * group1_data.var() + 
-                                (len(group2_data) - 1) * group2_data.var()) / 
-                               (len(group1_data) + len(group2_data) - 2))
-            cohens_d = (group1_data.mean() - group2_data.mean()) / pooled_std
+            pooled_std = np.sqrt(((n1 - 1) * std1 ** 2 + (n2 - 1) * std2 ** 2) / (n1 + n2 - 2))
+            cohens_d = (mean1 - mean2) / pooled_std
             
             return {
                 'type': 't_test',
@@ -183,16 +225,16 @@ class StatisticalTools:
                 'alternative': alternative,
                 'groups': {
                     'group1': {
-                        'name': str(groups[0]),
-                        'n': len(group1_data),
-                        'mean': float(group1_data.mean()),
-                        'std': float(group1_data.std())
+                        'name': str(grouped.labels[0]),
+                        'n': n1,
+                        'mean': float(mean1),
+                        'std': float(std1)
                     },
                     'group2': {
-                        'name': str(groups[1]),
-                        'n': len(group2_data),
-                        'mean': float(group2_data.mean()),
-                        'std': float(group2_data.std())
+                        'name': str(grouped.labels[1]),
+                        'n': n2,
+                        'mean': float(mean2),
+                        'std': float(std2)
                     }
                 },
                 'effect_size': {
@@ -279,41 +321,37 @@ class StatisticalTools:
                 return {"error": "Specified columns not found in DataFrame"}
             
             # Get groups
-            groups = df[group_column].unique()
-            if len(groups) < 2:
+            grouped = GroupedStatistics(df[column], df[group_column])
+            if grouped.n_groups < 2:
                 return {"error": "At least 2 groups required for ANOVA"}
             
-            # Prepare data for ANOVA
-            group_data = []
-            group_names = []
-            for group in groups:
-                group_values = df[df[group_column] == group][column].dropna()
-                if len(group_values) > 0:
-                    group_data.append(group_values)
-                    group_names.append(str(group))
-            
-            if len(group_data) < 2:
+            # Groups with data
+            present = grouped.counts > 0
+            n_groups = int(present.sum())
+            if n_groups < 2:
                 return {"error": "At least 2 groups with data required for ANOVA"}
             
-            # Perform ANOVA
-            f_stat, p_value = stats.f_oneway(*group_data)
+            # Perform ANOVA from the group moments (as stats.f_oneway)
+            counts = grouped.counts[present]
+            means = grouped.means[present]
+            n_total = int(counts.sum())
+            grand_mean = grouped.sums[present].sum() / n_total
+            ss_between = float((counts * (means - grand_mean) ** 2).sum())
+            ss_within = float(grouped.variances(ddof=0)[present].dot(counts))
+            df_between, df_within = n_groups - 1, n_total - n_groups
+            with np.errstate(divide='ignore', invalid='ignore'):
+                f_stat = np.float64(ss_between) / df_between / (np.float64(ss_within) / df_within)
+            p_value = stats.f.sf(f_stat, df_between, df_within)
             
             # Calculate eta-squared (effect size)
-            ss_between = sum(len(group) * (group.mean() - np.concatenate(group_data).mean())**2 for group in group_data)
-            ss_total = sum((np.concatenate(group_data) - np.concatenate(group_data).mean())**2)
+            ss_total = ss_between + ss_within
             eta_squared = ss_between / ss_total if ss_total > 0 else 0
             
             # Group statistics
-            group_stats = []
-            for i, group in enumerate(group_data):
-                group_stats.append({
-                    'group_name': group_names[i],
-                    'n': len(group),
-                    'mean': float(group.mean()),
-                    'std': float(group.std()),
-                    'min': float(group.min()),
-                    'max': float(group.max())
-                })
+            group_stats = [
+                {'group_name': str(entry.pop('group')), **entry}
+                for entry in grouped.summary()
+            ]
             
             return {
                 'type': 'anova_test',
@@ -329,7 +367,7 @@ class StatisticalTools:
                     'analysis_timestamp': datetime.now().isoformat(),
                     'tested_column': column,
                     'group_column': group_column,
-                    'total_groups': len(group_data)
+                    'total_groups': n_groups
                 }
             }
             
@@ -547,3 +585,307 @@ class StatisticalTools:
         except Exception as e:
             logger.error(f"Error in confidence_interval: {str(e)}")
             return {"error": f"Confidence interval calculation failed: {str(e)}"}
+    
+    @staticmethod
+    def bootstrap_confidence_interval(df: pd.DataFrame, column: str, statistic: str = 'mean',
+                                      confidence_level: float = 0.95, group_column: Optional[str] = None,
+                                      n_resamples: int = 10000, method: str = 'percentile',
+                                      random_state: int = 0, n_jobs: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Bootstrap confidence interval for a statistic of a numeric column
+        
+        Args:
+            df: Input DataFrame
+            column: Numeric column to analyze
+            statistic: Statistic to estimate ('mean', 'median', 'std', 'var')
+            confidence_level: Confidence level (0.95 for 95%, 0.99 for 99%)
+            group_column: Optional column with exactly 2 groups; the interval is
+                then for the difference of the statistic between the groups
+            n_resamples: Number of bootstrap resamples
+            method: Interval method ('percentile' or 'basic')
+            random_state: Seed; equal seeds give equal intervals for any n_jobs
+            n_jobs: Worker processes (default RESAMPLING_N_JOBS)
+            
+        Returns:
+            Dict containing bootstrap confidence interval results
+        """
+        try:
+            if method not in ('percentile', 'basic'):
+                return {"error": f"Unsupported bootstrap method: {method}"}
+            
+            samples, group_names = _resampling_samples(df, column, group_column)
+            if isinstance(samples, dict):
+                return samples
+            
+            max_resamples = getattr(settings, 'RESAMPLING_MAX_RESAMPLES', 100000)
+            if not 1 <= n_resamples <= max_resamples:
+                return {"error": f"n_resamples must be between 1 and {max_resamples}"}
+            
+            resampler = Resampler(samples, statistic, random_state=random_state, n_jobs=n_jobs)
+            observed = resampler.observed
+            replicates = resampler.bootstrap(n_resamples)
+            
+            alpha = 1 - confidence_level
+            low, high = np.quantile(replicates, [alpha / 2, 1 - alpha / 2])
+            if method == 'basic':
+                low, high = 2 * observed - high, 2 * observed - low
+            
+            estimate = f"difference in {statistic}" if group_column else statistic
+            
+            return {
+                'type': 'bootstrap_confidence_interval',
+                'column': column,
+                'statistic': statistic,
+                'group_column': group_column,
+                'groups': group_names,
+                'method': method,
+                'confidence_level': confidence_level,
+                'sample_size': sum(len(sample) for sample in samples),
+                'estimate': observed,
+                'standard_error': float(np.std(replicates, ddof=1)) if n_resamples > 1 else None,
+                'bias': float(np.mean(replicates) - observed),
+                'confidence_interval': {
+                    'lower_bound': float(low),
+                    'upper_bound': float(high)
+                },
+                'summary': {
+                    'analysis_timestamp': datetime.now().isoformat(),
+                    'n_resamples': n_resamples,
+                    'random_state': random_state,
+                    'interpretation': f"Bootstrap {confidence_level*100}% confidence interval for the {estimate}: {low:.4f} to {high:.4f}"
+                }
+            }
+            
+        except Exception as e:
+            logger.error(f"Error in bootstrap_confidence_interval: {str(e)}")
+            return {"error": f"Bootstrap confidence interval calculation failed: {str(e)}"}
+    
+    @staticmethod
+    def permutation_test(df: pd.DataFrame, column: str, group_column: str, statistic: str = 'mean',
+                         alternative: str = 'two-sided', n_resamples: int = 10000,
+                         random_state: int = 0, n_jobs: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Permutation test for a difference in a statistic between two groups
+        
+        Args:
+            df: Input DataFrame
+            column: Numeric column to test
+            group_column: Categorical column defining exactly 2 groups
+            statistic: Statistic compared between groups ('mean', 'median', 'std', 'var')
+            alternative: Test alternative ('two-sided', 'less', 'greater')
+            n_resamples: Number of random permutations
+            random_state: Seed; equal seeds give equal p-values for any n_jobs
+            n_jobs: Worker processes (default RESAMPLING_N_JOBS)
+            
+        Returns:
+            Dict containing permutation test results
+        """
+        try:
+            if alternative not in ('two-sided', 'less', 'greater'):
+                return {"error": f"Unsupported alternative: {alternative}"}
+            
+            samples, group_names = _resampling_samples(df, column, group_column)
+            if isinstance(samples, dict):
+                return samples
+            
+            max_resamples = getattr(settings, 'RESAMPLING_MAX_RESAMPLES', 100000)
+            if not 1 <= n_resamples <= max_resamples:
+                return {"error": f"n_resamples must be between 1 and {max_resamples}"}
+            
+            resampler = Resampler(samples, statistic, random_state=random_state, n_jobs=n_jobs)
+            observed = resampler.observed
+            replicates = resampler.permutation(n_resamples)
+            
+            # Tolerance so replicates equal to the observed value up to rounding count as extreme
+            tolerance = 1e-12 * max(1.0, abs(observed))
+            if alternative == 'two-sided':
+                extreme = np.abs(replicates) >= abs(observed) - tolerance
+            elif alternative == 'greater':
+                extreme = replicates >= observed - tolerance
+            else:
+                extreme = replicates <= observed + tolerance
+            # The observed assignment counts as one of the permutations
+            p_value = (int(extreme.sum()) + 1) / (n_resamples + 1)
+            
+            return {
+                'type': 'permutation_test',
+                'statistic': statistic,
+                'test_statistic': observed,
+                'p_value': float(p_value),
+                'alternative': alternative,
+                'groups': {
+                    f'group{index + 1}': {
+                        'name': name,
+                        'n': len(sample),
+                        statistic: float(STATISTICS[statistic](sample[None, :])[0])
+                    }
+                    for index, (name, sample) in enumerate(zip(group_names, samples))
+                },
+                'null_distribution': {
+                    'mean': float(np.mean(replicates)),
+                    'std': float(np.std(replicates, ddof=1)) if n_resamples > 1 else None,
+                    'percentiles': {
+                        str(q): float(value)
+                        for q, value in zip((2.5, 50, 97.5), np.percentile(replicates, [2.5, 50, 97.5]))
+                    }
+                },
+                'significance': p_value < 0.05,
+                'summary': {
+                    'analysis_timestamp': datetime.now().isoformat(),
+                    'tested_column': column,
+                    'group_column': group_column,
+                    'n_resamples': n_resamples,
+                    'random_state': random_state
+                }
+            }
+            
+        except Exception as e:
+            logger.error(f"Error in permutation_test: {str(e)}")
+            return {"error": f"Permutation test failed: {str(e)}"}
+
+
+def _resampling_samples(df: pd.DataFrame, column: str,
+                        group_column: Optional[str]) -> Tuple[Union[List[np.ndarray], Dict[str, str]], Optional[List[str]]]:
+    """Non-missing values of a column, split into two groups when a group column is given, or an error dict"""
+    required = [column] + ([group_column] if group_column else [])
+    if any(name not in df.columns for name in required):
+        return {"error": "Specified columns not found in DataFrame"}, None
+    if not pd.api.types.is_numeric_dtype(df[column]):
+        return {"error": f"Column '{column}' must be numeric"}, None
+    
+    if not group_column:
+        values = df[column].dropna().to_numpy(dtype=float)
+        if len(values) < 2:
+            return {"error": "Insufficient data for resampling"}, None
+        return [values], None
+    
+    grouped = GroupedStatistics(df[column], df[group_column])
+    if grouped.n_groups != 2:
+        return {"error": "Group column must have exactly 2 unique values"}, None
+    if (grouped.counts < 2).any():
+        return {"error": "Each group must have at least 2 observations"}, None
+    return [sample.astype(float) for sample in grouped.arrays()], [str(label) for label in grouped.labels]
+
+
+def _merge_column_blocks(blocks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Join per-column statistics computed for consecutive blocks of columns"""
+    return {
+        key: np.concatenate([block[key] for block in blocks]) if isinstance(value, np.ndarray)
+        else [item for block in blocks for item in block[key]]
+        for key, value in blocks[0].items()
+    }
+
+
+def _column_moments(values: np.ndarray) -> Dict[str, np.ndarray]:
+    """Count, mean, variance, min, max, skewness and kurtosis of each column, as pandas computes them"""
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(valid, values, 0).sum(axis=0) / count
+        centered = np.where(valid, values - mean, 0)
+        squared = centered * centered
+        m2 = squared.sum(axis=0)
+        m3 = (squared * centered).sum(axis=0)
+        m4 = (squared * squared).sum(axis=0)
+        # pandas zeroes floating point noise before the shape ratios
+        m2, m3, m4 = (np.where(np.abs(m) < 1e-14, 0, m) for m in (m2, m3, m4))
+        
+        var = np.where(count > 1, m2 / (count - 1), np.nan)
+        skewness = np.where(m2 == 0, 0, count * (count - 1) ** 0.5 / (count - 2) * m3 / m2 ** 1.5)
+        skewness = np.where(count < 3, np.nan, skewness)
+        denominator = (count - 2) * (count - 3) * m2 ** 2
+        kurtosis = np.where(
+            denominator == 0, 0,
+            count * (count + 1) * (count - 1) * m4 / denominator - 3 * (count - 1) ** 2 / ((count - 2) * (count - 3))
+        )
+        kurtosis = np.where(count < 4, np.nan, kurtosis)
+    
+    has_values = count > 0
+    minimum = np.full(values.shape[1], np.nan)
+    maximum = np.full(values.shape[1], np.nan)
+    if has_values.any():
+        minimum[has_values] = np.nanmin(values[:, has_values], axis=0)
+        maximum[has_values] = np.nanmax(values[:, has_values], axis=0)
+    
+    return {'count': count, 'mean': mean, 'var': var, 'min': minimum, 'max': maximum,
+            'skewness': skewness, 'kurtosis': kurtosis}
+
+
+def _column_order_statistics(values: np.ndarray) -> Dict[str, Any]:
+    """Median, quartiles (linear interpolation) and smallest mode of each column from one column-wise sort"""
+    ordered = np.sort(values, axis=0)  # missing values sort last
+    count = (~np.isnan(values)).sum(axis=0)
+    columns = np.arange(values.shape[1])
+    last = np.maximum(count - 1, 0)
+    
+    def quantile(q: float) -> np.ndarray:
+        position = q * last
+        lower = np.floor(position).astype(int)
+        upper = np.minimum(lower + 1, last)
+        low, high = ordered[lower, columns], ordered[upper, columns]
+        return np.where(count > 0, low + (high - low) * (position - lower), np.nan)
+    
+    modes = []
+    for column in columns:
+        column_values = ordered[:count[column], column]
+        if len(column_values) == 0:
+            modes.append(None)
+            continue
+        run_starts = np.concatenate(([0], np.flatnonzero(np.diff(column_values)) + 1))
+        run_lengths = np.diff(np.append(run_starts, len(column_values)))
+        modes.append(float(column_values[run_starts[np.argmax(run_lengths)]]))
+    
+    return {'median': quantile(0.5), 'q1': quantile(0.25), 'q3': quantile(0.75), 'mode': modes}
+
+
+def _sketch_descriptive_statistics(sketches: Dict[str, ColumnSketch],
+                                   columns: Optional[List[str]] = None) -> Dict[str, Any]:
+    """descriptive_statistics answered from column sketches: exact moments, approximate order statistics"""
+    numeric = {name: sketch for name, sketch in sketches.items()
+               if sketch.is_numeric and (columns is None or name in columns)}
+    if not numeric:
+        return {"error": "No numeric columns found for analysis"}
+    
+    results = {}
+    for col, sketch in numeric.items():
+        if sketch.count == 0:
+            continue
+        q1, median, q3 = sketch.quantile([0.25, 0.5, 0.75])
+        top_values = sketch.top_values()
+        # Only a value certainly seen more than once is a mode; continuous columns have none in the sketch
+        overestimate = sketch.error_bounds()['top_value_count_overestimate']
+        mode = float(top_values[0][0]) if top_values and top_values[0][1] - overestimate > 1 else None
+        results[col] = {
+            'count': sketch.count,
+            'mean': float(sketch.mean),
+            'median': float(median),
+            'mode': mode,
+            'std': float(sketch.std()),
+            'var': float(sketch.variance()),
+            'min': float(sketch.minimum),
+            'max': float(sketch.maximum),
+            'range': float(sketch.maximum - sketch.minimum),
+            'q1': float(q1),
+            'q3': float(q3),
+            'iqr': float(q3 - q1),
+            'skewness': float(sketch.skewness),
+            'kurtosis': float(sketch.kurtosis),
+            'missing_count': sketch.null_count,
+            'missing_percentage': float(sketch.null_count / sketch.rows * 100) if sketch.rows else 0.0
+        }
+    
+    any_sketch = next(iter(numeric.values()))
+    return {
+        'type': 'descriptive_statistics',
+        'summary': {
+            'total_columns_analyzed': len(results),
+            'total_rows': any_sketch.rows,
+            'analysis_timestamp': datetime.now().isoformat(),
+            'approximate': {
+                'statistics': ['median', 'mode', 'q1', 'q3', 'iqr'],
+                'method': 'sketch',
+                'error_bounds': any_sketch.error_bounds()
+            }
+        },
+        'statistics': results
+    }
@@ -0,0 +1,285 @@
+"""
+Survival Engine
+
+Kaplan-Meier curves, log-rank tests and group Cox models computed from one
+aggregate of the survival data: subjects are sorted once by (group, time)
+and collapsed to one row per unique group event time with the number of
+events and of subjects leaving the risk set, and risk sets follow from a
+cumulative sum. Curves of all groups are then computed together from the
+aggregate instead of refitting an estimator per group, so the cost is one
+sort of the cohort plus work proportional to the number of unique times.
+"""
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+logger = logging.getLogger(__name__)
+
+
+class SurvivalTable:
+    """
+    Survival data aggregated to unique event times per group
+    
+    Groups keep their order of first appearance (as Series.unique()). Input
+    rows must not contain missing values; events are 1 (event) or 0
+    (censored).
+    """
+    
+    def __init__(self, durations: np.ndarray, events: np.ndarray, groups: Optional[pd.Series] = None):
+        durations = np.asarray(durations, dtype=float)
+        events = np.asarray(events, dtype=float)
+        if groups is None:
+            codes, self.labels = np.zeros(len(durations), dtype=np.intp), [None]
+        else:
+            codes, uniques = pd.factorize(groups, sort=False)
+            self.labels = list(uniques)
+        self.n_groups = len(self.labels)
+        self.subjects = np.bincount(codes, minlength=self.n_groups)
+        self.events = np.bincount(codes, weights=events, minlength=self.n_groups)
+        
+        order = np.lexsort((durations, codes))
+        codes, durations, events = codes[order], durations[order], events[order]
+        starts = np.flatnonzero(np.concatenate((
+            [True], (codes[1:] != codes[:-1]) | (durations[1:] != durations[:-1])
+        ))) if len(durations) else np.empty(0, dtype=np.intp)
+        
+        # One row per unique (group, time): events and subjects leaving the risk set
+        self.codes = codes[starts]
+        self.times = durations[starts]
+        self.observed = np.add.reduceat(events, starts) if len(starts) else np.empty(0)
+        self.removed = np.diff(np.append(starts, len(durations)))
+        self.offsets = np.searchsorted(self.codes, np.arange(self.n_groups + 1))
+        
+        removed_before = np.concatenate(([0], np.cumsum(self.removed)))
+        self.at_risk = self.subjects[self.codes] - (removed_before[:-1] - removed_before[self.offsets[:-1]][self.codes])
+    
+    def survival(self) -> np.ndarray:
+        """Kaplan-Meier survival probability after each aggregate row"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            factor = 1 - self.observed / self.at_risk
+        # Products within each group segment as sums of logs; a zero factor ends the curve
+        log_factor = np.log(np.where(factor > 0, factor, 1))
+        log_survival = self._segment_cumsum(log_factor)
+        extinct = self._segment_cumsum((factor <= 0).astype(float)) > 0
+        return np.where(extinct, 0.0, np.exp(log_survival))
+    
+    def median_survival_times(self) -> np.ndarray:
+        """First time each group's survival drops to 0.5 or below (inf if it never does)"""
+        survival = self.survival()
+        rows = np.where(survival <= 0.5, np.arange(len(survival)), len(survival))
+        medians = np.full(self.n_groups, np.inf)
+        non_empty = np.flatnonzero(self.offsets[1:] > self.offsets[:-1])
+        if len(non_empty):
+            first = np.minimum.reduceat(rows, self.offsets[:-1][non_empty])
+            found = first < len(survival)
+            medians[non_empty[found]] = self.times[first[found]]
+        return medians
+    
+    def curves(self, max_points: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Per-group survival curves as lifelines reports them (timeline from 0)
+        
+        Args:
+            max_points: Largest number of timeline points per curve; longer
+                curves are evaluated at max_points evenly spaced times, which
+                keeps every reported value exact for its time
+        
+        Returns:
+            List of dicts with timeline, survival_probability and binned, in group order
+        """
+        survival = self.survival()
+        results = []
+        for start, stop in zip(self.offsets[:-1], self.offsets[1:]):
+            timeline, probability = self.times[start:stop], survival[start:stop]
+            if not len(timeline) or timeline[0] > 0:
+                timeline = np.concatenate(([0.0], timeline))
+                probability = np.concatenate(([1.0], probability))
+            
+            binned = bool(max_points) and len(timeline) > max_points
+            if binned:
+                grid = np.linspace(timeline[0], timeline[-1], max_points)
+                probability = probability[np.searchsorted(timeline, grid, side='right') - 1]
+                timeline = grid
+            
+            results.append({
+                'timeline': timeline.tolist(),
+                'survival_probability': probability.tolist(),
+                'binned': binned
+            })
+        return results
+    
+    def logrank_test(self) -> Dict[str, float]:
+        """Multivariate log-rank test of equal survival across groups (as lifelines)"""
+        observed = np.zeros(self.n_groups)
+        expected = np.zeros(self.n_groups)
+        variance = np.zeros((self.n_groups, self.n_groups))
+        
+        for at_risk, deaths in self._event_time_blocks():
+            total_at_risk = at_risk.sum(axis=0)
+            total_deaths = deaths.sum(axis=0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                weight = np.where(total_at_risk > 1,
+                                  total_deaths * (total_at_risk - total_deaths) / (total_at_risk - 1), 0) / total_at_risk
+            observed += deaths.sum(axis=1)
+            expected += at_risk @ (total_deaths / total_at_risk)
+            variance += np.diag(at_risk @ weight) - (at_risk * (weight / total_at_risk)) @ at_risk.T
+        
+        difference = (observed - expected)[:-1]
+        test_statistic = float(difference @ np.linalg.pinv(variance[:-1, :-1]) @ difference)
+        return {
+            'test_statistic': test_statistic,
+            'p_value': float(stats.chi2.sf(test_statistic, self.n_groups - 1)),
+            'degrees_of_freedom': self.n_groups - 1
+        }
+    
+    def cox_group_model(self, reference: int = 0, max_iterations: int = 50,
+                        tolerance: float = 1e-9) -> Dict[str, np.ndarray]:
+        """
+        Cox proportional hazards model with one indicator per non-reference group
+        
+        The partial likelihood uses Efron's tie correction, as lifelines does.
+        With only group indicators as covariates it depends on the data only
+        through deaths and risk sets per group at each event time, so it is
+        fitted from the aggregate.
+        
+        Args:
+            reference: Group index whose hazard is the baseline
+        
+        Returns:
+            Dict of per-group arrays (coef, se, z, p, hazard_ratio, lower_ci,
+            upper_ci), NaN for the reference group
+        """
+        others = np.array([index for index in range(self.n_groups) if index != reference])
+        # Risk sets and deaths do not depend on the coefficients: build them once per fit
+        blocks = list(self._event_time_blocks())
+        beta = np.zeros(self.n_groups)
+        log_likelihood, gradient, hessian = self._efron_terms(beta, others, blocks)
+        
+        for _ in range(max_iterations):
+            step = np.linalg.solve(-hessian, gradient)
+            # Halve the Newton step until the partial likelihood does not decrease
+            for _ in range(30):
+                candidate = beta.copy()
+                candidate[others] += step
+                new_terms = self._efron_terms(candidate, others, blocks)
+                if new_terms[0] >= log_likelihood - 1e-12:
+                    break
+                step = step / 2
+            converged = abs(new_terms[0] - log_likelihood) < tolerance and np.abs(step).max() < 1e-6
+            beta = candidate
+            log_likelihood, gradient, hessian = new_terms
+            if converged:
+                break
+        
+        se = np.full(self.n_groups, np.nan)
+        se[others] = np.sqrt(np.diag(np.linalg.inv(-hessian)))
+        coef = np.where(np.arange(self.n_groups) == reference, np.nan, beta)
+        z = coef / se
+        z_critical = stats.norm.ppf(0.975)
+        return {
+            'coef': coef,
+            'se': se,
+            'z': z,
+            'p': 2 * stats.norm.sf(np.abs(z)),
+            'hazard_ratio': np.exp(coef),
+            'lower_ci': np.exp(coef - z_critical * se),
+            'upper_ci': np.exp(coef + z_critical * se)
+        }
+    
+    def _efron_terms(self, beta: np.ndarray, others: np.ndarray,
+                     blocks: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[float, np.ndarray, np.ndarray]:
+        """Efron partial log-likelihood with its gradient and Hessian in the non-reference coefficients"""
+        risk = np.exp(beta)[:, None]
+        log_likelihood = float(self.events @ beta)
+        gradient = self.events.copy()
+        hessian = np.zeros((self.n_groups, self.n_groups))
+        
+        for at_risk, deaths in blocks:
+            # One term per death: the j-th of d tied deaths removes j/d of the dying subjects' risk
+            total_deaths = deaths.sum(axis=0).astype(int)
+            column = np.repeat(np.arange(len(total_deaths)), total_deaths)
+            fraction = (np.arange(len(column)) - np.repeat(np.cumsum(total_deaths) - total_deaths, total_deaths)) / total_deaths[column]
+            
+            weighted = (at_risk[:, column] - fraction * deaths[:, column]) * risk
+            denominator = weighted.sum(axis=0)
+            share = weighted / denominator
+            
+            log_likelihood -= float(np.log(denominator).sum())
+            gradient -= share.sum(axis=1)
+            hessian -= np.diag(share.sum(axis=1)) - share @ share.T
+        
+        return log_likelihood, gradient[others], hessian[np.ix_(others, others)]
+    
+    def _event_time_blocks(self, max_cells: int = 4000000) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Risk sets and deaths per group at the pooled event times, in blocks
+        
+        Yields:
+            (at_risk, deaths) arrays of shape (n_groups, block) with at most
+            max_cells cells
+        """
+        event_times = np.unique(self.times[self.observed > 0])
+        block = max(1, max_cells // max(self.n_groups, 1))
+        
+        for start in range(0, len(event_times), block):
+            times = event_times[start:start + block]
+            at_risk = np.empty((self.n_groups, len(times)))
+            deaths = np.zeros((self.n_groups, len(times)))
+            for group, (first, stop) in enumerate(zip(self.offsets[:-1], self.offsets[1:])):
+                group_times = self.times[first:stop]
+                removed_before = np.concatenate(([0], np.cumsum(self.removed[first:stop])))
+                position = np.searchsorted(group_times, times)
+                at_risk[group] = self.subjects[group] - removed_before[position]
+                
+                # Deaths at the times this group has a row for
+                matched = position < len(group_times)
+                matched[matched] = group_times[position[matched]] == times[matched]
+                deaths[group, matched] = self.observed[first:stop][position[matched]]
+            yield at_risk, deaths
+    
+    def _segment_cumsum(self, values: np.ndarray) -> np.ndarray:
+        """Cumulative sums restarting at each group segment"""
+        totals = np.concatenate(([0.0], np.cumsum(values)))
+        return totals[1:] - totals[self.offsets[:-1]][self.codes]
+
+
+def _fit_cox_group_model(durations: np.ndarray, events: np.ndarray, groups: pd.Series,
+                         reference_group: Any) -> Dict[str, Any]:
+    """Group Cox model of one stratum (process pool task)"""
+    table = SurvivalTable(durations, events, groups)
+    if table.n_groups < 2 or reference_group not in table.labels:
+        return {'labels': table.labels, 'error': "Stratum needs the reference group and at least one other group"}
+    model = table.cox_group_model(reference=table.labels.index(reference_group))
+    return {'labels': table.labels, 'subjects': table.subjects.tolist(), 'model': model}
+
+
+def fit_cox_group_models(strata: List[Tuple[np.ndarray, np.ndarray, pd.Series]], reference_group: Any,
+                         n_jobs: int = 1) -> List[Dict[str, Any]]:
+    """
+    Fit one group Cox model per stratum, across worker processes when n_jobs > 1
+    
+    Args:
+        strata: (durations, events, groups) of each stratum
+        reference_group: Group whose hazard is the baseline in every stratum
+        n_jobs: Worker processes
+    
+    Returns:
+        List of fit results in stratum order
+    """
+    n_jobs = min(n_jobs, len(strata))
+    if n_jobs > 1 and multiprocessing.current_process().daemon:
+        # Daemonic processes (Celery prefork workers) cannot start children
+        logger.warning("Stratified Cox fits running in a daemonic process; using a single process")
+        n_jobs = 1
+    
+    if n_jobs <= 1:
+        return [_fit_cox_group_model(*stratum, reference_group) for stratum in strata]
+    
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        futures = [executor.submit(_fit_cox_group_model, *stratum, reference_group) for stratum in strata]
+        return [future.result() for future in futures]
@@ -12,13 +12,16 @@ import logging
 from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
+from django.conf import settings
+
+from analytics.tools.grouped_stats import GroupedStatistics
+from analytics.tools.survival_engine import SurvivalTable, fit_cox_group_models
 
 logger = logging.getLogger(__name__)
 
 # Try to import lifelines, but handle gracefully if not available
 try:
-    from lifelines import KaplanMeierFitter, CoxPHFitter, WeibullFitter, LogNormalFitter, LogLogisticFitter
-    from lifelines.statistics import logrank_test, multivariate_logrank_test
+    from lifelines import CoxPHFitter, WeibullFitter, LogNormalFitter, LogLogisticFitter
     from lifelines.utils import concordance_index
     LIFELINES_AVAILABLE = True
 except ImportError:
@@ -33,7 +36,8 @@ class SurvivalAnalysisTools:
     
     @staticmethod
     def kaplan_meier_analysis(df: pd.DataFrame, duration_column: str, event_column: str,
-                             group_column: Optional[str] = None, title: str = "Kaplan-Meier Survival Curve") -> Dict[str, Any]:
+                             group_column: Optional[str] = None, title: str = "Kaplan-Meier Survival Curve",
+                             max_points: Optional[int] = None) -> Dict[str, Any]:
         """
         Perform Kaplan-Meier survival analysis
         
@@ -43,14 +47,13 @@ class SurvivalAnalysisTools:
             event_column: Column containing event indicators (1=event, 0=censored)
             group_column: Optional column for grouping (stratified analysis)
             title: Title for the analysis
+            max_points: Most timeline points per curve (default SURVIVAL_CURVE_MAX_POINTS);
+                longer curves are reported at evenly spaced times
             
         Returns:
             Dict containing Kaplan-Meier results
         """
         try:
-            if not LIFELINES_AVAILABLE:
-                return {"error": "lifelines package not available. Please install with: pip install lifelines"}
-            
             if duration_column not in df.columns or event_column not in df.columns:
                 return {"error": "Duration or event column not found in DataFrame"}
             
@@ -82,59 +85,34 @@ class SurvivalAnalysisTools:
                 'created_at': datetime.now().isoformat()
             }
             
+            if max_points is None:
+                max_points = getattr(settings, 'SURVIVAL_CURVE_MAX_POINTS', 2000)
+            
             if group_column:
-                # Stratified analysis
-                groups = survival_data[group_column].unique()
-                group_results = {}
-                
-                for group in groups:
-                    group_data = survival_data[survival_data[group_column] == group]
-                    if len(group_data) < 2:
-                        continue
-                    
-                    kmf = KaplanMeierFitter()
-                    kmf.fit(group_data[duration_column], group_data[event_column], label=str(group))
-                    
-                    group_results[str(group)] = {
-                        'survival_function': {
-                            'timeline': kmf.survival_function_.index.tolist(),
-                            'survival_probability': kmf.survival_function_.iloc[:, 0].tolist()
-                        },
-                        'median_survival_time': kmf.median_survival_time_,
-                        'mean_survival_time': kmf.survival_function_.index[-1] if len(kmf.survival_function_) > 0 else None,
-                        'subjects': len(group_data),
-                        'events': int(group_data[event_column].sum())
-                    }
-                
-                results['grouped_analysis'] = group_results
+                # Stratified analysis: all group curves from one aggregate
+                table = SurvivalTable(survival_data[duration_column].to_numpy(),
+                                      survival_data[event_column].to_numpy(), survival_data[group_column])
+                results['grouped_analysis'] = _group_curves(table, max_points)
                 
                 # Log-rank test for comparing groups
-                if len(groups) > 1:
+                if table.n_groups > 1:
                     try:
-                        logrank_result = multivariate_logrank_test(
-                            survival_data[duration_column],
-                            survival_data[group_column],
-                            survival_data[event_column]
-                        )
-                        results['logrank_test'] = {
-                            'test_statistic': float(logrank_result.test_statistic),
-                            'p_value': float(logrank_result.p_value),
-                            'significant': logrank_result.p_value < 0.05
-                        }
+                        results['logrank_test'] = _logrank_result(table)
                     except Exception as e:
                         results['logrank_test'] = {'error': str(e)}
             else:
                 # Single group analysis
-                kmf = KaplanMeierFitter()
-                kmf.fit(survival_data[duration_column], survival_data[event_column])
+                table = SurvivalTable(survival_data[duration_column].to_numpy(), survival_data[event_column].to_numpy())
+                curve = table.curves(max_points)[0]
                 
                 results['survival_analysis'] = {
                     'survival_function': {
-                        'timeline': kmf.survival_function_.index.tolist(),
-                        'survival_probability': kmf.survival_function_.iloc[:, 0].tolist()
+                        'timeline': curve['timeline'],
+                        'survival_probability': curve['survival_probability']
                     },
-                    'median_survival_time': kmf.median_survival_time_,
-                    'mean_survival_time': kmf.survival_function_.index[-1] if len(kmf.survival_function_) > 0 else None
+                    'timeline_binned': curve['binned'],
+                    'median_survival_time': float(table.median_survival_times()[0]),
+                    'mean_survival_time': float(table.times[-1])
                 }
             
             return results
@@ -296,13 +274,13 @@ class SurvivalAnalysisTools:
             
             if group_column:
                 # Grouped analysis
-                groups = survival_data[group_column].unique()
+                grouped = GroupedStatistics(survival_data[duration_column], survival_data[group_column])
                 group_results = {}
                 
-                for group in groups:
-                    group_data = survival_data[survival_data[group_column] == group]
-                    if len(group_data) < 2:
+                for group, positions in zip(grouped.labels, grouped.positions()):
+                    if len(positions) < 2:
                         continue
+                    group_data = survival_data.iloc[positions]
                     
                     try:
                         fitter.fit(group_data[duration_column], group_data[event_column], label=str(group))
@@ -383,27 +361,26 @@ class SurvivalAnalysisTools:
             
             if group_column:
                 # Grouped summary
-                groups = survival_data[group_column].unique()
+                grouped = GroupedStatistics(survival_data[duration_column], survival_data[group_column])
+                events = survival_data[event_column].to_numpy()
+                n_events = grouped.bincount(events)
+                n_censored = grouped.bincount(events == 0)
+                medians = grouped.quantiles([0.5])[:, 0]
+                stds = grouped.stds()
                 group_summaries = {}
                 
-                for group in groups:
-                    group_data = survival_data[survival_data[group_column] == group]
-                    if len(group_data) == 0:
-                        continue
-                    
-                    durations = group_data[duration_column]
-                    events = group_data[event_column]
-                    
-                    group_summaries[str(group)] = {
-                        'n_subjects': len(group_data),
-                        'n_events': int(events.sum()),
-                        'n_censored': int((events == 0).sum()),
-                        'event_rate': float(events.mean()),
-                        'median_duration': float(durations.median()),
-                        'mean_duration': float(durations.mean()),
-                        'min_duration': float(durations.min()),
-                        'max_duration': float(durations.max()),
-                        'std_duration': float(durations.std())
+                for index in np.flatnonzero(grouped.counts):
+                    n_subjects = int(grouped.counts[index])
+                    group_summaries[str(grouped.labels[index])] = {
+                        'n_subjects': n_subjects,
+                        'n_events': int(n_events[index]),
+                        'n_censored': int(n_censored[index]),
+                        'event_rate': float(n_events[index] / n_subjects),
+                        'median_duration': float(medians[index]),
+                        'mean_duration': float(grouped.means[index]),
+                        'min_duration': float(grouped.minimums[index]),
+                        'max_duration': float(grouped.maximums[index]),
+                        'std_duration': float(stds[index])
                     }
                 
                 results['group_summaries'] = group_summaries
@@ -432,7 +409,8 @@ class SurvivalAnalysisTools:
     
     @staticmethod
     def hazard_ratio_analysis(df: pd.DataFrame, duration_column: str, event_column: str,
-                             group_column: str, reference_group: Optional[str] = None) -> Dict[str, Any]:
+                             group_column: str, reference_group: Optional[str] = None,
+                             strata_column: Optional[str] = None, n_jobs: Optional[int] = None) -> Dict[str, Any]:
         """
         Calculate hazard ratios between groups
         
@@ -442,19 +420,19 @@ class SurvivalAnalysisTools:
             event_column: Column containing event indicators (1=event, 0=censored)
             group_column: Column containing group assignments
             reference_group: Reference group for hazard ratio calculation
+            strata_column: Optional column; hazard ratios are also fitted within each stratum
+            n_jobs: Worker processes for the per-stratum fits (default SURVIVAL_N_JOBS)
             
         Returns:
             Dict containing hazard ratio analysis
         """
         try:
-            if not LIFELINES_AVAILABLE:
-                return {"error": "lifelines package not available. Please install with: pip install lifelines"}
-            
-            if duration_column not in df.columns or event_column not in df.columns or group_column not in df.columns:
+            required_columns = [duration_column, event_column, group_column] + ([strata_column] if strata_column else [])
+            if any(column not in df.columns for column in required_columns):
                 return {"error": "Required columns not found in DataFrame"}
             
             # Prepare data
-            survival_data = df[[duration_column, event_column, group_column]].copy()
+            survival_data = df[required_columns].copy()
             survival_data = survival_data.dropna()
             
             if len(survival_data) == 0:
@@ -471,59 +449,56 @@ class SurvivalAnalysisTools:
             elif reference_group not in groups:
                 return {"error": f"Reference group '{reference_group}' not found in data"}
             
-            # Create dummy variables for groups
-            group_dummies = pd.get_dummies(survival_data[group_column], prefix='group')
-            survival_data = pd.concat([survival_data, group_dummies], axis=1)
+            # Fit the group Cox model (Efron ties) from the aggregated event times
+            table = SurvivalTable(survival_data[duration_column].to_numpy(),
+                                  survival_data[event_column].to_numpy(), survival_data[group_column])
+            model = table.cox_group_model(reference=table.labels.index(reference_group))
             
-            # Remove reference group column
-            ref_col = f'group_{reference_group}'
-            if ref_col in survival_data.columns:
-                survival_data = survival_data.drop(columns=[ref_col])
-            
-            # Fit Cox model
-            cph = CoxPHFitter()
-            cph.fit(survival_data, duration_column=duration_column, event_col=event_column)
-            
-            # Calculate hazard ratios
-            hazard_ratios = {}
-            for group in groups:
-                if group == reference_group:
-                    hazard_ratios[group] = {
-                        'hazard_ratio': 1.0,
-                        'reference': True
-                    }
-                else:
-                    group_col = f'group_{group}'
-                    if group_col in cph.summary.index:
-                        coef_info = cph.summary.loc[group_col]
-                        hazard_ratios[group] = {
-                            'hazard_ratio': float(coef_info['exp(coef)']),
-                            'p_value': float(coef_info['p']),
-                            'lower_ci': float(coef_info['lower 0.95']),
-                            'upper_ci': float(coef_info['upper 0.95']),
-                            'significant': coef_info['p'] < 0.05,
-                            'reference': False
-                        }
-            
-            return {
+            results = {
                 'type': 'hazard_ratio_analysis',
                 'duration_column': duration_column,
                 'event_column': event_column,
                 'group_column': group_column,
                 'reference_group': reference_group,
-                'hazard_ratios': hazard_ratios,
+                'hazard_ratios': _hazard_ratios(table.labels, model, reference_group),
                 'total_subjects': len(survival_data),
                 'groups': groups.tolist(),
                 'created_at': datetime.now().isoformat()
             }
             
+            if strata_column:
+                strata = GroupedStatistics(survival_data[duration_column], survival_data[strata_column])
+                stratum_data = [
+                    (survival_data[duration_column].to_numpy()[positions],
+                     survival_data[event_column].to_numpy()[positions],
+                     survival_data[group_column].iloc[positions])
+                    for positions in strata.positions()
+                ]
+                n_jobs = n_jobs or getattr(settings, 'SURVIVAL_N_JOBS', 1) or 1
+                
+                stratified = {}
+                for stratum, fit in zip(strata.labels, fit_cox_group_models(stratum_data, reference_group, n_jobs)):
+                    if 'error' in fit:
+                        stratified[str(stratum)] = {'error': fit['error']}
+                    else:
+                        stratified[str(stratum)] = {
+                            'hazard_ratios': _hazard_ratios(fit['labels'], fit['model'], reference_group),
+                            'total_subjects': int(sum(fit['subjects']))
+                        }
+                
+                results['strata_column'] = strata_column
+                results['stratified_hazard_ratios'] = stratified
+            
+            return results
+            
         except Exception as e:
             logger.error(f"Error in hazard_ratio_analysis: {str(e)}")
             return {"error": f"Hazard ratio analysis failed: {str(e)}"}
     
     @staticmethod
     def survival_curve_comparison(df: pd.DataFrame, duration_column: str, event_column: str,
-                                 group_column: str, title: str = "Survival Curve Comparison") -> Dict[str, Any]:
+                                 group_column: str, title: str = "Survival Curve Comparison",
+                                 max_points: Optional[int] = None) -> Dict[str, Any]:
         """
         Compare survival curves between groups
         
@@ -533,14 +508,13 @@ class SurvivalAnalysisTools:
             event_column: Column containing event indicators (1=event, 0=censored)
             group_column: Column containing group assignments
             title: Title for the comparison
+            max_points: Most timeline points per curve (default SURVIVAL_CURVE_MAX_POINTS);
+                longer curves are reported at evenly spaced times
             
         Returns:
             Dict containing survival curve comparison results
         """
         try:
-            if not LIFELINES_AVAILABLE:
-                return {"error": "lifelines package not available. Please install with: pip install lifelines"}
-            
             if duration_column not in df.columns or event_column not in df.columns or group_column not in df.columns:
                 return {"error": "Required columns not found in DataFrame"}
             
@@ -556,32 +530,13 @@ class SurvivalAnalysisTools:
             if len(groups) < 2:
                 return {"error": "At least 2 groups required for survival curve comparison"}
             
-            # Perform log-rank test
-            logrank_result = multivariate_logrank_test(
-                survival_data[duration_column],
-                survival_data[group_column],
-                survival_data[event_column]
-            )
+            if max_points is None:
+                max_points = getattr(settings, 'SURVIVAL_CURVE_MAX_POINTS', 2000)
             
-            # Calculate Kaplan-Meier curves for each group
-            group_curves = {}
-            for group in groups:
-                group_data = survival_data[survival_data[group_column] == group]
-                if len(group_data) < 2:
-                    continue
-                
-                kmf = KaplanMeierFitter()
-                kmf.fit(group_data[duration_column], group_data[event_column], label=str(group))
-                
-                group_curves[str(group)] = {
-                    'survival_function': {
-                        'timeline': kmf.survival_function_.index.tolist(),
-                        'survival_probability': kmf.survival_function_.iloc[:, 0].tolist()
-                    },
-                    'median_survival_time': kmf.median_survival_time_,
-                    'subjects': len(group_data),
-                    'events': int(group_data[event_column].sum())
-                }
+            # Log-rank test and Kaplan-Meier curves of all groups from one aggregate
+            table = SurvivalTable(survival_data[duration_column].to_numpy(),
+                                  survival_data[event_column].to_numpy(), survival_data[group_column])
+            group_curves = _group_curves(table, max_points)
             
             return {
                 'type': 'survival_curve_comparison',
@@ -591,11 +546,7 @@ class SurvivalAnalysisTools:
                 'group_column': group_column,
                 'groups': groups.tolist(),
                 'group_curves': group_curves,
-                'logrank_test': {
-                    'test_statistic': float(logrank_result.test_statistic),
-                    'p_value': float(logrank_result.p_value),
-                    'significant': logrank_result.p_value < 0.05
-                },
+                'logrank_test': _logrank_result(table),
                 'total_subjects': len(survival_data),
                 'created_at': datetime.now().isoformat()
             }
@@ -603,3 +554,54 @@ class SurvivalAnalysisTools:
         except Exception as e:
             logger.error(f"Error in survival_curve_comparison: {str(e)}")
             return {"error": f"Survival curve comparison failed: {str(e)}"}
+
+
+def _group_curves(table: SurvivalTable, max_points: Optional[int]) -> Dict[str, Dict[str, Any]]:
+    """Kaplan-Meier curve summaries of the groups with at least 2 subjects"""
+    medians = table.median_survival_times()
+    group_curves = {}
+    for index, curve in enumerate(table.curves(max_points)):
+        if table.subjects[index] < 2:
+            continue
+        group_curves[str(table.labels[index])] = {
+            'survival_function': {
+                'timeline': curve['timeline'],
+                'survival_probability': curve['survival_probability']
+            },
+            'timeline_binned': curve['binned'],
+            'median_survival_time': float(medians[index]),
+            'mean_survival_time': float(table.times[table.offsets[index + 1] - 1]),
+            'subjects': int(table.subjects[index]),
+            'events': int(table.events[index])
+        }
+    return group_curves
+
+
+def _logrank_result(table: SurvivalTable) -> Dict[str, Any]:
+    logrank = table.logrank_test()
+    return {
+        'test_statistic': logrank['test_statistic'],
+        'p_value': logrank['p_value'],
+        'significant': logrank['p_value'] < 0.05
+    }
+
+
+def _hazard_ratios(labels: List[Any], model: Dict[str, np.ndarray], reference_group: Any) -> Dict[Any, Dict[str, Any]]:
+    """Hazard ratio entries per group from a group Cox model"""
+    hazard_ratios = {}
+    for index, group in enumerate(labels):
+        if group == reference_group:
+            hazard_ratios[group] = {
+                'hazard_ratio': 1.0,
+                'reference': True
+            }
+        else:
+            hazard_ratios[group] = {
+                'hazard_ratio': float(model['hazard_ratio'][index]),
+                'p_value': float(model['p'][index]),
+                'lower_ci': float(model['lower_ci'][index]),
+                'upper_ci': float(model['upper_ci'][index]),
+                'significant': bool(model['p'][index] < 0.05),
+                'reference': False
+            }
+    return hazard_ratios
@@ -16,6 +16,7 @@ from django.core.exceptions import ValidationError
 
 from analytics.models import AnalysisTool
 from analytics.services.audit_trail_manager import AuditTrailManager
+from analytics.services.caching_strategy import caching_strategy_service
 
 logger = logging.getLogger(__name__)
 
@@ -225,7 +226,7 @@ class ToolRegistry:
             AnalysisTool instance or None
         """
         try:
-            return AnalysisTool.objects.get(name=tool_name, is_active=True)
+            return caching_strategy_service.get_active_tool(tool_name)
         except AnalysisTool.DoesNotExist:
             return None
     
@@ -264,12 +265,16 @@ class ToolRegistry:
         Args:
             tool_name: Name of the tool to execute
             parameters: Parameters for the tool
-            user_id: ID of the user executing the tool
+            user_id: ID of the authenticated user executing the tool; tools that
+                     take a user_id (e.g. batch_score) always receive this one
             
         Returns:
             Tool execution result
         """
         try:
+            # The owner comes from the caller's authentication, never from the parameters
+            parameters = {name: value for name, value in parameters.items() if name != 'user_id'}
+            
             # Get tool from database
             tool = self.get_tool(tool_name)
             if not tool:
@@ -288,6 +293,8 @@ class ToolRegistry:
             module = importlib.import_module(module_name)
             tool_class = getattr(module, class_name)
             tool_method = getattr(tool_class, method_name)
+            if 'user_id' in inspect.signature(tool_method).parameters:
+                parameters['user_id'] = user_id
             
             # Execute tool
             start_time = datetime.now()
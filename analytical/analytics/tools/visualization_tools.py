@@ -3,6 +3,9 @@ Visualization Tools
 
 This module provides comprehensive visualization tools for the analytical system.
 All tools are designed to work with pandas DataFrames and return standardized chart data.
+Charts over more points than the configured threshold are reduced server-side
+(LTTB for lines, density grids for scatter plots, pre-binned histograms and
+box plot summaries); metadata reports the raw point count and the method.
 """
 
 import pandas as pd
@@ -14,6 +17,10 @@ import logging
 from datetime import datetime
 import base64
 from io import BytesIO
+from django.conf import settings
+
+from analytics.services.column_sketches import ColumnSketch
+from analytics.tools.grouped_stats import GroupedStatistics
 
 logger = logging.getLogger(__name__)
 
@@ -25,10 +32,14 @@ class VisualizationTools:
     
     @staticmethod
     def line_chart(df: pd.DataFrame, x_column: str, y_columns: List[str], 
-                   title: str = "Line Chart", xlabel: str = None, ylabel: str = None) -> Dict[str, Any]:
+                   title: str = "Line Chart", xlabel: str = None, ylabel: str = None,
+                   max_points: Optional[int] = None) -> Dict[str, Any]:
         """
         Create line chart data for multiple series
         
+        Above the point threshold the series are reduced with LTTB to shared
+        x positions; missing values are None so the series stay aligned.
+        
         Args:
             df: Input DataFrame
             x_column: Column for x-axis
@@ -36,6 +47,7 @@ class VisualizationTools:
             title: Chart title
             xlabel: X-axis label
             ylabel: Y-axis label
+            max_points: Point threshold (None: configured for the tool, 0: no reduction)
             
         Returns:
             Dict containing chart data and metadata
@@ -48,14 +60,24 @@ class VisualizationTools:
             if missing_y_columns:
                 return {"error": f"Y columns not found: {missing_y_columns}"}
             
-            # Prepare data
-            x_data = df[x_column].tolist()
-            y_data = []
-            labels = []
+            threshold = _point_threshold('line_chart', max_points)
+            reduction_method = None
             
-            for col in y_columns:
-                y_data.append(df[col].dropna().tolist())
-                labels.append(col)
+            if threshold and len(df) > threshold:
+                reduced = df.iloc[_lttb_series_indices(df[x_column], [df[col] for col in y_columns], threshold)]
+                x_data = reduced[x_column].tolist()
+                y_data = [_nullable_list(reduced[col]) for col in y_columns]
+                labels = list(y_columns)
+                reduction_method = 'lttb'
+            else:
+                # Prepare data
+                x_data = df[x_column].tolist()
+                y_data = []
+                labels = []
+                
+                for col in y_columns:
+                    y_data.append(df[col].dropna().tolist())
+                    labels.append(col)
             
             return {
                 'type': 'line_chart',
@@ -73,6 +95,7 @@ class VisualizationTools:
                     'y_columns': y_columns,
                     'data_points': len(x_data),
                     'series_count': len(y_columns),
+                    **_level_of_detail(len(df), reduction_method, threshold),
                     'created_at': datetime.now().isoformat()
                 }
             }
@@ -147,10 +170,15 @@ class VisualizationTools:
     @staticmethod
     def scatter_plot(df: pd.DataFrame, x_column: str, y_column: str, 
                      color_column: Optional[str] = None, size_column: Optional[str] = None,
-                     title: str = "Scatter Plot", xlabel: str = None, ylabel: str = None) -> Dict[str, Any]:
+                     title: str = "Scatter Plot", xlabel: str = None, ylabel: str = None,
+                     max_points: Optional[int] = None) -> Dict[str, Any]:
         """
         Create scatter plot data
         
+        Above the point threshold the points are replaced by the occupied cells
+        of a CHART_DENSITY_GRID_SIZE grid: cell centers with their point count
+        (colored by count, or by the mean of a numeric color column).
+        
         Args:
             df: Input DataFrame
             x_column: Column for x-axis
@@ -160,6 +188,7 @@ class VisualizationTools:
             title: Chart title
             xlabel: X-axis label
             ylabel: Y-axis label
+            max_points: Point threshold (None: configured for the tool, 0: no reduction)
             
         Returns:
             Dict containing chart data and metadata
@@ -168,6 +197,32 @@ class VisualizationTools:
             if x_column not in df.columns or y_column not in df.columns:
                 return {"error": "Specified columns not found in DataFrame"}
             
+            threshold = _point_threshold('scatter_plot', max_points)
+            if threshold and len(df) > threshold:
+                chart_data, reduction_method = _reduced_scatter(
+                    df, x_column, y_column, color_column, size_column, threshold
+                )
+                chart_data.update({
+                    'title': title,
+                    'xlabel': xlabel or x_column,
+                    'ylabel': ylabel or y_column,
+                    'figsize': (10, 8)
+                })
+                
+                return {
+                    'type': 'scatter_plot',
+                    'chart_data': chart_data,
+                    'metadata': {
+                        'x_column': x_column,
+                        'y_column': y_column,
+                        'color_column': color_column,
+                        'size_column': size_column,
+                        'data_points': len(chart_data['x']),
+                        **_level_of_detail(len(df), reduction_method, threshold),
+                        'created_at': datetime.now().isoformat()
+                    }
+                }
+            
             # Prepare data
             x_data = df[x_column].dropna().tolist()
             y_data = df[y_column].dropna().tolist()
@@ -208,6 +263,7 @@ class VisualizationTools:
                     'color_column': color_column,
                     'size_column': size_column,
                     'data_points': len(x_data),
+                    **_level_of_detail(len(x_data), None, threshold),
                     'created_at': datetime.now().isoformat()
                 }
             }
@@ -217,11 +273,16 @@ class VisualizationTools:
             return {"error": f"Scatter plot creation failed: {str(e)}"}
     
     @staticmethod
-    def histogram(df: pd.DataFrame, column: str, bins: int = 30, 
-                  title: str = "Histogram", xlabel: str = None, ylabel: str = "Frequency") -> Dict[str, Any]:
+    def histogram(df: Optional[pd.DataFrame], column: str, bins: int = 30, 
+                  title: str = "Histogram", xlabel: str = None, ylabel: str = "Frequency",
+                  max_points: Optional[int] = None,
+                  sketches: Optional[Dict[str, ColumnSketch]] = None) -> Dict[str, Any]:
         """
         Create histogram data
         
+        Above the point threshold numeric data is pre-binned: chart_data has
+        'counts' and 'bin_edges' instead of the raw 'data'.
+        
         Args:
             df: Input DataFrame
             column: Column to create histogram for
@@ -229,32 +290,50 @@ class VisualizationTools:
             title: Chart title
             xlabel: X-axis label
             ylabel: Y-axis label
+            max_points: Point threshold (None: configured for the tool, 0: no reduction)
+            sketches: Ingest-time column sketches; a numeric column is binned from its
+                quantile sketch instead of df
             
         Returns:
             Dict containing chart data and metadata
         """
         try:
-            if column not in df.columns:
+            chart_data = {
+                'bins': bins,
+                'title': title,
+                'xlabel': xlabel or column,
+                'ylabel': ylabel,
+                'figsize': (10, 6)
+            }
+            
+            if sketches is not None and column in sketches and sketches[column].is_numeric:
+                return _sketch_histogram(sketches[column], column, bins, chart_data)
+            
+            if df is None or column not in df.columns:
                 return {"error": f"Column '{column}' not found in DataFrame"}
             
             data = df[column].dropna()
             if len(data) == 0:
                 return {"error": "No data available for histogram"}
             
+            threshold = _point_threshold('histogram', max_points)
+            reduction_method = None
+            if threshold and len(data) > threshold and pd.api.types.is_numeric_dtype(data):
+                counts, bin_edges = np.histogram(data.to_numpy(dtype=float), bins=bins)
+                chart_data['counts'] = counts.tolist()
+                chart_data['bin_edges'] = bin_edges.tolist()
+                reduction_method = 'binned'
+            else:
+                chart_data['data'] = data.tolist()
+            
             return {
                 'type': 'histogram',
-                'chart_data': {
-                    'data': data.tolist(),
-                    'bins': bins,
-                    'title': title,
-                    'xlabel': xlabel or column,
-                    'ylabel': ylabel,
-                    'figsize': (10, 6)
-                },
+                'chart_data': chart_data,
                 'metadata': {
                     'column': column,
                     'data_points': len(data),
                     'bins': bins,
+                    **_level_of_detail(len(data), reduction_method, threshold),
                     'created_at': datetime.now().isoformat()
                 }
             }
@@ -265,16 +344,22 @@ class VisualizationTools:
     
     @staticmethod
     def box_plot(df: pd.DataFrame, column: str, group_by: Optional[str] = None,
-                 title: str = "Box Plot", ylabel: str = None) -> Dict[str, Any]:
+                 title: str = "Box Plot", ylabel: str = None,
+                 max_points: Optional[int] = None) -> Dict[str, Any]:
         """
         Create box plot data
         
+        Above the point threshold each box is summarized server-side:
+        chart_data has matplotlib bxp 'stats' (quartiles, whiskers and at most
+        CHART_BOXPLOT_MAX_FLIERS outliers) instead of the raw 'data'.
+        
         Args:
             df: Input DataFrame
             column: Column to create box plot for
             group_by: Optional column to group by
             title: Chart title
             ylabel: Y-axis label
+            max_points: Point threshold (None: configured for the tool, 0: no reduction)
             
         Returns:
             Dict containing chart data and metadata
@@ -286,14 +371,43 @@ class VisualizationTools:
             if group_by and group_by not in df.columns:
                 return {"error": f"Group column '{group_by}' not found in DataFrame"}
             
+            threshold = _point_threshold('box_plot', max_points)
+            total_points = int(df[column].notna().sum())
+            if threshold and total_points > threshold and pd.api.types.is_numeric_dtype(df[column]):
+                if group_by:
+                    grouped = GroupedStatistics(df[column], df[group_by])
+                    labels = [str(group) for group in grouped.labels]
+                else:
+                    grouped = GroupedStatistics(df[column], pd.Series(0, index=df.index))
+                    labels = [column]
+                stats = _box_stats(grouped, labels)
+                
+                return {
+                    'type': 'boxplot',
+                    'chart_data': {
+                        'stats': stats,
+                        'labels': [entry['label'] for entry in stats],
+                        'title': title,
+                        'ylabel': ylabel or column,
+                        'figsize': (10, 6)
+                    },
+                    'metadata': {
+                        'column': column,
+                        'group_by': group_by,
+                        'groups': len(stats),
+                        'total_data_points': total_points,
+                        **_level_of_detail(total_points, 'summary', threshold),
+                        'created_at': datetime.now().isoformat()
+                    }
+                }
+            
             if group_by:
                 # Grouped box plot
-                groups = df[group_by].unique()
+                grouped = GroupedStatistics(df[column], df[group_by])
                 data = []
                 labels = []
                 
-                for group in groups:
-                    group_data = df[df[group_by] == group][column].dropna()
+                for group, group_data in zip(grouped.labels, grouped.arrays()):
                     if len(group_data) > 0:
                         data.append(group_data.tolist())
                         labels.append(str(group))
@@ -316,6 +430,7 @@ class VisualizationTools:
                     'group_by': group_by,
                     'groups': len(data),
                     'total_data_points': sum(len(group) for group in data),
+                    **_level_of_detail(total_points, None, threshold),
                     'created_at': datetime.now().isoformat()
                 }
             }
@@ -420,10 +535,14 @@ class VisualizationTools:
     
     @staticmethod
     def time_series_plot(df: pd.DataFrame, time_column: str, value_columns: List[str],
-                        title: str = "Time Series Plot", xlabel: str = None, ylabel: str = None) -> Dict[str, Any]:
+                        title: str = "Time Series Plot", xlabel: str = None, ylabel: str = None,
+                        max_points: Optional[int] = None) -> Dict[str, Any]:
         """
         Create time series plot data
         
+        Above the point threshold the series are reduced with LTTB over time,
+        as in line_chart.
+        
         Args:
             df: Input DataFrame
             time_column: Column containing time/date data
@@ -431,6 +550,7 @@ class VisualizationTools:
             title: Chart title
             xlabel: X-axis label
             ylabel: Y-axis label
+            max_points: Point threshold (None: configured for the tool, 0: no reduction)
             
         Returns:
             Dict containing chart data and metadata
@@ -446,14 +566,26 @@ class VisualizationTools:
             # Sort by time column
             df_sorted = df.sort_values(time_column)
             
-            # Prepare data
-            x_data = df_sorted[time_column].tolist()
-            y_data = []
-            labels = []
-            
-            for col in value_columns:
-                y_data.append(df_sorted[col].dropna().tolist())
-                labels.append(col)
+            threshold = _point_threshold('time_series_plot', max_points)
+            reduction_method = None
+            
+            if threshold and len(df_sorted) > threshold:
+                reduced = df_sorted.iloc[_lttb_series_indices(
+                    df_sorted[time_column], [df_sorted[col] for col in value_columns], threshold
+                )]
+                x_data = reduced[time_column].tolist()
+                y_data = [_nullable_list(reduced[col]) for col in value_columns]
+                labels = list(value_columns)
+                reduction_method = 'lttb'
+            else:
+                # Prepare data
+                x_data = df_sorted[time_column].tolist()
+                y_data = []
+                labels = []
+                
+                for col in value_columns:
+                    y_data.append(df_sorted[col].dropna().tolist())
+                    labels.append(col)
             
             return {
                 'type': 'line_chart',  # Time series is essentially a line chart
@@ -471,6 +603,7 @@ class VisualizationTools:
                     'value_columns': value_columns,
                     'data_points': len(x_data),
                     'series_count': len(value_columns),
+                    **_level_of_detail(len(df_sorted), reduction_method, threshold),
                     'created_at': datetime.now().isoformat()
                 }
             }
@@ -530,16 +663,21 @@ class VisualizationTools:
     
     @staticmethod
     def distribution_plot(df: pd.DataFrame, column: str, plot_type: str = 'histogram',
-                         title: str = "Distribution Plot", bins: int = 30) -> Dict[str, Any]:
+                         title: str = "Distribution Plot", bins: int = 30,
+                         max_points: Optional[int] = None) -> Dict[str, Any]:
         """
         Create distribution plot data (histogram, kde, or both)
         
+        Above the point threshold histograms are pre-binned and the KDE data
+        is a uniform random sample of the threshold size.
+        
         Args:
             df: Input DataFrame
             column: Column to plot distribution for
             plot_type: Type of plot ('histogram', 'kde', 'both')
             title: Chart title
             bins: Number of bins for histogram
+            max_points: Point threshold (None: configured for the tool, 0: no reduction)
             
         Returns:
             Dict containing chart data and metadata
@@ -553,8 +691,17 @@ class VisualizationTools:
                 return {"error": "No data available for distribution plot"}
             
             if plot_type == 'histogram':
-                return VisualizationTools.histogram(df, column, bins, title)
-            elif plot_type == 'kde':
+                return VisualizationTools.histogram(df, column, bins, title, max_points=max_points)
+            
+            raw_points = len(data)
+            threshold = _point_threshold('distribution_plot', max_points)
+            reduction_method = None
+            if threshold and raw_points > threshold:
+                # The density estimate only needs a representative sample
+                data = data.sample(threshold, random_state=0).sort_index()
+                reduction_method = 'sample'
+            
+            if plot_type == 'kde':
                 # For KDE, we'll return the data and let the frontend handle the plotting
                 return {
                     'type': 'kde_plot',
@@ -569,6 +716,7 @@ class VisualizationTools:
                         'column': column,
                         'data_points': len(data),
                         'plot_type': plot_type,
+                        **_level_of_detail(raw_points, reduction_method, threshold),
                         'created_at': datetime.now().isoformat()
                     }
                 }
@@ -588,6 +736,7 @@ class VisualizationTools:
                         'data_points': len(data),
                         'plot_type': plot_type,
                         'bins': bins,
+                        **_level_of_detail(raw_points, reduction_method, threshold),
                         'created_at': datetime.now().isoformat()
                     }
                 }
@@ -597,3 +746,200 @@ class VisualizationTools:
         except Exception as e:
             logger.error(f"Error in distribution_plot: {str(e)}")
             return {"error": f"Distribution plot creation failed: {str(e)}"}
+
+
+def _point_threshold(tool_name: str, max_points: Optional[int] = None) -> Optional[int]:
+    """Points a chart payload may carry before it is reduced (None: no reduction)"""
+    if max_points is None:
+        max_points = getattr(settings, 'CHART_MAX_POINTS_BY_TOOL', {}).get(
+            tool_name, getattr(settings, 'CHART_MAX_POINTS', 5000)
+        )
+    return max_points if max_points and max_points > 0 else None
+
+
+def _level_of_detail(raw_points: int, method: Optional[str], threshold: Optional[int]) -> Dict[str, Any]:
+    """Metadata describing the level-of-detail reduction applied to a chart"""
+    return {
+        'raw_points': int(raw_points),
+        'reduction_method': method,
+        'point_threshold': threshold
+    }
+
+
+def _nullable_list(series: pd.Series) -> List[Any]:
+    """Values with missing entries as None, keeping positions aligned"""
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _numeric_axis(values: pd.Series) -> np.ndarray:
+    """x positions for LTTB: numbers, datetimes as nanoseconds, otherwise row positions"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(float)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float, na_value=np.nan)
+    return np.arange(len(values), dtype=float)
+
+
+def _lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling
+    
+    Keeps the first and last points and, from each of threshold - 2 equal
+    buckets, the point forming the largest triangle with the previously kept
+    point and the average of the next bucket.
+    
+    Returns:
+        Positions of the kept points, ascending
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        average_x = x[end:next_end].mean()
+        average_y = y[end:next_end].mean()
+        
+        areas = np.abs(
+            (x[previous] - average_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (average_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    
+    return selected
+
+
+def _lttb_series_indices(x_values: pd.Series, series: List[pd.Series], threshold: int) -> np.ndarray:
+    """
+    Row positions to keep for several series sharing an x axis
+    
+    Each series gets an equal share of the threshold over its non-missing
+    points; the union of the kept positions is returned.
+    """
+    x = _numeric_axis(x_values)
+    x_valid = ~np.isnan(x)
+    per_series = max(threshold // max(len(series), 1), 3)
+    
+    kept = []
+    for values in series:
+        y = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        positions = np.flatnonzero(x_valid & ~np.isnan(y))
+        kept.append(positions[_lttb_indices(x[positions], y[positions], per_series)])
+    
+    return np.unique(np.concatenate(kept)) if kept else np.arange(0)
+
+
+def _reduced_scatter(df: pd.DataFrame, x_column: str, y_column: str, color_column: Optional[str],
+                     size_column: Optional[str], threshold: int) -> Tuple[Dict[str, Any], str]:
+    """
+    Scatter chart data for more points than the threshold
+    
+    Numeric axes become the occupied cells of a density grid; other axes fall
+    back to a uniform random sample of the threshold size.
+    
+    Returns:
+        (chart_data, reduction method)
+    """
+    columns = [x_column, y_column] + [col for col in (color_column, size_column) if col and col in df.columns]
+    points = df[list(dict.fromkeys(columns))].dropna(subset=[x_column, y_column])
+    
+    if not (pd.api.types.is_numeric_dtype(points[x_column]) and pd.api.types.is_numeric_dtype(points[y_column])):
+        sample = points.sample(min(threshold, len(points)), random_state=0).sort_index()
+        chart_data = {'x': sample[x_column].tolist(), 'y': sample[y_column].tolist()}
+        if color_column in sample.columns:
+            chart_data['colors'] = sample[color_column].tolist()
+        return chart_data, 'sample'
+    
+    grid_size = getattr(settings, 'CHART_DENSITY_GRID_SIZE', 100)
+    x = points[x_column].to_numpy(dtype=float)
+    y = points[y_column].to_numpy(dtype=float)
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=grid_size)
+    cell_x, cell_y = np.nonzero(counts)
+    cell_counts = counts[cell_x, cell_y]
+    
+    def cell_means(column):
+        values = pd.to_numeric(points[column], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        valid = ~np.isnan(values)
+        sums, _, _ = np.histogram2d(x[valid], y[valid], bins=[x_edges, y_edges], weights=values[valid])
+        totals, _, _ = np.histogram2d(x[valid], y[valid], bins=[x_edges, y_edges])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = sums[cell_x, cell_y] / totals[cell_x, cell_y]
+        return np.nan_to_num(means, nan=0.0)
+    
+    chart_data = {
+        'x': ((x_edges[cell_x] + x_edges[cell_x + 1]) / 2).tolist(),
+        'y': ((y_edges[cell_y] + y_edges[cell_y + 1]) / 2).tolist(),
+        'counts': cell_counts.astype(int).tolist(),
+        'grid_size': grid_size
+    }
+    
+    if color_column in points.columns and pd.api.types.is_numeric_dtype(points[color_column]):
+        chart_data['colors'] = cell_means(color_column).tolist()
+    else:
+        chart_data['colors'] = np.log1p(cell_counts).tolist()
+    
+    if size_column in points.columns and pd.api.types.is_numeric_dtype(points[size_column]):
+        sizes = cell_means(size_column)
+        spread = sizes.max() - sizes.min()
+        sizes = (sizes - sizes.min()) / spread * 100 + 10 if spread else np.full(len(sizes), 30.0)
+        chart_data['sizes'] = sizes.tolist()
+    
+    return chart_data, 'density_grid'
+
+
+def _box_stats(grouped: GroupedStatistics, labels: List[str]) -> List[Dict[str, Any]]:
+    """matplotlib bxp statistics per non-empty group, with outliers capped at CHART_BOXPLOT_MAX_FLIERS"""
+    max_fliers = getattr(settings, 'CHART_BOXPLOT_MAX_FLIERS', 200)
+    box = grouped.box_stats()
+    stats = []
+    for index in np.flatnonzero(grouped.counts):
+        fliers = box['fliers'][index]
+        if len(fliers) > max_fliers:
+            fliers = np.sort(np.random.default_rng(0).choice(fliers, max_fliers, replace=False))
+        stats.append({
+            'label': labels[index],
+            'mean': float(box['mean'][index]),
+            'med': float(box['med'][index]),
+            'q1': float(box['q1'][index]),
+            'q3': float(box['q3'][index]),
+            'whislo': float(box['whislo'][index]),
+            'whishi': float(box['whishi'][index]),
+            'fliers': fliers.tolist(),
+            'n': int(grouped.counts[index])
+        })
+    return stats
+
+
+def _sketch_histogram(sketch: ColumnSketch, column: str, bins: int, chart_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Histogram counts from a column's quantile sketch: bin mass from the sketch CDF over min..max"""
+    if sketch.count == 0:
+        return {"error": "No data available for histogram"}
+    
+    bin_edges = np.linspace(sketch.minimum, sketch.maximum, bins + 1)
+    cumulative = np.round(sketch.cdf(bin_edges) * sketch.count).astype(int)
+    cumulative[-1] = sketch.count
+    chart_data['counts'] = np.diff(np.concatenate(([0], cumulative[1:]))).tolist()
+    chart_data['bin_edges'] = bin_edges.tolist()
+    
+    return {
+        'type': 'histogram',
+        'chart_data': chart_data,
+        'metadata': {
+            'column': column,
+            'data_points': sketch.count,
+            'bins': bins,
+            **_level_of_detail(sketch.count, 'sketch', None),
+            'approximate': {
+                'statistics': ['counts'],
+                'error_bounds': {'quantile_rank_error': sketch.error_bounds()['quantile_rank_error']}
+            },
+            'created_at': datetime.now().isoformat()
+        }
+    }
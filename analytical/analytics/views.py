@@ -24,12 +24,51 @@ from analytics.services.analysis_executor import AnalysisExecutor
 from analytics.services.rag_service import RAGService
 from analytics.services.llm_processor import LLMProcessor
 from analytics.services.agentic_ai_controller import AgenticAIController
+from analytics.services.keyset_pagination import keyset_paginator
 from analytics.tools.tool_registry import ToolRegistry
 
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+# Columns loaded for list endpoints (only() projections)
+DATASET_LIST_FIELDS = (
+    'id', 'name', 'description', 'row_count', 'column_count', 'file_size_bytes',
+    'processing_status', 'data_quality_score', 'created_at', 'original_filename'
+)
+AUDIT_LIST_FIELDS = (
+    'id', 'action_type', 'action_category', 'resource_type', 'resource_name',
+    'action_description', 'success', 'created_at'
+)
+
+
+def _serialize_dataset(dataset):
+    return {
+        'id': dataset.id,
+        'name': dataset.name,
+        'description': dataset.description or '',
+        'row_count': dataset.row_count,
+        'column_count': dataset.column_count,
+        'file_size_bytes': dataset.file_size_bytes,
+        'processing_status': dataset.processing_status,
+        'data_quality_score': dataset.data_quality_score,
+        'created_at': dataset.created_at.isoformat(),
+        'original_filename': dataset.original_filename
+    }
+
+
+def _serialize_audit_entry(entry):
+    return {
+        'id': entry.id,
+        'action_type': entry.action_type,
+        'action_category': entry.action_category,
+        'resource_type': entry.resource_type,
+        'resource_name': entry.resource_name,
+        'action_description': entry.action_description,
+        'success': entry.success,
+        'created_at': entry.created_at
+    }
+
 
 class UploadViewSet(viewsets.ViewSet):
     """
@@ -152,28 +191,33 @@ class UploadViewSet(viewsets.ViewSet):
                     'error': 'User authentication failed'
                 }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
             
-            # Get all datasets for the user
-            datasets = Dataset.objects.filter(user=user).order_by('-created_at')
+            datasets = Dataset.objects.filter(user=user)
             
-            datasets_list = []
-            for dataset in datasets:
-                datasets_list.append({
-                    'id': dataset.id,
-                    'name': dataset.name,
-                    'description': dataset.description or '',
-                    'row_count': dataset.row_count,
-                    'column_count': dataset.column_count,
-                    'file_size_bytes': dataset.file_size_bytes,
-                    'processing_status': dataset.processing_status,
-                    'data_quality_score': dataset.data_quality_score,
-                    'created_at': dataset.created_at.isoformat(),
-                    'original_filename': dataset.original_filename
-                })
+            # Exports stream every dataset; lists return one keyset page
+            if request.query_params.get('export') == 'true':
+                return keyset_paginator.stream_json(datasets, _serialize_dataset, 'datasets', DATASET_LIST_FIELDS)
+            
+            try:
+                page = keyset_paginator.paginate(
+                    datasets,
+                    cursor=request.query_params.get('cursor'),
+                    page_size=request.query_params.get('page_size'),
+                    fields=DATASET_LIST_FIELDS
+                )
+            except ValueError as e:
+                return Response({
+                    'success': False,
+                    'error': str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            datasets_list = [_serialize_dataset(dataset) for dataset in page['items']]
             
             return Response({
                 'success': True,
                 'datasets': datasets_list,
                 'count': len(datasets_list),
+                'next_cursor': page['next_cursor'],
+                'has_more': page['has_more'],
                 'message': 'Datasets retrieved successfully'
             }, status=status.HTTP_200_OK)
                 
@@ -948,30 +992,38 @@ class AuditViewSet(viewsets.ViewSet):
             
             # Get audit trail
             audit_manager = AuditTrailManager()
-            # Use the correct method name
-            audit_entries = audit_manager.get_audit_trail(
+            audit_entries = audit_manager.get_audit_trail_queryset(
                 user_id=user.id,
-                limit=int(request.query_params.get('limit', 50)),
                 action_type=request.query_params.get('action_type'),
                 resource_type=request.query_params.get('resource_type')
             )
             
-            formatted_entries = []
-            for entry in audit_entries:
-                formatted_entries.append({
-                    'id': entry.id,
-                    'action_type': entry.action_type,
-                    'action_category': entry.action_category,
-                    'resource_type': entry.resource_type,
-                    'resource_name': entry.resource_name,
-                    'action_description': entry.action_description,
-                    'success': entry.success,
-                    'created_at': entry.created_at
-                })
+            # Exports stream every entry; lists return one keyset page
+            if request.query_params.get('export') == 'true':
+                return keyset_paginator.stream_json(
+                    audit_entries, _serialize_audit_entry, 'audit_entries', AUDIT_LIST_FIELDS
+                )
+            
+            try:
+                page = keyset_paginator.paginate(
+                    audit_entries,
+                    cursor=request.query_params.get('cursor'),
+                    page_size=request.query_params.get('page_size') or request.query_params.get('limit'),
+                    fields=AUDIT_LIST_FIELDS
+                )
+            except ValueError as e:
+                return Response({
+                    'success': False,
+                    'error': str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            formatted_entries = [_serialize_audit_entry(entry) for entry in page['items']]
             
             return Response({
                 'success': True,
                 'audit_entries': formatted_entries,
+                'next_cursor': page['next_cursor'],
+                'has_more': page['has_more'],
                 'message': f'Found {len(formatted_entries)} audit entries'
             }, status=status.HTTP_200_OK)
                 
@@ -1206,28 +1258,33 @@ def api_datasets_list(request):
                 email='user@example.com'
             )
         
-        # Get all datasets for the user
-        datasets = Dataset.objects.filter(user=user).order_by('-created_at')
+        datasets = Dataset.objects.filter(user=user)
         
-        datasets_list = []
-        for dataset in datasets:
-            datasets_list.append({
-                'id': dataset.id,
-                'name': dataset.name,
-                'description': dataset.description or '',
-                'row_count': dataset.row_count,
-                'column_count': dataset.column_count,
-                'file_size_bytes': dataset.file_size_bytes,
-                'processing_status': dataset.processing_status,
-                'data_quality_score': dataset.data_quality_score,
-                'created_at': dataset.created_at.isoformat(),
-                'original_filename': dataset.original_filename
-            })
+        # Exports stream every dataset; lists return one keyset page
+        if request.GET.get('export') == 'true':
+            return keyset_paginator.stream_json(datasets, _serialize_dataset, 'datasets', DATASET_LIST_FIELDS)
+        
+        try:
+            page = keyset_paginator.paginate(
+                datasets,
+                cursor=request.GET.get('cursor'),
+                page_size=request.GET.get('page_size'),
+                fields=DATASET_LIST_FIELDS
+            )
+        except ValueError as e:
+            return JsonResponse({
+                'success': False,
+                'error': str(e)
+            }, status=400)
+        
+        datasets_list = [_serialize_dataset(dataset) for dataset in page['items']]
         
         return JsonResponse({
             'success': True,
             'datasets': datasets_list,
             'count': len(datasets_list),
+            'next_cursor': page['next_cursor'],
+            'has_more': page['has_more'],
             'message': 'Datasets retrieved successfully'
         })
             
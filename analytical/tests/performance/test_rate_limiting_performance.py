@@ -0,0 +1,100 @@
+"""
+Rate Limiting Performance Tests
+
+This module contains microbenchmarks for the rate limiting middleware,
+measuring request throughput through the atomic Redis limiter, the cache
+fallback and the local token-bucket pre-check.
+"""
+
+import time
+from django.test import TestCase, RequestFactory
+from django.http import HttpResponse
+from django.contrib.auth.models import AnonymousUser
+
+from analytics.middleware.rate_limiting import RateLimitingMiddleware
+
+
+class RateLimitingPerformanceTest(TestCase):
+    """Test rate limiting middleware throughput"""
+
+    REQUEST_COUNT = 500
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = RateLimitingMiddleware(lambda request: HttpResponse('ok'))
+        self.middleware.rate_limiting_enabled = True
+        self.middleware.exempt_paths = ['/admin/']
+        self.backend = self.middleware.backend
+        self.cache = self.middleware.cache
+
+        # Limits high enough that every benchmarked request is allowed
+        self.middleware.limits = {
+            'api_general': {'requests': 1000000, 'window': 3600},
+            'ip_strict': {'requests': 1000000, 'window': 3600},
+        }
+
+    def tearDown(self):
+        keys = [
+            f"{self.middleware.cache_prefix}:ip:{self._client_ip(index)}:{category}"
+            for index in range(self.REQUEST_COUNT)
+            for category in ('api_general', 'api_general:burst', 'ip_strict')
+        ]
+        if self.backend:
+            self.backend.reset(*keys)
+        self.cache.delete_many(keys)
+
+    def _client_ip(self, index: int) -> str:
+        return f"10.0.{index // 256}.{index % 256}"
+
+    def _run_requests(self, count: int, distinct_clients: bool = True) -> float:
+        """Send requests through the middleware and return requests/sec"""
+        start_time = time.time()
+
+        for index in range(count):
+            request = self.factory.get('/api/datasets/', REMOTE_ADDR=self._client_ip(index if distinct_clients else 0))
+            request.user = AnonymousUser()
+            response = self.middleware.process_request(request)
+            if response is None:
+                self.middleware.process_response(request, HttpResponse('ok'))
+
+        return count / (time.time() - start_time)
+
+    def test_atomic_limiter_throughput(self):
+        """Test throughput of the single round-trip Redis limiter"""
+        if not self.middleware.backend:
+            self.skipTest("Redis rate limit backend not available")
+
+        self.middleware.local_precheck_enabled = False
+        requests_per_second = self._run_requests(self.REQUEST_COUNT)
+
+        print(f"\nAtomic Redis limiter: {requests_per_second:.0f} req/s")
+        self.assertGreater(requests_per_second, 200, f"Atomic limiter handled {requests_per_second:.0f} req/s, should be >200")
+
+    def test_cache_fallback_throughput(self):
+        """Test throughput of the cache-backed fallback limiter"""
+        self.middleware.backend = None
+        self.middleware.local_precheck_enabled = False
+        requests_per_second = self._run_requests(self.REQUEST_COUNT)
+
+        print(f"\nCache fallback limiter: {requests_per_second:.0f} req/s")
+        self.assertGreater(requests_per_second, 100, f"Cache fallback handled {requests_per_second:.0f} req/s, should be >100")
+
+    def test_local_precheck_sheds_over_limit_client(self):
+        """Test that an over-limit client is rejected without reaching Redis"""
+        self.middleware.limits = {
+            'api_general': {'requests': 10, 'window': 3600},
+            'ip_strict': {'requests': 1000000, 'window': 3600},
+        }
+        self._run_requests(10, distinct_clients=False)
+
+        self.middleware.backend = None
+        self.middleware.cache = None  # Any shared-store access would now fail
+
+        start_time = time.time()
+        request = self.factory.get('/api/datasets/', REMOTE_ADDR=self._client_ip(0))
+        request.user = AnonymousUser()
+        response = self.middleware.process_request(request)
+        shed_time = time.time() - start_time
+
+        self.assertEqual(response.status_code, 429)
+        self.assertLess(shed_time, 0.01, f"Local shedding took {shed_time:.4f}s, should be <10ms")
@@ -0,0 +1,71 @@
+"""
+Input Validation Performance Tests
+
+This module contains throughput benchmarks for the input validation
+middleware's compiled validation engine.
+"""
+
+import time
+import json
+from django.test import TestCase, RequestFactory
+
+from analytics.middleware.validation import InputValidationMiddleware, get_validation_engine
+
+
+class InputValidationPerformanceTest(TestCase):
+    """Test input validation throughput"""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = InputValidationMiddleware(lambda request: None)
+
+        self.chat_body = json.dumps({
+            'message': 'Show me the average revenue by region for the last quarter and plot it',
+            'session_id': 42,
+            'context': {
+                'columns': ['region', 'revenue', 'quarter', 'customer_id'],
+                'filters': [{'column': 'quarter', 'value': 'Q3'}, {'column': 'region', 'value': 'EMEA'}],
+                'notes': ['Compare with previous year', 'Exclude test accounts'] * 10,
+            }
+        })
+
+    def test_json_body_validation_throughput(self):
+        """Test validation throughput for chat-style JSON bodies"""
+        request_count = 500
+        start_time = time.time()
+
+        for _ in range(request_count):
+            request = self.factory.post('/api/chat/', data=self.chat_body, content_type='application/json')
+            result = self.middleware._validate_request(request)
+            self.assertTrue(result['is_valid'])
+
+        requests_per_second = request_count / (time.time() - start_time)
+
+        print(f"\nJSON body validation: {requests_per_second:.0f} req/s")
+        self.assertGreater(requests_per_second, 200, f"Validated {requests_per_second:.0f} req/s, should be >200")
+
+    def test_query_parameter_validation_throughput(self):
+        """Test validation throughput for typical query parameters"""
+        params = {'page': ['2'], 'page_size': ['50'], 'search': ['monthly revenue'], 'ordering': ['-created_at']}
+        iterations = 5000
+        start_time = time.time()
+
+        for _ in range(iterations):
+            result = self.middleware._validate_parameters(params, 'GET')
+            self.assertEqual(result['violations'], [])
+
+        values_per_second = iterations * len(params) / (time.time() - start_time)
+
+        print(f"\nQuery parameter validation: {values_per_second:.0f} values/s")
+        self.assertGreater(values_per_second, 20000, f"Validated {values_per_second:.0f} values/s, should be >20000")
+
+    def test_compiled_engine_detects_malicious_values(self):
+        """Test the single-pass engine still reports each matching pattern"""
+        engine = get_validation_engine(InputValidationMiddleware.DEFAULT_RULES['params'])
+
+        violations = engine.scan('q', "1 UNION SELECT password FROM users; cat ../etc/passwd")
+        violation_types = {violation['type'] for violation in violations}
+
+        self.assertEqual(violation_types, {'sql_injection', 'command_injection', 'path_traversal'})
+        self.assertEqual(engine.scan('q', 'select'), engine.detect('sql_injection', 'q', 'select', []))
+        self.assertEqual(engine.scan('q', 'revenue2024'), [])
@@ -6,6 +6,7 @@ Tests cover functionality, error handling, edge cases, and integration points.
 """
 
 import os
+import shutil
 import tempfile
 import json
 import pandas as pd
@@ -289,6 +290,113 @@ class AuditTrailManagerTest(TestCase):
         
         self.assertIsInstance(trail, list)
         self.assertGreater(len(trail), 0)
+        
+    @override_settings(AUDIT_DELIVERY_MODE='buffered')
+    def test_buffered_entries_written_on_flush(self):
+        """Test buffered audit entries are bulk inserted on flush"""
+        from analytics.services.audit_buffer import audit_trail_buffer
+        
+        with patch.object(audit_trail_buffer, '_ensure_writer'):
+            entry = self.manager.log_action(
+                user_id=self.user.id,
+                action_type='analysis',
+                action_category='analysis',
+                resource_type='dataset',
+                additional_details={'rows': 10}
+            )
+            self.assertIsNone(entry.pk)
+            self.assertFalse(AuditTrail.objects.filter(correlation_id=entry.correlation_id).exists())
+            
+            audit_trail_buffer.flush()
+        
+        stored = AuditTrail.objects.get(correlation_id=entry.correlation_id)
+        self.assertEqual(stored.after_snapshot['additional_details'], {'rows': 10})
+    
+    @override_settings(AUDIT_DELIVERY_MODE='durable')
+    def test_durable_queue_kept_when_batch_write_fails(self):
+        """Test a failed batch write leaves the durable queue intact and requeues single failures"""
+        import json
+        from analytics.services.audit_buffer import AuditTrailBuffer
+        
+        buffer = AuditTrailBuffer()
+        raw_entries = [
+            json.dumps(buffer._serialize(AuditTrail(user_id=self.user.id, action_type='analysis',
+                                                    resource_type='dataset', correlation_id=f'queued-{index}')))
+            for index in range(3)
+        ]
+        client = Mock()
+        client.set.return_value = True
+        client.lrange.side_effect = [raw_entries, []]
+        buffer._redis_client = client
+        
+        # Database down: every entry fails, nothing is trimmed
+        with patch.object(buffer, '_write_batch', side_effect=lambda entries: list(entries)), \
+                patch.object(buffer, '_database_available', return_value=False):
+            self.assertEqual(buffer.drain_durable_queue(), 0)
+        client.ltrim.assert_not_called()
+        client.pipeline.assert_not_called()
+        
+        # One entry fails on its own: the batch is trimmed and that entry pushed back
+        client.lrange.side_effect = [raw_entries, []]
+        with patch.object(buffer, '_write_batch', side_effect=lambda entries: [entries[1]]):
+            self.assertEqual(buffer.drain_durable_queue(), 2)
+        pipeline = client.pipeline.return_value
+        pipeline.ltrim.assert_called_once_with(buffer.QUEUE_KEY, 3, -1)
+        key, raw = pipeline.rpush.call_args[0]
+        self.assertEqual(key, buffer.QUEUE_KEY)
+        self.assertEqual(json.loads(raw), {**json.loads(raw_entries[1]), 'attempts': 1})
+        
+        # An entry that keeps failing moves to the dead-letter list
+        pipeline.reset_mock()
+        retried = json.dumps({**json.loads(raw_entries[1]), 'attempts': buffer.max_attempts - 1})
+        client.lrange.side_effect = [[retried], []]
+        with patch.object(buffer, '_write_batch', side_effect=lambda entries: list(entries)):
+            self.assertEqual(buffer.drain_durable_queue(), 0)
+        pipeline.ltrim.assert_called_once_with(buffer.QUEUE_KEY, 1, -1)
+        self.assertEqual(pipeline.rpush.call_args[0][0], buffer.DEAD_LETTER_KEY)
+        self.assertEqual(buffer.metrics['dead_lettered'], 1)
+        
+    @override_settings(AUDIT_DELIVERY_MODE='durable')
+    def test_redelivered_batch_is_skipped(self):
+        """Test a batch written before a crash, but not trimmed, is skipped on redelivery"""
+        import json
+        from analytics.services.audit_buffer import AuditTrailBuffer
+        
+        buffer = AuditTrailBuffer()
+        raw_entries = [
+            json.dumps(buffer._serialize(AuditTrail(user_id=self.user.id, action_type='analysis',
+                                                    resource_type='dataset', correlation_id=f'redelivered-{index}')))
+            for index in range(3)
+        ]
+        self.assertEqual(buffer._write_batch([buffer._deserialize(json.loads(raw)) for raw in raw_entries]), [])
+        
+        client = Mock()
+        client.set.return_value = True
+        client.lrange.side_effect = [raw_entries, []]
+        buffer._redis_client = client
+        buffer.drain_durable_queue()
+        
+        pipeline = client.pipeline.return_value
+        pipeline.ltrim.assert_called_once_with(buffer.QUEUE_KEY, 3, -1)
+        pipeline.rpush.assert_not_called()
+        self.assertEqual(AuditTrail.objects.filter(correlation_id__startswith='redelivered-').count(), 3)
+        
+        # A duplicate that reaches the row-by-row fallback is skipped without breaking the transaction
+        duplicate = buffer._deserialize(json.loads(raw_entries[0]))
+        with patch.object(buffer, '_stored_correlation_ids', return_value=set()):
+            self.assertEqual(buffer._write_batch([duplicate]), [])
+        self.assertEqual(AuditTrail.objects.filter(correlation_id__startswith='redelivered-').count(), 3)
+        
+    @override_settings(AUDIT_DELIVERY_MODE='buffered')
+    def test_security_events_written_synchronously(self):
+        """Test security-critical audit entries bypass the buffer"""
+        entry = self.manager.log_security_event(
+            user_id=self.user.id,
+            event_type='suspicious_request',
+            event_description='Blocked request'
+        )
+        
+        self.assertIsNotNone(entry.pk)
 
 
 class SessionManagerTest(TestCase):
@@ -396,6 +504,71 @@ class LLMProcessorTest(TestCase):
         
         self.assertFalse(result['success'])
         self.assertIn('error', result)
+        
+    def test_prepare_prompt_uses_summary_and_token_budget(self):
+        """Test prompt history is capped to summary plus recent turns"""
+        self.processor.context_token_budget = 200
+        context_messages = [
+            {'role': 'user', 'content': f"message {i} " + "word " * 40}
+            for i in range(10)
+        ]
+        
+        prompt = self.processor._prepare_prompt_with_context(
+            "Current question", context_messages, None,
+            conversation_summary="Earlier we analysed sales.csv"
+        )
+        
+        self.assertIn("Earlier we analysed sales.csv", prompt)
+        self.assertIn("message 9", prompt)
+        self.assertNotIn("message 0 ", prompt)
+        self.assertTrue(prompt.endswith("Current request: Current question"))
+        
+    def test_context_messages_served_from_buffer(self):
+        """Test context reads come from the Redis ring buffer when it is primed"""
+        self.processor.redis_client = Mock()
+        self.processor.redis_client.lrange.return_value = [
+            json.dumps({'role': 'assistant', 'content': 'second'}),
+            json.dumps({'role': 'user', 'content': 'first'}),
+        ]
+        
+        with patch('analytics.services.llm_processor.ChatMessage.objects') as mock_objects:
+            context = self.processor.get_context_messages(1, self.user)
+            mock_objects.filter.assert_not_called()
+        
+        self.assertEqual([msg['content'] for msg in context], ['first', 'second'])
+        
+    def test_cold_buffer_primed_only_if_unchanged_since_read(self):
+        """Test priming is conditional on the buffer version read before the database query"""
+        self.processor.redis_client = Mock()
+        self.processor.redis_client.lrange.return_value = []
+        self.processor.redis_client.get.return_value = '3'
+        message = Mock(message_type='user', content='hello', created_at=timezone.now(), token_count=2)
+        
+        with patch('analytics.services.llm_processor.ChatMessage.objects') as mock_objects:
+            mock_objects.filter.return_value.order_by.return_value = [message]
+            context = self.processor.get_context_messages(1, self.user)
+        
+        self.assertEqual([msg['content'] for msg in context], ['hello'])
+        buffer_key = self.processor._get_context_buffer_key(1, self.user.id)
+        args = self.processor.redis_client.eval.call_args[0]
+        self.assertEqual(args[1:5], (2, buffer_key, f"{buffer_key}:version", '3'))
+        self.processor.redis_client.delete.assert_not_called()
+        
+    def test_summary_refresh_queued_before_messages_leave_context(self):
+        """Test a summary refresh is queued once unsummarized messages fill the context window"""
+        session = Mock(id=1, session_data={})
+        
+        with patch('analytics.services.llm_processor.ChatMessage.objects') as mock_objects, \
+                patch('analytics.services.llm_processor.cache') as mock_cache, \
+                patch('analytics.tasks.llm_tasks.generate_conversation_summary') as mock_task:
+            mock_cache.add.return_value = True
+            mock_objects.filter.return_value.count.return_value = self.processor.max_context_messages - 1
+            self.processor._schedule_summary_refresh(session, self.user)
+            mock_task.delay.assert_not_called()
+            
+            mock_objects.filter.return_value.count.return_value = self.processor.max_context_messages
+            self.processor._schedule_summary_refresh(session, self.user)
+            mock_task.delay.assert_called_once_with('1', self.user.id)
 
 
 class RAGServiceTest(TestCase):
@@ -435,6 +608,33 @@ class RAGServiceTest(TestCase):
         self.assertIsInstance(result['results'], list)
 
 
+class RAGUsageAggregatorTest(TestCase):
+    """Test RAGUsageAggregator functionality"""
+    
+    def setUp(self):
+        from analytics.services.rag_usage_aggregator import RAGUsageAggregator
+        self.aggregator = RAGUsageAggregator()
+        self.aggregator._redis_client = Mock()
+        
+    def test_record_search_single_round_trip(self):
+        """Test a search is recorded with one pipeline execution"""
+        pipe = self.aggregator._redis_client.pipeline.return_value
+        
+        recorded = self.aggregator.record_search(
+            user_id=1, scope='global', results_count=2, cost=0.5, vector_note_ids=[10, 11]
+        )
+        
+        self.assertTrue(recorded)
+        pipe.execute.assert_called_once()
+        self.assertEqual(pipe.hincrby.call_count, 5)
+        
+    def test_record_search_redis_unavailable(self):
+        """Test recording reports failure so callers can fall back to direct writes"""
+        self.aggregator._redis_client.pipeline.side_effect = Exception("connection refused")
+        
+        self.assertFalse(self.aggregator.record_search(1, 'global', 0, 0.5, []))
+
+
 class ImageManagerTest(TestCase):
     """Test ImageManager functionality"""
     
@@ -464,6 +664,527 @@ class ImageManagerTest(TestCase):
                 self.assertFalse(result['valid'])
 
 
+class DashboardSummaryServiceTest(TestCase):
+    """Test DashboardSummaryService functionality"""
+    
+    def setUp(self):
+        from analytics.services.dashboard_summary import DashboardSummaryService
+        self.service = DashboardSummaryService()
+        self.service._redis_client = Mock()
+        self.service._update_script = Mock(return_value=1)
+        self.user = User.objects.create_user(
+            username='dashboarduser',
+            email='dashboard@example.com',
+            password='testpass123'
+        )
+        
+    def test_read_uses_summary_without_history_queries(self):
+        """Test a materialized summary is served without rebuilding"""
+        self.service._redis_client.hgetall.return_value = {
+            'total_datasets': '12',
+            'total_sessions': '3',
+            'dataset:7': json.dumps({'id': 7, 'name': 'sales', 'created_at': '2024-01-02T00:00:00+00:00'}),
+        }
+        
+        with patch.object(self.service, 'rebuild') as mock_rebuild:
+            summary = self.service.get_summary(self.user.id)
+        
+        mock_rebuild.assert_not_called()
+        self.assertEqual(summary['statistics']['total_datasets'], 12)
+        self.assertEqual(summary['recent_datasets'][0]['name'], 'sales')
+        
+    def test_created_row_increments_counter(self):
+        """Test a created row increments its counter and stores a recent entry"""
+        dataset = Dataset.objects.create(
+            name='test_dataset',
+            user=self.user,
+            file_size_bytes=1000,
+            parquet_size_bytes=500,
+            row_count=100,
+            column_count=3
+        )
+        
+        self.assertTrue(self.service.record(self.user.id, 'dataset', dataset, created=True))
+        args = self.service._update_script.call_args[1]['args']
+        self.assertEqual(args[0], 'total_datasets')
+        self.assertEqual(args[2], f'dataset:{dataset.id}')
+        
+    def test_rebuild_not_stored_when_updated_concurrently(self):
+        """Test a rebuild does not overwrite updates recorded while it read the database"""
+        self.service._redis_client = MagicMock()
+        self.service._redis_client.get.return_value = '4'
+        pipe = self.service._redis_client.pipeline.return_value.__enter__.return_value
+        pipe.get.return_value = '5'
+        
+        fields = self.service.rebuild(self.user.id)
+        
+        self.assertEqual(fields['total_datasets'], '0')
+        pipe.hset.assert_not_called()
+        pipe.execute.assert_not_called()
+        self.service._redis_client.delete.assert_called_once()
+        
+        pipe.get.return_value = '4'
+        self.service.rebuild(self.user.id)
+        pipe.hset.assert_called_once()
+        pipe.execute.assert_called_once()
+
+
+class CacheTagServiceTest(TestCase):
+    """Test CacheTagService functionality"""
+    
+    def setUp(self):
+        from analytics.services.cache_tags import CacheTagService
+        self.service = CacheTagService()
+        self.service._redis_client = MagicMock()
+        
+    def test_invalidate_tags_deletes_members_in_one_batch(self):
+        """Test tag invalidation deletes every registered key with one delete_many"""
+        pipe = self.service._redis_client.pipeline.return_value
+        pipe.execute.return_value = [{'user:1', 'dashboard:1'}, 2]
+        
+        with patch('analytics.services.cache_tags.caches') as mock_caches:
+            invalidated = self.service.invalidate_tags(['user:1'], aliases=['default'])
+        
+        mock_caches['default'].delete_many.assert_called_once()
+        self.assertEqual(invalidated, {'default': ['dashboard:1', 'user:1']})
+        pipe.delete.assert_called_once_with('analytical:cache:tag:default:user:1')
+        
+    def test_namespace_invalidation_changes_keys(self):
+        """Test bumping a namespace version moves keys to a new namespace"""
+        self.service._redis_client.get.return_value = None
+        self.assertEqual(self.service.namespaced_key('reports', 'summary'), 'reports:v1:summary')
+        
+        self.service._redis_client.incr.return_value = 2
+        self.assertEqual(self.service.invalidate_namespace('reports'), 2)
+        
+        self.service._redis_client.get.return_value = '2'
+        self.assertEqual(self.service.namespaced_key('reports', 'summary'), 'reports:v2:summary')
+
+
+LOCMEM_CACHES = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'test-{alias}'}
+    for alias in ('default', 'sessions', 'analysis')
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CachingStrategyServiceTest(TestCase):
+    """Test CachingStrategyService stampede protection"""
+    
+    def setUp(self):
+        from analytics.services.caching_strategy import CachingStrategyService
+        self.service = CachingStrategyService()
+        self.service.revalidate_in_background = False
+        self.lock_patcher = patch.object(self.service, '_get_lock', return_value=None)
+        self.lock_patcher.start()
+        
+    def tearDown(self):
+        self.lock_patcher.stop()
+        
+    def test_concurrent_misses_compute_once(self):
+        """Test concurrent callers of a cold entry share one computation"""
+        import threading
+        import time
+        calls = []
+        
+        @self.service.cache_function_result(ttl=60, key_prefix='single_flight')
+        def expensive(value):
+            calls.append(value)
+            time.sleep(0.1)
+            return value * 2
+        
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(expensive(21))) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [42] * 5)
+        
+    def test_expired_entry_is_served_stale_while_revalidating(self):
+        """Test an expired entry is returned while it is recomputed"""
+        from analytics.services.caching_strategy import CachedValue
+        import time
+        
+        cache_key = 'stale:entry'
+        self.service.get_cache('default').set(cache_key, CachedValue('old', time.time() - 1, 0.01), 60)
+        
+        value = self.service.get_or_compute(cache_key, lambda: 'new', ttl=60)
+        
+        self.assertEqual(value, 'old')
+        self.assertEqual(self.service.get_or_compute(cache_key, lambda: 'newer', ttl=60), 'new')
+        
+    def test_tool_usage_does_not_touch_cached_tool(self):
+        """Test callers get their own tool copy and usage is recorded without invalidating the cache"""
+        tool = AnalysisTool.objects.create(
+            name='cached_tool',
+            display_name='Cached Tool',
+            category='statistical',
+            description='Cached tool',
+            langchain_tool_name='cached_tool',
+            tool_class='test.Tool',
+            tool_function='execute'
+        )
+        
+        first = self.service.get_active_tool('cached_tool')
+        second = self.service.get_active_tool('cached_tool')
+        self.assertIsNot(first, second)
+        
+        with patch('analytics.signals.cache_tag_service.invalidate_tags') as mock_invalidate, \
+                self.captureOnCommitCallbacks(execute=True):
+            first.record_usage(success=True, execution_time=2.0)
+            second.record_usage(success=False)
+        
+        mock_invalidate.assert_not_called()
+        tool.refresh_from_db()
+        self.assertEqual((tool.usage_count, tool.success_count, tool.error_count), (2, 1, 1))
+        self.assertAlmostEqual(tool.average_execution_time, 2.0)
+        self.assertEqual(self.service.get_active_tool('cached_tool').usage_count, 0)
+
+
+class CacheMetricsCollectorTest(TestCase):
+    """Test shared cache metrics"""
+    
+    def setUp(self):
+        from analytics.services.cache_metrics import CacheMetricsCollector
+        self.collector = CacheMetricsCollector()
+        self.collector._redis_client = MagicMock()
+        self.collector.flush_interval = 3600
+        
+    def test_events_are_buffered_and_flushed_in_one_pipeline(self):
+        """Test buffered events become one HINCRBY per keyspace field"""
+        self.collector.record('dataset', hits=1, get_latency=0.002)
+        self.collector.record('dataset', misses=1, get_latency=0.004)
+        self.collector._redis_client.pipeline.assert_not_called()
+        
+        self.assertTrue(self.collector.flush())
+        pipe = self.collector._redis_client.pipeline.return_value
+        pipe.hincrby.assert_any_call('analytical:cache:metrics:dataset', 'hits', 1)
+        pipe.hincrby.assert_any_call('analytical:cache:metrics:dataset', 'get_count', 2)
+        pipe.execute.assert_called_once()
+        
+    def test_stats_aggregate_counters_from_all_workers(self):
+        """Test hit ratios and latencies are derived from the shared counters"""
+        self.collector._redis_client.smembers.return_value = {'dataset'}
+        self.collector._redis_client.pipeline.return_value.execute.return_value = [
+            {'hits': '6', 'near_hits': '2', 'misses': '2', 'get_latency_ms': '8.0', 'get_count': '8'}
+        ]
+        
+        stats = self.collector.get_stats()
+        
+        self.assertEqual(stats['keyspaces']['dataset']['hit_ratio'], 0.8)
+        self.assertEqual(stats['totals']['avg_get_latency_ms'], 1.0)
+
+
+class QueryInstrumentationTest(TestCase):
+    """Test per-request query counting and N+1 detection"""
+    
+    def setUp(self):
+        from django.db import connection
+        from analytics.services.query_instrumentation import QueryInstrumentation
+        self.instrumentation = QueryInstrumentation()
+        self.instrumentation.flush_interval = 3600
+        self.connection = connection
+        self.connection.execute_wrappers.append(self.instrumentation)
+        self.user = User.objects.create_user(
+            username='queryuser',
+            email='query@example.com',
+            password='testpass123'
+        )
+        
+    def tearDown(self):
+        self.connection.execute_wrappers.remove(self.instrumentation)
+        
+    def test_n_plus_one_flagged_with_select_related_fix(self):
+        """Test a foreign key followed per row is flagged with the matching optimization pattern"""
+        for index in range(6):
+            Dataset.objects.create(
+                name=f'dataset_{index}',
+                user=self.user,
+                file_size_bytes=1000,
+                parquet_size_bytes=500,
+                row_count=100,
+                column_count=3
+            )
+        
+        with self.instrumentation.track('datasets') as analysis:
+            owners = [dataset.user.username for dataset in Dataset.objects.all()]
+        
+        self.assertEqual(len(owners), 6)
+        self.assertEqual(analysis['query_count'], 7)
+        self.assertEqual(analysis['duplicate_queries'], 5)
+        self.assertEqual(analysis['n_plus_one'][0]['model'], 'User')
+        self.assertEqual(analysis['n_plus_one'][0]['suggestion'], "Dataset.objects.select_related('user')")
+        self.assertEqual(self.instrumentation._pending['datasets']['queries'], 7)
+        
+    def test_queries_outside_tracking_are_ignored(self):
+        """Test the wrapper records nothing without an active tracking scope"""
+        User.objects.count()
+        self.assertIsNone(self.instrumentation.current_stats())
+        self.assertEqual(
+            self.instrumentation.fingerprint('SELECT 1 FROM "t" WHERE "t"."id" IN (%s, %s, %s)'),
+            'SELECT N FROM "t" WHERE "t"."id" IN (%s...)'
+        )
+
+
+class KeysetPaginatorTest(TestCase):
+    """Test keyset pagination on (created_at, id)"""
+    
+    def setUp(self):
+        from analytics.services.keyset_pagination import KeysetPaginator
+        self.paginator = KeysetPaginator()
+        self.user = User.objects.create_user(
+            username='keysetuser',
+            email='keyset@example.com',
+            password='testpass123'
+        )
+        for index in range(5):
+            Dataset.objects.create(
+                name=f'dataset_{index}',
+                user=self.user,
+                file_size_bytes=1000,
+                parquet_size_bytes=500,
+                row_count=100,
+                column_count=3
+            )
+        
+    def test_pages_cover_every_row_once_with_timestamp_ties(self):
+        """Test rows sharing created_at are split across pages by id"""
+        Dataset.objects.filter(user=self.user).update(created_at=timezone.now())
+        queryset = Dataset.objects.filter(user=self.user)
+        
+        seen, cursor = [], None
+        while True:
+            page = self.paginator.paginate(queryset, cursor, page_size=2, fields=('id', 'created_at'))
+            seen.extend(dataset.id for dataset in page['items'])
+            if not page['has_more']:
+                break
+            cursor = page['next_cursor']
+        
+        expected = list(queryset.order_by('-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+        
+    def test_invalid_cursor_rejected(self):
+        """Test a malformed cursor raises ValueError"""
+        with self.assertRaises(ValueError):
+            self.paginator.paginate(Dataset.objects.all(), cursor='not-a-cursor')
+
+
+class FeatureMatrixCacheTest(TestCase):
+    """Test prepared feature matrices shared between ML tools"""
+    
+    def setUp(self):
+        from analytics.services.feature_matrix_cache import FeatureMatrixCache
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        with override_settings(FEATURE_MATRIX_CACHE_DIR=self.cache_dir):
+            self.cache = FeatureMatrixCache()
+        from analytics.services.feature_matrix_cache import mark_dataset_frame
+        self.df = mark_dataset_frame(pd.DataFrame({
+            'amount': [1.0, np.nan, 3.0, 4.0],
+            'region': ['north', 'south', None, 'north']
+        }), 'abc123')
+        
+    def test_matrix_is_encoded_scaled_float32(self):
+        """Test imputation, label encoding and scaling into float32"""
+        prepared = self.cache.prepare(self.df, ['amount', 'region'])
+        
+        self.assertEqual(prepared.matrix.dtype, np.float32)
+        self.assertEqual(prepared.encoders['categories']['region'], ['None', 'north', 'south'])
+        self.assertAlmostEqual(prepared.encoders['fill_values']['amount'], 8.0 / 3, places=5)
+        np.testing.assert_allclose(prepared.matrix.mean(axis=0), [0.0, 0.0], atol=1e-6)
+        
+    def test_other_process_reuses_memory_mapped_matrix(self):
+        """Test a second cache instance loads the stored matrix instead of rebuilding"""
+        from analytics.services.feature_matrix_cache import FeatureMatrixCache
+        first = self.cache.prepare(self.df, ['amount', 'region'])
+        
+        with override_settings(FEATURE_MATRIX_CACHE_DIR=self.cache_dir):
+            other = FeatureMatrixCache()
+        with patch.object(other, '_build') as mock_build:
+            prepared = other.prepare(self.df, ['amount', 'region'])
+        
+        mock_build.assert_not_called()
+        self.assertTrue(prepared.cached)
+        self.assertIsInstance(prepared.matrix, np.memmap)
+        np.testing.assert_array_equal(prepared.matrix, first.matrix)
+        
+    def test_filtered_and_reset_frame_is_not_served_another_selection(self):
+        """Test a derived frame carrying the dataset's attrs is keyed by its content"""
+        from analytics.services.feature_matrix_cache import mark_dataset_frame
+        df = mark_dataset_frame(pd.DataFrame({'a': np.arange(10.0)}), 'abc123')
+        spec = {'impute': 'mean', 'encode': 'label', 'scale': None}
+        
+        head = self.cache.prepare(df.head(5), ['a'], spec)
+        tail = self.cache.prepare(df[df.a >= 5].reset_index(drop=True), ['a'], spec)
+        
+        self.assertEqual(head.matrix.ravel().tolist(), [0, 1, 2, 3, 4])
+        self.assertEqual(tail.matrix.ravel().tolist(), [5, 6, 7, 8, 9])
+        
+    def test_modified_frame_is_not_served_the_original_matrix(self):
+        """Test frames assigned from or modified after the loaded frame get their own matrices"""
+        spec = {'impute': 'mean', 'encode': 'label', 'scale': None}
+        original = self.cache.prepare(self.df, ['amount'], spec)
+        
+        scaled = self.cache.prepare(self.df.assign(amount=self.df.amount * 100), ['amount'], spec)
+        self.assertNotEqual(scaled.key, original.key)
+        np.testing.assert_allclose(scaled.matrix, original.matrix * 100, rtol=1e-6)
+        
+        self.df.drop(index=0, inplace=True)
+        self.assertNotEqual(self.cache.prepare(self.df, ['amount'], spec).key, original.key)
+        self.assertEqual(self.cache.prepare(self.df.copy(), ['amount'], spec).matrix.shape, (3, 1))
+
+
+class ModelRegistryTest(TestCase):
+    """Test trained model artifacts and the loaded model LRU"""
+    
+    def setUp(self):
+        from analytics.services.model_registry import ModelRegistry
+        registry_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, registry_dir, ignore_errors=True)
+        with override_settings(MODEL_REGISTRY_DIR=registry_dir):
+            self.registry = ModelRegistry()
+        self.artifact = self.registry.save_artifact({'model': 'estimator', 'task': 'regression'})
+        self.trained_model = Mock(id=7, user_id=3, artifact_path=self.artifact['path'],
+                                  artifact_sha256=self.artifact['sha256'])
+        
+    @patch('analytics.services.model_registry.TrainedModel.objects.get')
+    def test_repeated_load_skips_deserialization(self, mock_get):
+        """Test the second load of a model is served from the LRU"""
+        import joblib
+        mock_get.return_value = self.trained_model
+        
+        with patch('analytics.services.model_registry.joblib.load', wraps=joblib.load) as mock_load:
+            first = self.registry.load(7, user_id=3)
+            second = self.registry.load(7, user_id=3)
+        
+        self.assertIs(first, second)
+        self.assertEqual(first['model'], 'estimator')
+        mock_load.assert_called_once()
+        mock_get.assert_called_once_with(id=7, user_id=3)
+        self.assertEqual(self.registry.get_stats()['hits'], 1)
+        
+    @patch('analytics.services.model_registry.TrainedModel.objects.get')
+    def test_modified_artifact_is_not_loaded(self, mock_get):
+        """Test an artifact whose checksum no longer matches is rejected"""
+        mock_get.return_value = self.trained_model
+        with open(self.artifact['path'], 'ab') as handle:
+            handle.write(b'tampered')
+        
+        with self.assertRaises(ValueError):
+            self.registry.load(7)
+
+
+class ColumnSketchServiceTest(TestCase):
+    """Test ingest-time column sketches and the tools answered from them"""
+    
+    def setUp(self):
+        from analytics.services.column_sketches import ColumnSketchService, ColumnSketch
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({
+            'amount': rng.lognormal(3, 1, 50000),
+            'region': rng.choice(['north', 'south', 'east', 'west'], 50000, p=[0.4, 0.3, 0.2, 0.1])
+        })
+        self.df.loc[::9, 'amount'] = np.nan
+        with override_settings(COLUMN_SKETCH_CHUNK_ROWS=7000):
+            service = ColumnSketchService()
+        # Round trip through JSON as stored on DatasetColumn.sketch
+        serialized = json.loads(json.dumps(service.build_sketches(self.df)))
+        self.sketches = {name: ColumnSketch(data) for name, data in serialized.items()}
+        
+    def test_sketch_estimates_within_error_bounds(self):
+        """Test moments are exact and quantiles, distinct counts and top values within their bounds"""
+        amount = self.sketches['amount']
+        values = self.df['amount'].dropna()
+        self.assertEqual(amount.null_count, int(self.df['amount'].isna().sum()))
+        self.assertAlmostEqual(amount.mean, values.mean(), places=8)
+        self.assertAlmostEqual(amount.std(), values.std(), places=8)
+        self.assertAlmostEqual(amount.kurtosis, values.kurtosis(), places=6)
+        
+        ordered = np.sort(values.to_numpy())
+        for q in (0.1, 0.25, 0.5, 0.9, 0.99):
+            rank = np.searchsorted(ordered, amount.quantile(q), side='right') / len(ordered)
+            self.assertLess(abs(rank - q), amount.error_bounds()['quantile_rank_error'])
+        self.assertLess(abs(amount.distinct_count() - values.nunique()) / values.nunique(), 0.05)
+        
+        region = self.sketches['region']
+        self.assertFalse(region.is_numeric)
+        self.assertEqual(region.distinct_count(), 4)
+        expected = self.df['region'].value_counts()
+        self.assertEqual([value for value, _ in region.top_values()], expected.index.tolist())
+        for value, count in region.top_values():
+            self.assertGreaterEqual(count, expected[value])
+            self.assertLessEqual(count - expected[value], region.error_bounds()['top_value_count_overestimate'])
+        
+    def test_tools_answer_from_sketches(self):
+        """Test descriptive statistics and histograms without the data"""
+        from analytics.tools.statistical_tools import StatisticalTools
+        from analytics.tools.visualization_tools import VisualizationTools
+        values = self.df['amount'].dropna()
+        
+        result = StatisticalTools.descriptive_statistics(None, sketches=self.sketches)
+        self.assertEqual(list(result['statistics']), ['amount'])
+        self.assertEqual(result['summary']['approximate']['method'], 'sketch')
+        self.assertEqual(result['statistics']['amount']['count'], len(values))
+        self.assertAlmostEqual(result['statistics']['amount']['median'], values.median(), delta=values.std() * 0.05)
+        # Continuous values are not repeated, so the sketch reports no mode
+        self.assertIsNone(result['statistics']['amount']['mode'])
+        
+        histogram = VisualizationTools.histogram(None, 'amount', bins=20, sketches=self.sketches)
+        self.assertEqual(sum(histogram['chart_data']['counts']), len(values))
+        self.assertEqual(histogram['metadata']['reduction_method'], 'sketch')
+        
+    def test_only_large_datasets_answered_from_sketches(self):
+        """Test small datasets and outlier detection always run on the data"""
+        from analytics.services.column_sketches import ColumnSketchService
+        with override_settings(COLUMN_SKETCH_EXACT_MAX_ROWS=10000):
+            service = ColumnSketchService()
+        sketches = dict(self.sketches)
+        
+        with patch.object(service, 'load_sketches', return_value=sketches):
+            self.assertIsNone(service.answer('descriptive_statistics', Mock(row_count=10000), {}))
+            self.assertIsNone(service.answer('outlier_detection', Mock(row_count=50000), {}))
+            self.assertIsNone(service.answer('descriptive_statistics', Mock(row_count=50000), {'exact': True}))
+            result = service.answer('descriptive_statistics', Mock(row_count=50000), {})
+        self.assertEqual(result['summary']['approximate']['method'], 'sketch')
+
+
+class NearCacheTest(TestCase):
+    """Test the per-process near cache in front of the shared caches"""
+    
+    def setUp(self):
+        from analytics.services.caching_strategy import NearCache
+        self.near_cache = NearCache(max_entries=2, ttl=5)
+        self.near_cache._listener_pid = os.getpid()  # No Redis subscription in tests
+        
+    def test_lru_bound_and_hit_ratio(self):
+        """Test the least recently used entry is evicted when full"""
+        self.near_cache.set('default', 'a', 1)
+        self.near_cache.set('default', 'b', 2)
+        self.near_cache.get('default', 'a')
+        self.near_cache.set('default', 'c', 3)
+        
+        self.assertEqual(self.near_cache.get('default', 'a'), 1)
+        self.assertIsNot(self.near_cache.get('default', 'c'), None)
+        stats = self.near_cache.get_stats()
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['size'], 2)
+        self.assertEqual(stats['hit_ratio'], 1.0)
+        
+    def test_invalidation_from_other_process_evicts(self):
+        """Test published invalidations evict entries unless they are our own writes"""
+        self.near_cache.set('default', 'tool:desc', 'cached')
+        
+        self.near_cache._on_invalidation('default', ['tool:desc'], self.near_cache.origin)
+        self.assertEqual(self.near_cache.get('default', 'tool:desc'), 'cached')
+        
+        self.near_cache._on_invalidation('default', ['tool:desc'], 'other-process')
+        self.assertEqual(self.near_cache.stats['invalidations'], 1)
+        self.assertEqual(len(self.near_cache._entries), 0)
+
+
 class SandboxExecutorTest(TestCase):
     """Test SandboxExecutor functionality"""
     
@@ -540,6 +1261,35 @@ class StructuredLoggerTest(TestCase):
         """Test logging error message"""
         result = self.logger.log_error("Test error message", {"error": "test"})
         self.assertTrue(result['success'])
+    
+    def test_context_is_isolated_per_thread(self):
+        """Test concurrent requests never see each other's correlation id"""
+        import threading
+        from analytics.services.logging_service import set_logging_context, reset_logging_context
+        
+        seen = {}
+        
+        def handle_request(index):
+            token = set_logging_context(correlation_id=f'corr-{index}')
+            seen[index] = self.logger.correlation_id
+            reset_logging_context(token)
+        
+        threads = [threading.Thread(target=handle_request, args=(i,)) for i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(seen, {i: f'corr-{i}' for i in range(10)})
+        self.assertIsNone(self.logger.correlation_id)
+    
+    def test_disabled_level_skips_serialization(self):
+        """Test nothing is formatted when the level is disabled"""
+        self.addCleanup(self.logger.logger.setLevel, self.logger.logger.level)
+        self.logger.logger.setLevel('INFO')
+        with patch.object(self.logger, '_format_message') as mock_format:
+            self.logger.debug("Debug message", {"payload": "x" * 1000})
+        mock_format.assert_not_called()
 
 
 class VectorNoteManagerTest(TestCase):
@@ -5,10 +5,14 @@ This module contains comprehensive unit tests for all tools in the analytics app
 Tests cover statistical tools, visualization tools, ML tools, survival analysis tools, and the tool registry.
 """
 
+import os
+import shutil
+import tempfile
+from pathlib import Path
 import pandas as pd
 import numpy as np
 from unittest.mock import Mock, patch
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 
 from analytics.tools.statistical_tools import StatisticalTools
@@ -95,6 +99,119 @@ class StatisticalToolsTest(TestCase):
         self.assertTrue(result['success'])
         self.assertIn('outliers', result)
         self.assertIn('outlier_indices', result)
+    
+    def test_descriptive_statistics_matches_pandas(self):
+        """Test the single-pass descriptive statistics against pandas per-column reductions"""
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame({
+            'normal': rng.normal(1000, 3, 2000),
+            'counts': rng.poisson(3, 2000),
+            'skewed': rng.exponential(2, 2000),
+            'empty': np.nan
+        })
+        data.loc[::7, 'skewed'] = np.nan
+        
+        result = self.tools.descriptive_statistics(data)
+        
+        self.assertNotIn('empty', result['statistics'])
+        self.assertNotIn('approximate', result['summary'])
+        for col in ['normal', 'counts', 'skewed']:
+            series = data[col].dropna()
+            stats_ = result['statistics'][col]
+            self.assertEqual(stats_['count'], len(series))
+            self.assertEqual(stats_['missing_count'], int(data[col].isna().sum()))
+            self.assertEqual(stats_['mode'], float(series.mode().iloc[0]))
+            for key, expected in [('mean', series.mean()), ('median', series.median()), ('std', series.std()),
+                                  ('q1', series.quantile(0.25)), ('q3', series.quantile(0.75)),
+                                  ('min', series.min()), ('max', series.max()),
+                                  ('skewness', series.skew()), ('kurtosis', series.kurtosis())]:
+                self.assertAlmostEqual(stats_[key], expected, places=8, msg=f"{col}.{key}")
+        
+        # Reducing one column at a time gives the same statistics
+        with override_settings(DESCRIPTIVE_STATS_BLOCK_BYTES=8 * len(data)):
+            blocked = self.tools.descriptive_statistics(data)
+        self.assertEqual(blocked['statistics'], result['statistics'])
+    
+    @override_settings(DESCRIPTIVE_STATS_EXACT_MAX_ROWS=1000, DESCRIPTIVE_STATS_SAMPLE_ROWS=1000)
+    def test_descriptive_statistics_approximate_order_statistics(self):
+        """Test that large inputs estimate order statistics from a sample unless exact is requested"""
+        data = pd.DataFrame({'value': np.random.default_rng(1).uniform(0, 100, 20000)})
+        
+        result = self.tools.descriptive_statistics(data)
+        self.assertEqual(result['summary']['approximate']['sample_rows'], 1000)
+        self.assertAlmostEqual(result['statistics']['value']['median'], data['value'].median(), delta=5)
+        self.assertAlmostEqual(result['statistics']['value']['mean'], data['value'].mean(), places=8)
+        
+        result = self.tools.descriptive_statistics(data, exact=True)
+        self.assertNotIn('approximate', result['summary'])
+        self.assertAlmostEqual(result['statistics']['value']['median'], data['value'].median(), places=8)
+    
+    def test_grouped_tests_match_scipy(self):
+        """Test t-test and ANOVA from group moments against scipy"""
+        from scipy import stats
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame({
+            'value': rng.normal(100, 5, 3000),
+            'group': rng.choice(['x', 'y', 'z'], 3000)
+        })
+        data.loc[::17, 'value'] = np.nan
+        samples = [data.loc[data['group'] == group, 'value'].dropna() for group in data['group'].unique()]
+        
+        anova = self.tools.anova_test(data, 'value', 'group')
+        f_stat, p_value = stats.f_oneway(*samples)
+        self.assertAlmostEqual(anova['f_statistic'], f_stat, places=8)
+        self.assertAlmostEqual(anova['p_value'], p_value, places=8)
+        self.assertEqual([entry['n'] for entry in anova['groups']], [len(sample) for sample in samples])
+        self.assertAlmostEqual(anova['groups'][0]['std'], samples[0].std(), places=8)
+        
+        pair = data[data['group'] != 'z']
+        result = self.tools.t_test(pair, 'value', 'group', alternative='less')
+        first, second = [pair.loc[pair['group'] == group, 'value'].dropna() for group in pair['group'].unique()]
+        t_stat, p_value = stats.ttest_ind(first, second, alternative='less')
+        self.assertAlmostEqual(result['test_statistic'], t_stat, places=8)
+        self.assertAlmostEqual(result['p_value'], p_value, places=8)
+        self.assertEqual(result['groups']['group1']['name'], pair['group'].iloc[0])
+    
+    def test_bootstrap_and_permutation_resampling(self):
+        """Test bootstrap intervals and permutation p-values against scipy, and block-independent seeding"""
+        from scipy import stats
+        from analytics.tools.resampling import Resampler
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame({
+            'value': np.concatenate([rng.normal(0, 1, 300), rng.normal(0.4, 1, 200)]),
+            'group': ['a'] * 300 + ['b'] * 200
+        })
+        first, second = data['value'].iloc[:300].to_numpy(), data['value'].iloc[300:].to_numpy()
+        
+        result = self.tools.bootstrap_confidence_interval(data, 'value', n_resamples=5000)
+        expected = stats.bootstrap((data['value'].to_numpy(),), np.mean, n_resamples=5000,
+                                   method='percentile', random_state=0).confidence_interval
+        self.assertAlmostEqual(result['estimate'], data['value'].mean(), places=10)
+        self.assertAlmostEqual(result['confidence_interval']['lower_bound'], expected.low, delta=0.01)
+        self.assertAlmostEqual(result['confidence_interval']['upper_bound'], expected.high, delta=0.01)
+        
+        difference = self.tools.bootstrap_confidence_interval(data, 'value', group_column='group', method='basic')
+        self.assertAlmostEqual(difference['estimate'], first.mean() - second.mean(), places=10)
+        self.assertLess(difference['confidence_interval']['upper_bound'], 0)
+        
+        result = self.tools.permutation_test(data, 'value', 'group', alternative='less', n_resamples=2000)
+        expected = stats.permutation_test((first, second), lambda x, y, axis: x.mean(axis) - y.mean(axis),
+                                          vectorized=True, n_resamples=2000, alternative='less', random_state=0)
+        self.assertAlmostEqual(result['test_statistic'], expected.statistic, places=10)
+        self.assertAlmostEqual(result['p_value'], expected.pvalue, delta=0.01)
+        
+        # Seeds are per fixed chunk, so block size and workers do not change results
+        resampler = Resampler([first, second], 'median', random_state=7, block_bytes=8 * 500 * 64)
+        replicates = resampler.permutation(2300)
+        bootstrap_replicates = resampler.bootstrap(2300)
+        resampler.n_jobs = 2
+        np.testing.assert_array_equal(resampler.permutation(2300), replicates)
+        for block_bytes in (8 * 500 * 7, 8 * 1024 ** 2):
+            resampler = Resampler([first, second], 'median', random_state=7, block_bytes=block_bytes)
+            np.testing.assert_array_equal(resampler.permutation(2300), replicates)
+            np.testing.assert_array_equal(resampler.bootstrap(2300), bootstrap_replicates)
+        
+        self.assertIn('error', self.tools.permutation_test(data, 'value', 'group', statistic='mode'))
 
 
 class VisualizationToolsTest(TestCase):
@@ -181,13 +298,91 @@ class VisualizationToolsTest(TestCase):
         
         self.assertFalse(result['success'])
         self.assertIn('error', result)
+        
+    def test_line_chart_lttb_reduction(self):
+        """Test long series are reduced with LTTB and keep their extremes"""
+        values = np.zeros(10000)
+        values[6000] = 50.0
+        data = pd.DataFrame({'x': np.arange(10000), 'y': values})
+        
+        result = self.tools.line_chart(data, x_column='x', y_columns=['y'], max_points=100)
+        
+        self.assertEqual(result['metadata']['reduction_method'], 'lttb')
+        self.assertEqual(result['metadata']['raw_points'], 10000)
+        self.assertLessEqual(len(result['chart_data']['x']), 100)
+        self.assertIn(6000, result['chart_data']['x'])
+        self.assertIn(50.0, result['chart_data']['y'][0])
+        
+    @override_settings(CHART_DENSITY_GRID_SIZE=10)
+    def test_scatter_plot_and_histogram_reduction(self):
+        """Test large scatter plots become density grids and histograms are pre-binned"""
+        np.random.seed(0)
+        data = pd.DataFrame({'x': np.random.randn(5000), 'y': np.random.randn(5000)})
+        
+        scatter = self.tools.scatter_plot(data, x_column='x', y_column='y', max_points=1000)
+        histogram = self.tools.histogram(data, column='x', bins=20, max_points=1000)
+        
+        self.assertEqual(scatter['metadata']['reduction_method'], 'density_grid')
+        self.assertLessEqual(len(scatter['chart_data']['x']), 100)
+        self.assertEqual(sum(scatter['chart_data']['counts']), 5000)
+        self.assertEqual(histogram['metadata']['reduction_method'], 'binned')
+        self.assertNotIn('data', histogram['chart_data'])
+        self.assertEqual(sum(histogram['chart_data']['counts']), 5000)
+        self.assertEqual(len(histogram['chart_data']['bin_edges']), 21)
+
+
+class GroupedStatisticsTest(TestCase):
+    """Test the shared grouped statistics helper"""
+    
+    def test_box_stats_and_arrays_match_per_group_reductions(self):
+        """Test per-group moments, quantiles and box statistics against matplotlib"""
+        from matplotlib import cbook
+        from analytics.tools.grouped_stats import GroupedStatistics
+        rng = np.random.default_rng(1)
+        values = pd.Series(rng.standard_t(3, 5000) * 10)
+        groups = pd.Series(rng.integers(0, 40, 5000)).astype(str)
+        values[::13] = np.nan
+        groups[::29] = None
+        groups[values.isna()] = 'empty'
+        
+        grouped = GroupedStatistics(values, groups)
+        self.assertEqual(grouped.labels, list(groups.dropna().unique()))
+        box = grouped.box_stats()
+        empty = grouped.labels.index('empty')
+        self.assertEqual(grouped.counts[empty], 0)
+        self.assertTrue(np.isnan(grouped.means[empty]))
+        
+        for index, (label, positions) in enumerate(zip(grouped.labels, grouped.positions())):
+            if label == 'empty':
+                continue
+            expected = values[groups == label].dropna()
+            np.testing.assert_array_equal(values.iloc[positions].to_numpy(), expected.to_numpy())
+            np.testing.assert_array_equal(grouped.arrays()[index], expected.to_numpy())
+            self.assertAlmostEqual(grouped.stds()[index], expected.std(), places=10)
+            entry = cbook.boxplot_stats(expected.to_numpy())[0]
+            for key in ('mean', 'med', 'q1', 'q3', 'whislo', 'whishi'):
+                self.assertAlmostEqual(box[key][index], entry[key], places=10)
+            np.testing.assert_allclose(box['fliers'][index], np.sort(entry['fliers']))
 
 
 class MachineLearningToolsTest(TestCase):
     """Test MachineLearningTools functionality"""
     
     def setUp(self):
+        from analytics.services.feature_matrix_cache import feature_matrix_cache
         self.tools = MachineLearningTools()
+        
+        # Keep prepared matrices and artifacts out of MEDIA_ROOT
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+        settings_override = override_settings(FEATURE_MATRIX_CACHE_DIR=self.tmp_dir / 'feature_cache')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache_dir_patch = patch.object(feature_matrix_cache, 'cache_dir', self.tmp_dir / 'feature_cache')
+        cache_dir_patch.start()
+        self.addCleanup(cache_dir_patch.stop)
+        self.addCleanup(feature_matrix_cache.clear)
+        
         # Create sample data for ML
         np.random.seed(42)
         self.sample_data = pd.DataFrame({
@@ -279,6 +474,143 @@ class MachineLearningToolsTest(TestCase):
         self.assertTrue(result['success'])
         self.assertIn('cv_scores', result)
         self.assertIn('mean_score', result)
+        
+    @override_settings(CLUSTERING_LARGE_DATA_ROWS=50)
+    def test_clustering_large_data_mode(self):
+        """Test large datasets use mini-batch k-means and a labels artifact"""
+        with override_settings(ANALYSIS_ARTIFACTS_DIR=self.tmp_dir / 'artifacts'):
+            result = self.tools.clustering(
+                self.sample_data,
+                feature_columns=['feature1', 'feature2'],
+                silhouette_sample_size=50,
+                labels_path='labels.parquet'
+            )
+            outside = self.tools.clustering(
+                self.sample_data,
+                feature_columns=['feature1', 'feature2'],
+                labels_path=os.path.join(self.tmp_dir, 'labels.parquet')
+            )
+        
+        self.assertIn('error', outside)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir, 'labels.parquet')))
+        self.assertEqual(result['labels_artifact']['path'],
+                         str((self.tmp_dir / 'artifacts' / 'clustering' / 'labels.parquet').resolve()))
+        self.assertEqual(result['mode'], 'large')
+        self.assertIsNone(result['cluster_labels'])
+        self.assertEqual(result['silhouette_sample_size'], 50)
+        labels = pd.read_parquet(result['labels_artifact']['path'])
+        self.assertEqual(len(labels), 100)
+        self.assertEqual(sorted(labels['cluster'].unique()), [0, 1, 2])
+        
+    def test_hyperparameter_sweep_leaderboard(self):
+        """Test the sweep ranks configurations and stops poor ones early"""
+        result = self.tools.hyperparameter_sweep(
+            self.sample_data,
+            target_column='target',
+            feature_columns=['feature1', 'feature2'],
+            model_type='logistic_regression',
+            param_grid={'C': [0.001, 0.01, 0.1, 1.0]},
+            cv_folds=3,
+            n_jobs=1
+        )
+        
+        self.assertEqual(result['n_configurations'], 4)
+        self.assertEqual(result['n_stopped_early'], 2)
+        leaderboard = result['leaderboard']
+        self.assertEqual(leaderboard[0]['params'], result['best_params'])
+        self.assertEqual(leaderboard[0]['folds_completed'], 3)
+        self.assertTrue(all(entry['stopped_early'] for entry in leaderboard[2:]))
+        
+    def test_hyperparameter_sweep_failed_configuration_not_ranked(self):
+        """Test a configuration that fails after scoring some folds never ranks or wins"""
+        from analytics.tools import ml_tools
+        fit_and_score = ml_tools._fit_and_score
+        
+        def failing_fit_and_score(estimator_class, params, *args, **kwargs):
+            if params['C'] == 1.0:
+                if failing_fit_and_score.calls:
+                    raise ValueError("fit diverged")
+                failing_fit_and_score.calls += 1
+                return 1.0, 0.0
+            return fit_and_score(estimator_class, params, *args, **kwargs)
+        failing_fit_and_score.calls = 0
+        
+        with patch.object(ml_tools, '_fit_and_score', failing_fit_and_score):
+            result = self.tools.hyperparameter_sweep(
+                self.sample_data,
+                target_column='target',
+                feature_columns=['feature1', 'feature2'],
+                model_type='logistic_regression',
+                param_grid={'C': [0.01, 1.0]},
+                cv_folds=3,
+                early_stopping=False,
+                n_jobs=1
+            )
+        
+        self.assertEqual(result['n_failed'], 1)
+        self.assertEqual(result['best_params'], {'C': 0.01})
+        failed = result['leaderboard'][-1]
+        self.assertEqual(failed['params'], {'C': 1.0})
+        self.assertIsNone(failed['mean_score'])
+        self.assertIsNone(failed['rank'])
+        self.assertIn('error', failed)
+        
+    def test_hyperparameter_sweep_in_process_data_not_shared(self):
+        """Test a sweep finishing in the same process leaves another sweep's data intact"""
+        from sklearn.linear_model import LogisticRegression
+        from analytics.tools import ml_tools
+        X = self.sample_data[['feature1', 'feature2']].to_numpy()
+        y = self.sample_data['target'].to_numpy()
+        indices = np.arange(len(y))
+        
+        with ml_tools._sweep_executor(X, y, 1) as submit:
+            self.tools.hyperparameter_sweep(
+                self.sample_data.head(60),
+                target_column='target',
+                feature_columns=['feature1', 'feature2'],
+                model_type='logistic_regression',
+                param_grid={'C': [0.1, 1.0]},
+                cv_folds=3,
+                n_jobs=1
+            )
+            future = submit(ml_tools._fit_and_score, LogisticRegression, {'C': 1.0},
+                            indices[:80], indices[80:], 'accuracy', 42)
+        
+        score, fit_time = future.result()
+        self.assertGreaterEqual(score, 0.0)
+        self.assertEqual(ml_tools._sweep_data, {})
+        
+    def test_batch_score_with_persisted_model(self):
+        """Test a trained model is persisted and scores a new dataset in chunks"""
+        import joblib
+        from analytics.services.model_registry import model_registry
+        data = self.sample_data.assign(target=np.where(self.sample_data['target'] == 1, 'yes', 'no'))
+        
+        with patch.object(model_registry, 'artifacts_dir', self.tmp_dir / 'models'):
+            trained = self.tools.train_classifier(
+                data, target_column='target', feature_columns=['feature1', 'feature2'],
+                model_type='logistic_regression'
+            )
+        bundle = joblib.load(trained['model_artifact']['path'])
+        bundle.update(model_id=1, user_id=1)
+        
+        artifacts_dir = self.tmp_dir / 'artifacts'
+        with override_settings(ANALYSIS_ARTIFACTS_DIR=artifacts_dir), \
+                patch.object(model_registry, 'load', return_value=bundle) as mock_load:
+            result = self.tools.batch_score(
+                data, model_id=1, user_id=1, output_path='predictions.parquet',
+                chunk_size=30, include_probabilities=True
+            )
+            outside = self.tools.batch_score(data, model_id=1, user_id=1, output_path='../predictions.parquet')
+        
+        mock_load.assert_called_once_with(1, 1)
+        self.assertIn('error', outside)
+        self.assertEqual(result['data_info']['chunks'], 4)
+        self.assertEqual(sum(result['summary']['prediction_counts'].values()), 100)
+        predictions = pd.read_parquet(os.path.join(artifacts_dir, 'scoring', 'predictions.parquet'))
+        self.assertEqual(len(predictions), 100)
+        self.assertEqual(set(predictions['prediction']) - {'yes', 'no'}, set())
+        self.assertIn('probability_yes', predictions.columns)
 
 
 class SurvivalAnalysisToolsTest(TestCase):
@@ -342,6 +674,49 @@ class SurvivalAnalysisToolsTest(TestCase):
             
             self.assertFalse(result['success'])
             self.assertIn('error', result)
+    
+    def test_survival_engine_matches_direct_computation(self):
+        """Test aggregated Kaplan-Meier, log-rank and group Cox results against direct computation"""
+        rng = np.random.default_rng(0)
+        data = pd.DataFrame({
+            'duration': np.round(rng.exponential(10, 400)),
+            'event': (rng.random(400) < 0.7).astype(int),
+            'group': rng.choice(['A', 'B'], 400),
+            'site': rng.choice(['north', 'south'], 400)
+        })
+        
+        result = self.tools.survival_curve_comparison(data, 'duration', 'event', 'group')
+        times = np.unique(data['duration'])
+        observed, expected, variance = 0.0, 0.0, 0.0
+        for group in ['A', 'B']:
+            subset = data[data['group'] == group]
+            survival, probabilities = 1.0, []
+            for time in np.unique(subset['duration']):
+                at_risk = (subset['duration'] >= time).sum()
+                survival *= 1 - subset.loc[subset['duration'] == time, 'event'].sum() / at_risk
+                probabilities.append(survival)
+            curve = result['group_curves'][group]['survival_function']
+            np.testing.assert_allclose(curve['survival_probability'][-len(probabilities):], probabilities)
+        for time in times:
+            at_risk = data['duration'] >= time
+            deaths = data.loc[data['duration'] == time, 'event'].sum()
+            n, n_a = at_risk.sum(), (at_risk & (data['group'] == 'A')).sum()
+            observed += data.loc[(data['duration'] == time) & (data['group'] == 'A'), 'event'].sum()
+            expected += deaths * n_a / n
+            if n > 1:
+                variance += deaths * (n_a / n) * (1 - n_a / n) * (n - deaths) / (n - 1)
+        self.assertAlmostEqual(result['logrank_test']['test_statistic'], (observed - expected) ** 2 / variance, places=8)
+        
+        binned = self.tools.kaplan_meier_analysis(data, 'duration', 'event', max_points=5)
+        self.assertEqual(len(binned['survival_analysis']['survival_function']['timeline']), 5)
+        self.assertTrue(binned['survival_analysis']['timeline_binned'])
+        
+        forward = self.tools.hazard_ratio_analysis(data, 'duration', 'event', 'group', reference_group='A',
+                                                   strata_column='site')
+        backward = self.tools.hazard_ratio_analysis(data, 'duration', 'event', 'group', reference_group='B')
+        self.assertAlmostEqual(forward['hazard_ratios']['B']['hazard_ratio'],
+                               1 / backward['hazard_ratios']['A']['hazard_ratio'], places=6)
+        self.assertEqual(set(forward['stratified_hazard_ratios']), {'north', 'south'})
 
 
 class ToolRegistryTest(TestCase):
@@ -448,3 +823,27 @@ class ToolRegistryTest(TestCase):
         self.assertIn('total_tools', stats)
         self.assertIn('usage_by_type', stats)
         self.assertEqual(stats['total_tools'], 2)
+        
+    def test_execute_tool_injects_authenticated_user_id(self):
+        """Test a user_id in the parameters is replaced by the caller's user_id"""
+        received = {}
+        
+        class OwnedTools:
+            @staticmethod
+            def score(model_id, user_id=None):
+                received.update(model_id=model_id, user_id=user_id)
+                return {'scored': True}
+        
+        tool = Mock()
+        tool.tool_class = 'analytics.tools.OwnedTools'
+        tool.tool_function = 'score'
+        module = Mock(OwnedTools=OwnedTools)
+        
+        with patch.object(self.registry, 'get_tool', return_value=tool), \
+             patch.object(self.registry, 'validate_parameters', return_value={'valid': True}), \
+             patch.object(self.registry, 'audit_manager'), \
+             patch('analytics.tools.tool_registry.importlib.import_module', return_value=module):
+            result = self.registry.execute_tool('score', {'model_id': 7, 'user_id': 99}, user_id=3)
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(received, {'model_id': 7, 'user_id': 3})